@@ -12,6 +12,7 @@ import { Area } from '../farms/entities/area.entity';
 import { SensorData } from '../iot/entities/sensor-data.entity';
 import { Farm } from '../farms/entities/farm.entity';
 import { FarmActivity } from '../farms/entities/farm-activity.entity';
+import { Crop } from '../farms/entities/crop.entity';
 
 
 // Existing services
@@ -26,6 +27,8 @@ import {
   ActionRouterService,
   AIOrchestrator,
   PythonAIClientService,
+  FarmVocabularyService,
+  CropCatalogService,
 } from './services';
 
 // Layer 2 RAG Services
@@ -68,7 +71,7 @@ import { FinancialQueryHandler } from './handlers/financial-query.handler';
 @Module({
   imports: [
     ConfigModule,
-    TypeOrmModule.forFeature([Document, CropKnowledgeChunk, RagDocument, RagChunk, Device, Area, SensorData, Farm, FarmActivity]),
+    TypeOrmModule.forFeature([Document, CropKnowledgeChunk, RagDocument, RagChunk, Device, Area, SensorData, Farm, FarmActivity, Crop]),
     // FarmModule, // REMOVED: Will be rebuilt later
     IoTModule, // For device control
     UsersModule, // For subscription management
@@ -86,6 +89,8 @@ import { FinancialQueryHandler } from './handlers/financial-query.handler';
 
     // Python AI Client
     PythonAIClientService,
+    FarmVocabularyService,
+    CropCatalogService,
 
     // Refactored services
     PreprocessingService,
@@ -59,6 +59,10 @@ export class RagChunk {
     language: string;
     keywords?: string[];
     entities?: string[];
+    // Tagged at ingest by the Python document NER (see RagDocumentService);
+    // retrieval filters on cropIds, crops keeps the names for display / debugging
+    crops?: string[];
+    cropIds?: string[];
   };
 
   @CreateDateColumn({ name: 'created_at' })
@@ -116,7 +116,10 @@ export class DeviceControlHandler {
     }
 
     // Normalize device name
-    const deviceType = this.normalizeDeviceName(deviceEntity.value);
+    // Farm vocabulary match: value is the user's own device name ("Bơm khu A") -> infer type from it
+    const deviceType =
+      this.normalizeDeviceName(deviceEntity.value) ??
+      (deviceEntity.deviceId ? this.deviceTypeFromName(deviceEntity.value) : null);
     console.log("deviceType _ được normalize: ",deviceType);
     
     if (!deviceType) {
@@ -149,7 +152,9 @@ export class DeviceControlHandler {
     // Find area with error handling
     let area: Area;
     try {
-      area = await this.findArea(areaEntity.value, userId);
+      area = areaEntity.areaId
+        ? await this.findAreaById(areaEntity.areaId, userId)
+        : await this.findArea(areaEntity.value, userId);
       console.log("area _từ findArea: ", area);
     } catch (error) {
       if (error instanceof NotFoundException || error instanceof ForbiddenException) {
@@ -167,7 +172,7 @@ export class DeviceControlHandler {
     // Find device with error handling
     let device: Device;
     try {
-      device = await this.findDevice(deviceType, area.id, userId);
+      device = await this.findDevice(deviceType, area.id, userId, deviceEntity.deviceId);
       console.log("device _từ findDevice: ", device);
     } catch (error) {
       if (error instanceof NotFoundException || error instanceof ForbiddenException) {
@@ -350,6 +355,20 @@ export class DeviceControlHandler {
     return 0; // Return 0 to indicate no valid duration found
   }
 
+  /**
+   * Find area by id from the farm vocabulary (single indexed lookup, scoped to user's farms)
+   */
+  private async findAreaById(areaId: string, userId: string): Promise<Area> {
+    const area = await this.areaRepository.findOne({
+      where: { id: areaId, farm: { userId } },
+      relations: ['farm'],
+    });
+    if (!area) {
+      throw new NotFoundException('Không tìm thấy khu vực của bạn');
+    }
+    return area;
+  }
+
   /**
    * Find area by name and verify ownership
    */
@@ -406,7 +425,24 @@ export class DeviceControlHandler {
     deviceType: 'pump' | 'light',
     areaId: string,
     userId: string,
+    deviceId?: string,
   ): Promise<Device> {
+    // Device named in the message (farm vocabulary) and located in this area
+    if (deviceId) {
+      const named = await this.deviceRepository.findOne({
+        where: {
+          id: deviceId,
+          areaId,
+          status: In([DeviceStatus.ACTIVE, DeviceStatus.ASSIGNED]),
+          area: { farm: { userId } },
+        },
+        relations: ['area', 'area.farm'],
+      });
+      if (named) {
+        return named;
+      }
+    }
+
     // DEBUG: Log all devices in this area
     const allDevices = await this.deviceRepository.find({ where: { areaId } });
     this.logger.debug(`[DEBUG] Devices in area ${areaId}: ${JSON.stringify(allDevices)}`);
@@ -491,10 +527,25 @@ export class DeviceControlHandler {
    * Helper to check if device is a pump
    */
   private isPump(device: Device): boolean {
-    const name = device.name.toLowerCase();
+    return this.isPumpName(device.name);
+  }
+
+  private isPumpName(deviceName: string): boolean {
+    const name = deviceName.toLowerCase();
     return name.includes('bơm') || name.includes('tưới') || name.includes('pump');
   }
 
+  /**
+   * Device type from a user-defined device name
+   */
+  private deviceTypeFromName(deviceName: string): 'pump' | 'light' | null {
+    if (this.isPumpName(deviceName)) {
+      return 'pump';
+    }
+    const name = deviceName.toLowerCase();
+    return name.includes('đèn') || name.includes('light') ? 'light' : null;
+  }
+
   /**
    * Format response message
    */
@@ -4,7 +4,7 @@ import { Repository, Between } from 'typeorm';
 import { FarmActivity, ActivityType } from '../../farms/entities/farm-activity.entity';
 import { Farm } from '../../farms/entities/farm.entity';
 import { Entity } from '../types';
-import { parseDateRange, formatDateRange } from '../utils/date-parser.util';
+import { parseDateRange, formatDateRange, fromResolvedRange, DateRange } from '../utils/date-parser.util';
 
 export interface FinancialQueryResult {
   success: boolean;
@@ -37,6 +37,8 @@ export class FinancialQueryHandler {
     // Extract date entities
     const dateEntities = entities.filter(e => e.type === 'date');
     let dateString = '';
+    // Range already resolved by the Python service, skips parsing the text again
+    let resolvedRange: DateRange | null = null;
 
     // Check if we have separate "month" and "year" entities
     // NER extract ra 2 entities: tháng 11 và năm 2024
@@ -52,6 +54,9 @@ export class FinancialQueryHandler {
       
       // Use the first (or most relevant) entity
       dateString = dateEntities[0].value;
+      if (dateEntities[0].dateRange) {
+        resolvedRange = fromResolvedRange(dateEntities[0].dateRange);
+      }
     } else {
       return {
         success: false,
@@ -59,8 +64,8 @@ export class FinancialQueryHandler {
       };
     }
 
-    // Parse date range
-    const dateRange = parseDateRange(dateString);
+    // Parse date range (rule-based entities / merged month + year still need parsing)
+    const dateRange = resolvedRange ?? parseDateRange(dateString);
     console.log("dateRange_ trong FinancialQueryHandler: ", dateRange);
     
     if (!dateRange) {
@@ -8,6 +8,7 @@ import { UsersService } from '../../users/users.service';
 import {
   AIResponse,
   IntentType,
+  EntityType,
   ProcessingLayer,
   IntentClassificationResult,
 } from '../types';
@@ -58,7 +59,10 @@ export class AIOrchestrator {
       );
       console.log('user_query || prompt: ', query);
       // checkpoint1
-      const intentResult = await this.intentClassifier.classifyIntent(query);
+      const intentResult = await this.intentClassifier.classifyIntent(
+        query,
+        user.id,
+      );
       // return {
       //   intent,
       //   confidence: pythonResult.intent_confidence,
@@ -266,6 +270,14 @@ export class AIOrchestrator {
       userId: user.id,
       topK: DEFAULT_AI_CONFIG.ragTopK, // 10
       threshold: DEFAULT_AI_CONFIG.ragSimilarityThreshold, // 0.4
+      // Crop names the catalog could not link carry no cropId: no filter for them
+      cropIds: [
+        ...new Set(
+          intentResult.entities
+            .filter((entity) => entity.type === EntityType.CROP_NAME && entity.cropId)
+            .map((entity) => entity.cropId as string),
+        ),
+      ],
     });
     console.log('ragResult_layer2_RAG: ', ragResult);
     console.log('RESULT TỪ RAG _confidence: ', ragResult.confidence);
@@ -0,0 +1,44 @@
+import { Injectable, Logger, OnApplicationBootstrap } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { Crop } from '../../farms/entities/crop.entity';
+import { PythonAIClientService } from './python-ai-client.service';
+
+/**
+ * Pushes the crops table to the Python service, which links crop_name
+ * entities to crop ids (entity.cropId) without a DB lookup per query
+ */
+@Injectable()
+export class CropCatalogService implements OnApplicationBootstrap {
+  private readonly logger = new Logger(CropCatalogService.name);
+
+  constructor(
+    @InjectRepository(Crop)
+    private readonly cropRepository: Repository<Crop>,
+    private readonly pythonAIClient: PythonAIClientService,
+  ) {}
+
+  async onApplicationBootstrap(): Promise<void> {
+    // Python keeps the last catalog on disk, so a failed push only delays new crops
+    await this.syncCatalog().catch((error) =>
+      this.logger.warn(`Crop catalog push failed: ${error.message}`),
+    );
+  }
+
+  /**
+   * Call after the crops table changes (seed, admin edits)
+   */
+  async syncCatalog(): Promise<boolean> {
+    if (!(await this.pythonAIClient.checkAvailability())) {
+      return false;
+    }
+    const crops = await this.cropRepository.find({ select: ['id', 'name'] });
+    const pushed = await this.pythonAIClient.pushCropCatalog(
+      crops.map((crop) => ({ id: crop.id, name: crop.name })),
+    );
+    if (pushed) {
+      this.logger.log(`Pushed ${crops.length} crops to Python AI Service`);
+    }
+    return pushed;
+  }
+}
@@ -0,0 +1,119 @@
+import { Injectable, Logger } from '@nestjs/common';
+import { InjectRepository } from '@nestjs/typeorm';
+import { Repository } from 'typeorm';
+import { Farm } from '../../farms/entities/farm.entity';
+import { Area } from '../../farms/entities/area.entity';
+import { Device } from '../../iot/entities/device.entity';
+import {
+  FarmVocabularyItem,
+  PythonAIClientService,
+} from './python-ai-client.service';
+
+// Area/device names change rarely; re-push at most this often so renames
+// reach the Python service without hooking every farm/device write path
+const FARM_VOCAB_SYNC_TTL_MS = 5 * 60 * 1000;
+
+interface FarmSyncState {
+  farmId: string | null;
+  syncedAt: number;
+}
+
+/**
+ * Keeps the Python service's per-farm vocabulary (area + device names) in sync,
+ * so /analyze returns area_id / device_id and the handlers skip fuzzy DB lookups
+ */
+@Injectable()
+export class FarmVocabularyService {
+  private readonly logger = new Logger(FarmVocabularyService.name);
+  private readonly farms = new Map<string, FarmSyncState>();
+  private readonly pending = new Set<string>();
+
+  constructor(
+    @InjectRepository(Farm)
+    private readonly farmRepository: Repository<Farm>,
+    @InjectRepository(Area)
+    private readonly areaRepository: Repository<Area>,
+    @InjectRepository(Device)
+    private readonly deviceRepository: Repository<Device>,
+    private readonly pythonAIClient: PythonAIClientService,
+  ) {}
+
+  /**
+   * Farm id to send with /analyze (null when the user has no farm)
+   */
+  async getFarmId(userId: string): Promise<string | null> {
+    const cached = this.farms.get(userId);
+    if (cached) {
+      if (Date.now() - cached.syncedAt > FARM_VOCAB_SYNC_TTL_MS) {
+        this.scheduleSync(userId);
+      }
+      return cached.farmId;
+    }
+
+    const farm = await this.farmRepository.findOne({
+      where: { userId },
+      select: ['id'],
+    });
+    const farmId = farm?.id ?? null;
+    this.farms.set(userId, { farmId, syncedAt: 0 });
+    if (farmId) {
+      this.scheduleSync(userId);
+    }
+    return farmId;
+  }
+
+  /**
+   * Python answered farm_vocabulary_loaded=false (restart, eviction, new farm)
+   */
+  markNotLoaded(userId: string): void {
+    this.scheduleSync(userId);
+  }
+
+  private scheduleSync(userId: string): void {
+    if (this.pending.has(userId)) {
+      return;
+    }
+    this.pending.add(userId);
+    // Fire and forget: the current query already has its answer
+    this.sync(userId)
+      .catch((error) =>
+        this.logger.warn(
+          `Farm vocabulary sync failed for user ${userId}: ${error.message}`,
+        ),
+      )
+      .finally(() => this.pending.delete(userId));
+  }
+
+  private async sync(userId: string): Promise<void> {
+    const state = this.farms.get(userId);
+    if (!state?.farmId) {
+      return;
+    }
+
+    const areas = await this.areaRepository.find({
+      where: { farmId: state.farmId },
+      select: ['id', 'name'],
+    });
+    const devices = areas.length
+      ? await this.deviceRepository.find({
+          where: areas.map((area) => ({ areaId: area.id })),
+          select: ['id', 'name'],
+        })
+      : [];
+
+    const toItem = (entity: { id: string; name: string }): FarmVocabularyItem => ({
+      id: entity.id,
+      name: entity.name,
+    });
+    const pushed = await this.pythonAIClient.pushFarmVocabulary(state.farmId, {
+      areas: areas.filter((area) => area.name).map(toItem),
+      devices: devices.filter((device) => device.name).map(toItem),
+    });
+    if (pushed) {
+      state.syncedAt = Date.now();
+      this.logger.debug(
+        `Pushed vocabulary of farm ${state.farmId}: ${areas.length} areas, ${devices.length} devices`,
+      );
+    }
+  }
+}
@@ -8,4 +8,6 @@ export * from './llm-fallback.service';
 export * from './action-router.service';
 export * from './ai-orchestrator.service';
 export * from './python-ai-client.service';
+export * from './farm-vocabulary.service';
+export * from './crop-catalog.service';
 
@@ -4,6 +4,7 @@ import { INTENT_PATTERNS } from '../constants';
 import { normalizeText } from '../utils';
 import { EntityExtractorService } from './entity-extractor.service';
 import { PythonAIClientService } from './python-ai-client.service';
+import { FarmVocabularyService } from './farm-vocabulary.service';
 
 @Injectable()
 export class IntentClassifierService {
@@ -12,6 +13,7 @@ export class IntentClassifierService {
   constructor(
     private readonly entityExtractor: EntityExtractorService,
     private readonly pythonAIClient: PythonAIClientService,
+    private readonly farmVocabulary: FarmVocabularyService,
   ) {}
 
   /**
@@ -19,7 +21,10 @@ export class IntentClassifierService {
    * Uses Python AI Service (PhoBERT) if available, falls back to rule-based
    */
   // checkpoint1
-  async classifyIntent(query: string): Promise<IntentClassificationResult> {
+  async classifyIntent(
+    query: string,
+    userId?: string,
+  ): Promise<IntentClassificationResult> {
     const startTime = Date.now();
     const normalizedQuery = normalizeText(query);
     // lowerCase + NFC + space giữa + space đầu cuối
@@ -29,7 +34,12 @@ export class IntentClassifierService {
     // console.log("gọi đến port 8000/analyze");
     // TRẢ VỀ KẾT QUẢ CHO STEP1_ORCHESTRATOR
     // checkpoint2
-    const pythonResult = await this.pythonAIClient.analyzeText(query, 3);
+    // farm_id -> Python also matches this farm's area/device names (area_id/device_id)
+    const farmId = userId ? await this.farmVocabulary.getFarmId(userId) : null;
+    const pythonResult = await this.pythonAIClient.analyzeText(query, 3, farmId);
+    if (userId && farmId && pythonResult?.farm_vocabulary_loaded === false) {
+      this.farmVocabulary.markNotLoaded(userId);
+    }
     // key kma
     // pythonResult === response.data từ 8000/analyze
     console.log('pythonResult_intent: ', pythonResult?.intent);
@@ -3,6 +3,15 @@ import { ConfigService } from '@nestjs/config';
 import axios, { AxiosInstance } from 'axios';
 import { IntentType, Entity, EntityType } from '../types';
 
+// Python side drops work whose deadline has passed instead of computing
+// results we already gave up on (see python-ai-service serving/admission.py)
+const PYTHON_AI_TIMEOUT_MS = 10000;
+const DEADLINE_HEADER = 'X-Request-Deadline-Ms';
+// Document NER tags whole chunk batches at ingest time
+const DOCUMENT_NER_TIMEOUT_MS = 60000;
+// Farm vocabulary endpoints are admin-only when the Python service sets ADMIN_TOKEN
+const ADMIN_TOKEN_HEADER = 'X-Admin-Token';
+
 export interface PythonAIResponse {
   success: boolean;
   intent: string;
@@ -10,6 +19,23 @@ export interface PythonAIResponse {
   all_intents: Array<{ intent: string; confidence: number }>;
   entities: Entity[];
   processing_time_ms: number;
+  // true when the Python service answered with its rule-based path because
+  // the inference queue was over its latency SLO
+  degraded?: boolean;
+  // Only set when farm_id was sent: false means the Python service has no
+  // vocabulary for that farm yet (restart / evicted) and it should be pushed
+  farm_vocabulary_loaded?: boolean | null;
+}
+
+export interface FarmVocabularyItem {
+  id: string;
+  name: string;
+  aliases?: string[];
+}
+
+export interface FarmVocabularyPayload {
+  areas: FarmVocabularyItem[];
+  devices: FarmVocabularyItem[];
 }
 
 @Injectable()
@@ -17,6 +43,7 @@ export class PythonAIClientService {
   private readonly logger = new Logger(PythonAIClientService.name);
   private readonly client: AxiosInstance;
   private readonly baseUrl: string;
+  private readonly adminToken?: string;
   private isAvailable: boolean = false;
 
   constructor(private readonly configService: ConfigService) {
@@ -24,12 +51,15 @@ export class PythonAIClientService {
       'PYTHON_AI_SERVICE_URL',
       'http://localhost:8000',
     );
+    this.adminToken = this.configService.get<string>('PYTHON_AI_ADMIN_TOKEN');
 
     this.client = axios.create({
       baseURL: this.baseUrl,
-      timeout: 10000, // 10 seconds
+      timeout: PYTHON_AI_TIMEOUT_MS, // 10 seconds
       headers: {
         'Content-Type': 'application/json',
+        // Remaining time budget, so the Python service can shed expired requests
+        [DEADLINE_HEADER]: String(PYTHON_AI_TIMEOUT_MS),
       },
     });
 
@@ -68,6 +98,7 @@ export class PythonAIClientService {
   async analyzeText(
     text: string,
     topK: number = 3,
+    farmId?: string | null,
   ): Promise<PythonAIResponse | null> {
     if (!this.isAvailable) {
       this.logger.debug(
@@ -85,12 +116,19 @@ export class PythonAIClientService {
       const response = await this.client.post<PythonAIResponse>('/analyze', {
         text,
         top_k: topK,
+        // Python matches the farm's own area/device names and returns their ids
+        ...(farmId ? { farm_id: farmId } : {}),
       });
 
       console.log('*__INTENT trả về từ 8000/analyze: ', response.data.intent);
       console.log('*__entities trả về từ 8000/analyze: ', response.data.entities);
 
       const processingTime = Date.now() - startTime;
+      if (response.data.degraded) {
+        this.logger.warn(
+          'Python AI Service is overloaded, result came from its rule-based path',
+        );
+      }
       this.logger.debug(
         `Python AI Analysis: Intent=${response.data.intent}, ` +
           `Entities=${response.data.entities.length}, ` +
@@ -99,6 +137,7 @@ export class PythonAIClientService {
 
       return response.data;
     } catch (error) {
+      this.logOverload(error);
       this.logger.error(`Python AI Service analysis error: ${error.message}`);
       return null;
     }
@@ -127,6 +166,7 @@ export class PythonAIClientService {
 
       return response.data;
     } catch (error) {
+      this.logOverload(error);
       this.logger.error(
         `Python AI Service intent classification error: ${error.message}`,
       );
@@ -156,6 +196,7 @@ export class PythonAIClientService {
 
       return response.data;
     } catch (error) {
+      this.logOverload(error);
       this.logger.error(
         `Python AI Service NER extraction error: ${error.message}`,
       );
@@ -163,6 +204,104 @@ export class PythonAIClientService {
     }
   }
 
+  /**
+   * Tag long texts (RAG chunks) with crop / area / metric entities.
+   * The Python side runs a sliding window instead of truncating at 256 tokens.
+   * Returns one entity list per text, or null when the service is unavailable.
+   */
+  async extractDocumentEntities(texts: string[]): Promise<Entity[][] | null> {
+    if (!this.isAvailable || texts.length === 0) {
+      return null;
+    }
+
+    try {
+      const response = await this.client.post(
+        '/ner/document',
+        { texts },
+        {
+          // Ingest is offline work: allow a full batch of long chunks
+          timeout: DOCUMENT_NER_TIMEOUT_MS,
+          headers: { [DEADLINE_HEADER]: String(DOCUMENT_NER_TIMEOUT_MS) },
+        },
+      );
+
+      return response.data.results.map((result: any) =>
+        result.entities.map((entity: any) => this.convertToEntity(entity)),
+      );
+    } catch (error) {
+      this.logOverload(error);
+      this.logger.warn(
+        `Python AI Service document NER error: ${error.message}`,
+      );
+      return null;
+    }
+  }
+
+  /**
+   * Replace the area/device vocabulary of a farm on the Python service
+   */
+  async pushFarmVocabulary(
+    farmId: string,
+    vocabulary: FarmVocabularyPayload,
+  ): Promise<boolean> {
+    if (!this.isAvailable) {
+      return false;
+    }
+
+    try {
+      await this.client.put(
+        `/farms/${encodeURIComponent(farmId)}/vocabulary`,
+        vocabulary,
+        { headers: this.adminHeaders() },
+      );
+      return true;
+    } catch (error) {
+      this.logger.warn(
+        `Python AI Service farm vocabulary push failed: ${error.message}`,
+      );
+      return false;
+    }
+  }
+
+  /**
+   * Replace the crop catalog used to link crop_name entities to crop ids
+   */
+  async pushCropCatalog(crops: FarmVocabularyItem[]): Promise<boolean> {
+    try {
+      await this.client.put(
+        '/admin/crops',
+        { crops },
+        { headers: this.adminHeaders() },
+      );
+      return true;
+    } catch (error) {
+      this.logger.warn(
+        `Python AI Service crop catalog push failed: ${error.message}`,
+      );
+      return false;
+    }
+  }
+
+  /**
+   * Remove the vocabulary of a deleted farm
+   */
+  async deleteFarmVocabulary(farmId: string): Promise<boolean> {
+    try {
+      await this.client.delete(
+        `/farms/${encodeURIComponent(farmId)}/vocabulary`,
+        { headers: this.adminHeaders() },
+      );
+      return true;
+    } catch (error) {
+      if (error?.response?.status !== 404) {
+        this.logger.warn(
+          `Python AI Service farm vocabulary delete failed: ${error.message}`,
+        );
+      }
+      return false;
+    }
+  }
+
   /**
    * Convert Python AI intent string to IntentType enum
    */
@@ -202,9 +341,33 @@ export class PythonAIClientService {
         start: pythonEntity.start,
         end: pythonEntity.end,
       },
+      // Present when the entity matched the farm vocabulary
+      ...(pythonEntity.area_id ? { areaId: pythonEntity.area_id } : {}),
+      ...(pythonEntity.device_id ? { deviceId: pythonEntity.device_id } : {}),
+      // Present when crop_name linked to a row of the crops table
+      ...(pythonEntity.crop_id ? { cropId: pythonEntity.crop_id } : {}),
+      // Present for date entities the Python resolver understood
+      ...(pythonEntity.date_range ? { dateRange: pythonEntity.date_range } : {}),
     };
   }
 
+  private adminHeaders(): Record<string, string> {
+    return this.adminToken ? { [ADMIN_TOKEN_HEADER]: this.adminToken } : {};
+  }
+
+  /**
+   * Log 429/503 load shedding responses from the Python service
+   */
+  private logOverload(error: any): void {
+    const status = error?.response?.status;
+    if (status === 429 || status === 503) {
+      const retryAfter = error.response.headers?.['retry-after'];
+      this.logger.warn(
+        `Python AI Service shed request (HTTP ${status}, Retry-After=${retryAfter ?? '-'}s), using fallback`,
+      );
+    }
+  }
+
   /**
    * Check if service is available
    */
@@ -6,10 +6,21 @@ import { RagChunk } from '../entities/rag-chunk.entity';
 import { ChunkingService } from './chunking.service';
 import { EmbeddingService } from './embedding.service';
 import { TextExtractionService } from './text-extraction.service';
+import { PythonAIClientService } from './python-ai-client.service';
+import { Entity, EntityType } from '../types';
 import * as fs from 'fs';
 import * as path from 'path';
 import { randomUUID } from 'crypto';
 
+// Chunks sent to the Python document NER per request
+const CHUNK_TAGGING_BATCH_SIZE = 16;
+// Entity types kept as chunk tags
+const CHUNK_TAG_TYPES = new Set<EntityType>([
+  EntityType.CROP_NAME,
+  EntityType.FARM_AREA,
+  EntityType.METRIC,
+]);
+
 export interface CreateRagDocumentDto {
   category?: string;
   tags?: string[];
@@ -28,6 +39,7 @@ export class RagDocumentService {
     private readonly chunkingService: ChunkingService,
     private readonly embeddingService: EmbeddingService,
     private readonly textExtractionService: TextExtractionService,
+    private readonly pythonAI: PythonAIClientService,
   ) {
     if (!fs.existsSync(this.uploadDir)) {
       fs.mkdirSync(this.uploadDir, { recursive: true });
@@ -121,6 +133,10 @@ export class RagDocumentService {
 
       this.logger.log(`Generated ${embeddings.length} embeddings`);
 
+      // STEP 2.5: Tag chunks with crop / area / metric entities (used to
+      // pre-filter chunks by crop at retrieval time)
+      const chunkEntities = await this.tagChunks(chunks.map(c => c.content));
+
       // STEP 3: Save chunks to database
       this.logger.log('Saving chunks to database...');
       
@@ -147,6 +163,7 @@ export class RagDocumentService {
             JSON.stringify({
               tokens: chunk.tokens,
               language: 'vi',
+              ...this.chunkTags(chunkEntities[idx]),
             }),
           ],
         );
@@ -197,6 +214,41 @@ export class RagDocumentService {
     return this.ragDocumentRepo.findOne({ where: { id } });
   }
 
+  /**
+   * Run the Python document NER over all chunks in batches.
+   * A failed batch leaves its chunks untagged; ingest still completes.
+   */
+  private async tagChunks(contents: string[]): Promise<Entity[][]> {
+    const tagged: Entity[][] = [];
+    for (let i = 0; i < contents.length; i += CHUNK_TAGGING_BATCH_SIZE) {
+      const batch = contents.slice(i, i + CHUNK_TAGGING_BATCH_SIZE);
+      const entities = await this.pythonAI.extractDocumentEntities(batch);
+      tagged.push(...(entities ?? batch.map(() => [])));
+    }
+
+    const taggedCount = tagged.filter(entities => entities.length > 0).length;
+    this.logger.log(`Tagged ${taggedCount}/${contents.length} chunks with entities`);
+    return tagged;
+  }
+
+  /**
+   * Chunk metadata fields built from its entities
+   */
+  private chunkTags(entities: Entity[] = []): Record<string, string[]> {
+    const kept = entities.filter(entity => CHUNK_TAG_TYPES.has(entity.type));
+    if (kept.length === 0) {
+      return {};
+    }
+
+    const unique = (values: string[]) => [...new Set(values)];
+    const crops = kept.filter(entity => entity.type === EntityType.CROP_NAME);
+    return {
+      entities: unique(kept.map(entity => `${entity.type}:${String(entity.value).toLowerCase()}`)),
+      crops: unique(crops.map(entity => String(entity.value).toLowerCase())),
+      cropIds: unique(crops.map(entity => entity.cropId).filter(Boolean) as string[]),
+    };
+  }
+
   /**
    * Delete document and all chunks
    */
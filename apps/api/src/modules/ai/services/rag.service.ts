@@ -8,6 +8,9 @@ export interface RAGRetrievalOptions {
   userId?: string;
   topK?: number;
   threshold?: number;
+  // Crop ids linked on the query's NER crop entities: only chunks tagged with
+  // one of them are compared (falls back to all chunks when none match)
+  cropIds?: string[];
 }
 
 interface FootnoteReference {
@@ -74,6 +77,7 @@ export class RAGService {
       topK: options.topK || 5,
       threshold: finalThreshold, // 0.4
       userId: options.userId,
+      cropIds: options.cropIds,
     });
 
     const retrievalTime = Date.now() - startTime;
@@ -7,6 +7,9 @@ export interface SimilaritySearchOptions {
   topK: number;
   threshold: number;
   userId?: string;
+  // Crop ids (crops table), matched against metadata.cropIds tagged at ingest;
+  // ids rather than names so synonyms (bắp / ngô) hit the same chunks
+  cropIds?: string[];
 }
 
 @Injectable()
@@ -25,6 +28,23 @@ export class VectorStoreService {
   async similaritySearch(
     queryEmbedding: number[], // vector embedding 768 dimensions
     options: SimilaritySearchOptions, // topK, threshold =0.4, userId
+  ): Promise<RagChunk[]> {
+    if (options.cropIds?.length) {
+      // Pre-filter by crop before the vector comparison; documents ingested
+      // before chunk tagging (or a crop we never tagged) fall back to all chunks
+      const filtered = await this.search(queryEmbedding, options, options.cropIds);
+      if (filtered.length > 0) {
+        return filtered;
+      }
+      this.logger.debug(`No chunks tagged with crop ids [${options.cropIds.join(', ')}], searching all chunks`);
+    }
+    return this.search(queryEmbedding, options);
+  }
+
+  private async search(
+    queryEmbedding: number[],
+    options: SimilaritySearchOptions,
+    cropIds?: string[],
   ): Promise<RagChunk[]> {
     try {
       // Convert embedding array to pgvector format string
@@ -52,6 +72,13 @@ export class VectorStoreService {
 
       const params: any[] = [embeddingStr, options.threshold];
 
+      if (cropIds?.length) {
+        params.push(cropIds);
+        sql += `
+          AND c.metadata->'cropIds' ?| $${params.length}::text[]
+        `;
+      }
+
       sql += `
         ORDER BY similarity DESC
         LIMIT $${params.length + 1}
@@ -76,7 +103,7 @@ export class VectorStoreService {
       this.logger.debug(`Found ${results.length} similar chunks`);
       
       // Debug: If no results, try without threshold
-      if (results.length === 0) {
+      if (results.length === 0 && !cropIds) {
         this.logger.debug('No results found, trying without threshold...');
         const debugSql = `
           SELECT 
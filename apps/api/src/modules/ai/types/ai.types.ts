@@ -38,6 +38,16 @@ export interface Entity {
     start: number;
     end: number;
   };
+  // Ids from the farm vocabulary match (Python service, farm_area / device_name)
+  areaId?: string;
+  deviceId?: string;
+  // Crop id linked by the Python service (crop_name)
+  cropId?: string;
+  // Concrete range resolved by the Python service (date), ISO dates, inclusive
+  dateRange?: {
+    from: string;
+    to: string;
+  };
 }
 
 export interface IntentClassificationResult {
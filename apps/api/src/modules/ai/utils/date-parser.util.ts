@@ -7,6 +7,32 @@ export interface DateRange {
   end: Date;
 }
 
+/**
+ * Date range resolved by the Python NER service (entity.dateRange),
+ * ISO dates in server local time, both ends inclusive
+ */
+export interface ResolvedDateRange {
+  from: string; // YYYY-MM-DD
+  to: string; // YYYY-MM-DD
+}
+
+/**
+ * Convert a resolved range into a DateRange without parsing Vietnamese text again
+ * @param resolved - The date_range returned with a date entity
+ * @returns DateRange from 00:00 of `from` to the end of `to`, null if malformed
+ */
+export function fromResolvedRange(resolved: ResolvedDateRange): DateRange | null {
+  const from = resolved.from?.split('-').map(Number);
+  const to = resolved.to?.split('-').map(Number);
+  if (from?.length !== 3 || to?.length !== 3 || [...from, ...to].some(isNaN)) {
+    return null;
+  }
+  return {
+    start: new Date(from[0], from[1] - 1, from[2]),
+    end: new Date(to[0], to[1] - 1, to[2], 23, 59, 59, 999),
+  };
+}
+
 /**
  * Parse a date entity string into a date range
  * @param dateEntity - The date entity value from NER (e.g., "tháng này", "quý 1")
@@ -0,0 +1,95 @@
+"""
+Helpers dùng chung cho các script export / benchmark / parity check
+"""
+
+import csv
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+DATA_DIR = PROJECT_ROOT / "train" / "data"
+MODELS_DIR = PROJECT_ROOT / "models"
+
+INTENT_CSV_FILES = ["intent_data_5intents_cleaned.csv", "intent_data_augmented_5intents.csv"]
+NER_CSV_FILES = ["ner_iot_data.csv", "ner_data.csv", "ner_data_augmented.csv"]
+
+
+def add_src_to_path():
+    """Cho phép import `models.*` giống main.py (chạy từ thư mục src)"""
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+
+def model_location(name: str) -> Dict[str, Any]:
+    """
+    model_name / model_dir giống main.py (PHOBERT_MODEL_NAME, MODELS_DIR) cho model `name`
+    -> script chạy được trên model khác models/ mặc định, vd fixture của make_tiny_fixture.py
+    """
+    add_src_to_path()
+    from config import settings
+
+    return {"model_name": settings.phobert_model_name, "model_dir": Path(settings.models_dir) / name}
+
+
+def load_labeled_texts(file_names: Sequence[str], limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """Đọc cặp (text, label) từ các CSV training (cột text + label/entities)"""
+    rows: List[Tuple[str, str]] = []
+    for file_name in file_names:
+        with open(DATA_DIR / file_name, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                text = (row.get("text") or "").strip()
+                if text:
+                    rows.append((text, row.get("label") or row.get("entities") or ""))
+                if limit and len(rows) >= limit:
+                    return rows
+    return rows
+
+
+def load_texts(file_names: Sequence[str], limit: Optional[int] = None) -> List[str]:
+    """Chỉ lấy cột text"""
+    return [text for text, _ in load_labeled_texts(file_names, limit)]
+
+
+def batched(items: Sequence, batch_size: int):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Percentile q (0-100) theo nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize_latencies(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    return {
+        "mean": statistics.fmean(latencies_ms) if latencies_ms else 0.0,
+        "p50": percentile(latencies_ms, 50),
+        "p95": percentile(latencies_ms, 95),
+        "p99": percentile(latencies_ms, 99),
+    }
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence]):
+    """In bảng dạng markdown để dán vào PR/README"""
+    def fmt(value):
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    print("| " + " | ".join(headers) + " |")
+    print("|" + "|".join("---" for _ in headers) + "|")
+    for row in rows:
+        print("| " + " | ".join(fmt(value) for value in row) + " |")
+
+
+def rss_mb() -> float:
+    """RSS hiện tại của process (MB), đọc từ /proc/self/status"""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return 0.0
@@ -0,0 +1,84 @@
+"""
+CPU latency benchmark cho từng inference engine (torch / onnx / onnx-int8)
+
+Đo thời gian tokenize + forward trên câu thật từ train/data, in bảng markdown.
+
+Usage:
+    python scripts/benchmark_engines.py --engines torch onnx onnx-int8 --samples 300
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import torch
+
+from bench_utils import (
+    INTENT_CSV_FILES,
+    NER_CSV_FILES,
+    add_src_to_path,
+    batched,
+    load_texts,
+    print_table,
+    summarize_latencies,
+)
+
+add_src_to_path()
+from models.engines import SUPPORTED_ENGINES  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+TASKS = {
+    "intent": (IntentClassifier, INTENT_CSV_FILES),
+    "ner": (NERExtractor, NER_CSV_FILES),
+}
+
+
+def benchmark(model, texts, batch_size: int, warmup: int):
+    """Trả về latency (ms) của từng batch"""
+    for batch in list(batched(texts, batch_size))[:warmup]:
+        model.engine(model.tokenizer(batch, return_tensors="pt", truncation=True, max_length=256, padding=True))
+
+    latencies = []
+    for batch in batched(texts, batch_size):
+        started = time.perf_counter()
+        inputs = model.tokenizer(batch, return_tensors="pt", truncation=True, max_length=256, padding=True)
+        model.engine(inputs)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference engines on CPU")
+    parser.add_argument("--engines", nargs="+", choices=SUPPORTED_ENGINES, default=list(SUPPORTED_ENGINES))
+    parser.add_argument("--task", choices=["intent", "ner", "all"], default="all")
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    rows = []
+    tasks = list(TASKS) if args.task == "all" else [args.task]
+    for task in tasks:
+        model_class, csv_files = TASKS[task]
+        texts = load_texts(csv_files, args.samples)
+        for engine in args.engines:
+            model = model_class(engine=engine)
+            asyncio.run(model.load_model())
+            latencies = benchmark(model, texts, args.batch_size, args.warmup)
+            stats = summarize_latencies(latencies)
+            throughput = len(texts) / (sum(latencies) / 1000)
+            rows.append([task, engine, args.batch_size, stats["p50"], stats["p95"], stats["mean"], throughput])
+            del model
+
+    print_table(["task", "engine", "batch", "p50 ms", "p95 ms", "mean ms", "texts/s"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
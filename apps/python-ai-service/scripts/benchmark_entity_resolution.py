@@ -0,0 +1,206 @@
+"""
+Micro-benchmark bước gộp entity PhoBERT + rule-based của NERExtractor._post_process_entities
+
+- legacy: sort list dict + greedy theo last_end, rồi lọc entity sai ở vòng sau
+- interval: models/entity_resolution.py (lọc trước, span phủ các mảnh cùng type được ưu tiên,
+  weighted interval scheduling)
+- post-process: cả bước sau khi có entity model + regex, gồm normalize / date_range / crop_id:
+  legacy (chọn + lọc rồi thêm 2 vòng normalize, link crop) vs NERExtractor._post_process_entities
+  (1 lượt, finalize ngay trên entity được giữ)
+
+Entity "model" lấy từ nhãn của NER CSV (confidence 0.85 như _spans_to_entities), có nhiễu giống
+lỗi BIO hay gặp: cắt còn âm tiết đầu, hoặc nuốt thêm từ đứng trước (0.75, nhãn I- mồ côi);
+entity rule-based là Gazetteer.find (0.95). Kiểm tra thêm trên khoảng ngẫu nhiên nhỏ:
+interval phải đúng bằng tối ưu vét cạn và không bao giờ kém legacy (theo trọng số đã ưu tiên
+span phủ), sai thì exit 1.
+
+Usage:
+    python scripts/benchmark_entity_resolution.py --limit 5000 --repeat 5
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from bench_utils import NER_CSV_FILES, add_src_to_path, load_labeled_texts, print_table
+
+add_src_to_path()
+from models.crop_linker import CropLinker  # noqa: E402
+from models.entity_resolution import (  # noqa: E402
+    EntitySpans,
+    is_invalid_entity,
+    prefer_covering_spans,
+    resolve_entities,
+    schedule_intervals,
+)
+from models.gazetteer import Gazetteer  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+# Nhãn CSV -> type của NERExtractor (các nhãn khác model không học)
+CSV_TYPES = {
+    "CROP": "crop_name", "CROP_NAME": "crop_name", "AREA": "farm_area", "DEVICE": "device_name",
+    "DATE": "date", "DURATION": "duration", "METRIC": "metric",
+}
+
+
+def legacy_resolve(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """_remove_overlapping_entities + _filter_invalid_entities cũ"""
+    result = []
+    last_end = -1
+    for entity in sorted(entities, key=lambda x: (x["start"], -x["confidence"], -(x["end"] - x["start"]))):
+        if entity["start"] >= last_end:
+            result.append(entity)
+            last_end = entity["end"]
+    return [entity for entity in result if not is_invalid_entity(entity["type"], entity["raw"])]
+
+
+def model_entities(text: str, labels: str, rng: random.Random) -> List[Dict[str, Any]]:
+    entities = []
+    for label in json.loads(labels or "[]"):
+        entity_type = CSV_TYPES.get(label["type"])
+        start, end = label["start"], label["end"]
+        if entity_type is None or text[start:end] != label["value"]:
+            continue
+        confidence = 0.85
+        noise = rng.random()
+        if noise < 0.2 and " " in text[start:end]:
+            end = text.index(" ", start)
+            confidence = 0.75
+        elif noise < 0.3 and start > 1:
+            start = text.rfind(" ", 0, start - 1) + 1
+            confidence = 0.75
+        entities.append({
+            "type": entity_type, "raw": text[start:end], "start": start, "end": end, "confidence": confidence,
+        })
+    return entities
+
+
+def total_weight(entities: Sequence[Dict[str, Any]]) -> float:
+    return sum(entity["confidence"] * (entity["end"] - entity["start"]) for entity in entities)
+
+
+def scheduled_weight(candidates: List[Dict[str, Any]], kept: Sequence[Dict[str, Any]]) -> float:
+    """Tổng trọng số mà interval scheduling tối ưu (sau prefer_covering_spans)"""
+    spans = EntitySpans(candidates)
+    prefer_covering_spans(spans)
+    weights = {id(candidates[index]): weight for index, weight in zip(spans.indexes, spans.weights)}
+    return sum(weights.get(id(entity), 0.0) for entity in kept)
+
+
+def legacy_post_process(extractor: NERExtractor, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """_post_process_entities trước khi gộp (bỏ print): chọn + lọc, rồi normalize, rồi link crop"""
+    result = legacy_resolve(entities)
+    for entity in result:
+        entity["value"] = extractor._normalize_entity_value(entity)
+        if entity["type"] == "date":
+            entity["date_range"] = extractor.date_resolver.resolve(entity["raw"])
+    extractor.crop_linker.link_entities(result)
+    return result
+
+
+def time_us_per_case(resolve: Callable, cases: List[List[Dict[str, Any]]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for entities in cases:
+            resolve(entities)
+        best = min(best, time.perf_counter() - started)
+    return best / len(cases) * 1e6
+
+
+def check_optimal(rng: random.Random, trials: int) -> int:
+    """Số lần schedule_intervals khác tối ưu vét cạn (hoặc kém greedy) trên khoảng ngẫu nhiên"""
+    failures = 0
+    for _ in range(trials):
+        count = rng.randint(0, 8)
+        starts = [rng.randint(0, 20) for _ in range(count)]
+        ends = [start + rng.randint(1, 8) for start in starts]
+        weights = [rng.random() for _ in range(count)]
+        chosen = schedule_intervals(starts, ends, weights)
+        spans = sorted((starts[i], ends[i]) for i in chosen)
+        overlapping = any(a[1] > b[0] for a, b in zip(spans, spans[1:]))
+        optimum = max(
+            sum(weights[i] for i in subset)
+            for size in range(count + 1) for subset in itertools.combinations(range(count), size)
+            if all(ends[a] <= starts[b] or ends[b] <= starts[a] for a, b in itertools.combinations(subset, 2))
+        )
+        if overlapping or abs(sum(weights[i] for i in chosen) - optimum) > 1e-9:
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark greedy vs weighted interval entity resolution")
+    parser.add_argument("--limit", type=int, default=5000, help="Rows per CSV")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--trials", type=int, default=2000, help="Random cases for the optimality check")
+    parser.add_argument("--show", type=int, default=5, help="Examples of differing texts to print")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    gazetteer = Gazetteer.load()
+    texts, cases = [], []
+    for text, labels in load_labeled_texts(NER_CSV_FILES, args.limit):
+        texts.append(text)
+        cases.append(model_entities(text, labels, rng) + gazetteer.find(text))
+
+    rows = []
+    results = {}
+    for name, resolve in [("legacy", legacy_resolve), ("interval", resolve_entities)]:
+        results[name] = [resolve(entities) for entities in cases]
+        rows.append([
+            name,
+            time_us_per_case(resolve, cases, args.repeat),
+            sum(map(len, results[name])),
+            sum(map(total_weight, results[name])),
+        ])
+
+    differing = [i for i, (a, b) in enumerate(zip(results["legacy"], results["interval"])) if a != b]
+    worse = sum(
+        scheduled_weight(candidates, b) < scheduled_weight(candidates, a) - 1e-9
+        for candidates, a, b in zip(cases, results["legacy"], results["interval"])
+    )
+    post_rows = []
+    extractor = NERExtractor(gazetteer=gazetteer, crop_linker=CropLinker())
+    extractor.crop_linker.update([
+        {"id": str(index), "name": name} for index, name in enumerate(sorted({
+            entity["raw"] for entities in cases for entity in entities if entity["type"] == "crop_name"
+        }))
+    ])
+    model_cases = [[e for e in entities if e["confidence"] < 0.95] for entities in cases]
+    for name, post_process in [
+        ("legacy", lambda i: legacy_post_process(extractor, model_cases[i] + gazetteer.find(texts[i]))),
+        ("fused", lambda i: extractor._post_process_entities(texts[i], model_cases[i])),
+    ]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for i in range(len(texts)):
+                post_process(i)
+            best = min(best, time.perf_counter() - started)
+        post_rows.append([name, best / len(texts) * 1e6])
+
+    for i in differing[:args.show]:
+        legacy = [f"{e['raw']} ({e['type']})" for e in results["legacy"][i]]
+        interval = [f"{e['raw']} ({e['type']})" for e in results["interval"][i]]
+        print(f"  {texts[i]!r}: {legacy} -> {interval}")
+
+    print(f"{len(cases)} texts, {sum(map(len, cases))} candidate entities, {len(differing)} texts differing")
+    print_table(["resolver", "µs/text", "entities kept", "kept confidence × chars"], rows)
+    print("Whole post-process step (gazetteer.find + resolution + normalize / date_range / crop_id):")
+    print_table(["post-process", "µs/text"], post_rows)
+    failures = check_optimal(rng, args.trials) + worse
+    if failures:
+        print(f"❌ interval scheduling not optimal in {failures} cases")
+        return 1
+    print("✅ interval scheduling optimal on random cases, never below legacy on the CSV texts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
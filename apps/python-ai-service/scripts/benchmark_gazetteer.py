@@ -0,0 +1,155 @@
+"""
+Micro-benchmark rule-based NER: vòng lặp regex cũ vs compiled gazetteer (models/gazetteer.py)
+
+- legacy:              ~50 regex (21 crop, 6 device, area, duration, date) dựng + chạy mỗi câu
+- gazetteer (legacy):  trie + regex gộp, cùng danh sách cụm từ cũ -> kết quả phải giống hệt legacy
+- gazetteer:           trie với toàn bộ gazetteer.json (ENTITY_DATA) -> thêm bao nhiêu entity
+
+So sánh kết quả sau bước loại overlap (như NERExtractor._remove_overlapping_entities),
+exit 1 nếu gazetteer (legacy) khác legacy ở bất kỳ câu nào.
+
+Usage:
+    python scripts/benchmark_gazetteer.py --limit 5000 --repeat 5
+"""
+
+import argparse
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from bench_utils import INTENT_CSV_FILES, NER_CSV_FILES, add_src_to_path, load_texts, print_table
+from build_gazetteer import LEGACY_PHRASES
+
+add_src_to_path()
+from models.gazetteer import LEGACY_PATTERN_GROUPS, Gazetteer  # noqa: E402
+
+
+def legacy_rule_entities(text: str) -> List[Dict[str, Any]]:
+    """NERExtractor._extract_rule_based_entities trước khi có gazetteer (bỏ print debug)"""
+    date_patterns = [
+        (r'tháng\s*\d{1,2}\s*năm\s*\d{4}', 'date'),
+        (r'tháng\s*\d{1,2}\s*năm\s*(?:ngoái|trước)', 'date'),
+        (r'năm\s*\d{4}', 'date'),
+        (r'năm\s*(?:nay|này)', 'date'),
+        (r'năm\s*(?:ngoái|trước)', 'date'),
+        (r'tháng\s*\d{1,2}', 'date'),
+        (r'tháng\s*(?:này|nay)', 'date'),
+        (r'tháng\s*trước', 'date'),
+        (r'quý\s*\d', 'date'),
+        (r'tuần\s*(?:này|nay)', 'date'),
+        (r'tuần\s*trước', 'date'),
+        (r'hôm\s*nay', 'date'),
+        (r'hôm\s*qua', 'date'),
+        (r'\d{1,2}/\d{1,2}/\d{2,4}', 'date'),
+    ]
+    crop_patterns = [
+        (r'\b' + r'\s+'.join(phrase.split()) + r'\b', 'crop_name') for phrase in LEGACY_PHRASES["crop_name"]
+    ]
+    device_patterns = [
+        (r'\b' + r'\s+'.join(phrase.split()) + r'\b', 'device_name') for phrase in LEGACY_PHRASES["device_name"]
+    ]
+    area_patterns = [
+        (r'\bhàng\s+\d+\b', 'farm_area'),
+        (r'\bluống\s+\d+\b', 'farm_area'),
+        (r'\bkhu\s+[A-Z]\b', 'farm_area'),
+        (r'\bkhu\s+\d+\b', 'farm_area'),
+        (r'\bvườn\s+\w+\b', 'farm_area'),
+    ]
+    duration_patterns = [
+        (r'\d+\s*phút', 'duration'),
+        (r'\d+\s*giờ', 'duration'),
+        (r'\d+\s*ngày', 'duration'),
+        (r'nửa\s+tiếng', 'duration'),
+        (r'\d+\s*tiếng\s*rưỡi', 'duration'),
+    ]
+    entities = []
+    for pattern, entity_type in crop_patterns + device_patterns + area_patterns + duration_patterns + date_patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            entities.append({
+                "type": entity_type,
+                "raw": match.group(0),
+                "start": match.start(),
+                "end": match.end(),
+                "confidence": 0.95,
+            })
+    return entities
+
+
+def remove_overlapping(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Như NERExtractor._remove_overlapping_entities"""
+    result = []
+    last_end = -1
+    for entity in sorted(entities, key=lambda x: (x["start"], -x["confidence"], -(x["end"] - x["start"]))):
+        if entity["start"] >= last_end:
+            result.append(entity)
+            last_end = entity["end"]
+    return result
+
+
+def resolved(extract: Callable[[str], List[Dict[str, Any]]], texts: List[str]) -> List[List[tuple]]:
+    return [
+        [(e["type"], e["start"], e["end"]) for e in remove_overlapping(extract(text))]
+        for text in texts
+    ]
+
+
+def time_us_per_text(extract: Callable[[str], List[Dict[str, Any]]], texts: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            extract(text)
+        best = min(best, time.perf_counter() - started)
+    return best / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark legacy regex loop vs compiled gazetteer")
+    parser.add_argument("--limit", type=int, default=5000, help="Rows per CSV")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show", type=int, default=5, help="Examples of extra matches to print")
+    args = parser.parse_args()
+
+    texts = list(dict.fromkeys(load_texts(INTENT_CSV_FILES + NER_CSV_FILES, args.limit)))
+    legacy_gazetteer = Gazetteer(LEGACY_PHRASES, LEGACY_PATTERN_GROUPS)
+    gazetteer = Gazetteer.load()
+    engines = [
+        ("legacy", legacy_rule_entities),
+        ("gazetteer (legacy phrases)", legacy_gazetteer.find),
+        ("gazetteer", gazetteer.find),
+    ]
+
+    reference = resolved(legacy_rule_entities, texts)
+    reference_count = sum(map(len, reference))
+    rows = []
+    mismatches = 0
+    for name, extract in engines:
+        results = resolved(extract, texts)
+        differing = [i for i, (a, b) in enumerate(zip(results, reference)) if a != b]
+        if name == "gazetteer (legacy phrases)":
+            mismatches = len(differing)
+        elif name == "gazetteer":
+            for i in differing[:args.show]:
+                extra = [texts[i][start:end] + f" ({entity_type})" for entity_type, start, end in results[i]
+                         if (entity_type, start, end) not in reference[i]]
+                print(f"  {texts[i]!r}: +{extra}")
+        rows.append([
+            name,
+            time_us_per_text(extract, texts, args.repeat),
+            sum(map(len, results)),
+            sum(map(len, results)) - reference_count,
+            len(differing),
+        ])
+
+    print(f"{len(texts)} unique texts, gazetteer: {gazetteer.stats()}")
+    print_table(["engine", "µs/text", "entities", "vs legacy", "texts differing"], rows)
+    if mismatches:
+        print(f"❌ gazetteer with legacy phrases differs from legacy on {mismatches} texts")
+        return 1
+    print("✅ gazetteer with legacy phrases matches legacy on every text")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
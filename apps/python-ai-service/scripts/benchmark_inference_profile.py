@@ -0,0 +1,170 @@
+"""
+Benchmark CPU inference profile × batch size cho intent + NER (engine torch)
+
+Profiles:
+- baseline:       torch.no_grad, thread mặc định của torch (như trước)
+- inference_mode: torch.inference_mode, thread mặc định
+- tuned:          inference_mode + thread theo cgroup quota + 1 inter-op thread + flush denormal
+- tuned_bf16:     tuned + bf16 autocast (chỉ khi CPU hỗ trợ, agreement so với fp32)
+
+Mỗi profile chạy trong 1 process con riêng (số thread inter-op chỉ đặt được 1 lần / process).
+Chạy trên từng loại node để chọn THREADS_PER_WORKER / INTER_OP_THREADS / BF16_AUTOCAST.
+
+Usage:
+    python scripts/benchmark_inference_profile.py --batch-sizes 1 4 16 --samples 256
+    python scripts/benchmark_inference_profile.py --profiles baseline tuned --threads 4
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import torch
+
+from bench_utils import (
+    INTENT_CSV_FILES,
+    NER_CSV_FILES,
+    add_src_to_path,
+    batched,
+    load_texts,
+    print_table,
+    summarize_latencies,
+)
+
+add_src_to_path()
+from models.bucketing import tokenize_bucketed  # noqa: E402
+from models.inference_profile import InferenceProfile, available_cpus, bf16_supported  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+PROFILES: Dict[str, Dict] = {
+    "baseline": {"inference_mode": False, "flush_denormal": False},
+    "inference_mode": {"inference_mode": True, "flush_denormal": False},
+    "tuned": {"inference_mode": True, "flush_denormal": True},
+    "tuned_bf16": {"inference_mode": True, "flush_denormal": True, "bf16": True},
+}
+# baseline / inference_mode giữ thread mặc định của torch (không gọi apply_runtime)
+DEFAULT_THREAD_PROFILES = ("baseline", "inference_mode")
+TASKS = {
+    "intent": (IntentClassifier, INTENT_CSV_FILES),
+    "ner": (NERExtractor, NER_CSV_FILES),
+}
+
+
+def predictions(model, texts: List[str]) -> List:
+    """argmax (câu với intent, từng token với NER) để so sánh bf16 với fp32"""
+    outputs = []
+    for rows, inputs, _ in tokenize_bucketed(model.tokenizer, texts, buckets=model.length_buckets):
+        argmax = model.engine(inputs).argmax(dim=-1)
+        mask = inputs["attention_mask"].bool()
+        for position, _ in enumerate(rows):
+            outputs.append(argmax[position][mask[position]].tolist() if argmax.dim() > 1 else argmax[position].item())
+    return outputs
+
+
+def run_single(profile_name: str, args):
+    """Chạy trong process con, in 1 dòng JSON"""
+    profile = InferenceProfile(intra_op_threads=args.threads, **PROFILES[profile_name])
+    if profile_name not in DEFAULT_THREAD_PROFILES:
+        profile.apply_runtime()
+
+    results = []
+    for task in args.tasks:
+        model_class, csv_files = TASKS[task]
+        texts = load_texts(csv_files, args.samples)
+        model = model_class(inference_profile=profile)
+        asyncio.run(model.load_model())
+        model.warmup(texts[:8])
+
+        agreement = None
+        if profile.bf16_active:
+            fast = predictions(model, texts)
+            profile.bf16_active = False
+            reference = predictions(model, texts)
+            profile.bf16_active = True
+            agreement = sum(a == b for a, b in zip(fast, reference)) / len(texts)
+
+        for batch_size in args.batch_sizes:
+            latencies = []
+            started = time.perf_counter()
+            for batch in batched(texts, batch_size):
+                batch_started = time.perf_counter()
+                if task == "ner":
+                    model.predict_batch(batch)
+                else:
+                    model.predict_batch(batch, [1] * len(batch))
+                latencies.append((time.perf_counter() - batch_started) * 1000)
+            elapsed = time.perf_counter() - started
+            results.append({
+                "task": task,
+                "batch_size": batch_size,
+                "texts_per_s": len(texts) / elapsed,
+                "latency": summarize_latencies(latencies),
+                "agreement": agreement,
+            })
+
+    print(json.dumps({
+        "profile": profile_name,
+        "threads": torch.get_num_threads(),
+        "interop_threads": torch.get_num_interop_threads(),
+        "bf16_active": profile.bf16_active,
+        "results": results,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CPU inference profiles x batch size")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--tasks", nargs="+", choices=list(TASKS), default=list(TASKS))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--samples", type=int, default=256, help="Texts per task")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads for tuned profiles (0 = cgroup quota)")
+    parser.add_argument("--single", choices=list(PROFILES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single, args)
+        return 0
+
+    print(f"CPUs available (affinity + cgroup quota): {available_cpus()}, bf16 supported: {bf16_supported()}")
+    rows = []
+    for profile_name in args.profiles:
+        if PROFILES[profile_name].get("bf16") and not bf16_supported():
+            print(f"Skipping {profile_name}: CPU has no bf16 support")
+            continue
+        command = [
+            sys.executable, str(Path(__file__).resolve()), "--single", profile_name,
+            "--tasks", *args.tasks,
+            "--batch-sizes", *map(str, args.batch_sizes),
+            "--samples", str(args.samples),
+            "--threads", str(args.threads),
+        ]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        # dòng JSON cuối cùng (bỏ log của model)
+        result = json.loads(output.strip().splitlines()[-1])
+        for item in result["results"]:
+            rows.append([
+                profile_name,
+                f"{result['threads']}/{result['interop_threads']}",
+                item["task"],
+                item["batch_size"],
+                item["texts_per_s"],
+                item["latency"]["p50"],
+                item["latency"]["p95"],
+                f"{item['agreement']:.2%}" if item["agreement"] is not None else "-",
+            ])
+
+    print_table(
+        ["profile", "threads intra/inter", "task", "batch", "texts/s", "p50 ms/batch", "p95 ms/batch", "agreement w/ fp32"],
+        rows,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Micro-benchmark intent memory (models/intent_memory.py) ở 10k / 100k câu đã sửa
+
+- add: thêm theo lô 100 câu (ma trận tăng gấp đôi khi đầy)
+- match: khớp text đã chuẩn hoá (dict lookup) trước khi chạy model
+- search: cosine top-k sau classifier head, batch 1 (classify) và 16 (predict_batch),
+  so với argsort toàn bộ -> top-k phải giống hệt, khác thì exit 1
+- save / load file npz, dung lượng ma trận vector
+
+Vector ngẫu nhiên 768 chiều (= hidden size PhoBERT-base), chỉ đo chi phí tra cứu,
+không cần model. Mỗi query tốn thêm 1 forward có output_hidden_states (~không đổi).
+
+Usage:
+    python scripts/benchmark_intent_memory.py --sizes 10000 100000 --repeat 20
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_utils import add_src_to_path, print_table
+
+add_src_to_path()
+from models.intent_memory import MEMORY_TOP_K, IntentMemory, normalize_rows  # noqa: E402
+
+HIDDEN_SIZE = 768
+INTENTS = ["hỏi_giá", "bật_thiết_bị", "tắt_thiết_bị", "hỏi_thời_tiết", "hỏi_kỹ_thuật"]
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def build_memory(size: int, rng: np.random.Generator, chunk: int = 100):
+    memory = IntentMemory()
+    vectors = rng.standard_normal((size, HIDDEN_SIZE), dtype=np.float32)
+    texts = [f"Câu hỏi đã sửa số {i}?" for i in range(size)]
+    started = time.perf_counter()
+    for first in range(0, size, chunk):
+        memory.add(
+            texts[first:first + chunk],
+            [INTENTS[i % len(INTENTS)] for i in range(first, min(size, first + chunk))],
+            vectors[first:first + chunk],
+            encoder="benchmark",
+        )
+    return memory, texts, time.perf_counter() - started
+
+
+def check_top_k(memory: IntentMemory, queries: np.ndarray, k: int) -> bool:
+    scores, rows = memory.search(queries, k)
+    expected = np.argsort(-(normalize_rows(queries) @ memory.vectors.T), axis=1)[:, :k]
+    return bool(np.array_equal(rows, expected)) and bool(np.all(np.diff(scores, axis=1) <= 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent memory lookup cost")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--top-k", type=int, default=MEMORY_TOP_K)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rows = []
+    failures = 0
+    for size in args.sizes:
+        memory, texts, add_s = build_memory(size, rng)
+        single = rng.standard_normal((1, HIDDEN_SIZE), dtype=np.float32)
+        batch = rng.standard_normal((16, HIDDEN_SIZE), dtype=np.float32)
+        failures += not check_top_k(memory, batch, args.top_k)
+
+        probe = texts[size // 2].upper() + "  "
+        match_us = best_ms(lambda: [memory.match(probe) for _ in range(1000)], args.repeat)
+        search_1 = best_ms(lambda: memory.search(single, args.top_k), args.repeat)
+        search_16 = best_ms(lambda: memory.search(batch, args.top_k), args.repeat)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "intent_memory.npz"
+            save_ms = best_ms(lambda: memory.save(path), 3)
+            file_mb = path.stat().st_size / 2**20
+            loaded = IntentMemory()
+            load_ms = best_ms(lambda: loaded.load(path), 3)
+            failures += loaded.match(probe) != memory.match(probe)
+
+        rows.append([
+            size,
+            size / add_s,
+            match_us,
+            search_1,
+            search_16,
+            search_16 / 16,
+            memory.vectors.nbytes / 2**20,
+            file_mb,
+            save_ms,
+            load_ms,
+        ])
+
+    print(f"dim={HIDDEN_SIZE}, top-k={args.top_k}, best of {args.repeat}")
+    print_table([
+        "examples", "add/s", "match µs", "search ms (1)", "search ms (16)", "ms/query (16)",
+        "vectors MB", "file MB", "save ms", "load ms",
+    ], rows)
+    if failures:
+        print(f"❌ {failures} checks failed (top-k differs from full sort or reload lost examples)")
+        return 1
+    print("✅ top-k matches a full sort, reload keeps every example")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark length bucketing trên phân bố độ dài câu thật (train/data CSVs)
+
+1. Phân bố số token (PhoBERT tokenizer) của câu intent / NER theo bucket
+2. Latency tokenize + forward theo từng chiến lược padding:
+   - max_length: pad tới 256 (như config Colab training)
+   - longest:    pad tới câu dài nhất trong batch (padding=True, trước đây)
+   - bucketed:   chia batch theo bucket 16/32/64/128/256
+
+Usage:
+    python scripts/benchmark_length_buckets.py --batch-sizes 1 8 16 32 --samples 512
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+
+import torch
+
+from bench_utils import (
+    INTENT_CSV_FILES,
+    NER_CSV_FILES,
+    add_src_to_path,
+    batched,
+    load_texts,
+    percentile,
+    print_table,
+    summarize_latencies,
+)
+
+add_src_to_path()
+from models.bucketing import LENGTH_BUCKETS, bucket_length, tokenize_bucketed  # noqa: E402
+from models.engines import ENGINE_TORCH, SUPPORTED_ENGINES  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+MAX_LENGTH = 256
+STRATEGIES = {
+    "max_length": (MAX_LENGTH,),
+    "longest": (),
+    "bucketed": LENGTH_BUCKETS,
+}
+TASKS = {
+    "intent": (IntentClassifier, INTENT_CSV_FILES),
+    "ner": (NERExtractor, NER_CSV_FILES),
+}
+
+
+def length_distribution(tokenizer, task: str, texts):
+    lengths = [len(ids) for ids in tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]]
+    buckets = Counter(bucket_length(length) for length in lengths)
+    print(
+        f"\n{task}: {len(lengths)} texts, tokens p50={percentile(lengths, 50):.0f} "
+        f"p95={percentile(lengths, 95):.0f} max={max(lengths)}"
+    )
+    print_table(
+        ["bucket", "texts", "share"],
+        [[bucket, count, f"{count / len(lengths):.1%}"] for bucket, count in sorted(buckets.items())]
+    )
+
+
+def run_strategy(model, texts, batch_size: int, buckets):
+    """Latency (ms) từng batch + tỉ lệ token padding"""
+    latencies = []
+    real_tokens = 0
+    total_tokens = 0
+    for batch in batched(texts, batch_size):
+        started = time.perf_counter()
+        for _, inputs, _ in tokenize_bucketed(model.tokenizer, batch, max_length=MAX_LENGTH, buckets=buckets):
+            model.engine(inputs)
+            real_tokens += int(inputs["attention_mask"].sum())
+            total_tokens += inputs["attention_mask"].numel()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, 1 - real_tokens / total_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark padding strategies on real query lengths")
+    parser.add_argument("--task", choices=["intent", "ner", "all"], default="all")
+    parser.add_argument("--engine", choices=SUPPORTED_ENGINES, default=ENGINE_TORCH)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32])
+    parser.add_argument("--samples", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    rows = []
+    tasks = list(TASKS) if args.task == "all" else [args.task]
+    for task in tasks:
+        model_class, csv_files = TASKS[task]
+        texts = load_texts(csv_files)
+        # Trộn như traffic thật (CSV được sinh theo từng template liền nhau)
+        random.Random(42).shuffle(texts)
+        texts = texts[:args.samples]
+
+        model = model_class(engine=args.engine)
+        asyncio.run(model.load_model())
+        length_distribution(model.tokenizer, task, texts)
+
+        for batch_size in args.batch_sizes:
+            for strategy, buckets in STRATEGIES.items():
+                run_strategy(model, texts[:batch_size * 4], batch_size, buckets)  # warm-up
+                latencies, padding_ratio = run_strategy(model, texts, batch_size, buckets)
+                stats = summarize_latencies(latencies)
+                throughput = len(texts) / (sum(latencies) / 1000)
+                rows.append([
+                    task, batch_size, strategy, f"{padding_ratio:.1%}", stats["p50"], stats["p95"], throughput
+                ])
+        del model
+
+    print()
+    print_table(["task", "batch", "padding", "pad tokens", "p50 ms", "p95 ms", "texts/s"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark chi phí tokenize mỗi câu (µs/query) của đường /analyze
+
+/analyze tokenize cùng 1 câu cho intent và cho NER (có offsets). So sánh:
+- slow / fast tokenizer, không cache: 2 lần tokenize mỗi câu
+- có TokenizationCache: lần đầu gặp câu (miss) và câu lặp lại (hit)
+
+Usage:
+    python scripts/benchmark_tokenization.py --limit 2000
+    python scripts/benchmark_tokenization.py --model-name /tmp/agribot-tiny/phobert --repeat 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from bench_utils import INTENT_CSV_FILES, NER_CSV_FILES, add_src_to_path, load_texts, print_table
+
+add_src_to_path()
+from models.fast_tokenizer import build_fast_phobert_tokenizer  # noqa: E402
+from models.token_cache import TokenizationCache, encode_texts  # noqa: E402
+from transformers import AutoTokenizer  # noqa: E402
+
+
+def analyze_uncached(tokenizer, texts):
+    """Như trước: intent tokenize 1 lần, NER tokenize thêm 1 lần (có offsets nếu được)"""
+    for text in texts:
+        encode_texts(tokenizer, [text], 256, return_offsets=False)
+        encode_texts(tokenizer, [text], 256, return_offsets=True)
+
+
+def analyze_cached(tokenizer, texts, cache: TokenizationCache):
+    for text in texts:
+        cache.encode(tokenizer, [text])
+        cache.encode(tokenizer, [text])
+
+
+def time_us_per_query(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - started)
+    return best / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-query tokenization cost of /analyze")
+    parser.add_argument("--model-name", default=os.getenv("PHOBERT_MODEL_NAME", "vinai/phobert-base"))
+    parser.add_argument("--limit", type=int, default=2000, help="Rows per CSV")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = list(dict.fromkeys(load_texts(INTENT_CSV_FILES + NER_CSV_FILES, args.limit)))
+    slow = AutoTokenizer.from_pretrained(args.model_name)
+    tokenizers = [("slow", slow), ("fast", build_fast_phobert_tokenizer(slow))]
+
+    rows = []
+    for name, tokenizer in tokenizers:
+        uncached = time_us_per_query(lambda batch: analyze_uncached(tokenizer, batch), texts, args.repeat)
+
+        # cache mới cho mỗi lần đo -> mọi câu đều miss lần đầu, lần thứ 2 (NER) hit
+        miss = time_us_per_query(
+            lambda batch: analyze_cached(tokenizer, batch, TokenizationCache(len(batch))), texts, args.repeat
+        )
+        cache = TokenizationCache(len(texts))
+        analyze_cached(tokenizer, texts, cache)
+        warm = cache.stats()
+        hit = time_us_per_query(lambda batch: analyze_cached(tokenizer, batch, cache), texts, args.repeat)
+        stats = cache.stats()
+        hit_rate = (stats["hits"] - warm["hits"]) / ((stats["hits"] + stats["misses"]) - (warm["hits"] + warm["misses"]))
+
+        rows.append([name, "no cache", uncached, "-"])
+        rows.append([name, "cache, new text", miss, 0.5])
+        rows.append([name, "cache, repeated text", hit, hit_rate])
+
+    print(f"{len(texts)} unique texts, intent + NER tokenization per /analyze query")
+    print_table(["tokenizer", "case", "µs/query", "hit rate"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark requests/s theo số worker của src/serve.py + tổng bộ nhớ
+
+Với mỗi giá trị --workers: start launcher, chờ /ready, bắn /analyze với
+--concurrency client trong --duration giây, rồi đọc RSS và PSS của process
+cha + các worker từ /proc (PSS chia đều page dùng chung -> thấy được lợi ích copy-on-write).
+Chỉ chạy trên Linux.
+
+Usage:
+    python scripts/benchmark_workers.py --workers 1 2 4 --concurrency 16 --duration 30
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from bench_utils import INTENT_CSV_FILES, SRC_DIR, load_texts, print_table, summarize_latencies
+
+
+def process_tree(pid: int) -> List[int]:
+    """pid cha + toàn bộ process con (đệ quy)"""
+    pids = [pid]
+    children_file = Path(f"/proc/{pid}/task/{pid}/children")
+    if children_file.exists():
+        for child in children_file.read_text().split():
+            pids.extend(process_tree(int(child)))
+    return pids
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    """Tổng RSS và PSS (MB) của cây process"""
+    rss = pss = 0
+    for tree_pid in process_tree(pid):
+        try:
+            for line in Path(f"/proc/{tree_pid}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Rss:"):
+                    rss += int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss += int(line.split()[1])
+        except FileNotFoundError:
+            continue
+    return {"rss": rss / 1024, "pss": pss / 1024}
+
+
+async def wait_ready(base_url: str, timeout_s: float):
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(1)
+    raise TimeoutError(f"Service at {base_url} not ready after {timeout_s}s")
+
+
+async def closed_loop(base_url: str, texts: List[str], concurrency: int, duration_s: float):
+    """N client, mỗi client gửi request tiếp theo ngay khi nhận response"""
+    latencies: List[float] = []
+    errors = 0
+    text_cycle = itertools.cycle(texts)
+    stop_at = time.monotonic() + duration_s
+
+    async def user(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/analyze", json={"text": next(text_cycle)})
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        await asyncio.gather(*[user(client) for _ in range(concurrency)])
+    return latencies, errors
+
+
+def run_case(workers: int, args, texts: List[str]) -> List:
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    command = [
+        sys.executable, str(SRC_DIR / "serve.py"),
+        "--workers", str(workers),
+        "--port", str(args.port),
+    ]
+    if args.threads_per_worker:
+        command += ["--threads-per-worker", str(args.threads_per_worker)]
+
+    process = subprocess.Popen(command, cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url, args.startup_timeout))
+        latencies, errors = asyncio.run(closed_loop(base_url, texts, args.concurrency, args.duration))
+        memory = memory_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    stats = summarize_latencies(latencies)
+    return [
+        workers,
+        len(latencies) / args.duration,
+        stats["p50"],
+        stats["p95"],
+        errors,
+        memory["rss"],
+        memory["pss"],
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serve.py scaling with worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads-per-worker", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    texts = load_texts(INTENT_CSV_FILES, 2000)
+    rows = [run_case(workers, args, texts) for workers in args.workers]
+    print_table(["workers", "req/s", "p50 ms", "p95 ms", "errors", "total RSS MB", "total PSS MB"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Sinh src/models/gazetteer.json (cụm từ cho rule-based NER) từ ENTITY_DATA của train/generate_ner_data_v2.py
+và src/models/crop_synonyms.json (nhóm tên gọi của cùng 1 cây, dùng để link crop_id, xem models/crop_linker.py)
+
+- crop_name: toàn bộ cây trồng nhiều âm tiết trong ENTITY_DATA["CROP"] + các cụm cũ hardcode trong NERExtractor
+- device_name: thiết bị nhiều âm tiết trong ENTITY_DATA["DEVICE"] + các cụm cũ
+- Chỉ giữ cụm >= 2 âm tiết: tiếng Việt tách âm tiết bằng dấu cách nên 1 âm tiết khớp cả trong từ ghép
+  ("điều" trong "điều khiển", "cam" trong "cam kết", "tưới" là động từ) -> để PhoBERT xử lý
+- farm_area / duration / date có dạng tham số (khu A, 10 phút, tháng 11) -> regex trong models/gazetteer.py
+- crop_synonyms: CROP_SYNONYMS của train/scripts/augment_ner_data.py + tên gọi theo vùng miền bên dưới,
+  mọi cây trong ENTITY_DATA["CROP"] (kể cả 1 âm tiết) đều có nhóm riêng
+
+Usage:
+    python scripts/build_gazetteer.py
+"""
+
+import argparse
+import ast
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from bench_utils import PROJECT_ROOT, SRC_DIR
+
+GENERATOR_FILE = PROJECT_ROOT / "train" / "generate_ner_data_v2.py"
+AUGMENT_FILE = PROJECT_ROOT / "train" / "scripts" / "augment_ner_data.py"
+OUTPUT_FILE = SRC_DIR / "models" / "gazetteer.json"
+SYNONYMS_OUTPUT_FILE = SRC_DIR / "models" / "crop_synonyms.json"
+
+# Cụm từ hardcode trước đây trong NERExtractor._extract_rule_based_entities
+LEGACY_PHRASES: Dict[str, List[str]] = {
+    "crop_name": [
+        "cà chua", "cà phê", "cà rốt", "cà tím", "khoai lang", "khoai tây", "khoai mì", "sầu riêng",
+        "thanh long", "hồ tiêu", "cao su", "đậu tương", "đậu phộng", "bắp cải", "rau muống", "rau dền",
+        "dưa chuột", "dưa hấu", "su su", "su hào", "củ cải",
+    ],
+    "device_name": ["máy bơm", "máy tưới", "máy phun", "van nước", "cảm biến", "hệ thống tưới"],
+}
+# ENTITY_DATA key -> entity type trả về cho NestJS
+SOURCES = {"CROP": "crop_name", "DEVICE": "device_name"}
+# Tên gọi khác nhau theo vùng miền của cùng 1 cây (đều có trong ENTITY_DATA["CROP"])
+REGIONAL_SYNONYMS: List[List[str]] = [
+    ["ngô", "bắp"],
+    ["khoai mì", "sắn"],
+    ["chè", "trà"],
+    ["dứa", "thơm", "khóm"],
+    ["lạc", "đậu phộng"],
+    ["vừng", "mè"],
+    ["đậu tương", "đậu nành"],
+    ["dưa chuột", "dưa leo"],
+    ["mướp đắng", "khổ qua"],
+    ["chanh dây", "chanh leo"],
+    ["súp lơ", "bông cải xanh"],
+    ["hồ tiêu", "tiêu"],
+]
+# CROP_SYNONYMS để "tiêu" trong nhóm "ớt" (chỉ đúng cho augment câu) -> bỏ, tiêu là hồ tiêu
+EXCLUDED_SYNONYMS = {"ớt": {"tiêu"}}
+
+
+def load_literal(path: Path, name: str):
+    """Đọc hằng số module-level bằng ast (không import / chạy script: cần pandas, random...)"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"{name} not found in {path}")
+
+
+def load_entity_data() -> Dict[str, List[str]]:
+    return load_literal(GENERATOR_FILE, "ENTITY_DATA")
+
+
+def build_phrases() -> Dict[str, List[str]]:
+    entity_data = load_entity_data()
+    phrases: Dict[str, List[str]] = {}
+    for source, entity_type in SOURCES.items():
+        candidates = LEGACY_PHRASES.get(entity_type, []) + entity_data.get(source, [])
+        unique = {}
+        for phrase in candidates:
+            phrase = " ".join(phrase.split())
+            if len(phrase.split()) >= 2:
+                unique.setdefault(phrase.lower(), phrase)
+        phrases[entity_type] = sorted(unique.values(), key=str.lower)
+    return phrases
+
+
+def build_crop_synonyms() -> List[List[str]]:
+    """
+    Nhóm tên của cùng 1 cây, tên đầu tiên là tên chuẩn. Mỗi tên chỉ thuộc 1 nhóm
+    (trùng thì nhóm gộp trước giữ), cây không có tên khác là nhóm 1 phần tử
+    """
+    groups: List[List[str]] = []
+    owner: Dict[str, int] = {}
+
+    def add_group(names: List[str]):
+        index = None
+        for name in names:
+            key = " ".join(name.split()).lower()
+            if key in owner:
+                index = owner[key]
+                break
+        if index is None:
+            index = len(groups)
+            groups.append([])
+        for name in names:
+            name = " ".join(name.split())
+            if name.lower() not in owner:
+                owner[name.lower()] = index
+                groups[index].append(name)
+
+    crop_synonyms = load_literal(AUGMENT_FILE, "CROP_SYNONYMS")
+    for canonical, variants in crop_synonyms.items():
+        excluded = EXCLUDED_SYNONYMS.get(canonical, set())
+        add_group([canonical] + [v for v in variants if v not in excluded and v != canonical])
+    for names in REGIONAL_SYNONYMS:
+        add_group(names)
+    for name in LEGACY_PHRASES["crop_name"] + load_entity_data()["CROP"]:
+        add_group([name])
+    return sorted(groups, key=lambda group: group[0].lower())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the rule-based NER gazetteer from ENTITY_DATA")
+    parser.add_argument("--output", default=str(OUTPUT_FILE))
+    parser.add_argument("--synonyms-output", default=str(SYNONYMS_OUTPUT_FILE))
+    args = parser.parse_args()
+
+    phrases = build_phrases()
+    Path(args.output).write_text(json.dumps(phrases, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    for entity_type, values in phrases.items():
+        print(f"{entity_type}: {len(values)} phrases")
+    print(f"✅ Saved to {args.output}")
+
+    groups = build_crop_synonyms()
+    Path(args.synonyms_output).write_text(
+        json.dumps({"groups": groups}, ensure_ascii=False, indent=1) + "\n", encoding="utf-8"
+    )
+    print(f"crop synonyms: {len(groups)} groups, {sum(map(len, groups))} names")
+    print(f"✅ Saved to {args.synonyms_output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Parity check PyTorch vs ONNX trên các CSV trong train/data
+
+- Intent: tỉ lệ trùng top-1 intent
+- NER: tỉ lệ trùng label trên từng token (bỏ padding và special tokens)
+Exit code 1 nếu tỉ lệ nào thấp hơn --min-agreement (mặc định 99%)
+
+Usage:
+    python scripts/check_onnx_parity.py --engine onnx-int8
+"""
+
+import argparse
+import asyncio
+import sys
+
+import numpy as np
+import torch
+
+from bench_utils import INTENT_CSV_FILES, NER_CSV_FILES, add_src_to_path, batched, load_texts
+
+add_src_to_path()
+from models.engines import ENGINE_ONNX, ENGINE_ONNX_INT8, OnnxEngine  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+
+def intent_agreement(texts, batch_size: int, engine: str) -> float:
+    classifier = IntentClassifier()
+    asyncio.run(classifier.load_model())
+    onnx_engine = OnnxEngine.from_model_dir(classifier.model_dir, engine)
+
+    matched = 0
+    for batch in batched(texts, batch_size):
+        inputs = classifier.tokenizer(batch, return_tensors="pt", truncation=True, max_length=256, padding=True)
+        torch_top1 = torch.argmax(classifier.engine(inputs), dim=-1).cpu()
+        onnx_top1 = torch.argmax(onnx_engine(inputs), dim=-1)
+        matched += int((torch_top1 == onnx_top1).sum())
+    return matched / len(texts)
+
+
+def ner_agreement(texts, batch_size: int, engine: str) -> float:
+    extractor = NERExtractor()
+    asyncio.run(extractor.load_model())
+    onnx_engine = OnnxEngine.from_model_dir(extractor.model_dir, engine)
+    special_ids = list(extractor.tokenizer.all_special_ids)
+
+    matched = 0
+    total = 0
+    for batch in batched(texts, batch_size):
+        inputs = extractor.tokenizer(batch, return_tensors="pt", truncation=True, max_length=256, padding=True)
+        torch_labels = torch.argmax(extractor.engine(inputs), dim=-1).cpu().numpy()
+        onnx_labels = torch.argmax(onnx_engine(inputs), dim=-1).numpy()
+        # Chỉ so sánh token thật (bỏ <s>, </s>, <pad>)
+        mask = ~np.isin(inputs["input_ids"].numpy(), special_ids)
+        matched += int((torch_labels == onnx_labels)[mask].sum())
+        total += int(mask.sum())
+    return matched / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check PyTorch vs ONNX prediction parity")
+    parser.add_argument("--engine", choices=[ENGINE_ONNX, ENGINE_ONNX_INT8], default=ENGINE_ONNX_INT8)
+    parser.add_argument("--task", choices=["intent", "ner", "all"], default="all")
+    parser.add_argument("--limit", type=int, default=None, help="Max texts per task")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args()
+
+    failed = False
+    if args.task in ("intent", "all"):
+        texts = load_texts(INTENT_CSV_FILES, args.limit)
+        agreement = intent_agreement(texts, args.batch_size, args.engine)
+        ok = agreement >= args.min_agreement
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} Intent top-1 agreement ({args.engine}): {agreement:.4%} on {len(texts)} texts")
+
+    if args.task in ("ner", "all"):
+        texts = load_texts(NER_CSV_FILES, args.limit)
+        agreement = ner_agreement(texts, args.batch_size, args.engine)
+        ok = agreement >= args.min_agreement
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} NER token label agreement ({args.engine}): {agreement:.4%} on {len(texts)} texts")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+So sánh accuracy / latency / memory của các intent engine (teacher PhoBERT vs student distill,
+early-exit: thêm số layer PhoBERT chạy trung bình mỗi câu)
+
+Mỗi engine chạy trong 1 process con riêng để RSS không bị lẫn giữa các model.
+Đánh giá trên holdout của train_lexical_intent.py, latency đo batch-of-1 (tokenize + forward).
+
+Usage:
+    python scripts/compare_intent_engines.py --engines torch onnx-int8 student
+    python scripts/compare_intent_engines.py --engines torch early-exit
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from bench_utils import add_src_to_path, model_location, print_table, rss_mb, summarize_latencies
+from train_lexical_intent import load_split
+
+add_src_to_path()
+from models.engines import (  # noqa: E402
+    EARLY_EXIT_DIR_NAME,
+    ENGINE_STUDENT,
+    ENGINE_TORCH,
+    INTENT_ENGINES,
+    STUDENT_DIR_NAME,
+    EarlyExitEngine,
+    OnnxEngine,
+    StudentEngine,
+)
+from models.intent_classifier import IntentClassifier  # noqa: E402
+
+
+def engine_size(classifier: IntentClassifier):
+    """(số params, dung lượng weights trên disk MB)"""
+    engine = classifier.engine
+    if isinstance(engine, OnnxEngine):
+        return None, engine.model_path.stat().st_size / 1e6
+    if isinstance(engine, StudentEngine):
+        files = list((classifier.model_dir / STUDENT_DIR_NAME).glob("*.pt"))
+        model = engine.model
+    else:
+        files = [p for p in classifier.model_dir.glob("*") if p.suffix in (".bin", ".safetensors")]
+        model = classifier.model
+    params = sum(p.numel() for p in model.parameters())
+    if isinstance(engine, EarlyExitEngine):
+        files += list((classifier.model_dir / EARLY_EXIT_DIR_NAME).glob("*.pt"))
+        params += sum(p.numel() for p in engine.heads.parameters())
+    return params, sum(p.stat().st_size for p in files) / 1e6
+
+
+def run_single(engine: str, limit: int):
+    """Chạy trong process con, in 1 dòng JSON"""
+    rows = load_split()[1][:limit]
+    texts = [text for text, _ in rows]
+
+    baseline_rss = rss_mb()
+    classifier = IntentClassifier(engine=engine, **model_location("intent_classifier"))
+    asyncio.run(classifier.load_model())
+    classifier.warmup(texts[:8])
+    loaded_rss = rss_mb()
+
+    predictions, latencies = [], []
+    for text in texts:
+        started = time.perf_counter()
+        predictions.append(classifier.predict_batch([text], [1])[0]["intent"])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    params, disk_mb = engine_size(classifier)
+    early_exit = classifier.early_exit_stats()
+    print(json.dumps({
+        "engine": engine,
+        "params": params,
+        "disk_mb": disk_mb,
+        "rss_mb": loaded_rss - baseline_rss,
+        "accuracy": sum(p == label for p, (_, label) in zip(predictions, rows)) / len(rows),
+        "predictions": predictions,
+        "latency": summarize_latencies(latencies),
+        # PhoBERT-base có 12 layer, engine khác early-exit không đếm
+        "avg_layers": early_exit["avg_layers"] if early_exit else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare intent engines (accuracy / latency / memory)")
+    parser.add_argument("--engines", nargs="+", choices=INTENT_ENGINES, default=[ENGINE_TORCH, ENGINE_STUDENT])
+    parser.add_argument("--limit", type=int, default=1000, help="Holdout texts to evaluate")
+    parser.add_argument("--single", choices=INTENT_ENGINES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single, args.limit)
+        return 0
+
+    results = []
+    for engine in args.engines:
+        output = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--single", engine, "--limit", str(args.limit)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        # dòng JSON cuối cùng (bỏ log của model)
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    teacher = next((r for r in results if r["engine"] == ENGINE_TORCH), None)
+    rows = []
+    for result in results:
+        agreement = (
+            sum(a == b for a, b in zip(result["predictions"], teacher["predictions"])) / len(result["predictions"])
+            if teacher else None
+        )
+        rows.append([
+            result["engine"],
+            f"{result['params'] / 1e6:.1f}M" if result["params"] else "-",
+            result["disk_mb"],
+            result["rss_mb"],
+            f"{result['accuracy']:.2%}",
+            f"{agreement:.2%}" if agreement is not None else "-",
+            result["latency"]["p50"],
+            result["latency"]["p95"],
+            result.get("avg_layers") or "-",
+        ])
+    print_table(
+        ["engine", "params", "disk MB", "RSS MB", "accuracy", "agreement w/ teacher", "p50 ms", "p95 ms",
+         "avg layers"],
+        rows
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
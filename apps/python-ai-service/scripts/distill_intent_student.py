@@ -0,0 +1,144 @@
+"""
+Distill PhoBERT intent classifier (teacher, models/intent_classifier) sang BiLSTM student
+
+- Transfer set: train split của intent_data_augmented_5intents.csv (cùng split với
+  train_lexical_intent.py, holdout dùng để đánh giá)
+- Loss = alpha * T^2 * KL(student/T || teacher/T) + (1 - alpha) * CE(nhãn gốc)
+- Embedding student = PCA word embeddings của teacher xuống --embedding-dim
+- Chạy được trên CPU (~vài phút), lưu vào models/intent_classifier/student/
+
+Usage:
+    python scripts/distill_intent_student.py --epochs 8
+    INTENT_ENGINE=student python src/main.py
+"""
+
+import argparse
+import asyncio
+import time
+
+import torch
+import torch.nn.functional as F
+
+from bench_utils import add_src_to_path, batched, model_location
+from train_lexical_intent import load_split
+
+add_src_to_path()
+from models.engines import STUDENT_DIR_NAME  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.student import BiLSTMStudent  # noqa: E402
+
+MAX_LENGTH = 64  # câu hỏi intent ngắn, 64 subword là đủ
+
+
+def teacher_logits(teacher: IntentClassifier, texts, batch_size: int) -> torch.Tensor:
+    """Chạy teacher 1 lần trên toàn bộ transfer set"""
+    outputs = []
+    for batch in batched(texts, batch_size):
+        inputs = teacher.tokenizer(batch, return_tensors="pt", truncation=True, max_length=MAX_LENGTH, padding=True)
+        outputs.append(teacher.engine(inputs).float().cpu())
+    return torch.cat(outputs)
+
+
+def pca_embeddings(weight: torch.Tensor, dim: int) -> torch.Tensor:
+    """Chiếu word embeddings của teacher (vocab x 768) xuống vocab x dim"""
+    centered = weight - weight.mean(dim=0, keepdim=True)
+    _, _, v = torch.pca_lowrank(centered, q=dim, center=False)
+    projected = centered @ v[:, :dim]
+    # giữ scale tương đương nn.Embedding init
+    return projected / projected.std()
+
+
+def evaluate(student, tokenizer, texts, gold_ids, teacher_ids, batch_size: int):
+    student.eval()
+    predictions = []
+    with torch.no_grad():
+        for batch in batched(texts, batch_size):
+            inputs = tokenizer(batch, return_tensors="pt", truncation=True, max_length=MAX_LENGTH, padding=True)
+            predictions.append(student(inputs["input_ids"], inputs["attention_mask"]).argmax(dim=-1))
+    predictions = torch.cat(predictions)
+    return (predictions == gold_ids).float().mean().item(), (predictions == teacher_ids).float().mean().item()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill PhoBERT intent classifier into a BiLSTM student")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=2e-3)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="Weight of the distillation (KL) term")
+    parser.add_argument("--embedding-dim", type=int, default=128)
+    parser.add_argument("--hidden-size", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+
+    teacher = IntentClassifier(**model_location("intent_classifier"))
+    asyncio.run(teacher.load_model())
+    tokenizer = teacher.tokenizer
+    label_to_id = {label: idx for idx, label in enumerate(teacher.intent_labels)}
+
+    train_rows, holdout_rows = load_split()
+    train_texts = [text for text, _ in train_rows]
+    train_gold = torch.tensor([label_to_id[label] for _, label in train_rows])
+    holdout_texts = [text for text, _ in holdout_rows]
+    holdout_gold = torch.tensor([label_to_id[label] for _, label in holdout_rows])
+
+    started = time.perf_counter()
+    train_teacher = teacher_logits(teacher, train_texts, args.batch_size)
+    holdout_teacher = teacher_logits(teacher, holdout_texts, args.batch_size).argmax(dim=-1)
+    print(f"Teacher logits for {len(train_texts)} texts in {time.perf_counter() - started:.1f}s")
+    print(f"Teacher holdout accuracy: {(holdout_teacher == holdout_gold).float().mean().item():.4f}")
+
+    teacher_embeddings = teacher.model.get_input_embeddings().weight.detach().float()
+    student = BiLSTMStudent(
+        vocab_size=teacher_embeddings.size(0),
+        num_labels=len(teacher.intent_labels),
+        embedding_dim=args.embedding_dim,
+        hidden_size=args.hidden_size,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+    with torch.no_grad():
+        student.embedding.weight.copy_(pca_embeddings(teacher_embeddings, args.embedding_dim))
+    output_dir = teacher.model_dir / STUDENT_DIR_NAME
+    # Teacher không cần nữa, giải phóng RAM trước khi train
+    del teacher
+
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.lr)
+    temperature = args.temperature
+    for epoch in range(1, args.epochs + 1):
+        student.train()
+        order = torch.randperm(len(train_texts)).tolist()
+        total_loss = 0.0
+        for batch_ids in batched(order, args.batch_size):
+            inputs = tokenizer(
+                [train_texts[i] for i in batch_ids],
+                return_tensors="pt", truncation=True, max_length=MAX_LENGTH, padding=True
+            )
+            logits = student(inputs["input_ids"], inputs["attention_mask"])
+            soft_loss = F.kl_div(
+                F.log_softmax(logits / temperature, dim=-1),
+                F.softmax(train_teacher[batch_ids] / temperature, dim=-1),
+                reduction="batchmean",
+            ) * temperature ** 2
+            hard_loss = F.cross_entropy(logits, train_gold[batch_ids])
+            loss = args.alpha * soft_loss + (1 - args.alpha) * hard_loss
+
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            total_loss += loss.item() * len(batch_ids)
+
+        accuracy, agreement = evaluate(student, tokenizer, holdout_texts, holdout_gold, holdout_teacher, args.batch_size)
+        print(
+            f"Epoch {epoch}/{args.epochs}: loss={total_loss / len(train_texts):.4f} "
+            f"holdout_acc={accuracy:.4f} teacher_agreement={agreement:.4f}"
+        )
+
+    student.save_pretrained(output_dir, {"labels": list(label_to_id), "max_length": MAX_LENGTH})
+    print(f"✅ Saved student ({sum(p.numel() for p in student.parameters()) / 1e6:.1f}M params) to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Đánh giá cascade lexical -> PhoBERT trên holdout của train_lexical_intent.py
+
+Với mỗi ngưỡng: escalation rate, accuracy (cascade vs PhoBERT-only, so với nhãn gốc),
+độ trùng với PhoBERT và latency p50/p95 cho request đơn lẻ (batch-of-1)
+Latency cascade = lexical + PhoBERT (chỉ với câu bị escalate), đo trên cùng 1 lần chạy
+
+Lưu ý: PhoBERT được fine-tune trên toàn bộ CSV nên accuracy PhoBERT trên holdout là lạc quan;
+thêm --csv intent_data_5intents_cleaned.csv để đánh giá trên tập khác
+
+Usage:
+    python scripts/train_lexical_intent.py
+    python scripts/evaluate_cascade.py --thresholds 0.8 0.9 0.95
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_utils import MODELS_DIR, add_src_to_path, load_labeled_texts, print_table, summarize_latencies
+from train_lexical_intent import THRESHOLDS, load_split
+
+add_src_to_path()
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.lexical_intent import LexicalIntentClassifier  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate lexical -> PhoBERT intent cascade")
+    parser.add_argument("--model-dir", default=str(MODELS_DIR / "intent_lexical"))
+    parser.add_argument("--csv", default=None, help="Evaluate on this CSV instead of the holdout split")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=THRESHOLDS)
+    args = parser.parse_args()
+
+    rows = load_labeled_texts([args.csv], args.limit) if args.csv else load_split()[1][:args.limit]
+    texts = [text for text, _ in rows]
+    gold = np.array([label for _, label in rows])
+
+    lexical = LexicalIntentClassifier.load(Path(args.model_dir))
+    classifier = IntentClassifier()  # cascade tắt: luôn chạy PhoBERT
+    asyncio.run(classifier.load_model())
+    classifier.warmup(texts[:8])
+
+    lexical_ms, lexical_pred, lexical_conf = [], [], []
+    phobert_ms, phobert_pred = [], []
+    for text in texts:
+        started = time.perf_counter()
+        intent, confidence, _ = lexical.predict(text)
+        lexical_ms.append((time.perf_counter() - started) * 1000)
+        lexical_pred.append(intent)
+        lexical_conf.append(confidence)
+
+        started = time.perf_counter()
+        result = classifier.predict_batch([text], [3])[0]
+        phobert_ms.append((time.perf_counter() - started) * 1000)
+        phobert_pred.append(result["intent"])
+
+    lexical_ms, phobert_ms = np.array(lexical_ms), np.array(phobert_ms)
+    lexical_pred, phobert_pred = np.array(lexical_pred), np.array(phobert_pred)
+    lexical_conf = np.array(lexical_conf)
+
+    phobert_latency = summarize_latencies(phobert_ms.tolist())
+    table = [[
+        "phobert-only", "100.00%", f"{(phobert_pred == gold).mean():.2%}", "100.00%",
+        phobert_latency["p50"], phobert_latency["p95"], 1.0
+    ]]
+    for threshold in args.thresholds:
+        escalated = lexical_conf < threshold
+        predicted = np.where(escalated, phobert_pred, lexical_pred)
+        latency = summarize_latencies((lexical_ms + np.where(escalated, phobert_ms, 0.0)).tolist())
+        table.append([
+            f"cascade@{threshold}",
+            f"{escalated.mean():.2%}",
+            f"{(predicted == gold).mean():.2%}",
+            f"{(predicted == phobert_pred).mean():.2%}",
+            latency["p50"],
+            latency["p95"],
+            phobert_latency["p50"] / latency["p50"] if latency["p50"] else 0.0,
+        ])
+
+    print(f"\nIntent cascade on {len(texts)} texts ({args.csv or 'holdout split'})\n")
+    print_table(
+        ["mode", "escalation rate", "accuracy", "agreement w/ PhoBERT", "p50 ms", "p95 ms", "p50 speedup"],
+        table
+    )
+
+
+if __name__ == "__main__":
+    main()
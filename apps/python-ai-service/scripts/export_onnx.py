@@ -0,0 +1,98 @@
+"""
+Export fine-tuned PhoBERT models (intent + NER) sang ONNX, tùy chọn int8 dynamic quantization
+
+Output:
+    models/intent_classifier/onnx/model.onnx (+ model.int8.onnx nếu --quantize)
+    models/ner_extractor/onnx/model.onnx     (+ model.int8.onnx nếu --quantize)
+
+Usage:
+    python scripts/export_onnx.py --task all --quantize
+Sau đó chạy service với INTENT_ENGINE=onnx-int8 NER_ENGINE=onnx-int8
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoModelForTokenClassification, AutoTokenizer
+
+from bench_utils import MODELS_DIR, add_src_to_path
+
+add_src_to_path()
+from models.engines import ONNX_DIR_NAME, ONNX_FP32_FILE, ONNX_INT8_FILE  # noqa: E402
+
+TASKS = {
+    "intent": ("intent_classifier", AutoModelForSequenceClassification),
+    "ner": ("ner_extractor", AutoModelForTokenClassification),
+}
+
+
+def export_task(task: str, tokenizer, opset: int, quantize: bool, models_dir: Path = MODELS_DIR):
+    dir_name, model_class = TASKS[task]
+    model_dir = models_dir / dir_name
+    if not model_dir.exists():
+        raise FileNotFoundError(f"Fine-tuned model not found at {model_dir}")
+
+    print(f"📦 Loading {task} model from {model_dir}...")
+    model = model_class.from_pretrained(model_dir)
+    # Trả tuple thay vì ModelOutput để torch.onnx trace được
+    model.config.return_dict = False
+    model.eval()
+
+    output_dir = model_dir / ONNX_DIR_NAME
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_dir / ONNX_FP32_FILE
+
+    dummy = tokenizer(["bật máy bơm ở khu A trong 10 phút"], return_tensors="pt")
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "sequence"},
+        "attention_mask": {0: "batch", 1: "sequence"},
+        "logits": {0: "batch"} if task == "intent" else {0: "batch", 1: "sequence"},
+    }
+
+    print(f"🔧 Exporting {task} -> {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+            # Exporter TorchScript (dynamic_axes); torch mới mặc định dùng dynamo cần onnxscript
+            dynamo=False,
+        )
+    print(f"   fp32 size: {fp32_path.stat().st_size / (1024 * 1024):.1f} MB")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = output_dir / ONNX_INT8_FILE
+        print(f"🔧 Quantizing (dynamic int8) -> {int8_path}")
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"   int8 size: {int8_path.stat().st_size / (1024 * 1024):.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export PhoBERT intent/NER models to ONNX")
+    parser.add_argument("--task", choices=["intent", "ner", "all"], default="all")
+    parser.add_argument("--tokenizer", default="vinai/phobert-base", help="Tokenizer name or path")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--quantize", action="store_true", help="Also write dynamic int8 model")
+    parser.add_argument("--models-dir", default=str(MODELS_DIR), help="Directory holding intent_classifier/ner_extractor")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    tasks = list(TASKS) if args.task == "all" else [args.task]
+    for task in tasks:
+        export_task(task, tokenizer, args.opset, args.quantize, Path(args.models_dir))
+
+    print("✅ Done. Verify with: python scripts/check_onnx_parity.py")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
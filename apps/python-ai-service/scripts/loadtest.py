@@ -0,0 +1,281 @@
+"""
+Load test python-ai-service bằng câu thật trong train/data/*.csv
+
+2 chế độ:
+- closed: N user đồng thời, mỗi user gửi request tiếp theo ngay khi nhận response
+  (đo throughput tối đa ở mức concurrency đó)
+- open: gửi theo lịch cố định QPS bất kể server trả lời nhanh hay chậm
+  (latency tính từ thời điểm lẽ ra phải gửi -> không bị coordinated omission)
+
+Mỗi bước (1 giá trị --concurrency hoặc --qps) báo: throughput, p50/p95/p99,
+tỉ lệ lỗi, tỉ lệ bị shed (429/503), tỉ lệ degraded và RSS của server theo thời gian.
+Chạy nhiều bước tăng dần -> saturation curve (lưu --output-json để so giữa các release).
+
+Không cần tải model: --fixture trỏ tới thư mục sinh bởi scripts/make_tiny_fixture.py,
+script tự start src/serve.py với PHOBERT_MODEL_NAME/MODELS_DIR của fixture.
+
+Usage:
+    python scripts/make_tiny_fixture.py --output /tmp/agribot-tiny
+    python scripts/loadtest.py --fixture /tmp/agribot-tiny --mode open --qps 10 25 50 100 --duration 20
+    python scripts/loadtest.py --base-url http://localhost:8000 --mode closed --concurrency 1 4 16 --endpoint mix
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench_utils import INTENT_CSV_FILES, NER_CSV_FILES, SRC_DIR, load_texts, print_table, summarize_latencies
+from benchmark_workers import memory_mb, wait_ready
+
+ENDPOINTS = {
+    "analyze": "/analyze",
+    "intent": "/intent/classify",
+    "ner": "/ner/extract",
+}
+SHED_STATUS_CODES = (429, 503)
+
+
+class StepResult:
+    """Kết quả 1 bước load (1 mức QPS / concurrency)"""
+
+    def __init__(self, load: float, duration_s: float):
+        self.load = load
+        self.duration_s = duration_s
+        self.latencies_ms: List[float] = []
+        self.status_counts: Counter = Counter()
+        self.transport_errors = 0
+        self.degraded = 0
+        # (giây kể từ lúc bắt đầu bước, RSS MB)
+        self.rss_samples: List[Tuple[float, float]] = []
+
+    def record(self, status_code: int, latency_ms: float, degraded: bool):
+        self.status_counts[status_code] += 1
+        if status_code == 200:
+            self.latencies_ms.append(latency_ms)
+            self.degraded += int(degraded)
+
+    @property
+    def total(self) -> int:
+        return sum(self.status_counts.values()) + self.transport_errors
+
+    def summary(self) -> Dict[str, Any]:
+        total = self.total or 1
+        ok = self.status_counts[200]
+        shed = sum(self.status_counts[code] for code in SHED_STATUS_CODES)
+        errors = total - ok - shed if self.total else 0
+        rss = [value for _, value in self.rss_samples]
+        return {
+            "load": self.load,
+            "requests": self.total,
+            "throughput_rps": ok / self.duration_s,
+            **{f"{key}_ms": value for key, value in summarize_latencies(self.latencies_ms).items()},
+            "error_rate": errors / total,
+            "shed_rate": shed / total,
+            "degraded_rate": self.degraded / (ok or 1),
+            "status_counts": {str(code): count for code, count in sorted(self.status_counts.items())},
+            "transport_errors": self.transport_errors,
+            "rss_start_mb": rss[0] if rss else None,
+            "rss_max_mb": max(rss) if rss else None,
+            "rss_end_mb": rss[-1] if rss else None,
+            "rss_timeline": self.rss_samples,
+        }
+
+
+def build_workload(endpoint: str, limit: Optional[int], seed: int) -> List[Tuple[str, str]]:
+    """(path, text), câu intent cho /intent/classify, câu NER cho /ner/extract, trộn cả 2 cho /analyze"""
+    intent_texts = load_texts(INTENT_CSV_FILES, limit)
+    ner_texts = load_texts(NER_CSV_FILES, limit)
+    if endpoint == "intent":
+        workload = [(ENDPOINTS["intent"], text) for text in intent_texts]
+    elif endpoint == "ner":
+        workload = [(ENDPOINTS["ner"], text) for text in ner_texts]
+    elif endpoint == "analyze":
+        workload = [(ENDPOINTS["analyze"], text) for text in intent_texts + ner_texts]
+    else:
+        # mix: giống traffic thật từ NestJS, chủ yếu /analyze
+        workload = (
+            [(ENDPOINTS["analyze"], text) for text in intent_texts + ner_texts]
+            + [(ENDPOINTS["intent"], text) for text in intent_texts[: len(intent_texts) // 4]]
+            + [(ENDPOINTS["ner"], text) for text in ner_texts[: len(ner_texts) // 4]]
+        )
+    random.Random(seed).shuffle(workload)
+    return workload
+
+
+async def send(client: httpx.AsyncClient, base_url: str, path: str, text: str, result: StepResult, started: float):
+    try:
+        response = await client.post(f"{base_url}{path}", json={"text": text})
+    except httpx.TransportError:
+        result.transport_errors += 1
+        return
+    latency_ms = (time.perf_counter() - started) * 1000
+    degraded = False
+    if response.status_code == 200:
+        degraded = bool(response.json().get("degraded", False))
+    result.record(response.status_code, latency_ms, degraded)
+
+
+async def sample_rss(pid: Optional[int], result: StepResult, stop: asyncio.Event, interval_s: float = 1.0):
+    """RSS server mỗi giây (chỉ khi script tự start server, cần /proc)"""
+    if pid is None:
+        return
+    step_started = time.monotonic()
+    while not stop.is_set():
+        result.rss_samples.append((round(time.monotonic() - step_started, 1), memory_mb(pid)["rss"]))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval_s)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def open_loop(client, base_url, workload, qps: float, duration_s: float, result: StepResult):
+    """Gửi request thứ i tại started + i / qps, không chờ response"""
+    tasks = set()
+    interval = 1.0 / qps
+    total = int(qps * duration_s)
+    started = time.perf_counter()
+    for index in range(total):
+        scheduled = started + index * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        path, text = workload[index % len(workload)]
+        task = asyncio.create_task(send(client, base_url, path, text, result, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def closed_loop(client, base_url, workload, concurrency: int, duration_s: float, result: StepResult):
+    """N user, mỗi user gửi request tiếp theo ngay khi nhận response"""
+    stop_at = time.monotonic() + duration_s
+    cursor = 0
+
+    async def user():
+        nonlocal cursor
+        while time.monotonic() < stop_at:
+            path, text = workload[cursor % len(workload)]
+            cursor += 1
+            await send(client, base_url, path, text, result, time.perf_counter())
+
+    await asyncio.gather(*[user() for _ in range(concurrency)])
+
+
+async def run_step(args, workload, load: float, server_pid: Optional[int]) -> StepResult:
+    result = StepResult(load, args.duration)
+    stop = asyncio.Event()
+    # open loop: đủ connection cho request đang chờ, không để client thành nút thắt
+    max_connections = int(load) if args.mode == "closed" else args.max_connections
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        sampler = asyncio.create_task(sample_rss(server_pid, result, stop))
+        if args.mode == "open":
+            await open_loop(client, args.base_url, workload, load, args.duration, result)
+        else:
+            await closed_loop(client, args.base_url, workload, int(load), args.duration, result)
+        stop.set()
+        await sampler
+    return result
+
+
+def start_server(args) -> subprocess.Popen:
+    fixture = Path(args.fixture).resolve()
+    env = dict(
+        os.environ,
+        PYTHONUNBUFFERED="1",
+        PHOBERT_MODEL_NAME=str(fixture / "phobert"),
+        MODELS_DIR=str(fixture / "models"),
+    )
+    command = [sys.executable, str(SRC_DIR / "serve.py"), "--workers", str(args.workers), "--port", str(args.port)]
+    return subprocess.Popen(command, cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def run(args, workload, server_pid: Optional[int]) -> List[Dict[str, Any]]:
+    await wait_ready(args.base_url, args.startup_timeout)
+    loads = args.qps if args.mode == "open" else args.concurrency
+    summaries = []
+    for load in loads:
+        result = await run_step(args, workload, load, server_pid)
+        summaries.append(result.summary())
+        if args.cooldown:
+            await asyncio.sleep(args.cooldown)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test python-ai-service with texts from train/data")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None, help="Running service (default http://127.0.0.1:<port>)")
+    target.add_argument("--fixture", default=None, help="Tiny model fixture dir -> start src/serve.py with it")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed")
+    parser.add_argument("--qps", type=float, nargs="+", default=[5, 10, 25, 50, 100], help="Open-loop steps")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32], help="Closed-loop steps")
+    parser.add_argument("--endpoint", choices=[*ENDPOINTS, "mix"], default="analyze")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per step")
+    parser.add_argument("--cooldown", type=float, default=2, help="Pause between steps")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-connections", type=int, default=256, help="Open-loop connection pool")
+    parser.add_argument("--limit", type=int, default=None, help="Rows per CSV")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="serve.py workers (with --fixture)")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    parser.add_argument("--label", default=None, help="Release label stored in the JSON report")
+    parser.add_argument("--output-json", default=None)
+    args = parser.parse_args()
+    if args.base_url is None:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+
+    workload = build_workload(args.endpoint, args.limit, args.seed)
+    print(f"Workload: {len(workload)} texts, endpoint={args.endpoint}, mode={args.mode}")
+
+    process = start_server(args) if args.fixture else None
+    try:
+        summaries = asyncio.run(run(args, workload, process.pid if process else None))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=60)
+
+    load_header = "qps" if args.mode == "open" else "users"
+    print_table(
+        [load_header, "req/s", "p50 ms", "p95 ms", "p99 ms", "error %", "shed %", "degraded %", "RSS max MB"],
+        [
+            [
+                s["load"], s["throughput_rps"], s["p50_ms"], s["p95_ms"], s["p99_ms"],
+                s["error_rate"] * 100, s["shed_rate"] * 100, s["degraded_rate"] * 100,
+                s["rss_max_mb"] if s["rss_max_mb"] is not None else "-",
+            ]
+            for s in summaries
+        ],
+    )
+
+    if args.output_json:
+        report = {
+            "label": args.label,
+            "timestamp": time.time(),
+            "mode": args.mode,
+            "endpoint": args.endpoint,
+            "duration_s": args.duration,
+            "workers": args.workers if args.fixture else None,
+            "fixture": args.fixture,
+            "steps": summaries,
+        }
+        Path(args.output_json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Saved report to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
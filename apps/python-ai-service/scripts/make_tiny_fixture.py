@@ -0,0 +1,169 @@
+"""
+Sinh fixture PhoBERT "tí hon" (random weights) để chạy service / load test không cần tải model
+
+- Tokenizer: vocab.txt + bpe.codes đúng định dạng PhoBERT, sinh từ các CSV trong train/data
+  (ký tự + merges cho các từ phổ biến -> mọi subword sinh ra đều có trong vocab)
+- Model: RoBERTa 2 layer, hidden 32 (--layers / --hidden-size), cho intent (5 nhãn) và NER (13 nhãn BIO);
+  --layers 12 có cùng số layer với PhoBERT-base để thử early-exit (scripts/train_early_exit.py)
+- Output giống layout production:
+    <output>/phobert/                        -> PHOBERT_MODEL_NAME
+    <output>/models/intent_classifier/       -> MODELS_DIR=<output>/models
+    <output>/models/ner_extractor/
+
+Kết quả dự đoán là ngẫu nhiên, chỉ dùng để đo throughput / latency / bộ nhớ.
+
+Usage:
+    python scripts/make_tiny_fixture.py --output /tmp/agribot-tiny
+    PHOBERT_MODEL_NAME=/tmp/agribot-tiny/phobert MODELS_DIR=/tmp/agribot-tiny/models python src/main.py
+"""
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import torch
+from transformers import (
+    AutoTokenizer,
+    RobertaConfig,
+    RobertaForSequenceClassification,
+    RobertaForTokenClassification,
+)
+
+from bench_utils import DATA_DIR, add_src_to_path, load_texts
+
+add_src_to_path()
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+DEFAULT_OUTPUT = Path("/tmp/agribot-tiny")
+
+
+def build_bpe(texts: Iterable[str], max_words: int) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Vocab + merges kiểu PhoBERT (fastBPE): token giữa từ có hậu tố "@@"
+
+    Merges chỉ nối dần từ trái sang phải cho các từ phổ biến, nên mọi subword BPE sinh ra là
+    (1) 1 ký tự, (2) tiền tố của 1 từ phổ biến (giữa từ) hoặc (3) nguyên 1 từ phổ biến (cuối từ)
+    -> đều có trong vocab, không có <unk> với ký tự đã gặp
+    """
+    word_counts = Counter(word for text in texts for word in text.split())
+    char_counts: Counter = Counter()
+    for word, count in word_counts.items():
+        for char in word:
+            char_counts[char] += count
+
+    vocab: Dict[str, int] = {}
+    for char, count in char_counts.most_common():
+        vocab[char] = count
+        vocab[f"{char}@@"] = count
+
+    merges: List[str] = []
+    seen_merges = set()
+    for word, count in word_counts.most_common(max_words):
+        if len(word) < 2:
+            continue
+        symbols = list(word[:-1]) + [word[-1] + "</w>"]
+        current = symbols[0]
+        for symbol in symbols[1:]:
+            if (current, symbol) not in seen_merges:
+                seen_merges.add((current, symbol))
+                merges.append(f"{current} {symbol} {count}")
+            current += symbol
+            if current.endswith("</w>"):
+                vocab.setdefault(current[:-4], count)
+            else:
+                vocab.setdefault(f"{current}@@", count)
+    return vocab, merges
+
+
+def tiny_config(vocab_size: int, labels: List[str], num_layers: int = 2, hidden_size: int = 32) -> RobertaConfig:
+    return RobertaConfig(
+        vocab_size=vocab_size,
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=258,  # như PhoBERT-base (256 + 2)
+        type_vocab_size=1,
+        pad_token_id=1,
+        bos_token_id=0,
+        eos_token_id=2,
+        layer_norm_eps=1e-5,
+        tokenizer_class="PhobertTokenizer",
+        id2label=dict(enumerate(labels)),
+        label2id={label: idx for idx, label in enumerate(labels)},
+    )
+
+
+def write_label_mapping(model_dir: Path, labels: List[str], **extra):
+    mapping = {"label_to_id": {label: idx for idx, label in enumerate(labels)}, **extra}
+    (model_dir / "label_mapping.json").write_text(json.dumps(mapping, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def write_fixture(
+    output: Path,
+    max_words: int = 4000,
+    seed: int = 0,
+    texts: List[str] = None,
+    num_layers: int = 2,
+    hidden_size: int = 32,
+) -> Path:
+    """Ghi tokenizer + model intent / NER tí hon vào output, trả thư mục tokenizer"""
+    tokenizer_dir = output / "phobert"
+    tokenizer_dir.mkdir(parents=True, exist_ok=True)
+
+    if texts is None:
+        texts = load_texts(sorted(path.name for path in DATA_DIR.glob("*.csv")))
+    vocab, merges = build_bpe(texts, max_words)
+    (tokenizer_dir / "vocab.txt").write_text(
+        "".join(f"{token} {count}\n" for token, count in vocab.items()), encoding="utf-8"
+    )
+    (tokenizer_dir / "bpe.codes").write_text("".join(f"{merge}\n" for merge in merges), encoding="utf-8")
+    (tokenizer_dir / "tokenizer_config.json").write_text(
+        json.dumps({"tokenizer_class": "PhobertTokenizer", "model_max_length": 256}, indent=2), encoding="utf-8"
+    )
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+    vocab_size = len(tokenizer)
+    tiny_config(vocab_size, [], num_layers, hidden_size).save_pretrained(tokenizer_dir)
+    unk_rate = sum(ids.count(tokenizer.unk_token_id) for ids in tokenizer(texts[:500])["input_ids"]) / 500
+    print(f"Tokenizer: {vocab_size} tokens, {len(merges)} merges, {unk_rate:.3f} <unk>/text")
+
+    torch.manual_seed(seed)
+    intent_labels = IntentClassifier.INTENT_LABELS
+    intent_dir = output / "models" / "intent_classifier"
+    RobertaForSequenceClassification(
+        tiny_config(vocab_size, intent_labels, num_layers, hidden_size)
+    ).save_pretrained(intent_dir)
+    write_label_mapping(intent_dir, intent_labels)
+
+    ner_labels = NERExtractor.ENTITY_LABELS
+    ner_dir = output / "models" / "ner_extractor"
+    RobertaForTokenClassification(
+        tiny_config(vocab_size, ner_labels, num_layers, hidden_size)
+    ).save_pretrained(ner_dir)
+    write_label_mapping(ner_dir, ner_labels, entity_types=list(NERExtractor.ENTITY_TYPE_MAP))
+    return tokenizer_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a tiny random-weight PhoBERT fixture")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--max-words", type=int, default=4000, help="Most frequent words that get BPE merges")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layers", type=int, default=2, help="Transformer layers (PhoBERT-base: 12)")
+    parser.add_argument("--hidden-size", type=int, default=32, help="Hidden size (PhoBERT-base: 768)")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    tokenizer_dir = write_fixture(
+        output, args.max_words, args.seed, num_layers=args.layers, hidden_size=args.hidden_size
+    )
+    print(f"✅ Tiny fixture written to {output}")
+    print(f"   PHOBERT_MODEL_NAME={tokenizer_dir} MODELS_DIR={output / 'models'}")
+
+
+if __name__ == "__main__":
+    main()
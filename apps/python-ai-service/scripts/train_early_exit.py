@@ -0,0 +1,160 @@
+"""
+Train early-exit heads cho PhoBERT intent classifier (models/intent_classifier) + calibrate ngưỡng
+
+- Backbone đóng băng: chạy PhoBERT 1 lần trên train split của intent_data_augmented_5intents.csv
+  (cùng split với train_lexical_intent.py), giữ pooled hidden state các layer --layers và logits
+  của model đầy đủ; chỉ train các head Linear (vài giây trên CPU)
+- Loss = alpha * T^2 * KL(head/T || model đầy đủ/T) + (1 - alpha) * CE(nhãn gốc)
+- Calibrate trên --calibration-ratio của train split (không dùng để train head): mỗi head lấy
+  ngưỡng nhỏ nhất mà các câu thoát ở đó trùng với model đầy đủ >= --target
+- Lưu vào models/intent_classifier/early_exit/, so sánh với model đầy đủ trên holdout:
+  python scripts/compare_intent_engines.py --engines torch early-exit
+
+Usage:
+    python scripts/train_early_exit.py --layers 2 4 6 8 10 --target 0.99
+    INTENT_ENGINE=early-exit python src/main.py
+
+Model lấy theo PHOBERT_MODEL_NAME / MODELS_DIR như main.py; thử nhanh trên fixture 12 layer:
+    python scripts/make_tiny_fixture.py --output /tmp/agribot-12 --layers 12 --hidden-size 64
+    PHOBERT_MODEL_NAME=/tmp/agribot-12/phobert MODELS_DIR=/tmp/agribot-12/models \
+        python scripts/train_early_exit.py
+(fixture random weights -> fine-tune intent model trước thì ngưỡng / exit rate mới có nghĩa)
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from sklearn.model_selection import train_test_split
+
+from bench_utils import add_src_to_path, batched, model_location, print_table
+from train_lexical_intent import load_split
+
+add_src_to_path()
+from models.early_exit import ExitHeads, calibrate_thresholds, pool_hidden  # noqa: E402
+from models.engines import EARLY_EXIT_DIR_NAME  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+
+MAX_LENGTH = 64  # câu hỏi intent ngắn, 64 subword là đủ
+
+
+def backbone_features(classifier: IntentClassifier, texts, layers, batch_size: int):
+    """(features[layer_index] = [N, 2 * hidden], logits của model đầy đủ [N, labels])"""
+    features = [[] for _ in layers]
+    logits = []
+    # no_grad chứ không inference_mode: features còn làm input lúc train head (cần autograd)
+    with torch.no_grad():
+        for batch in batched(texts, batch_size):
+            inputs = classifier.tokenizer(
+                batch, return_tensors="pt", truncation=True, max_length=MAX_LENGTH, padding=True
+            )
+            outputs = classifier.model(**inputs, output_hidden_states=True)
+            # hidden_states[0] là embedding, hidden_states[i] là output của layer i
+            for position, layer in enumerate(layers):
+                features[position].append(pool_hidden(outputs.hidden_states[layer], inputs["attention_mask"]))
+            logits.append(outputs.logits.float())
+    return [torch.cat(feature) for feature in features], torch.cat(logits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and calibrate early-exit heads for the intent classifier")
+    parser.add_argument("--layers", type=int, nargs="+", default=[2, 4, 6, 8, 10])
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the distillation (KL) term")
+    parser.add_argument("--calibration-ratio", type=float, default=0.2)
+    parser.add_argument("--target", type=float, default=0.99, help="Min agreement with the full model per head")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    layers = sorted(set(args.layers))
+
+    classifier = IntentClassifier(**model_location("intent_classifier"))
+    asyncio.run(classifier.load_model())
+    if classifier.model is None:
+        raise SystemExit("Early-exit heads need the PyTorch intent model (INTENT_ENGINE=torch)")
+    num_layers = classifier.model.config.num_hidden_layers
+    if not all(1 <= layer < num_layers for layer in layers):
+        raise SystemExit(f"--layers must be between 1 and {num_layers - 1}")
+    label_to_id = {label: idx for idx, label in enumerate(classifier.intent_labels)}
+
+    train_rows, _ = load_split()
+    fit_rows, calibration_rows = train_test_split(
+        train_rows, test_size=args.calibration_ratio, random_state=args.seed,
+        stratify=[label for _, label in train_rows]
+    )
+
+    started = time.perf_counter()
+    fit_features, fit_teacher = backbone_features(classifier, [t for t, _ in fit_rows], layers, args.batch_size)
+    calibration_features, calibration_teacher = backbone_features(
+        classifier, [t for t, _ in calibration_rows], layers, args.batch_size
+    )
+    print(f"Backbone features for {len(fit_rows) + len(calibration_rows)} texts in {time.perf_counter() - started:.1f}s")
+    fit_gold = torch.tensor([label_to_id[label] for _, label in fit_rows])
+    calibration_gold = torch.tensor([label_to_id[label] for _, label in calibration_rows])
+
+    heads = ExitHeads(classifier.model.config.hidden_size, len(label_to_id), layers)
+    optimizer = torch.optim.AdamW(heads.parameters(), lr=args.lr)
+    temperature = args.temperature
+    soft_targets = F.softmax(fit_teacher / temperature, dim=-1)
+    for epoch in range(1, args.epochs + 1):
+        heads.train()
+        total_loss = 0.0
+        for batch_ids in batched(torch.randperm(len(fit_rows)).tolist(), args.batch_size):
+            head_logits = heads([feature[batch_ids] for feature in fit_features])
+            loss = sum(
+                args.alpha * F.kl_div(
+                    F.log_softmax(logits / temperature, dim=-1), soft_targets[batch_ids], reduction="batchmean"
+                ) * temperature ** 2
+                + (1 - args.alpha) * F.cross_entropy(logits, fit_gold[batch_ids])
+                for logits in head_logits
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch_ids)
+        if epoch == 1 or epoch % 10 == 0 or epoch == args.epochs:
+            print(f"Epoch {epoch}/{args.epochs}: loss={total_loss / len(fit_rows):.4f}")
+
+    heads.eval()
+    with torch.no_grad():
+        probabilities = [F.softmax(logits, dim=-1) for logits in heads(calibration_features)]
+    teacher_predictions = calibration_teacher.argmax(dim=-1)
+    confidences = np.stack([p.max(dim=-1).values.numpy() for p in probabilities])
+    agrees = np.stack([(p.argmax(dim=-1) == teacher_predictions).numpy() for p in probabilities])
+    heads.thresholds = calibrate_thresholds(confidences, agrees, args.target)
+
+    # Bảng calibrate: câu thoát ở từng head (theo thứ tự), phần còn lại chạy hết model
+    remaining = np.ones(len(calibration_rows), dtype=bool)
+    rows = []
+    for position, layer in enumerate(layers):
+        exits = remaining & (confidences[position] >= heads.thresholds[position])
+        head_accuracy = (probabilities[position].argmax(dim=-1) == calibration_gold).float().mean().item()
+        rows.append([
+            layer,
+            f"{head_accuracy:.2%}",
+            heads.thresholds[position],
+            f"{exits.mean():.2%}",
+            f"{agrees[position][exits].mean():.2%}" if exits.any() else "-",
+        ])
+        remaining &= ~exits
+    rows.append([num_layers, f"{(teacher_predictions == calibration_gold).float().mean().item():.2%}", "-",
+                 f"{remaining.mean():.2%}", "100.00%"])
+    print(f"Calibration ({len(calibration_rows)} texts, target agreement {args.target:.2%}):")
+    print_table(["layer", "head accuracy", "threshold", "exit rate", "agreement w/ full model"], rows)
+
+    output_dir = classifier.model_dir / EARLY_EXIT_DIR_NAME
+    heads.save_pretrained(output_dir, {
+        "labels": list(label_to_id), "max_length": MAX_LENGTH, "target": args.target,
+    })
+    print(f"✅ Saved early-exit heads at layers {layers} to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Train lexical intent model (stage 1 của cascade) trên intent_data_augmented_5intents.csv
+
+TF-IDF char/word n-gram + Logistic Regression (calibrated), lưu vào models/intent_lexical/
+Giữ lại 20% (stratified, seed cố định) làm holdout cho scripts/evaluate_cascade.py
+
+Usage:
+    python scripts/train_lexical_intent.py
+    python scripts/train_lexical_intent.py --full   # train trên toàn bộ data (deploy)
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from bench_utils import MODELS_DIR, add_src_to_path, load_labeled_texts, print_table
+
+add_src_to_path()
+from models.lexical_intent import LexicalIntentClassifier  # noqa: E402
+
+TRAIN_CSV = "intent_data_augmented_5intents.csv"
+HOLDOUT_RATIO = 0.2
+SEED = 42
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98]
+
+
+def load_split() -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """(train, holdout) cố định - dùng chung với evaluate_cascade.py"""
+    rows = load_labeled_texts([TRAIN_CSV])
+    labels = [label for _, label in rows]
+    return train_test_split(rows, test_size=HOLDOUT_RATIO, random_state=SEED, stratify=labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train lexical intent model for the cascade")
+    parser.add_argument("--output", default=str(MODELS_DIR / "intent_lexical"))
+    parser.add_argument("--full", action="store_true", help="Train on all rows (no holdout)")
+    args = parser.parse_args()
+
+    train_rows, holdout_rows = load_split()
+    if args.full:
+        train_rows = train_rows + holdout_rows
+
+    model = LexicalIntentClassifier().fit(
+        [text for text, _ in train_rows],
+        [label for _, label in train_rows]
+    )
+    print(f"Trained on {len(train_rows)} texts, labels: {model.labels}")
+
+    # Độ chính xác trên holdout theo từng ngưỡng: câu >= ngưỡng được trả lời ở stage 1
+    texts = [text for text, _ in holdout_rows]
+    gold = np.array([label for _, label in holdout_rows])
+    probabilities = model.predict_proba(texts)
+    confidence = probabilities.max(axis=1)
+    predicted = np.array(model.labels)[probabilities.argmax(axis=1)]
+
+    print(f"\nLexical-only holdout accuracy: {(predicted == gold).mean():.4f} ({len(texts)} texts)\n")
+    table = []
+    for threshold in THRESHOLDS:
+        accepted = confidence >= threshold
+        accepted_accuracy = (predicted[accepted] == gold[accepted]).mean() if accepted.any() else 0.0
+        table.append([threshold, f"{1 - accepted.mean():.2%}", f"{accepted_accuracy:.2%}"])
+    print_table(["threshold", "escalation rate", "stage-1 accuracy"], table)
+
+    model.save(
+        Path(args.output),
+        {"train_csv": TRAIN_CSV, "train_size": len(train_rows), "holdout": not args.full, "seed": SEED},
+    )
+    print(f"\n✅ Saved lexical intent model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Kiểm tra models/date_resolver.py cho cùng khoảng ngày với parseDateRange của NestJS
+(apps/api/src/modules/ai/utils/date-parser.util.ts, port sang Python bên dưới)
+
+- Chuỗi date: entity date mà gazetteer tìm được trong intent + NER CSV, cộng các dạng sinh thêm
+  (tháng 1-12, quý 1-4, năm, tháng N năm YYYY / ngoái / nay, tuần, ngày dd/mm/yy...)
+- "Hôm nay" chạy qua mọi ngày trong --days ngày (đầu tháng, cuối năm, Chủ nhật...)
+- Chỗ parseDateRange trả null (vd "hôm nay", "15/3/24": NestJS nhận chuỗi ISO / dd/mm và không
+  hiểu) -> chỉ đếm là "mới resolve được", không tính là lệch
+- Không sinh "tháng N năm YYYY" với năm ngoài 2000-2100: regex tháng của parseDateRange backtrack
+  ("tháng 11 năm 1999" -> "tháng 1" -> tháng 1 năm nay), resolver trả None
+- Đo µs/chuỗi: parse lại (legacy) vs resolver có nhớ theo ngày
+
+Usage:
+    python scripts/verify_date_resolver.py --days 800
+"""
+
+import argparse
+import re
+import sys
+import time
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from bench_utils import INTENT_CSV_FILES, NER_CSV_FILES, add_src_to_path, load_texts, print_table
+
+add_src_to_path()
+from models.date_resolver import DateResolver  # noqa: E402
+from models.gazetteer import Gazetteer  # noqa: E402
+
+Span = Tuple[date, date]
+
+
+def last_day(year: int, month: int) -> date:
+    """new Date(year, month, 0) của JS: ngày cuối của tháng month (1-12), month 0 = tháng 12 năm trước"""
+    first_next = date(year + month // 12, month % 12 + 1, 1)
+    return first_next - timedelta(days=1)
+
+
+def legacy_parse(text: str, now: date) -> Optional[Span]:
+    """parseDateRange của NestJS (JS month 0-based -> đổi sang 1-based), bỏ log"""
+    normalized = text.lower().strip()
+    if "tháng này" in normalized:
+        return date(now.year, now.month, 1), last_day(now.year, now.month)
+    if "tháng trước" in normalized:
+        end = date(now.year, now.month, 1) - timedelta(days=1)
+        return date(end.year, end.month, 1), end
+
+    match = re.search(r"tháng\s*(\d{1,2})\s*năm\s*(\d{4})", normalized)
+    if match:
+        month, year = int(match.group(1)), int(match.group(2))
+        if 1 <= month <= 12 and 2000 <= year <= 2100:
+            return date(year, month, 1), last_day(year, month)
+    match = re.search(r"tháng\s*(\d{1,2})\s*năm\s*(ngoái|trước)", normalized)
+    if match:
+        month = int(match.group(1))
+        if 1 <= month <= 12:
+            return date(now.year - 1, month, 1), last_day(now.year - 1, month)
+    match = re.search(r"tháng\s*(\d{1,2})\s*năm\s*nay", normalized)
+    if match:
+        month = int(match.group(1))
+        if 1 <= month <= 12:
+            return date(now.year, month, 1), last_day(now.year, month)
+    match = re.search(r"năm\s*(\d{4})", normalized)
+    if match:
+        year = int(match.group(1))
+        if 2000 <= year <= 2100:
+            return date(year, 1, 1), date(year, 12, 31)
+    match = re.search(r"tháng\s*(\d{1,2})(?!\s*năm)", normalized)
+    if match:
+        month = int(match.group(1))
+        if 1 <= month <= 12:
+            year = now.year - 1 if month > now.month else now.year
+            return date(year, month, 1), last_day(year, month)
+    match = re.search(r"quý\s*(\d)", normalized)
+    if match:
+        quarter = int(match.group(1))
+        if 1 <= quarter <= 4:
+            start_month = (quarter - 1) * 3 + 1
+            return date(now.year, start_month, 1), last_day(now.year, start_month + 2)
+    if "năm nay" in normalized:
+        return date(now.year, 1, 1), date(now.year, 12, 31)
+    if "năm trước" in normalized or "năm ngoái" in normalized:
+        return date(now.year - 1, 1, 1), date(now.year - 1, 12, 31)
+    if "tuần này" in normalized:
+        monday = now - timedelta(days=now.weekday())
+        return monday, monday + timedelta(days=6)
+    if "tuần trước" in normalized:
+        monday = now - timedelta(days=now.weekday() + 7)
+        return monday, monday + timedelta(days=6)
+    return None
+
+
+def generated_forms() -> List[str]:
+    forms = [f"tháng {m}" for m in range(1, 14)] + [f"quý {q}" for q in range(0, 6)]
+    forms += [f"tháng {m} năm {y}" for m in (1, 2, 6, 11, 12) for y in (2023, 2024, 2025)]
+    forms += [f"tháng {m} năm {suffix}" for m in (1, 7, 12) for suffix in ("ngoái", "trước", "nay")]
+    forms += [f"năm {y}" for y in (1999, 2020, 2024, 2101)]
+    forms += ["tháng này", "tháng nay", "tháng trước", "năm nay", "năm ngoái", "năm trước",
+              "tuần này", "tuần trước", "hôm nay", "hôm qua", "15/3/24", "29/2/2024", "31/4/2024",
+              "Tháng 11  năm 2024", "THÁNG TRƯỚC"]
+    return forms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the date resolver against NestJS parseDateRange")
+    parser.add_argument("--days", type=int, default=800, help="Number of 'today' values to check")
+    parser.add_argument("--start", default="2023-12-25", help="First 'today' (ISO)")
+    args = parser.parse_args()
+
+    gazetteer = Gazetteer.load()
+    from_data = {
+        entity["raw"] for text in load_texts(INTENT_CSV_FILES + NER_CSV_FILES)
+        for entity in gazetteer.find_patterns(text) if entity["type"] == "date"
+    }
+    strings = sorted(from_data | set(generated_forms()))
+    start = date.fromisoformat(args.start)
+    days = [start + timedelta(days=offset) for offset in range(args.days)]
+
+    mismatches = newly_resolved = compared = 0
+    legacy_s = resolver_s = 0.0
+    for today in days:
+        resolver = DateResolver(clock=lambda today=today: today)
+        for _ in range(2):  # lần 2 đi qua memo
+            for text in strings:
+                started = time.perf_counter()
+                expected = legacy_parse(text, today)
+                legacy_s += time.perf_counter() - started
+                started = time.perf_counter()
+                actual = resolver.resolve(text)
+                resolver_s += time.perf_counter() - started
+                compared += 1
+                if expected is None:
+                    newly_resolved += actual is not None
+                    continue
+                expected_iso = {"from": expected[0].isoformat(), "to": expected[1].isoformat()}
+                if actual != expected_iso:
+                    mismatches += 1
+                    if mismatches <= 5:
+                        print(f"❌ today={today} {text!r}: legacy={expected_iso} resolver={actual}")
+
+    print(f"{len(strings)} date strings ({len(from_data)} from CSVs) x {len(days)} days")
+    print_table(
+        ["cases", "mismatches", "newly resolved", "legacy µs", "resolver µs"],
+        [[compared, mismatches, newly_resolved, legacy_s / compared * 1e6, resolver_s / compared * 1e6]],
+    )
+    print("❌ Resolver differs from parseDateRange" if mismatches else "✅ Resolver matches parseDateRange")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Kiểm tra FastPhobertTokenizer cho input_ids giống hệt PhoBERT slow tokenizer
+trên toàn bộ câu trong train/data/*.csv, và offset mapping trỏ đúng vào text gốc;
+đo luôn thời gian tokenize của 2 bản
+
+Usage:
+    python scripts/verify_fast_tokenizer.py
+    python scripts/verify_fast_tokenizer.py --model-name /path/to/phobert --batch-size 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from bench_utils import DATA_DIR, add_src_to_path, batched, load_texts, print_table
+
+add_src_to_path()
+from models.fast_tokenizer import build_fast_phobert_tokenizer, mismatched_texts  # noqa: E402
+from transformers import AutoTokenizer  # noqa: E402
+
+
+def offset_errors(tokenizer, texts) -> int:
+    """Số token (không phải special) mà text[start:end] không khớp với token đã decode"""
+    errors = 0
+    encoded = tokenizer(texts, truncation=True, max_length=256, return_offsets_mapping=True)
+    for text, ids, offsets in zip(texts, encoded["input_ids"], encoded["offset_mapping"]):
+        for token_id, (start, end) in zip(ids, offsets):
+            if start == end or token_id == tokenizer.unk_token_id:
+                continue
+            piece = tokenizer.decode([token_id])
+            errors += int(text[start:end].strip() != piece)
+    return errors
+
+
+def time_tokenizer(tokenizer, texts, batch_size: int) -> float:
+    started = time.perf_counter()
+    for batch in batched(texts, batch_size):
+        tokenizer(batch, truncation=True, max_length=256)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify fast PhoBERT tokenizer against the slow one")
+    parser.add_argument("--model-name", default=os.getenv("PHOBERT_MODEL_NAME", "vinai/phobert-base"))
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    slow = AutoTokenizer.from_pretrained(args.model_name)
+    fast = build_fast_phobert_tokenizer(slow)
+
+    rows = []
+    failed = False
+    for csv_path in sorted(DATA_DIR.glob("*.csv")):
+        texts = load_texts([csv_path.name])
+        mismatches = mismatched_texts(slow, fast, texts)
+        bad_offsets = offset_errors(fast, texts)
+        slow_ms = time_tokenizer(slow, texts, args.batch_size)
+        fast_ms = time_tokenizer(fast, texts, args.batch_size)
+        rows.append([csv_path.name, len(texts), len(mismatches), bad_offsets, slow_ms, fast_ms, slow_ms / fast_ms])
+        for text in mismatches[:5]:
+            print(f"❌ {csv_path.name}: {text!r}")
+            print(f"   slow: {slow(text)['input_ids']}")
+            print(f"   fast: {fast(text)['input_ids']}")
+        failed = failed or bool(mismatches) or bool(bad_offsets)
+
+    print_table(["file", "texts", "id mismatches", "offset errors", "slow ms", "fast ms", "speedup"], rows)
+    print("❌ Fast tokenizer differs from slow tokenizer" if failed else "✅ Fast tokenizer matches slow tokenizer")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
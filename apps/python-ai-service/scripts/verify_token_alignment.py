@@ -0,0 +1,159 @@
+"""
+Kiểm tra NERExtractor._convert_predictions_without_offsets (bảng surface + align_tokens)
+cho entity giống hệt thuật toán cũ (decode + find từng token) trên các NER CSV
+
+- Bảng surface: so với tokenizer.decode([id], skip_special_tokens=True) cho mọi id trong vocab
+- Property: mỗi câu (+ biến thể viết hoa / viết liền 1 cụm) x nhiều chuỗi nhãn BIO ngẫu nhiên
+  -> danh sách entity (type, raw, start, end, confidence) phải giống hệt
+- Đo µs/câu của 2 cách
+
+Cần PhoBERT slow tokenizer (đường không có offset mapping).
+
+Usage:
+    python scripts/verify_token_alignment.py
+    python scripts/verify_token_alignment.py --model-name /tmp/agribot-tiny/phobert --trials 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from bench_utils import NER_CSV_FILES, add_src_to_path, load_texts, print_table
+
+add_src_to_path()
+from models.ner_extractor import NERExtractor  # noqa: E402
+from models.token_alignment import build_surface_table, token_surface  # noqa: E402
+from transformers import AutoTokenizer  # noqa: E402
+
+
+def legacy_entities(tokenizer, labels: List[str], text: str, predictions: List[int], input_ids: List[int]) -> List[Dict[str, Any]]:
+    """_convert_predictions_without_offsets trước khi có bảng surface (bỏ print / log debug)"""
+    entities = []
+    current_entity = None
+    text_lower = text.lower()
+    current_pos = 0
+    for pred, token_id in zip(predictions, input_ids):
+        label = labels[pred]
+        if token_id in [tokenizer.bos_token_id, tokenizer.eos_token_id, tokenizer.pad_token_id]:
+            continue
+        token_text = tokenizer.decode([token_id], skip_special_tokens=True).strip()
+        if not token_text:
+            continue
+        token_clean = token_text.replace("_", " ").strip()
+        token_lower = token_clean.lower()
+        token_start = text_lower.find(token_lower, current_pos)
+        if token_start == -1:
+            token_no_space = token_clean.replace(" ", "")
+            token_start = text_lower.find(token_no_space.lower(), current_pos)
+            if token_start != -1:
+                token_clean = token_no_space
+        if token_start == -1:
+            continue
+        token_end = token_start + len(token_clean)
+        current_pos = token_end
+
+        if label.startswith("B-"):
+            if current_entity:
+                entities.append(current_entity)
+            entity_type = label[2:]
+            current_entity = {
+                "type": NERExtractor.ENTITY_TYPE_MAP.get(entity_type, entity_type.lower()),
+                "raw": text[token_start:token_end],
+                "start": token_start,
+                "end": token_end,
+                "confidence": 0.85
+            }
+        elif label.startswith("I-"):
+            if current_entity:
+                current_entity["raw"] = text[current_entity["start"]:token_end]
+                current_entity["end"] = token_end
+            else:
+                entity_type = label[2:]
+                current_entity = {
+                    "type": NERExtractor.ENTITY_TYPE_MAP.get(entity_type, entity_type.lower()),
+                    "raw": text[token_start:token_end],
+                    "start": token_start,
+                    "end": token_end,
+                    "confidence": 0.75
+                }
+        elif label == "O" and current_entity:
+            entities.append(current_entity)
+            current_entity = None
+    if current_entity:
+        entities.append(current_entity)
+    return entities
+
+
+def variants(text: str) -> List[str]:
+    """Câu gốc, viết hoa, và viết liền cụm đầu tiên (đi qua nhánh thử lại bỏ dấu cách)"""
+    return [text, text.upper(), text.replace(" ", "", 1)]
+
+
+def random_predictions(rng: random.Random, length: int, num_labels: int) -> List[int]:
+    # ~60% O để có cả entity dài lẫn I- mồ côi
+    return [0 if rng.random() < 0.6 else rng.randrange(1, num_labels) for _ in range(length)]
+
+
+def table_mismatches(tokenizer, table) -> List[int]:
+    return [
+        token_id for token_id in range(len(tokenizer))
+        if table[token_id] != token_surface(tokenizer.decode([token_id], skip_special_tokens=True))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify cached token alignment against the legacy decode+find loop")
+    parser.add_argument("--model-name", default=os.getenv("PHOBERT_MODEL_NAME", "vinai/phobert-base"))
+    parser.add_argument("--trials", type=int, default=3, help="Random label sequences per text variant")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--skip-table-check", action="store_true", help="Skip decoding every vocab id")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name, use_fast=False)
+    extractor = NERExtractor(model_name=args.model_name)
+    extractor.tokenizer = tokenizer
+
+    started = time.perf_counter()
+    extractor.surface_table = build_surface_table(tokenizer)
+    table_ms = (time.perf_counter() - started) * 1000
+    bad_ids = [] if args.skip_table_check else table_mismatches(tokenizer, extractor.surface_table)
+    for token_id in bad_ids[:5]:
+        print(f"❌ surface of id {token_id}: {extractor.surface_table[token_id]!r}")
+
+    labels = extractor.entity_labels
+    rng = random.Random(args.seed)
+    cases = []
+    for text in load_texts(NER_CSV_FILES):
+        for variant in variants(text):
+            input_ids = tokenizer(variant, truncation=True, max_length=256)["input_ids"]
+            for _ in range(args.trials):
+                cases.append((variant, random_predictions(rng, len(input_ids), len(labels)), input_ids))
+
+    mismatches = 0
+    legacy_s = new_s = 0.0
+    for text, predictions, input_ids in cases:
+        started = time.perf_counter()
+        expected = legacy_entities(tokenizer, labels, text, predictions, input_ids)
+        legacy_s += time.perf_counter() - started
+        started = time.perf_counter()
+        actual = extractor._convert_predictions_without_offsets(text, predictions, input_ids)
+        new_s += time.perf_counter() - started
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ {text!r}\n   legacy: {expected}\n   new:    {actual}")
+
+    print_table(
+        ["cases", "entity mismatches", "table mismatches", "table build ms", "legacy µs/case", "new µs/case"],
+        [[len(cases), mismatches, len(bad_ids), table_ms, legacy_s / len(cases) * 1e6, new_s / len(cases) * 1e6]],
+    )
+    failed = bool(mismatches or bad_ids)
+    print("❌ Alignment differs from legacy" if failed else "✅ Alignment matches legacy on every case")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Service configuration
+Đọc cấu hình từ biến môi trường (giống ConfigService bên NestJS)
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+# Thư mục models/ mặc định (apps/python-ai-service/models)
+DEFAULT_MODELS_DIR = str(Path(__file__).resolve().parents[1] / "models")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_int_tuple(name: str, default: Tuple[int, ...]) -> Tuple[int, ...]:
+    """"16,32,64" -> (16, 32, 64); "" hoặc "0" -> () (tắt)"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return tuple(sorted(int(part) for part in value.split(",") if part.strip() and int(part) > 0))
+
+
+@dataclass
+class ServiceConfig:
+    """Configuration for Python AI Service"""
+    # Base model / tokenizer (HuggingFace name hoặc đường dẫn local)
+    phobert_model_name: str = "vinai/phobert-base"
+    # Thư mục chứa intent_classifier/, ner_extractor/, intent_lexical/, versions/
+    # (load test dùng fixture nhỏ, xem scripts/make_tiny_fixture.py)
+    models_dir: str = DEFAULT_MODELS_DIR
+    # Dynamic batching: gom các request /analyze đồng thời thành 1 batch
+    batching_enabled: bool = True
+    batch_max_size: int = 16  # số câu tối đa trong 1 forward
+    batch_max_wait_ms: float = 5.0  # thời gian chờ tối đa để gom batch
+    # Admission control: số request inference đang xử lý tối đa, vượt quá -> 429
+    max_in_flight: int = 64
+    retry_after_s: float = 1.0
+    # Deadline mặc định khi caller không gửi X-Request-Deadline-Ms (0 = không giới hạn)
+    default_deadline_ms: float = 0
+    # Degradation: queue wait (hoặc request in-flight lâu nhất) vượt SLO -> rules-only cho request mới
+    degrade_enabled: bool = True
+    degrade_slo_ms: float = 300.0
+    degrade_exit_ratio: float = 0.5
+    # Inference engine: "torch" | "onnx" | "onnx-int8" (xem scripts/export_onnx.py)
+    # intent còn có "student" (BiLSTM distill, xem scripts/distill_intent_student.py)
+    # và "early-exit" (PhoBERT dừng ở layer giữa khi đủ tự tin, xem scripts/train_early_exit.py)
+    intent_engine: str = "torch"
+    ner_engine: str = "torch"
+    # Length bucketing: pad tới bucket gần nhất thay vì câu dài nhất / max_length
+    length_buckets: Tuple[int, ...] = (16, 32, 64, 128, 256)
+    # Fast (Rust) PhoBERT tokenizer có offset mapping, false = slow tokenizer của transformers
+    fast_tokenizer: bool = True
+    # Số câu giữ trong tokenization cache dùng chung intent/NER (0 = tắt)
+    tokenization_cache_size: int = 4096
+    # Cascade: lexical model trả lời trước, confidence < threshold mới chạy PhoBERT (0 = tắt)
+    intent_cascade_threshold: float = 0.9
+    # Document NER (/ner/document): token nội dung mỗi cửa sổ, token chồng giữa 2 cửa sổ,
+    # số văn bản tối đa mỗi request
+    ner_document_window: int = 254
+    ner_document_overlap: int = 64
+    ner_document_max_texts: int = 64
+    # Số câu tối đa mỗi request /ner/extract_batch (bulk evaluation, tag lại lịch sử chat)
+    ner_batch_max_texts: int = 512
+
+    # Model registry: các worker kiểm tra models/versions/<name>/ACTIVE mỗi N giây (0 = tắt)
+    model_sync_interval_s: float = 5.0
+    # Shadow evaluation: số mẫu tối đa chờ chạy candidate, đầy thì bỏ mẫu
+    shadow_max_pending: int = 32
+    # Token cho /admin/* (header X-Admin-Token), rỗng = không kiểm tra
+    admin_token: str = ""
+    # Từ vựng area/device theo farm do NestJS đẩy lên (rỗng = <models_dir>/farm_vocabulary)
+    farm_vocab_dir: str = ""
+    # Memory budget cho các farm đã compile trong mỗi worker (0 = tắt)
+    farm_vocab_memory_mb: float = 32.0
+    # Catalog crop (id, tên) do NestJS đẩy lên để link crop_id (rỗng = <models_dir>/crop_catalog.json)
+    crop_catalog_file: str = ""
+    # Câu admin đã sửa intent (rỗng = <models_dir>/intent_memory.npz): cosine với câu đã sửa gần nhất
+    # >= override thì lấy hẳn intent đã sửa, >= boost thì trộn vào xác suất của model
+    intent_memory_file: str = ""
+    intent_memory_override_threshold: float = 0.95
+    intent_memory_boost_threshold: float = 0.85
+
+    # Production launcher (serve.py)
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    threads_per_worker: int = 0  # 0 = tự chia đều số CPU (theo cgroup quota) cho các worker
+    # Worker chết liên tục: chờ backoff (x2 mỗi lần) trước khi fork lại; quá max_restarts
+    # trong restart_window thì cha dừng hẳn (exit != 0) để supervisor bên ngoài xử lý
+    worker_restart_backoff_s: float = 1.0
+    worker_restart_backoff_max_s: float = 30.0
+    worker_max_restarts: int = 10
+    worker_restart_window_s: float = 60.0
+    # CPU inference profile (xem models/inference_profile.py)
+    inference_mode: bool = True  # torch.inference_mode thay cho no_grad
+    inter_op_threads: int = 1
+    bf16_autocast: bool = False  # chỉ có tác dụng khi CPU hỗ trợ bf16 (AVX512-BF16 / AMX)
+    flush_denormal: bool = True
+
+    @classmethod
+    def from_env(cls) -> "ServiceConfig":
+        """Build config from environment variables"""
+        return cls(
+            phobert_model_name=os.getenv("PHOBERT_MODEL_NAME", cls.phobert_model_name),
+            models_dir=os.getenv("MODELS_DIR") or cls.models_dir,
+            batching_enabled=_env_bool("BATCHING_ENABLED", cls.batching_enabled),
+            batch_max_size=_env_int("BATCH_MAX_SIZE", cls.batch_max_size),
+            batch_max_wait_ms=_env_float("BATCH_MAX_WAIT_MS", cls.batch_max_wait_ms),
+            max_in_flight=_env_int("MAX_IN_FLIGHT", cls.max_in_flight),
+            retry_after_s=_env_float("RETRY_AFTER_S", cls.retry_after_s),
+            default_deadline_ms=_env_float("DEFAULT_DEADLINE_MS", cls.default_deadline_ms),
+            degrade_enabled=_env_bool("DEGRADE_ENABLED", cls.degrade_enabled),
+            degrade_slo_ms=_env_float("DEGRADE_SLO_MS", cls.degrade_slo_ms),
+            degrade_exit_ratio=_env_float("DEGRADE_EXIT_RATIO", cls.degrade_exit_ratio),
+            intent_engine=os.getenv("INTENT_ENGINE", cls.intent_engine),
+            ner_engine=os.getenv("NER_ENGINE", cls.ner_engine),
+            length_buckets=_env_int_tuple("LENGTH_BUCKETS", cls.length_buckets),
+            fast_tokenizer=_env_bool("FAST_TOKENIZER", cls.fast_tokenizer),
+            tokenization_cache_size=_env_int("TOKENIZATION_CACHE_SIZE", cls.tokenization_cache_size),
+            intent_cascade_threshold=_env_float("INTENT_CASCADE_THRESHOLD", cls.intent_cascade_threshold),
+            model_sync_interval_s=_env_float("MODEL_SYNC_INTERVAL_S", cls.model_sync_interval_s),
+            shadow_max_pending=_env_int("SHADOW_MAX_PENDING", cls.shadow_max_pending),
+            admin_token=os.getenv("ADMIN_TOKEN", cls.admin_token),
+            farm_vocab_dir=os.getenv("FARM_VOCAB_DIR", cls.farm_vocab_dir),
+            farm_vocab_memory_mb=_env_float("FARM_VOCAB_MEMORY_MB", cls.farm_vocab_memory_mb),
+            ner_document_window=_env_int("NER_DOCUMENT_WINDOW", cls.ner_document_window),
+            ner_document_overlap=_env_int("NER_DOCUMENT_OVERLAP", cls.ner_document_overlap),
+            ner_document_max_texts=_env_int("NER_DOCUMENT_MAX_TEXTS", cls.ner_document_max_texts),
+            ner_batch_max_texts=_env_int("NER_BATCH_MAX_TEXTS", cls.ner_batch_max_texts),
+            crop_catalog_file=os.getenv("CROP_CATALOG_FILE", cls.crop_catalog_file),
+            intent_memory_file=os.getenv("INTENT_MEMORY_FILE", cls.intent_memory_file),
+            intent_memory_override_threshold=_env_float(
+                "INTENT_MEMORY_OVERRIDE_THRESHOLD", cls.intent_memory_override_threshold
+            ),
+            intent_memory_boost_threshold=_env_float(
+                "INTENT_MEMORY_BOOST_THRESHOLD", cls.intent_memory_boost_threshold
+            ),
+            host=os.getenv("HOST", cls.host),
+            port=_env_int("PORT", cls.port),
+            workers=_env_int("WORKERS", cls.workers),
+            threads_per_worker=_env_int("THREADS_PER_WORKER", cls.threads_per_worker),
+            worker_restart_backoff_s=_env_float("WORKER_RESTART_BACKOFF_S", cls.worker_restart_backoff_s),
+            worker_restart_backoff_max_s=_env_float(
+                "WORKER_RESTART_BACKOFF_MAX_S", cls.worker_restart_backoff_max_s
+            ),
+            worker_max_restarts=_env_int("WORKER_MAX_RESTARTS", cls.worker_max_restarts),
+            worker_restart_window_s=_env_float("WORKER_RESTART_WINDOW_S", cls.worker_restart_window_s),
+            inference_mode=_env_bool("INFERENCE_MODE", cls.inference_mode),
+            inter_op_threads=_env_int("INTER_OP_THREADS", cls.inter_op_threads),
+            bf16_autocast=_env_bool("BF16_AUTOCAST", cls.bf16_autocast),
+            flush_denormal=_env_bool("FLUSH_DENORMAL", cls.flush_denormal),
+        )
+
+
+settings = ServiceConfig.from_env()
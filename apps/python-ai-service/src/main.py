@@ -2,17 +2,18 @@
 Python AI Service - PhoBERT Intent Classification & NER
 FastAPI server for Vietnamese Agricultural Chatbot
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 #giống class-validator , BaseModel là class nền tảng của pydantic
-from pydantic import BaseModel 
+from pydantic import BaseModel, Field
 # List[T]	danh sách các phần tử kiểu T
 # Optional[T]	T hoặc None
 # Dict[K, V]	object / map  ____ obj
 # -> Dict[str, Any] nghĩa là trả về Object { key: value }
 # List[Dict[str, Any]] <=> Array<Record<string, any>> ___arr
 # Any	kiểu bất kỳ
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import json
 #   Node              	Python
 # Express + node	FastAPI + uvicorn
@@ -25,10 +26,26 @@ from loguru import logger
 # exit process
 import sys
 import time #module xử lý thời gian
+import asyncio
+from pathlib import Path
 
 # kiểu load service.ts
 from models.intent_classifier import IntentClassifier
 from models.ner_extractor import NERExtractor
+from models.fast_tokenizer import load_tokenizer
+from models.inference_profile import InferenceProfile
+from models.token_cache import TokenizationCache
+from models.crop_linker import CropLinker
+from models.farm_vocabulary import merge_farm_entities
+from serving.batcher import DynamicBatcher
+from serving.admission import DEADLINE_HEADER, AdmissionController, DeadlineExceeded, RequestRejected, Ticket
+from serving.degradation import DegradationController
+from serving.crop_catalog import CropCatalogStore
+from serving.farm_vocabulary import FarmVocabularyError, FarmVocabularyStore
+from serving.intent_memory import IntentMemoryStore
+from serving.registry import ModelRegistry, ModelVersionError
+from serving.shadow import ShadowEvaluator
+from config import settings
 
 # Configure logging
 logger.remove()
@@ -56,14 +73,58 @@ app.add_middleware(
 # Khai báo ở ngoài cùng file, ai cũng dùng được
 # Python dùng global variable
 # Nestjs dùng DI container_ phải khai báo provider trong Module rồi Inject vào Contructor
-intent_classifier: Optional[IntentClassifier] = None
-ner_extractor: Optional[NERExtractor] = None
+# Model đang active nằm trong intent_registry / ner_registry (hot swap, xem serving/registry.py)
+MODELS_ROOT = Path(settings.models_dir)
+# Tokenizer dùng chung cho mọi model/version
+shared_tokenizer = None
+# /analyze: intent và NER dùng chung kết quả tokenize của cùng 1 câu
+tokenization_cache = TokenizationCache(settings.tokenization_cache_size)
+# Thread / inference_mode / bf16 cho forward trên CPU, serve.py apply trong từng worker
+inference_profile = InferenceProfile(
+    inference_mode=settings.inference_mode,
+    intra_op_threads=settings.threads_per_worker,
+    inter_op_threads=settings.inter_op_threads,
+    bf16=settings.bf16_autocast,
+    flush_denormal=settings.flush_denormal,
+)
+# Tên area/device theo farm do NestJS đẩy lên, dùng khi request có farm_id
+farm_vocabularies = FarmVocabularyStore(
+    Path(settings.farm_vocab_dir) if settings.farm_vocab_dir else MODELS_ROOT / "farm_vocabulary",
+    memory_budget_mb=settings.farm_vocab_memory_mb,
+)
+# crop_name -> crop id, dùng chung cho mọi version NER (catalog do NestJS đẩy lên)
+crop_catalog = CropCatalogStore(
+    Path(settings.crop_catalog_file) if settings.crop_catalog_file else MODELS_ROOT / "crop_catalog.json",
+    CropLinker(),
+)
+crop_catalog.refresh()
+# Câu admin đã sửa intent, dùng chung cho mọi version IntentClassifier (vector tính lại khi đổi model)
+intent_memory = IntentMemoryStore(
+    Path(settings.intent_memory_file) if settings.intent_memory_file else MODELS_ROOT / "intent_memory.npz"
+)
+intent_memory.refresh()
+# Batcher gom các request đồng thời thành 1 forward (None nếu tắt batching)
+intent_batcher: Optional[DynamicBatcher] = None
+ner_batcher: Optional[DynamicBatcher] = None
+# Giới hạn request in-flight + deadline từ header (load shedding khi quá tải)
+admission = AdmissionController(
+    max_in_flight=settings.max_in_flight,
+    retry_after_s=settings.retry_after_s,
+    default_deadline_ms=settings.default_deadline_ms,
+)
+# Queue wait vượt SLO -> tự chuyển sang rules-only, hết quá tải thì quay lại PhoBERT
+degradation = DegradationController(
+    slo_ms=settings.degrade_slo_ms,
+    exit_ratio=settings.degrade_exit_ratio,
+    enabled=settings.degrade_enabled,
+)
 
 # Request/Response Models
 #DTO===================DTO===========================DTO
 class IntentRequest(BaseModel):
     text: str
-    top_k: int = 3
+    # top_k <= 0 làm torch.topk lỗi, > số intent thì vô nghĩa (5 intent)
+    top_k: int = Field(3, ge=1, le=5)
 
 # NER entity
 class Entity(BaseModel):
@@ -73,12 +134,20 @@ class Entity(BaseModel):
     confidence: float
     start: int
     end: int
+    # Chỉ có khi khớp tên trong farm vocabulary (request có farm_id)
+    area_id: Optional[str] = None
+    device_id: Optional[str] = None
+    # crop_name link được với catalog crop (PUT /admin/crops)
+    crop_id: Optional[str] = None
+    # date: {"from": "YYYY-MM-DD", "to": "YYYY-MM-DD"} (2 đầu đều tính)
+    date_range: Optional[Dict[str, str]] = None
 
 class IntentResponse(BaseModel):
     intent: str
     confidence: float
     all_intents: List[Dict[str, Any]]
     processing_time_ms: float
+    degraded: bool = False  # True = trả lời bằng rule-based do service quá tải
 
 # export interface IntentClassificationResult {
 #   intent: IntentType;
@@ -90,14 +159,32 @@ class IntentResponse(BaseModel):
 
 class NERRequest(BaseModel):
     text: str
+    farm_id: Optional[str] = None  # có -> thêm entity theo tên area/device của farm
 
 class NERResponse(BaseModel):
     entities: List[Entity]
     processing_time_ms: float
+    degraded: bool = False
+    # None = request không có farm_id, False = farm chưa được đẩy vocabulary (NestJS nên đẩy lại)
+    farm_vocabulary_loaded: Optional[bool] = None
+
+class NERBatchRequest(BaseModel):
+    texts: List[str]
+    farm_id: Optional[str] = None
+
+class NERBatchResult(BaseModel):
+    entities: List[Entity]
+
+class NERBatchResponse(BaseModel):
+    results: List[NERBatchResult]
+    processing_time_ms: float
+    degraded: bool = False
+    farm_vocabulary_loaded: Optional[bool] = None
 
 class CombinedRequest(BaseModel):
     text: str
-    top_k: int = 3
+    top_k: int = Field(3, ge=1, le=5)
+    farm_id: Optional[str] = None
 
 class CombinedResponse(BaseModel):
     intent: str
@@ -105,44 +192,365 @@ class CombinedResponse(BaseModel):
     all_intents: List[Dict[str, Any]]
     entities: List[Entity]
     processing_time_ms: float
+    degraded: bool = False
+    farm_vocabulary_loaded: Optional[bool] = None
+
+class VocabularyItem(BaseModel):
+    id: str
+    name: str
+    aliases: List[str] = []
+
+class FarmVocabularyRequest(BaseModel):
+    areas: List[VocabularyItem] = []
+    devices: List[VocabularyItem] = []
+
+class CropCatalogRequest(BaseModel):
+    crops: List[VocabularyItem]
+
+class IntentExample(BaseModel):
+    text: str
+    intent: str
+
+class IntentMemoryRequest(BaseModel):
+    examples: List[IntentExample]
+
+class DocumentNERRequest(BaseModel):
+    texts: List[str]
+    # None = DOCUMENT_ENTITY_TYPES (tag cho chunk RAG)
+    entity_types: Optional[List[str]] = None
+
+class DocumentNERResult(BaseModel):
+    entities: List[Entity]
+    windows: int
+    tokens: int
+
+class DocumentNERResponse(BaseModel):
+    results: List[DocumentNERResult]
+    processing_time_ms: float
+    degraded: bool = False
 #END____DTO=====================DTO=========================DTO
 
+# Câu mẫu tiếng Việt để warm-up (đủ 5 intent + các loại entity)
+WARMUP_QUERIES = [
+    "bật máy bơm ở khu A trong 10 phút",
+    "doanh thu tháng này là bao nhiêu",
+    "nhiệt độ ở khu B hiện tại thế nào",
+    "cách trồng cà chua bi",
+    "chi phí phân bón quý 1 năm 2024",
+    "xin chào",
+]
+
+# Trạng thái khởi động: readiness chỉ true sau khi load + warm-up xong
+service_state: Dict[str, Any] = {
+    "status": "starting",  # starting | ready | failed
+    "ready": False,
+    "startup_timings_ms": {},
+    "error": None,
+}
+startup_task: Optional[asyncio.Task] = None
+version_sync_task: Optional[asyncio.Task] = None
+
+def create_intent_classifier(model_dir: Optional[Path] = None) -> IntentClassifier:
+    return IntentClassifier(
+        model_name=settings.phobert_model_name,
+        engine=settings.intent_engine,
+        cascade_threshold=settings.intent_cascade_threshold,
+        length_buckets=settings.length_buckets,
+        model_dir=model_dir,
+        lexical_dir=MODELS_ROOT / "intent_lexical",
+        token_cache=tokenization_cache,
+        inference_profile=inference_profile,
+        memory=intent_memory.memory,
+        memory_override_threshold=settings.intent_memory_override_threshold,
+        memory_boost_threshold=settings.intent_memory_boost_threshold,
+    )
+
+def create_ner_extractor(model_dir: Optional[Path] = None) -> NERExtractor:
+    return NERExtractor(
+        model_name=settings.phobert_model_name,
+        engine=settings.ner_engine,
+        length_buckets=settings.length_buckets,
+        model_dir=model_dir,
+        token_cache=tokenization_cache,
+        inference_profile=inference_profile,
+        crop_linker=crop_catalog.linker,
+    )
+
+async def load_intent_version(model_dir: Path) -> IntentClassifier:
+    """Loader của intent_registry khi hot swap: load + warm-up 1 version"""
+    intent = create_intent_classifier(model_dir)
+    await intent.load_model(tokenizer=shared_tokenizer)
+    await asyncio.to_thread(intent.warmup, WARMUP_QUERIES)
+    return intent
+
+async def load_ner_version(model_dir: Path) -> NERExtractor:
+    """Loader của ner_registry khi hot swap: load + warm-up 1 version"""
+    ner = create_ner_extractor(model_dir)
+    await ner.load_model(tokenizer=shared_tokenizer)
+    await asyncio.to_thread(ner.warmup, WARMUP_QUERIES)
+    return ner
+
+intent_registry = ModelRegistry("intent_classifier", MODELS_ROOT, load_intent_version)
+ner_registry = ModelRegistry("ner_extractor", MODELS_ROOT, load_ner_version)
+MODEL_REGISTRIES: Dict[str, ModelRegistry] = {
+    intent_registry.name: intent_registry,
+    ner_registry.name: ner_registry,
+}
+
+async def load_models():
+    """
+    Load tokenizer 1 lần, load intent + NER (version active) song song (chưa warm-up)
+    và gán vào registry. serve.py gọi hàm này ở process cha trước khi fork worker
+    để các worker dùng chung weights (copy-on-write)
+    """
+    global shared_tokenizer
+    timings = service_state["startup_timings_ms"]
+    started = time.perf_counter()
+
+    # 2 - tokenizer dùng chung cho cả 2 model
+    phase_started = time.perf_counter()
+    logger.info(f"Loading shared tokenizer from {settings.phobert_model_name}...")
+    # Fast tokenizer (offset mapping) chỉ dùng khi khớp input_ids với slow tokenizer trên câu warm-up
+    shared_tokenizer = await asyncio.to_thread(
+        load_tokenizer, settings.phobert_model_name, settings.fast_tokenizer, WARMUP_QUERIES
+    )
+    timings["tokenizer"] = (time.perf_counter() - phase_started) * 1000
+
+    # 3 - load 2 model song song (mỗi model trong 1 thread)
+    phase_started = time.perf_counter()
+    intent_version = intent_registry.startup_version()
+    ner_version = ner_registry.startup_version()
+    logger.info(
+        f"Loading Intent Classifier ({intent_version}) + NER Extractor ({ner_version}) in parallel..."
+    )
+    intent = create_intent_classifier(intent_registry.version_dir(intent_version))
+    ner = create_ner_extractor(ner_registry.version_dir(ner_version))
+    await asyncio.gather(
+        intent.load_model(tokenizer=shared_tokenizer),
+        ner.load_model(tokenizer=shared_tokenizer)
+    )
+    intent_registry.set_active(intent_version, intent)
+    ner_registry.set_active(ner_version, ner)
+    timings["models_parallel"] = (time.perf_counter() - phase_started) * 1000
+    timings["intent_classifier_load"] = intent.load_time_ms
+    timings["ner_extractor_load"] = ner.load_time_ms
+    timings["load_total"] = (time.perf_counter() - started) * 1000
+
+async def warmup_models(intent: IntentClassifier, ner: NERExtractor):
+    """Warm-up để request đầu tiên không phải trả giá khởi tạo kernel"""
+    timings = service_state["startup_timings_ms"]
+    timings["intent_classifier_warmup"] = await asyncio.to_thread(intent.warmup, WARMUP_QUERIES)
+    timings["ner_extractor_warmup"] = await asyncio.to_thread(ner.warmup, WARMUP_QUERIES)
+
+def predict_intent_batch(items: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    """batch_fn của intent batcher (item = (text, top_k)), chạy trên version active lúc forward"""
+    with intent_registry.acquire() as intent:
+        return intent.predict_batch(
+            [text for text, _ in items],
+            [top_k for _, top_k in items]
+        )
+
+def predict_ner_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """batch_fn của NER batcher, chạy trên version active lúc forward"""
+    with ner_registry.acquire() as ner:
+        return ner.predict_batch(texts)
+
+async def sync_model_versions():
+    """Các worker theo dõi file ACTIVE (và catalog crop, intent memory) để cùng đổi sau khi admin cập nhật ở 1 worker"""
+    while True:
+        await asyncio.sleep(settings.model_sync_interval_s)
+        for registry in MODEL_REGISTRIES.values():
+            await registry.sync_active()
+        await asyncio.to_thread(crop_catalog.refresh)
+        await asyncio.to_thread(intent_memory.refresh)
+        # Version intent mới -> tính lại vector của các câu đã sửa
+        await asyncio.to_thread(intent_memory.sync_encoder, intent_registry.model)
+
+async def initialize_service():
+    """Load models (nếu chưa preload) + warm-up, bật batcher, cuối cùng set ready"""
+    global intent_batcher, ner_batcher, version_sync_task
+
+    started = time.perf_counter()
+    try:
+        if not inference_profile.applied:
+            # Chạy thẳng main.py (không qua serve.py): 1 process dùng hết CPU quota
+            inference_profile.apply_runtime(workers=1)
+        if intent_registry.model is None or ner_registry.model is None:
+            await load_models()
+        # Vector câu đã sửa của model đang chạy (file do version trước ghi thì tính lại)
+        await asyncio.to_thread(intent_memory.sync_encoder, intent_registry.model)
+        # 4 - warm-up chạy trong từng worker (sau fork)
+        await warmup_models(intent_registry.model, ner_registry.model)
+
+        if settings.batching_enabled:
+            intent_batcher = DynamicBatcher(
+                "intent",
+                predict_intent_batch,
+                max_batch_size=settings.batch_max_size,
+                max_wait_ms=settings.batch_max_wait_ms,
+            )
+            ner_batcher = DynamicBatcher(
+                "ner",
+                predict_ner_batch,
+                max_batch_size=settings.batch_max_size,
+                max_wait_ms=settings.batch_max_wait_ms,
+            )
+            await intent_batcher.start()
+            await ner_batcher.start()
+
+        if settings.model_sync_interval_s > 0:
+            version_sync_task = asyncio.create_task(sync_model_versions())
+
+        service_state["status"] = "ready"
+        service_state["ready"] = True
+        timings = service_state["startup_timings_ms"]
+        timings["worker_startup"] = (time.perf_counter() - started) * 1000
+        logger.info(
+            " Python AI Service ready! Startup breakdown (ms): "
+            + ", ".join(f"{phase}={ms:.0f}" for phase, ms in timings.items())
+        )
+
+    except Exception as e:
+        service_state["status"] = "failed"
+        service_state["error"] = str(e)
+        logger.error(f"Failed to load models: {str(e)}")
+
 # Startup/Shutdown Events
 # Tương đương onModuleInit(), chạy 1 lần khi server start
 # hàm này chạy đầu tiên khi server bật lên
 @app.on_event("startup")
 async def startup_event():
     # Load model nặng vào RAM
-    """Load models on startup"""
-    global intent_classifier, ner_extractor
+    """Start loading models in background so /health answers during cold start"""
+    global startup_task
     # 1
     logger.info("🚀 Starting Python AI Service...")
-    
-    try:
-        # 2
-        logger.info("Loading Intent Classifier (PhoBERT)...")
-        intent_classifier = IntentClassifier()
-        # load tokenier, load label_mapping.json, load head classification vào
-        await intent_classifier.load_model()
-        # 8
-        logger.info("Intent Classifier loaded successfully")
-        # 9
-        logger.info("Loading NER Extractor (PhoBERT)...")
-        ner_extractor = NERExtractor()
-        await ner_extractor.load_model()
-        # 15
-        logger.info("NER Extractor loaded successfully")
-        # 16
-        logger.info(" Python AI Service ready!")
-        
-    except Exception as e:
-        logger.error(f"Failed to load models: {str(e)}")
-        raise
+    startup_task = asyncio.create_task(initialize_service())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info(" Shutting down Python AI Service...")
+    for task in (startup_task, version_sync_task):
+        if task is not None and not task.done():
+            task.cancel()
+    await shadow.stop()
+    for batcher in (intent_batcher, ner_batcher):
+        if batcher is not None:
+            await batcher.stop()
+
+async def admission_ticket(http_request: Request):
+    """
+    Dependency cho các endpoint inference: cấp slot in-flight, đọc deadline từ header
+    Quá tải -> 429, trả slot khi request xong
+    """
+    ticket = admit_request(http_request, bulk=False)
+    try:
+        yield ticket
+    finally:
+        admission.release(ticket)
+
+async def bulk_admission_ticket(http_request: Request):
+    """Như admission_ticket cho endpoint nhiều câu / cả tài liệu (chạy lâu, không tính là quá tải)"""
+    ticket = admit_request(http_request, bulk=True)
+    try:
+        yield ticket
+    finally:
+        admission.release(ticket)
+
+def admit_request(http_request: Request, bulk: bool) -> Ticket:
+    try:
+        return admission.admit(http_request.headers.get(DEADLINE_HEADER), bulk=bulk)
+    except RequestRejected as e:
+        raise rejected_error(e)
+
+def rejected_error(error: RequestRejected) -> HTTPException:
+    """RequestRejected -> HTTPException (429/503) kèm Retry-After"""
+    if error.status_code == 503:
+        admission.record_expired()
+    logger.warning(f"Request rejected ({error.status_code}): {error.reason}")
+    return HTTPException(status_code=error.status_code, detail=error.reason, headers=error.headers)
+
+def check_degraded() -> bool:
+    """
+    Cập nhật degradation theo thời gian chờ hiện tại của hàng đợi batch
+    (BATCHING_ENABLED=false không có hàng đợi: dùng request in-flight lâu nhất, trừ bulk)
+    """
+    batchers = [b for b in (intent_batcher, ner_batcher) if b is not None]
+    if batchers:
+        wait_s = max(b.queue_wait_s() for b in batchers)
+    else:
+        wait_s = admission.oldest_in_flight_s()
+    return degradation.update(wait_s * 1000)
+
+def service_busy() -> bool:
+    """Có request đang xếp hàng hoặc đang degraded -> shadow không lấy mẫu"""
+    batchers = [b for b in (intent_batcher, ner_batcher) if b is not None]
+    return degradation.degraded or any(b.queue_depth > 0 for b in batchers)
+
+# So sánh candidate version với version active trên traffic thật (ngoài critical path)
+shadow = ShadowEvaluator(
+    busy=service_busy,
+    max_pending=settings.shadow_max_pending,
+    intent_primary=intent_registry.acquire,
+    ner_primary=ner_registry.acquire,
+)
+shadow_start_lock = asyncio.Lock()
+
+async def run_intent(text: str, top_k: int, ticket: Ticket, degraded: bool = False) -> Dict[str, Any]:
+    """Classify + gửi bản sao kết quả cho shadow (nếu đang bật)"""
+    result = await infer_intent(text, top_k, ticket, degraded)
+    if not degraded:
+        shadow.observe_intent(text, top_k, result)
+    return result
+
+async def run_ner(text: str, ticket: Ticket, degraded: bool = False) -> Dict[str, Any]:
+    """Extract entities + gửi bản sao kết quả cho shadow (nếu đang bật)"""
+    result = await infer_ner(text, ticket, degraded)
+    if not degraded:
+        shadow.observe_ner(text, result)
+    return result
+
+async def infer_intent(text: str, top_k: int, ticket: Ticket, degraded: bool = False) -> Dict[str, Any]:
+    """Classify qua batcher nếu bật batching, ngược lại gọi thẳng model"""
+    # acquire: version đang dùng không bị unload giữa chừng nếu admin swap version mới
+    with intent_registry.acquire() as intent:
+        if degraded:
+            # Tra câu đã sửa chỉ là 1 lần dict lookup, vẫn chạy khi degraded
+            return intent.try_memory(text) or intent.classify_rules_only(text)
+        if intent_batcher is not None:
+            # Câu dễ trả lời luôn bằng lexical model (trong thread), không chiếm chỗ trong batch PhoBERT
+            cascaded = await intent.try_cascade_async(text, top_k)
+            if cascaded is not None:
+                return cascaded
+        else:
+            if ticket.expired():
+                raise DeadlineExceeded()
+            return await intent.classify(text, top_k=top_k)
+    # batch_fn tự acquire version active lúc forward
+    return await intent_batcher.submit((text, top_k), deadline=ticket.deadline)
+
+def apply_farm_vocabulary(
+    text: str, entities: List[Dict[str, Any]], farm_id: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[bool]]:
+    """Gộp entity theo tên area/device của farm (cả khi degraded, chỉ là tra trie)"""
+    if not farm_id:
+        return entities, None
+    vocabulary = farm_vocabularies.get(farm_id)
+    if vocabulary is None:
+        return entities, False
+    return merge_farm_entities(entities, vocabulary.find(text)), True
+
+async def infer_ner(text: str, ticket: Ticket, degraded: bool = False) -> Dict[str, Any]:
+    """Extract entities qua batcher nếu bật batching, ngược lại gọi thẳng model"""
+    if ner_batcher is not None and not degraded:
+        return await ner_batcher.submit(text, deadline=ticket.deadline)
+    with ner_registry.acquire() as ner:
+        if degraded:
+            return ner.extract_rules_only(text)
+        if ticket.expired():
+            raise DeadlineExceeded()
+        return await ner.extract(text)
 
 # Health Check
 @app.get("/")
@@ -153,23 +561,212 @@ async def root():
         "status": "running",
         "version": "1.0.0",
         "models": {
-            "intent_classifier": "vinai/phobert-base",
-            "ner_extractor": "vinai/phobert-base"
+            "intent_classifier": settings.phobert_model_name,
+            "ner_extractor": settings.phobert_model_name
+        },
+        "engines": {
+            "intent_classifier": settings.intent_engine,
+            "ner_extractor": settings.ner_engine
         }
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint (liveness)
+    status = "healthy" chỉ khi model đã load + warm-up xong, "starting" trong lúc cold start
+    """
+    status = "healthy" if service_state["ready"] else service_state["status"]
+    body = {
+        "status": status,
+        "ready": service_state["ready"],
+        "intent_classifier": intent_registry.model is not None,
+        "ner_extractor": ner_registry.model is not None,
+        "model_versions": {name: registry.active_version for name, registry in MODEL_REGISTRIES.items()},
+        "startup_timings_ms": service_state["startup_timings_ms"],
+    }
+    if service_state["error"]:
+        body["error"] = service_state["error"]
+    # Load lỗi -> 503 để container bị restart
+    return JSONResponse(status_code=503 if status == "failed" else 200, content=body)
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 cho đến khi model load + warm-up xong"""
+    if not service_state["ready"]:
+        return JSONResponse(status_code=503, content={"ready": False, "status": service_state["status"]})
+    return {"ready": True, "status": service_state["status"]}
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics (queue depth, batch fill ratio, ...)"""
     return {
-        "status": "healthy",
-        "intent_classifier": intent_classifier is not None,
-        "ner_extractor": ner_extractor is not None
+        "admission": admission.stats(),
+        "degradation": degradation.stats(),
+        "cascade": intent_registry.model.cascade_stats() if intent_registry.model is not None else None,
+        "early_exit": intent_registry.model.early_exit_stats() if intent_registry.model is not None else None,
+        "tokenization_cache": tokenization_cache.stats(),
+        "farm_vocabulary": farm_vocabularies.stats(),
+        "crop_catalog": crop_catalog.stats(),
+        "intent_memory": intent_memory.stats(),
+        "inference_profile": inference_profile.stats(),
+        "batching": {
+            "enabled": settings.batching_enabled,
+            "intent": intent_batcher.stats() if intent_batcher is not None else None,
+            "ner": ner_batcher.stats() if ner_batcher is not None else None,
+        }
     }
 
+# Model Registry (admin)
+class ModelLoadRequest(BaseModel):
+    version: str
+
+async def check_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """ADMIN_TOKEN được cấu hình thì /admin/* bắt buộc header X-Admin-Token"""
+    if settings.admin_token and x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.get("/admin/models", dependencies=[Depends(check_admin_token)])
+async def list_model_versions():
+    """Version active / đang load / đang drain và các version có sẵn của từng model"""
+    return {name: registry.stats() for name, registry in MODEL_REGISTRIES.items()}
+
+@app.post("/admin/models/{name}/load", status_code=202, dependencies=[Depends(check_admin_token)])
+async def load_model_version(name: str, request: ModelLoadRequest):
+    """
+    Load version mới trong background (load + warm-up), swap khi xong
+    Request đang chạy dùng nốt version cũ, version cũ unload khi drain.
+    Version được ghi vào ACTIVE -> các worker khác tự đổi theo (MODEL_SYNC_INTERVAL_S)
+    """
+    registry = MODEL_REGISTRIES.get(name)
+    if registry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+    if not service_state["ready"]:
+        raise HTTPException(status_code=503, detail="Service is still starting")
+    try:
+        registry.load_in_background(request.version)
+    except ModelVersionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason)
+    return {
+        "model": name,
+        "loading_version": request.version,
+        "active_version": registry.active_version,
+    }
+
+class ShadowStartRequest(BaseModel):
+    intent_version: Optional[str] = None
+    ner_version: Optional[str] = None
+    sample_rate: float = 0.1
+
+@app.post("/admin/shadow/start", dependencies=[Depends(check_admin_token)])
+async def start_shadow(request: ShadowStartRequest):
+    """
+    Load candidate version (intent và/hoặc NER) rồi chạy shadow trên sample_rate request
+    Candidate load riêng, không ảnh hưởng version active
+    """
+    if not service_state["ready"]:
+        raise HTTPException(status_code=503, detail="Service is still starting")
+    if shadow.active or shadow_start_lock.locked():
+        raise HTTPException(status_code=409, detail="Shadow evaluation already running")
+    if not request.intent_version and not request.ner_version:
+        raise HTTPException(status_code=400, detail="intent_version or ner_version is required")
+
+    async with shadow_start_lock:
+        return await load_shadow_candidates(request)
+
+async def load_shadow_candidates(request: ShadowStartRequest) -> Dict[str, Any]:
+    """Load + warm-up candidate (như hot swap) rồi bật shadow"""
+    candidates = {}
+    for registry, version, loader in (
+        (intent_registry, request.intent_version, load_intent_version),
+        (ner_registry, request.ner_version, load_ner_version),
+    ):
+        if not version:
+            candidates[registry.name] = None
+            continue
+        try:
+            model_dir = registry.version_dir(version)
+        except ModelVersionError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.reason)
+        if not model_dir.exists():
+            raise HTTPException(status_code=404, detail=f"Version '{version}' of {registry.name} not found")
+        candidates[registry.name] = await loader(model_dir)
+
+    shadow.start(
+        candidates[intent_registry.name],
+        candidates[ner_registry.name],
+        versions={
+            intent_registry.name: request.intent_version,
+            ner_registry.name: request.ner_version,
+        },
+        sample_rate=request.sample_rate,
+    )
+    return shadow.stats()
+
+@app.post("/admin/shadow/stop", dependencies=[Depends(check_admin_token)])
+async def stop_shadow():
+    """Dừng shadow, unload candidate (giữ lại thống kê cuối cùng)"""
+    await shadow.stop()
+    return shadow.stats()
+
+@app.get("/admin/shadow", dependencies=[Depends(check_admin_token)])
+async def shadow_report():
+    """Agreement, confusion (primary -> candidate) và latency delta của candidate"""
+    return {
+        "active_versions": {name: registry.active_version for name, registry in MODEL_REGISTRIES.items()},
+        **shadow.stats(),
+    }
+
+@app.put("/admin/crops", dependencies=[Depends(check_admin_token)])
+async def reload_crop_catalog(request: CropCatalogRequest):
+    """NestJS đẩy lại bảng crops khi thay đổi, các worker khác đọc lại file trong vòng sync"""
+    stats = await asyncio.to_thread(crop_catalog.put, [crop.model_dump() for crop in request.crops])
+    return {"crop_catalog": stats}
+
+@app.post("/admin/intent-memory", dependencies=[Depends(check_admin_token)])
+async def add_intent_examples(request: IntentMemoryRequest):
+    """
+    Sửa intent ngay không cần train lại: câu trùng (sau chuẩn hoá) trả luôn intent đã sửa,
+    câu gần giống (cosine PhoBERT, chỉ engine torch) được kéo về intent đã sửa
+    """
+    classifier = intent_registry.model
+    if classifier is None:
+        raise HTTPException(status_code=503, detail="Intent classifier not loaded")
+    unknown = sorted({example.intent for example in request.examples} - set(classifier.intent_labels))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown intents: {unknown}")
+    stats = await asyncio.to_thread(
+        intent_memory.add, [example.model_dump() for example in request.examples], classifier
+    )
+    return {"intent_memory": stats}
+
+# Farm vocabulary (NestJS đẩy khi area/device của farm thay đổi)
+@app.put("/farms/{farm_id}/vocabulary", dependencies=[Depends(check_admin_token)])
+async def put_farm_vocabulary(farm_id: str, request: FarmVocabularyRequest):
+    """Thay toàn bộ tên area/device của farm, compile ngay, các worker khác đọc lại từ file"""
+    try:
+        vocabulary = farm_vocabularies.put(
+            farm_id,
+            [item.model_dump() for item in request.areas],
+            [item.model_dump() for item in request.devices],
+        )
+    except FarmVocabularyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason)
+    return {"farm_id": farm_id, **vocabulary.stats()}
+
+@app.delete("/farms/{farm_id}/vocabulary", dependencies=[Depends(check_admin_token)])
+async def delete_farm_vocabulary(farm_id: str):
+    try:
+        removed = farm_vocabularies.remove(farm_id)
+    except FarmVocabularyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"No vocabulary for farm '{farm_id}'")
+    return {"farm_id": farm_id, "removed": True}
+
 # Intent Classification Endpoints
 @app.post("/intent/classify", response_model=IntentResponse)
-async def classify_intent(request: IntentRequest):
+async def classify_intent(request: IntentRequest, ticket: Ticket = Depends(admission_ticket)):
     """
     Classify user intent using PhoBERT
     Args:
@@ -177,22 +774,26 @@ async def classify_intent(request: IntentRequest):
     Returns:
         IntentResponse with predicted intent and confidence
     """
-    if intent_classifier is None:
+    if not service_state["ready"]:
         raise HTTPException(status_code=503, detail="Intent classifier not loaded")
     
     try:
         logger.info(f"Classifying intent for: {request.text[:50]}...")
-        result = await intent_classifier.classify(request.text, top_k=request.top_k)
+        degraded = check_degraded()
+        result = await run_intent(request.text, request.top_k, ticket, degraded)
+        result["degraded"] = degraded
         logger.info(f"Intent: {result['intent']} (confidence: {result['confidence']:.2f})")
         return result
-        
+
+    except RequestRejected as e:
+        raise rejected_error(e)
     except Exception as e:
         logger.error(f"Intent classification error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # NER Endpoints
 @app.post("/ner/extract", response_model=NERResponse)
-async def extract_entities(request: NERRequest):
+async def extract_entities(request: NERRequest, ticket: Ticket = Depends(admission_ticket)):
     """
     Extract named entities using PhoBERT
     Args:
@@ -200,19 +801,117 @@ async def extract_entities(request: NERRequest):
     Returns:
         NERResponse with extracted entities
     """
-    if ner_extractor is None:
+    if not service_state["ready"]:
         raise HTTPException(status_code=503, detail="NER extractor not loaded")
     
     try:
         logger.info(f"Extracting entities from: {request.text[:50]}...")
-        result = await ner_extractor.extract(request.text)
-        logger.info(f"Found {len(result['entities'])} entities")
-        return result
-        
+        degraded = check_degraded()
+        result = await run_ner(request.text, ticket, degraded)
+        entities, farm_loaded = apply_farm_vocabulary(request.text, result["entities"], request.farm_id)
+        logger.info(f"Found {len(entities)} entities")
+        return {
+            **result,
+            "entities": entities,
+            "degraded": degraded,
+            "farm_vocabulary_loaded": farm_loaded,
+        }
+
+    except RequestRejected as e:
+        raise rejected_error(e)
     except Exception as e:
         logger.error(f"NER extraction error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
+@app.post("/ner/extract_batch", response_model=NERBatchResponse)
+async def extract_entities_batch(request: NERBatchRequest, ticket: Ticket = Depends(bulk_admission_ticket)):
+    """
+    Extract entities cho nhiều câu trong 1 request (bulk evaluation, tag lại lịch sử chat)
+    Không qua batcher: các câu đã là 1 batch, chia theo bucket + BATCH_MAX_SIZE câu mỗi forward
+    """
+    if not service_state["ready"]:
+        raise HTTPException(status_code=503, detail="NER extractor not loaded")
+    if len(request.texts) > settings.ner_batch_max_texts:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.ner_batch_max_texts} texts per request"
+        )
+
+    start_time = time.time()
+    try:
+        degraded = check_degraded()
+        with ner_registry.acquire() as ner:
+            if degraded:
+                results = [ner.extract_rules_only(text) for text in request.texts]
+            else:
+                if ticket.expired():
+                    raise DeadlineExceeded()
+                results = await ner.extract_batch(request.texts, max_batch_size=settings.batch_max_size)
+
+        farm_loaded = None
+        for text, result in zip(request.texts, results):
+            result["entities"], farm_loaded = apply_farm_vocabulary(text, result["entities"], request.farm_id)
+        return {
+            "results": results,
+            "processing_time_ms": (time.time() - start_time) * 1000,
+            "degraded": degraded,
+            "farm_vocabulary_loaded": farm_loaded,
+        }
+
+    except RequestRejected as e:
+        raise rejected_error(e)
+    except Exception as e:
+        logger.error(f"Batch NER extraction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Entity type mặc định khi gắn tag chunk tài liệu lúc ingest (lọc chunk theo cây trước khi so vector)
+DOCUMENT_ENTITY_TYPES = ("crop_name", "farm_area", "metric")
+
+@app.post("/ner/document", response_model=DocumentNERResponse)
+async def extract_document_entities(request: DocumentNERRequest, ticket: Ticket = Depends(bulk_admission_ticket)):
+    """
+    NER cho văn bản dài (chunk tài liệu RAG): cửa sổ trượt, không truncate 256 token
+    Không qua batcher (batch theo cửa sổ trong predict_documents), quá tải -> chỉ rule-based
+    """
+    if not service_state["ready"]:
+        raise HTTPException(status_code=503, detail="NER extractor not loaded")
+    if len(request.texts) > settings.ner_document_max_texts:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.ner_document_max_texts} texts per request"
+        )
+
+    start_time = time.time()
+    entity_types = set(request.entity_types or DOCUMENT_ENTITY_TYPES)
+    try:
+        degraded = check_degraded()
+        with ner_registry.acquire() as ner:
+            if degraded:
+                results = [
+                    {**ner.extract_rules_only(text), "windows": 0, "tokens": 0} for text in request.texts
+                ]
+            else:
+                if ticket.expired():
+                    raise DeadlineExceeded()
+                results = await asyncio.to_thread(
+                    ner.predict_documents,
+                    request.texts,
+                    settings.ner_document_window,
+                    settings.ner_document_overlap,
+                    settings.batch_max_size,
+                )
+        for result in results:
+            result["entities"] = [entity for entity in result["entities"] if entity["type"] in entity_types]
+        return {
+            "results": results,
+            "processing_time_ms": (time.time() - start_time) * 1000,
+            "degraded": degraded,
+        }
+
+    except RequestRejected as e:
+        raise rejected_error(e)
+    except Exception as e:
+        logger.error(f"Document NER error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Combined Endpoint (Intent + NER)
 # checkpoint3
 @app.post("/analyze", response_model=CombinedResponse)
@@ -222,7 +921,7 @@ async def extract_entities(request: NERRequest):
     # entities: List[Entity]
     # processing_time_ms: float
     # 17
-async def analyze_text(request: CombinedRequest):
+async def analyze_text(request: CombinedRequest, ticket: Ticket = Depends(admission_ticket)):
     # text: str
     # top_k: int = 3
     """
@@ -232,15 +931,19 @@ async def analyze_text(request: CombinedRequest):
     Returns:
         CombinedResponse with intent and entities
     """
-    if intent_classifier is None or ner_extractor is None:
+    if not service_state["ready"]:
         raise HTTPException(status_code=503, detail="Models not loaded")
     
     try:
         start_time = time.time()
         logger.info(f"Analyzing text: {request.text[:50]}...")
-        # Run both models
-        intent_result = await intent_classifier.classify(request.text, top_k=request.top_k)
-        ner_result = await ner_extractor.extract(request.text)
+        # Quá tải -> rules-only (keyword intent + regex entities) để kịp SLO
+        degraded = check_degraded()
+        # Run both models (song song, mỗi model gom batch riêng)
+        intent_result, ner_result = await asyncio.gather(
+            run_intent(request.text, request.top_k, ticket, degraded),
+            run_ner(request.text, ticket, degraded)
+        )
         logger.info("\n" + "="*60)
         logger.info("FINAL INTENT RESULT TO NESTJS:")
         logger.info(json.dumps(intent_result, indent=2, ensure_ascii=False))
@@ -251,15 +954,21 @@ async def analyze_text(request: CombinedRequest):
         logger.info(json.dumps(ner_result, indent=2, ensure_ascii=False))
         logger.info("="*60)
 
+        entities, farm_loaded = apply_farm_vocabulary(request.text, ner_result["entities"], request.farm_id)
+
         processing_time = (time.time() - start_time) * 1000
         return {
             "intent": intent_result["intent"],
             "intent_confidence": intent_result["confidence"],
             "all_intents": intent_result["all_intents"],
-            "entities": ner_result["entities"],
-            "processing_time_ms": processing_time
+            "entities": entities,
+            "processing_time_ms": processing_time,
+            "degraded": degraded,
+            "farm_vocabulary_loaded": farm_loaded
         }
-        
+
+    except RequestRejected as e:
+        raise rejected_error(e)
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
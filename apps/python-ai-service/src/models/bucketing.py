@@ -0,0 +1,102 @@
+"""
+Length bucketing cho PhoBERT inference
+Câu hỏi thực tế thường < 20 token: pad về bucket gần nhất (16/32/64/128/256)
+thay vì max_length=256, và trong 1 batch chỉ pad câu ngắn tới bucket của nó
+(câu ngắn không bị kéo dài theo câu dài nhất). Shape ổn định theo bucket cũng giúp
+ONNX Runtime / oneDNN tái sử dụng kernel đã chuẩn bị.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from .token_cache import TokenizationCache, encode_texts
+
+LENGTH_BUCKETS: Tuple[int, ...] = (16, 32, 64, 128, 256)
+
+
+def bucket_length(length: int, buckets: Sequence[int] = LENGTH_BUCKETS) -> int:
+    """Bucket nhỏ nhất chứa được length (buckets rỗng -> giữ nguyên length)"""
+    for bucket in buckets:
+        if length <= bucket:
+            return bucket
+    return length
+
+
+def tokenize_bucketed(
+    tokenizer,
+    texts: List[str],
+    max_length: int = 256,
+    buckets: Sequence[int] = LENGTH_BUCKETS,
+    return_offsets: bool = False,
+    cache: Optional[TokenizationCache] = None,
+) -> List[Tuple[List[int], Dict[str, torch.Tensor], Optional[List[np.ndarray]]]]:
+    """
+    Tokenize không padding, nhóm câu theo bucket rồi pad từng nhóm tới độ dài bucket
+
+    Args:
+        tokenizer: PhoBERT tokenizer
+        texts: Danh sách câu
+        max_length: Truncate như trước (256)
+        buckets: Các độ dài pad cho phép, rỗng = pad tới câu dài nhất trong nhóm
+        return_offsets: Trả thêm offset mapping (None nếu tokenizer không hỗ trợ)
+        cache: Tokenization cache dùng chung giữa intent và NER (None = luôn tokenize)
+
+    Returns:
+        List (row_indices, inputs, offsets) cho từng bucket, row_indices là vị trí trong texts;
+        offsets[i] là offset mapping (không pad) của câu row_indices[i]
+    """
+    if cache is not None:
+        encodings = cache.encode(tokenizer, texts, max_length)
+    else:
+        # Slow tokenizer không hỗ trợ offset mapping -> offsets = None
+        encodings = encode_texts(tokenizer, texts, max_length, return_offsets)
+    has_offsets = return_offsets and all(offsets is not None for _, offsets in encodings)
+
+    results = []
+    for rows, inputs in pad_bucketed(tokenizer, [ids for ids, _ in encodings], buckets):
+        group_offsets = [encodings[row][1] for row in rows] if has_offsets else None
+        results.append((rows, inputs, group_offsets))
+
+    return results
+
+
+def pad_bucketed(
+    tokenizer,
+    sequences: Sequence[Sequence[int]],
+    buckets: Sequence[int] = LENGTH_BUCKETS,
+) -> List[Tuple[List[int], Dict[str, torch.Tensor]]]:
+    """
+    Nhóm các chuỗi input_ids (đã có special token) theo bucket rồi pad từng nhóm
+
+    Returns:
+        List (row_indices, inputs) cho từng bucket, row_indices là vị trí trong sequences
+    """
+    groups: Dict[int, List[int]] = {}
+    if buckets:
+        for row, ids in enumerate(sequences):
+            groups.setdefault(bucket_length(len(ids), buckets), []).append(row)
+    elif sequences:
+        # Không bucketing: 1 nhóm, pad tới câu dài nhất (như padding=True)
+        groups[0] = list(range(len(sequences)))
+
+    pad_token_id = tokenizer.pad_token_id
+    with_token_type_ids = "token_type_ids" in tokenizer.model_input_names
+    results = []
+    for bucket, rows in sorted(groups.items()):
+        # Câu dài hơn bucket lớn nhất (hoặc không bucketing) -> pad tới câu dài nhất nhóm
+        length = max(bucket, max(len(sequences[row]) for row in rows))
+        inputs = {
+            "input_ids": torch.full((len(rows), length), pad_token_id, dtype=torch.long),
+            "attention_mask": torch.zeros((len(rows), length), dtype=torch.long),
+        }
+        if with_token_type_ids:
+            inputs["token_type_ids"] = torch.zeros((len(rows), length), dtype=torch.long)
+        for position, row in enumerate(rows):
+            ids = sequences[row]
+            inputs["input_ids"][position, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            inputs["attention_mask"][position, :len(ids)] = 1
+        results.append((rows, inputs))
+
+    return results
@@ -0,0 +1,139 @@
+"""
+Link entity crop_name -> crop id trong bảng crops của NestJS
+
+Bảng crops chỉ có vài chục dòng ("Cà phê robusta", "Lúa ST25"...) nhưng người dùng gọi
+"cà phê Robusta", "ca phe", "bắp", "cây lúa"... Trước đây NestJS phải dò lại bằng query.
+Ở đây dựng sẵn 1 dict: tên đã chuẩn hoá (bỏ dấu, lower, gộp khoảng trắng) -> crop id
+
+- Tên / alias của crop trong catalog: khớp chính xác sau chuẩn hoá
+- Nhóm tên gọi khác (models/crop_synonyms.json, sinh bởi scripts/build_gazetteer.py):
+  "bắp" -> nhóm "ngô" -> crop có tên là "ngô" hoặc bắt đầu bằng "ngô " (giống / loại)
+- Tên dẫn tới nhiều crop (2 giống cùng loại cây) thì không link (không đoán)
+
+Catalog do NestJS đẩy lên (PUT /admin/crops), lưu / đồng bộ giữa worker: serving/crop_catalog.py
+"""
+
+import json
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+SYNONYMS_FILE = Path(__file__).with_name("crop_synonyms.json")
+# "cây lúa", "quả xoài", "giống lúa ST25": thử lại sau khi bỏ từ chỉ loại ở đầu
+CLASSIFIERS = ("cay", "qua", "trai", "giong")
+# Ưu tiên khi 1 tên khớp nhiều crop: tên / alias của catalog > nhóm của chính tên đó > nhóm của loại cây
+PRIORITY_NAME, PRIORITY_SYNONYM, PRIORITY_SPECIES = 0, 1, 2
+
+
+@lru_cache(maxsize=4096)
+def normalize_crop_name(text: str) -> str:
+    """Bỏ dấu, đ -> d, lower, "_" của PhoBERT -> khoảng trắng (vd "Cà phê  Robusta" -> "ca phe robusta")"""
+    text = text.replace("_", " ").replace("đ", "d").replace("Đ", "d")
+    text = "".join(c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def load_synonym_groups(path: Path = SYNONYMS_FILE) -> List[List[str]]:
+    return json.loads(path.read_text(encoding="utf-8"))["groups"]
+
+
+class CropLinker:
+    """Tên cây (đã chuẩn hoá) -> crop id, dựng lại toàn bộ mỗi lần catalog thay đổi"""
+
+    def __init__(self, synonym_groups: Optional[Sequence[Sequence[str]]] = None):
+        groups = load_synonym_groups() if synonym_groups is None else synonym_groups
+        # tên chuẩn hoá -> index nhóm
+        self._group_of: Dict[str, int] = {}
+        self._groups: List[List[str]] = []
+        for group in groups:
+            keys = [normalize_crop_name(name) for name in group]
+            self._groups.append(keys)
+            for key in keys:
+                self._group_of.setdefault(key, len(self._groups) - 1)
+        self._index: Dict[str, str] = {}
+        self.crop_count = 0
+        self.ambiguous_count = 0
+
+    def update(self, crops: Sequence[Dict[str, Any]]):
+        """
+        Dựng lại dict cho catalog mới (thay nguyên dict, request đang chạy vẫn đọc bản cũ)
+
+        Args:
+            crops: [{"id": ..., "name": ..., "aliases": [...]}]
+        """
+        # key -> (priority, id); None = nhiều crop cùng priority
+        candidates: Dict[str, Any] = {}
+
+        def offer(key: str, priority: int, crop_id: str):
+            current = candidates.get(key)
+            if current is None or priority < current[0]:
+                candidates[key] = (priority, crop_id)
+            elif priority == current[0] and current[1] not in (None, crop_id) and priority != PRIORITY_NAME:
+                candidates[key] = (priority, None)
+
+        for crop in crops:
+            crop_id = str(crop["id"])
+            for name in [crop["name"], *crop.get("aliases", [])]:
+                key = normalize_crop_name(name)
+                if not key:
+                    continue
+                offer(key, PRIORITY_NAME, crop_id)
+                group = self._group_of.get(key)
+                if group is not None:
+                    for synonym in self._groups[group]:
+                        offer(synonym, PRIORITY_SYNONYM, crop_id)
+                species = self._species_group(key)
+                if species is not None:
+                    for synonym in self._groups[species]:
+                        offer(synonym, PRIORITY_SPECIES, crop_id)
+
+        self._index = {key: crop_id for key, (_, crop_id) in candidates.items() if crop_id is not None}
+        self.crop_count = len(crops)
+        self.ambiguous_count = sum(1 for _, crop_id in candidates.values() if crop_id is None)
+
+    def _species_group(self, key: str) -> Optional[int]:
+        """Nhóm của tên dài nhất là tiền tố (theo từ) của key, vd "lua st25" -> nhóm của "lúa" (loại cây)"""
+        words = key.split()
+        for length in range(len(words) - 1, 0, -1):
+            group = self._group_of.get(" ".join(words[:length]))
+            if group is not None:
+                return group
+        return None
+
+    def link(self, value: str) -> Optional[str]:
+        """Crop id của 1 tên cây, None nếu không có trong catalog hoặc không rõ crop nào"""
+        index = self._index
+        if not index:
+            return None
+        key = normalize_crop_name(value)
+        crop_id = index.get(key)
+        if crop_id is None:
+            first, _, rest = key.partition(" ")
+            if first in CLASSIFIERS and rest:
+                crop_id = index.get(rest)
+        return crop_id
+
+    def link_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Thêm crop_id vào entity crop_name link được (tại chỗ)"""
+        if not self._index:
+            return entities
+        for entity in entities:
+            self.link_entity(entity)
+        return entities
+
+    def link_entity(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        """Thêm crop_id nếu entity là crop_name link được (tại chỗ)"""
+        if entity["type"] == "crop_name":
+            crop_id = self.link(entity["value"])
+            if crop_id is not None:
+                entity["crop_id"] = crop_id
+        return entity
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "crops": self.crop_count,
+            "linked_names": len(self._index),
+            "ambiguous_names": self.ambiguous_count,
+            "synonym_groups": len(self._groups),
+        }
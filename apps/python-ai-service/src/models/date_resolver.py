@@ -0,0 +1,165 @@
+"""
+Chuyển entity date ("tháng trước", "quý 2", "tháng 11 năm 2024", "15/3/24"...) thành khoảng ngày cụ thể
+
+Trước đây _normalize_date giữ nguyên tiếng Việt ("tháng trước") và NestJS
+(utils/date-parser.util.ts) phải parse lại bằng chuỗi regex trước mỗi financial query.
+Ở đây:
+
+- 1 regex gộp, mỗi dạng 1 named group -> 1 lần search, lastgroup chọn hàm tính khoảng
+- Kết quả {"from": "YYYY-MM-DD", "to": "YYYY-MM-DD"} (2 đầu đều tính), theo giờ local của server
+- Nhớ kết quả theo chuỗi trong ngày, sang ngày mới thì xoá ("tháng trước" đổi nghĩa)
+
+Ngữ nghĩa giống parseDateRange của NestJS (tuần từ thứ 2, "tháng 11" chưa tới thì là năm ngoái,
+quý không có năm là quý của năm nay), kiểm tra: scripts/verify_date_resolver.py
+"""
+
+import calendar
+import re
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+DateSpan = Tuple[date, date]
+
+# Dạng dài đặt trước: "tháng 11 năm 2024" không bị "tháng 11" cắt ngang
+DATE_FORMS = {
+    "month_year": r"tháng\s*(?P<month_year_m>\d{1,2})\s*năm\s*(?P<month_year_y>\d{4})",
+    "month_last_year": r"tháng\s*(?P<month_last_year_m>\d{1,2})\s*năm\s*(?:ngoái|trước)",
+    "month_this_year": r"tháng\s*(?P<month_this_year_m>\d{1,2})\s*năm\s*(?:nay|này)",
+    "quarter_year": r"quý\s*(?P<quarter_year_q>\d)\s*năm\s*(?P<quarter_year_y>\d{4})",
+    "year": r"năm\s*(?P<year_y>\d{4})",
+    "month": r"tháng\s*(?P<month_m>\d{1,2})",
+    "quarter": r"quý\s*(?P<quarter_q>\d)",
+    "this_month": r"tháng\s*(?:này|nay)",
+    "last_month": r"tháng\s*trước",
+    "this_year": r"năm\s*(?:nay|này)",
+    "last_year": r"năm\s*(?:ngoái|trước)",
+    "this_week": r"tuần\s*(?:này|nay)",
+    "last_week": r"tuần\s*trước",
+    "today": r"hôm\s*nay",
+    "yesterday": r"hôm\s*qua",
+    "day": r"(?P<day_d>\d{1,2})/(?P<day_m>\d{1,2})/(?P<day_y>\d{2,4})",
+}
+DATE_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in DATE_FORMS.items()), re.IGNORECASE
+)
+MEMO_SIZE = 1024
+
+
+def month_span(year: int, month: int) -> Optional[DateSpan]:
+    if not 1 <= month <= 12:
+        return None
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def quarter_span(year: int, quarter: int) -> Optional[DateSpan]:
+    if not 1 <= quarter <= 4:
+        return None
+    first_month = (quarter - 1) * 3 + 1
+    return date(year, first_month, 1), month_span(year, first_month + 2)[1]
+
+
+def year_span(year: int) -> Optional[DateSpan]:
+    if not 2000 <= year <= 2100:
+        return None
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def week_span(monday: date) -> DateSpan:
+    return monday, monday + timedelta(days=6)
+
+
+def resolve_match(match: "re.Match", today: date) -> Optional[DateSpan]:
+    """Khoảng ngày của 1 match DATE_PATTERN, None nếu số không hợp lệ (tháng 13, quý 5...)"""
+    form = match.lastgroup
+    group = match.group
+
+    if form == "month_year":
+        year = int(group("month_year_y"))
+        return month_span(year, int(group("month_year_m"))) if 2000 <= year <= 2100 else None
+    if form == "month_last_year":
+        return month_span(today.year - 1, int(group("month_last_year_m")))
+    if form == "month_this_year":
+        return month_span(today.year, int(group("month_this_year_m")))
+    if form == "quarter_year":
+        year = int(group("quarter_year_y"))
+        return quarter_span(year, int(group("quarter_year_q"))) if 2000 <= year <= 2100 else None
+    if form == "year":
+        return year_span(int(group("year_y")))
+    if form == "month":
+        month = int(group("month_m"))
+        # Tháng chưa tới trong năm nay -> tháng đó của năm ngoái
+        return month_span(today.year - 1 if month > today.month else today.year, month)
+    if form == "quarter":
+        return quarter_span(today.year, int(group("quarter_q")))
+    if form == "this_month":
+        return month_span(today.year, today.month)
+    if form == "last_month":
+        last = today.replace(day=1) - timedelta(days=1)
+        return month_span(last.year, last.month)
+    if form == "this_year":
+        return year_span(today.year)
+    if form == "last_year":
+        return year_span(today.year - 1)
+    if form == "this_week":
+        return week_span(today - timedelta(days=today.weekday()))
+    if form == "last_week":
+        return week_span(today - timedelta(days=today.weekday() + 7))
+    if form == "today":
+        return today, today
+    if form == "yesterday":
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    if form == "day":
+        year = group("day_y")
+        year = int(f"20{year}") if len(year) == 2 else int(year)
+        try:
+            day = date(year, int(group("day_m")), int(group("day_d")))
+        except ValueError:
+            return None
+        return day, day
+    return None
+
+
+class DateResolver:
+    """Chuỗi date -> {"from", "to"} (ISO), nhớ theo ngày hiện tại"""
+
+    def __init__(self, clock: Callable[[], date] = date.today, memo_size: int = MEMO_SIZE):
+        self.clock = clock
+        self.memo_size = memo_size
+        self._day: Optional[date] = None
+        self._memo: Dict[str, Optional[Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve_span(self, text: str, today: date) -> Optional[DateSpan]:
+        match = DATE_PATTERN.search(text)
+        return resolve_match(match, today) if match else None
+
+    def resolve(self, text: str) -> Optional[Dict[str, str]]:
+        key = " ".join(text.lower().split())
+        today = self.clock()
+        with self._lock:
+            if today != self._day:
+                # Sang ngày mới: "hôm nay", "tuần này"... đã khác
+                self._memo.clear()
+                self._day = today
+            if key in self._memo:
+                self.hits += 1
+                cached = self._memo[key]
+                return dict(cached) if cached else None
+            self.misses += 1
+
+        span = self.resolve_span(key, today)
+        result = {"from": span[0].isoformat(), "to": span[1].isoformat()} if span else None
+        with self._lock:
+            if self._day == today:
+                if len(self._memo) >= self.memo_size:
+                    self._memo.clear()
+                self._memo[key] = result
+        return dict(result) if result else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"memo_size": len(self._memo), "hits": self.hits, "misses": self.misses}
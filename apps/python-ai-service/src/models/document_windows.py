@@ -0,0 +1,63 @@
+"""
+Cửa sổ trượt cho NER trên văn bản dài (chunk tài liệu RAG lúc ingest)
+
+extract() truncate ở 256 token, đủ cho câu hỏi nhưng chunk tài liệu ~2000 ký tự dài hơn nhiều.
+Ở đây văn bản được tokenize 1 lần (không truncate), chia thành các cửa sổ chồng nhau,
+các cửa sổ của mọi văn bản chạy chung batch theo bucket, rồi ghép nhãn lại:
+
+- Token nằm trong nhiều cửa sổ lấy nhãn của cửa sổ mà nó ở gần giữa nhất
+  (xa mép cắt nhất -> đủ ngữ cảnh 2 bên), mép là đầu / cuối văn bản thì không tính là mép cắt
+- Vị trí ký tự tính trên token của cả văn bản (offset mapping hoặc align_tokens) -> entity
+  có start / end theo văn bản gốc, không cần cộng offset từng cửa sổ
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Số token nội dung mỗi cửa sổ (+ <s> </s> = 256, max_position của PhoBERT là 258)
+DOCUMENT_WINDOW = 254
+DOCUMENT_OVERLAP = 64
+
+
+def plan_windows(length: int, window: int = DOCUMENT_WINDOW, overlap: int = DOCUMENT_OVERLAP) -> List[Tuple[int, int]]:
+    """[start, end) của các cửa sổ phủ length token, 2 cửa sổ liền nhau chung overlap token"""
+    if length <= 0:
+        return []
+    if window <= 0:
+        raise ValueError("window must be positive")
+    overlap = max(0, min(overlap, window - 1))
+    stride = window - overlap
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, length)
+        windows.append((start, end))
+        if end == length:
+            return windows
+        start += stride
+
+
+def merge_window_predictions(
+    length: int, windows: Sequence[Tuple[int, int]], predictions: Sequence[np.ndarray]
+) -> np.ndarray:
+    """
+    Nhãn cho từng token của văn bản từ nhãn của các cửa sổ
+
+    Args:
+        length: Số token của văn bản
+        windows: [start, end) của từng cửa sổ (plan_windows)
+        predictions: predictions[i] = nhãn các token nội dung của cửa sổ i (độ dài end - start)
+    """
+    merged = np.zeros(length, dtype=np.int64)
+    best = np.full(length, -1, dtype=np.int64)
+    for (start, end), window_predictions in zip(windows, predictions):
+        positions = np.arange(start, end)
+        # Khoảng cách tới mép cắt gần nhất; mép trùng đầu / cuối văn bản không phải mép cắt
+        left = positions - start if start > 0 else np.full(end - start, length)
+        right = end - 1 - positions if end < length else np.full(end - start, length)
+        score = np.minimum(left, right)
+        better = score > best[start:end]
+        merged[start:end][better] = np.asarray(window_predictions)[better]
+        best[start:end][better] = score[better]
+    return merged
@@ -0,0 +1,101 @@
+"""
+Early-exit heads cho PhoBERT intent classifier (gắn vào output các layer giữa của encoder)
+
+- Mỗi head: [<s>, masked mean] của hidden state layer đó -> Linear, train trên backbone đã đóng
+  băng (chỉ head học, features tính 1 lần), xem scripts/train_early_exit.py
+- Ngưỡng confidence từng head được calibrate trên tập riêng: head sau chỉ thấy các câu chưa
+  thoát ở head trước, ngưỡng nhỏ nhất mà các câu thoát ở đó vẫn trùng với model đầy đủ >= target
+- Inference (EarlyExitEngine trong engines.py): chạy từng layer, câu nào vượt ngưỡng thì dừng,
+  câu còn lại chạy tiếp tới classifier gốc ở layer cuối
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+from torch import nn
+
+EXIT_WEIGHTS_FILE = "early_exit.pt"
+EXIT_CONFIG_FILE = "config.json"
+# Ngưỡng > 1: head chưa calibrate thì không bao giờ cho thoát
+NEVER_EXIT = 1.01
+
+
+def pool_hidden(hidden: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """[batch, seq, hidden] -> [batch, 2 * hidden]: token <s> + mean các token thật (bỏ padding)"""
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    mean = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+    return torch.cat([hidden[:, 0], mean], dim=-1)
+
+
+class ExitHeads(nn.Module):
+    """Các head Linear theo layer (1-based: layer 4 = output của encoder.layer[3])"""
+
+    def __init__(
+        self,
+        hidden_size: int,
+        num_labels: int,
+        layers: Sequence[int],
+        thresholds: Optional[Sequence[float]] = None,
+    ):
+        super().__init__()
+        self.layers = [int(layer) for layer in layers]
+        self.thresholds = list(thresholds) if thresholds else [NEVER_EXIT] * len(self.layers)
+        if len(self.thresholds) != len(self.layers):
+            raise ValueError("thresholds must match layers")
+        self.config: Dict[str, Any] = {
+            "hidden_size": hidden_size,
+            "num_labels": num_labels,
+            "layers": self.layers,
+        }
+        self.heads = nn.ModuleList(nn.Linear(2 * hidden_size, num_labels) for _ in self.layers)
+        self.index = {layer: position for position, layer in enumerate(self.layers)}
+
+    def forward(self, features: Sequence[torch.Tensor]) -> List[torch.Tensor]:
+        """features[i] = pool_hidden của layer self.layers[i] -> logits của từng head"""
+        return [head(feature) for head, feature in zip(self.heads, features)]
+
+    def save_pretrained(self, output_dir: Path, extra_config: Dict[str, Any] = None):
+        output_dir.mkdir(parents=True, exist_ok=True)
+        torch.save(self.state_dict(), output_dir / EXIT_WEIGHTS_FILE)
+        config = {**self.config, "thresholds": self.thresholds, **(extra_config or {})}
+        (output_dir / EXIT_CONFIG_FILE).write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @classmethod
+    def from_pretrained(cls, model_dir: Path) -> "ExitHeads":
+        config = json.loads((model_dir / EXIT_CONFIG_FILE).read_text(encoding="utf-8"))
+        heads = cls(config["hidden_size"], config["num_labels"], config["layers"], config.get("thresholds"))
+        heads.load_state_dict(torch.load(model_dir / EXIT_WEIGHTS_FILE, map_location="cpu"))
+        heads.eval()
+        return heads
+
+
+def calibrate_thresholds(
+    confidences: np.ndarray,
+    agrees: np.ndarray,
+    target: float,
+    candidates: Sequence[float] = tuple(np.round(np.arange(0.5, 1.0, 0.005), 3)),
+) -> List[float]:
+    """
+    Ngưỡng cho từng head theo thứ tự layer
+
+    Args:
+        confidences: [heads, samples] max softmax của từng head
+        agrees: [heads, samples] dự đoán của head == dự đoán của model đầy đủ
+        target: Tỉ lệ trùng tối thiểu trong các câu thoát ở mỗi head (vd 0.99)
+        candidates: Các ngưỡng thử, chọn ngưỡng nhỏ nhất đạt target (không có -> NEVER_EXIT)
+    """
+    remaining = np.ones(confidences.shape[1], dtype=bool)
+    thresholds = []
+    for head_confidences, head_agrees in zip(confidences, agrees):
+        chosen = NEVER_EXIT
+        for threshold in sorted(candidates):
+            exits = remaining & (head_confidences >= threshold)
+            if exits.any() and head_agrees[exits].mean() >= target:
+                chosen = float(threshold)
+                break
+        thresholds.append(chosen)
+        remaining &= head_confidences < chosen
+    return thresholds
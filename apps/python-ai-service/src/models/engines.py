@@ -0,0 +1,279 @@
+"""
+Inference engines cho PhoBERT models
+Tách phần "chạy forward" ra khỏi IntentClassifier/NERExtractor
+để có thể đổi giữa PyTorch eager và ONNX Runtime mà không sửa logic xử lý
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import torch
+from loguru import logger
+
+from .early_exit import EXIT_WEIGHTS_FILE, ExitHeads, pool_hidden
+from .inference_profile import InferenceProfile
+from .student import STUDENT_WEIGHTS_FILE, BiLSTMStudent
+
+# ONNX Runtime is optional - only needed for engine="onnx" / "onnx-int8"
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNXRUNTIME_AVAILABLE = False
+
+ENGINE_TORCH = "torch"
+ENGINE_ONNX = "onnx"
+ENGINE_ONNX_INT8 = "onnx-int8"
+ENGINE_STUDENT = "student"
+ENGINE_EARLY_EXIT = "early-exit"
+SUPPORTED_ENGINES = (ENGINE_TORCH, ENGINE_ONNX, ENGINE_ONNX_INT8)
+# Student (distilled BiLSTM) và early-exit heads chỉ có cho intent
+INTENT_ENGINES = SUPPORTED_ENGINES + (ENGINE_STUDENT, ENGINE_EARLY_EXIT)
+
+# Tên file trong <model_dir>/onnx/ (do scripts/export_onnx.py sinh ra)
+ONNX_DIR_NAME = "onnx"
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+# Thư mục student trong <model_dir>/ (do scripts/distill_intent_student.py sinh ra)
+STUDENT_DIR_NAME = "student"
+# Thư mục early-exit heads trong <model_dir>/ (do scripts/train_early_exit.py sinh ra)
+EARLY_EXIT_DIR_NAME = "early_exit"
+
+
+class TorchEngine:
+    """Chạy model PyTorch (eager) - mặc định"""
+
+    name = ENGINE_TORCH
+
+    def __init__(self, model: torch.nn.Module, device: torch.device, profile: Optional[InferenceProfile] = None):
+        self.model = model
+        self.device = device
+        self.profile = profile or InferenceProfile()
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Args:
+            inputs: Output của tokenizer (return_tensors="pt")
+
+        Returns:
+            logits (tensor trên self.device)
+        """
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with self.profile.context(self.device):
+            # bf16 autocast -> logits bf16, đổi về fp32 cho softmax / argmax như cũ
+            return self.model(**inputs).logits.float()
+
+    def forward_pooled(self, inputs: Dict[str, torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Như __call__ nhưng trả thêm vector câu (mean pooling layer cuối, bỏ padding) trong cùng 1 forward
+
+        Returns:
+            (logits [batch, labels], vectors [batch, hidden]) đều fp32
+        """
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with self.profile.context(self.device):
+            outputs = self.model(**inputs, output_hidden_states=True)
+            hidden = outputs.hidden_states[-1]
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            vectors = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            return outputs.logits.float(), vectors.float()
+
+
+class OnnxEngine:
+    """Chạy graph ONNX đã export (fp32 hoặc int8 dynamic quantization) trên CPU"""
+
+    def __init__(self, model_path: Path, name: str = ENGINE_ONNX, intra_op_threads: Optional[int] = None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime not installed. Please install: pip install onnxruntime")
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_path}. Run scripts/export_onnx.py first."
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.name = name
+        self.model_path = model_path
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        # Graph chỉ nhận các input lúc export (input_ids, attention_mask)
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        logger.info(f"Loaded ONNX model {model_path.name} (inputs: {self.input_names})")
+
+    @classmethod
+    def from_model_dir(cls, model_dir: Path, engine: str, intra_op_threads: Optional[int] = None) -> "OnnxEngine":
+        """Chọn file .onnx theo engine ("onnx" hoặc "onnx-int8")"""
+        file_name = ONNX_INT8_FILE if engine == ENGINE_ONNX_INT8 else ONNX_FP32_FILE
+        return cls(model_dir / ONNX_DIR_NAME / file_name, name=engine, intra_op_threads=intra_op_threads)
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Args:
+            inputs: Output của tokenizer (return_tensors="pt")
+
+        Returns:
+            logits (tensor CPU) - cùng kiểu với TorchEngine để phần xử lý sau không đổi
+        """
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        logits = self.session.run(None, feed)[0]
+        return torch.from_numpy(logits)
+
+
+class StudentEngine:
+    """Chạy student BiLSTM đã distill từ PhoBERT (cùng tokenizer, nhỏ hơn ~15 lần)"""
+
+    name = ENGINE_STUDENT
+
+    def __init__(self, model: BiLSTMStudent, device: torch.device, profile: Optional[InferenceProfile] = None):
+        self.model = model.to(device)
+        self.device = device
+        self.profile = profile or InferenceProfile()
+
+    @classmethod
+    def from_model_dir(
+        cls, model_dir: Path, device: torch.device, profile: Optional[InferenceProfile] = None
+    ) -> "StudentEngine":
+        student_dir = model_dir / STUDENT_DIR_NAME
+        if not (student_dir / STUDENT_WEIGHTS_FILE).exists():
+            raise FileNotFoundError(
+                f"Student model not found at {student_dir}. Run scripts/distill_intent_student.py first."
+            )
+        logger.info(f"Loading distilled student model from {student_dir}")
+        return cls(BiLSTMStudent.from_pretrained(student_dir), device, profile)
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Args:
+            inputs: Output của tokenizer (return_tensors="pt")
+
+        Returns:
+            logits (tensor trên self.device)
+        """
+        with self.profile.context(self.device):
+            return self.model(
+                inputs["input_ids"].to(self.device),
+                inputs["attention_mask"].to(self.device)
+            ).float()
+
+
+class EarlyExitEngine:
+    """
+    PhoBERT chạy từng layer, câu nào head ở layer giữa đủ tự tin thì dừng ở đó
+    (xem models/early_exit.py). Câu còn lại đi hết 12 layer + classifier gốc như TorchEngine
+    """
+
+    name = ENGINE_EARLY_EXIT
+
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        heads: ExitHeads,
+        device: torch.device,
+        profile: Optional[InferenceProfile] = None,
+    ):
+        self.model = model
+        self.backbone = model.base_model
+        self.heads = heads.to(device)
+        self.device = device
+        self.profile = profile or InferenceProfile()
+        self.num_layers = len(self.backbone.encoder.layer)
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.layers_executed = 0
+        self.exits = {layer: 0 for layer in heads.layers}
+
+    @classmethod
+    def from_model_dir(
+        cls,
+        model_dir: Path,
+        model: torch.nn.Module,
+        device: torch.device,
+        profile: Optional[InferenceProfile] = None,
+    ) -> "EarlyExitEngine":
+        heads_dir = model_dir / EARLY_EXIT_DIR_NAME
+        if not (heads_dir / EXIT_WEIGHTS_FILE).exists():
+            raise FileNotFoundError(
+                f"Early-exit heads not found at {heads_dir}. Run scripts/train_early_exit.py first."
+            )
+        heads = ExitHeads.from_pretrained(heads_dir)
+        logger.info(f"Loaded early-exit heads at layers {heads.layers} (thresholds {heads.thresholds})")
+        return cls(model, heads, device, profile)
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Args:
+            inputs: Output của tokenizer (return_tensors="pt")
+
+        Returns:
+            logits (tensor trên self.device): của head đã cho thoát, hoặc của classifier gốc
+        """
+        input_ids = inputs["input_ids"].to(self.device)
+        attention_mask = inputs["attention_mask"].to(self.device)
+        token_type_ids = inputs.get("token_type_ids")
+        batch_size = input_ids.size(0)
+        with self.profile.context(self.device):
+            hidden = self.backbone.embeddings(
+                input_ids=input_ids,
+                token_type_ids=token_type_ids.to(self.device) if token_type_ids is not None else None,
+            )
+            extended_mask = self.backbone.get_extended_attention_mask(attention_mask, input_ids.shape)
+            logits = torch.empty((batch_size, self.heads.config["num_labels"]), device=self.device)
+            # Vị trí trong batch của các câu chưa thoát
+            active = torch.arange(batch_size, device=self.device)
+            exited: Dict[int, int] = {}
+            layers_executed = 0
+
+            for depth, layer in enumerate(self.backbone.encoder.layer, start=1):
+                hidden = layer(hidden, attention_mask=extended_mask)[0]
+                layers_executed += len(active)
+                position = self.heads.index.get(depth)
+                if position is None or depth == self.num_layers:
+                    continue
+                exit_logits = self.heads.heads[position](pool_hidden(hidden, attention_mask)).float()
+                confident = torch.softmax(exit_logits, dim=-1).max(dim=-1).values >= self.heads.thresholds[position]
+                if not confident.any():
+                    continue
+                logits[active[confident]] = exit_logits[confident]
+                exited[depth] = int(confident.sum())
+                keep = ~confident
+                if not keep.any():
+                    break
+                active = active[keep]
+                hidden = hidden[keep]
+                attention_mask = attention_mask[keep]
+                extended_mask = extended_mask[keep]
+            else:
+                # Câu chưa thoát: classifier gốc trên layer cuối
+                logits[active] = self.model.classifier(hidden).float()
+
+        with self._lock:
+            self.rows += batch_size
+            self.layers_executed += layers_executed
+            for depth, count in exited.items():
+                self.exits[depth] += count
+        return logits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "layers": self.heads.layers,
+                "thresholds": self.heads.thresholds,
+                "rows_total": self.rows,
+                "avg_layers": self.layers_executed / self.rows if self.rows else 0.0,
+                "exits_total": dict(self.exits),
+            }
+
+
+def validate_engine(engine: str, supported: Sequence[str] = SUPPORTED_ENGINES) -> str:
+    """Kiểm tra tên engine hợp lệ"""
+    if engine not in supported:
+        raise ValueError(f"Unsupported engine '{engine}'. Supported: {', '.join(supported)}")
+    return engine
@@ -0,0 +1,172 @@
+"""
+Gộp entity PhoBERT + rule-based: lọc entity sai + loại overlap trên mảng, tối ưu theo trọng số
+
+Trước đây _post_process_entities sort list dict, quét greedy theo last_end, rồi lọc và normalize
+thêm 2 vòng nữa. Greedy giữ entity bắt đầu trước dù ngắn hơn / kém tin cậy hơn entity sau
+(model trả "vườn cà" 0.7, regex trả "cà chua" 0.95 chồng lên -> "cà chua" bị bỏ). Ở đây:
+
+- EntitySpans: start / end / weight thành các mảng song song (1 vòng qua list dict), dict gốc giữ nguyên.
+  List Python + bisect chứ không dùng numpy: mỗi câu chỉ vài chục entity, overhead dựng mảng
+  numpy (~50µs / 8 entity) còn lớn hơn cả bước cũ
+- Lọc (crop 1 ký tự, "nam", "bắc"..., farm_area chỉ là số) ngay lúc dựng mảng, trước khi chọn:
+  entity sai không còn chặn entity đúng chồng lên nó
+- Weighted interval scheduling: tập entity không chồng nhau có tổng confidence × độ dài lớn nhất,
+  sort theo end + bisect cho p(j) -> O(n log n), DP O(n)
+- Trọng số bằng nhau thì giữ entity kết thúc trước / đứng trước trong list (model trước regex),
+  giống thứ tự ưu tiên của sort ổn định cũ
+- Span phủ trọn các mảnh cùng type nối liền nhau (chỉ cách khoảng trắng) luôn thắng các mảnh đó:
+  2 mảnh regex 0.95 ("quý 2" + "năm nay") có tổng confidence × độ dài lớn hơn 1 span model 0.85
+  phủ cả cụm, nhưng tách ra thì date_range của mảnh đầu sai
+- finalize (normalize value, date_range, crop_id) chạy ngay trong vòng lấy kết quả, chỉ trên entity được giữ
+
+Chậm hơn greedy cũ ở riêng bước chọn (vài µs / câu, thêm sort theo end + DP + ưu tiên span phủ),
+đổi lại không bỏ nhầm entity đúng. Cả bước post-process bị gazetteer.find chi phối (~30µs / câu).
+
+So sánh với greedy cũ: scripts/benchmark_entity_resolution.py
+"""
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Từ đơn hay bị gán nhầm (giống _filter_invalid_entities cũ)
+INVALID_CROP_WORDS = frozenset({"nam", "bắc", "trung", "miền", "chua", "tây", "đông"})
+INVALID_AREA_WORDS = frozenset("0123456789")
+# Span phủ nhận trọng số lớn hơn tổng các mảnh bên trong đúng 1 lượng nhỏ
+COVER_MARGIN = 1e-6
+
+
+def is_invalid_entity(entity_type: str, raw: str) -> bool:
+    raw_lower = raw.lower().strip()
+    if entity_type == "crop_name":
+        return raw_lower in INVALID_CROP_WORDS or len(raw_lower) == 1
+    if entity_type == "farm_area":
+        return raw_lower in INVALID_AREA_WORDS
+    return False
+
+
+class EntitySpans:
+    """Entity hợp lệ dạng mảng song song: index i <-> entities[indexes[i]]"""
+
+    __slots__ = ("entities", "indexes", "types", "starts", "ends", "weights")
+
+    def __init__(self, entities: Sequence[Dict[str, Any]]):
+        self.entities = entities
+        self.indexes: List[int] = []
+        self.types: List[str] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.weights: List[float] = []
+        for index, entity in enumerate(entities):
+            start, end = entity["start"], entity["end"]
+            # Span rỗng / ngược không chiếm chỗ nào, bỏ luôn
+            if end <= start or is_invalid_entity(entity["type"], entity["raw"]):
+                continue
+            self.indexes.append(index)
+            self.types.append(entity["type"])
+            self.starts.append(start)
+            self.ends.append(end)
+            self.weights.append(float(entity["confidence"]) * (end - start))
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+
+def prefer_covering_spans(spans: EntitySpans, text: Optional[str] = None) -> int:
+    """
+    Tăng trọng số của span phủ trọn các mảnh cùng type nối liền nhau lên trên tổng các mảnh
+
+    Mảnh nối liền: mảnh sau bắt đầu đúng ở end mảnh trước, hoặc chỉ cách khoảng trắng (cần text).
+    Span dài xét sau span ngắn để trọng số đã tăng của span con được cộng vào span cha.
+
+    Returns:
+        Số span được tăng trọng số
+    """
+    # Cần 1 span phủ + ít nhất 2 mảnh cùng type: đa số câu không có type nào lặp 3 lần
+    if len(spans) < 3 or len(set(spans.types)) == len(spans):
+        return 0
+    starts, ends, weights = spans.starts, spans.ends, spans.weights
+    groups: Dict[str, List[int]] = {}
+    for i, entity_type in enumerate(spans.types):
+        groups.setdefault(entity_type, []).append(i)
+    boosted = 0
+    for group in groups.values():
+        if len(group) < 3:
+            continue
+        for i in sorted(group, key=lambda i: ends[i] - starts[i]):
+            start, end = starts[i], ends[i]
+            inner = sorted(
+                (j for j in group if start <= starts[j] and ends[j] <= end and (starts[j], ends[j]) != (start, end)),
+                key=starts.__getitem__,
+            )
+            if len(inner) < 2:
+                continue
+            reached = {start}
+            for j in inner:
+                if starts[j] in reached or (text is not None and any(
+                    position < starts[j] and text[position:starts[j]].isspace() for position in reached
+                )):
+                    reached.add(ends[j])
+            if end in reached:
+                cover = sum(weights[j] for j in inner) + COVER_MARGIN
+                if cover > weights[i]:
+                    weights[i] = cover
+                    boosted += 1
+    return boosted
+
+
+def schedule_intervals(starts: Sequence[int], ends: Sequence[int], weights: Sequence[float]) -> List[int]:
+    """
+    Index các khoảng [start, end) không chồng nhau có tổng weight lớn nhất, theo thứ tự start
+
+    Khoảng chỉ chạm nhau (end == start của khoảng sau) không tính là chồng
+    """
+    count = len(starts)
+    order = sorted(range(count), key=ends.__getitem__)
+    sorted_ends = [ends[i] for i in order]
+    # previous[j] = số khoảng (theo thứ tự end) kết thúc <= start của khoảng j
+    previous = [0] * count
+    best = [0.0] * (count + 1)
+    for j, i in enumerate(order):
+        previous[j] = bisect_right(sorted_ends, starts[i])
+        take = weights[i] + best[previous[j]]
+        best[j + 1] = take if take > best[j] else best[j]
+
+    chosen = []
+    j = count
+    while j > 0:
+        if best[j] != best[j - 1]:
+            chosen.append(order[j - 1])
+            j = previous[j - 1]
+        else:
+            j -= 1
+    chosen.sort(key=starts.__getitem__)
+    return chosen
+
+
+def resolve_entities(
+    entities: Sequence[Dict[str, Any]],
+    text: Optional[str] = None,
+    finalize: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lọc entity sai + chọn tập không chồng nhau tốt nhất, trả dict gốc theo thứ tự start
+
+    Args:
+        text: Câu gốc, để coi 2 mảnh chỉ cách khoảng trắng là nối liền (None = phải chạm nhau)
+        finalize: Gọi tại chỗ trên từng entity được giữ (normalize, date_range, crop_id)
+    """
+    if not entities:
+        return []
+    spans = EntitySpans(entities)
+    if len(spans) <= 1:
+        chosen = range(len(spans))
+    else:
+        prefer_covering_spans(spans, text)
+        chosen = schedule_intervals(spans.starts, spans.ends, spans.weights)
+    result = []
+    for i in chosen:
+        entity = entities[spans.indexes[i]]
+        if finalize is not None:
+            finalize(entity)
+        result.append(entity)
+    return result
@@ -0,0 +1,84 @@
+"""
+Từ vựng riêng của từng farm: tên khu vực (areas) và thiết bị (devices) do người dùng đặt
+
+NestJS đẩy danh sách area / device của farm (PUT /farms/{farm_id}/vocabulary), ở đây compile
+thành PhraseTrie; /analyze có farm_id thì tìm tên trong câu và trả entity kèm area_id / device_id
+-> NestJS không phải dò lại tên trong DB (ILike) sau mỗi câu hỏi
+Cache / lưu trữ giữa các worker: serving/farm_vocabulary.py
+"""
+
+from typing import Any, Dict, List, Sequence
+
+from .gazetteer import PhraseTrie
+
+# Tên do chính người dùng đặt -> ưu tiên hơn regex / PhoBERT (0.95 / 0.85)
+FARM_CONFIDENCE = 0.97
+# "Khu-A", "nha_kinh.1": cho phép các ký tự này giữa 2 từ của tên ngoài khoảng trắng
+NAME_SEPARATORS = "-_./"
+# entity type -> field id trả về cho NestJS
+ID_FIELDS = {"farm_area": "area_id", "device_name": "device_id"}
+
+
+class FarmVocabulary:
+    """Area / device names của 1 farm đã compile, dùng chung cho mọi request của farm đó"""
+
+    def __init__(self, farm_id: str, areas: Sequence[Dict[str, Any]], devices: Sequence[Dict[str, Any]]):
+        """
+        Args:
+            farm_id: Id farm bên NestJS
+            areas, devices: [{"id": ..., "name": ..., "aliases": [...]}]
+        """
+        self.farm_id = farm_id
+        self.trie = PhraseTrie(separators=NAME_SEPARATORS)
+        # area trước device: tên trùng nhau thì hiểu là khu vực
+        for entity_type, items in (("farm_area", areas), ("device_name", devices)):
+            for item in items:
+                for name in [item["name"], *item.get("aliases", [])]:
+                    self.trie.add(name, (entity_type, str(item["id"]), item["name"]))
+        self.area_count = len(areas)
+        self.device_count = len(devices)
+        self.memory_bytes = self.trie.memory_bytes()
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """Entity cho tên area / device xuất hiện trong câu, value = tên chuẩn trong DB"""
+        entities = []
+        for start, end, (entity_type, item_id, name) in self.trie.find(text):
+            entities.append({
+                "type": entity_type,
+                "value": name,
+                "raw": text[start:end],
+                "start": start,
+                "end": end,
+                "confidence": FARM_CONFIDENCE,
+                ID_FIELDS[entity_type]: item_id,
+            })
+        return entities
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "areas": self.area_count,
+            "devices": self.device_count,
+            "phrases": self.trie.phrase_count,
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+def merge_farm_entities(entities: List[Dict[str, Any]], farm_entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Gộp entity của farm vào kết quả NER: tên của farm được giữ, entity khác chồng lên thì bỏ
+    (vd regex "khu A" trùng với area "Khu A" -> lấy bản có area_id)
+    """
+    if not farm_entities:
+        return entities
+    kept: List[Dict[str, Any]] = []
+    last_end = -1
+    # trùng nhau giữa các tên của farm: bắt đầu sớm hơn, rồi dài hơn
+    for entity in sorted(farm_entities, key=lambda e: (e["start"], -(e["end"] - e["start"]))):
+        if entity["start"] >= last_end:
+            kept.append(entity)
+            last_end = entity["end"]
+    others = [
+        entity for entity in entities
+        if all(entity["end"] <= farm["start"] or entity["start"] >= farm["end"] for farm in kept)
+    ]
+    return sorted(kept + others, key=lambda e: e["start"])
@@ -0,0 +1,170 @@
+"""
+Fast (Rust `tokenizers`) PhoBERT tokenizer có offset mapping
+
+PhobertTokenizer của transformers chỉ có bản slow (Python): BPE từng từ bằng vòng lặp Python
+và không trả offset mapping -> NERExtractor phải decode từng token rồi text.find để căn lại vị trí.
+Bản fast dựng lại đúng BPE đó từ vocab.txt + bpe.codes đã load trong slow tokenizer:
+
+- Pre-tokenize giống slow: mỗi "từ" là 1 đoạn \\S+\\n? (không normalize, không lowercase)
+- fastBPE đánh dấu token giữa từ bằng hậu tố "@@", còn `tokenizers` BPE dùng hậu tố "</w>" ở token
+  cuối từ -> đổi tên token trong vocab ("abc@@" -> "abc", "abc" -> "abc</w>"), giữ nguyên id
+- Slow tokenizer merge hết theo bpe.codes rồi mới tra vocab (token không có trong vocab -> <unk>),
+  còn `tokenizers` cần mọi kết quả merge có trong vocab -> token trung gian nhận id tạm sau vocab
+  gốc và được đổi về <unk> khi encode
+
+Kiểm tra input_ids trùng khớp với slow tokenizer: scripts/verify_fast_tokenizer.py
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from tokenizers import Regex, Tokenizer, decoders, models, pre_tokenizers, processors
+from transformers import AutoTokenizer, PreTrainedTokenizerFast
+
+# Hậu tố fastBPE (token giữa từ) và hậu tố cuối từ của bpe.codes
+CONTINUATION_SUFFIX = "@@"
+END_OF_WORD_SUFFIX = "</w>"
+# Giống re.findall(r"\S+\n?", text) trong PhobertTokenizer._tokenize
+WORD_PATTERN = r"\S+\n?"
+# Câu kiểm tra mặc định lúc load (script / model load riêng không truyền câu warm-up của main.py)
+DEFAULT_CHECK_TEXTS = (
+    "Bật máy bơm khu A trong 30 phút",
+    "Giá cà phê hôm nay bao nhiêu?",
+    "Doanh thu quý 2 năm 2024 của vườn sầu riêng",
+    "Cách phòng bệnh đạo ôn cho lúa",
+)
+
+
+class FastPhobertTokenizer(PreTrainedTokenizerFast):
+    """PreTrainedTokenizerFast + đổi id của token trung gian (ngoài vocab PhoBERT) về <unk>"""
+
+    slow_tokenizer_class = None
+    # Giống PhobertTokenizer: RoBERTa không dùng token_type_ids
+    model_input_names = ["input_ids", "attention_mask"]
+
+    def __init__(self, *args, phobert_vocab_size: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Số id thật của PhoBERT (embedding của model), id >= số này là token trung gian
+        self.phobert_vocab_size = phobert_vocab_size or self._tokenizer.get_vocab_size()
+
+    @property
+    def vocab_size(self) -> int:
+        return self.phobert_vocab_size
+
+    def __len__(self) -> int:
+        return self.phobert_vocab_size
+
+    def build_inputs_with_special_tokens(
+        self, token_ids_0: List[int], token_ids_1: Optional[List[int]] = None
+    ) -> List[int]:
+        """Như PhobertTokenizer: <s> A </s> và <s> A </s></s> B </s> (bản gốc trả ids không đổi)"""
+        bos, eos = [self.bos_token_id], [self.eos_token_id]
+        if token_ids_1 is None:
+            return bos + token_ids_0 + eos
+        return bos + token_ids_0 + eos + eos + token_ids_1 + eos
+
+    def _convert_encoding(self, encoding, **kwargs):
+        encoding_dict, encodings = super()._convert_encoding(encoding, **kwargs)
+        limit, unk_id = self.phobert_vocab_size, self.unk_token_id
+        encoding_dict["input_ids"] = [
+            ids if max(ids, default=0) < limit else [token_id if token_id < limit else unk_id for token_id in ids]
+            for ids in encoding_dict["input_ids"]
+        ]
+        return encoding_dict, encodings
+
+
+def _bpe_vocab(encoder: Dict[str, int], special_tokens: Sequence[str]) -> Dict[str, int]:
+    """Vocab PhoBERT (dạng "@@") -> vocab của `tokenizers` BPE (dạng "</w>"), cùng id"""
+    vocab = {}
+    for token, token_id in encoder.items():
+        if token in special_tokens:
+            vocab[token] = token_id
+        elif token.endswith(CONTINUATION_SUFFIX):
+            vocab.setdefault(token[: -len(CONTINUATION_SUFFIX)], token_id)
+        else:
+            vocab.setdefault(token + END_OF_WORD_SUFFIX, token_id)
+    return vocab
+
+
+def build_fast_phobert_tokenizer(slow_tokenizer) -> FastPhobertTokenizer:
+    """
+    Dựng FastPhobertTokenizer từ PhobertTokenizer (slow) đã load
+
+    Args:
+        slow_tokenizer: PhobertTokenizer (có encoder + bpe_ranks từ vocab.txt / bpe.codes)
+    """
+    special_tokens = list(slow_tokenizer.all_special_tokens)
+    # <mask> nằm ở added_tokens_encoder (id ngay sau vocab.txt)
+    vocab = _bpe_vocab({**slow_tokenizer.encoder, **slow_tokenizer.added_tokens_encoder}, special_tokens)
+    phobert_vocab_size = len(slow_tokenizer)
+
+    merges: List[Tuple[str, str]] = [pair for pair, _ in sorted(slow_tokenizer.bpe_ranks.items(), key=lambda x: x[1])]
+    # Token trung gian (2 vế + kết quả merge) không có trong vocab: id tạm, encode xong đổi về <unk>
+    next_id = max(vocab.values()) + 1
+    for left, right in merges:
+        for token in (left, right, left + right):
+            if token not in vocab:
+                vocab[token] = next_id
+                next_id += 1
+
+    tokenizer = Tokenizer(models.BPE(
+        vocab=vocab,
+        merges=merges,
+        unk_token=slow_tokenizer.unk_token,
+        end_of_word_suffix=END_OF_WORD_SUFFIX,
+    ))
+    tokenizer.pre_tokenizer = pre_tokenizers.Split(Regex(WORD_PATTERN), behavior="removed", invert=True)
+    tokenizer.decoder = decoders.BPEDecoder(suffix=END_OF_WORD_SUFFIX)
+    bos, eos = slow_tokenizer.bos_token, slow_tokenizer.eos_token
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single=f"{bos} $A {eos}",
+        pair=f"{bos} $A {eos} {eos} $B {eos}",
+        special_tokens=[(bos, slow_tokenizer.bos_token_id), (eos, slow_tokenizer.eos_token_id)],
+    )
+
+    return FastPhobertTokenizer(
+        tokenizer_object=tokenizer,
+        phobert_vocab_size=phobert_vocab_size,
+        model_max_length=slow_tokenizer.model_max_length,
+        padding_side=slow_tokenizer.padding_side,
+        **slow_tokenizer.special_tokens_map,
+    )
+
+
+def mismatched_texts(slow_tokenizer, fast_tokenizer, texts: Sequence[str], max_length: int = 256) -> List[str]:
+    """Các câu mà fast tokenizer cho input_ids khác slow tokenizer"""
+    texts = list(texts)
+    if not texts:
+        # Tokenizer slow không nhận batch rỗng (ValueError)
+        return []
+    slow_ids = slow_tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+    fast_ids = fast_tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+    return [text for text, expected, actual in zip(texts, slow_ids, fast_ids) if expected != actual]
+
+
+def load_tokenizer(model_name: str, fast: bool = True, check_texts: Optional[Sequence[str]] = None):
+    """
+    Load tokenizer PhoBERT, dùng bản fast (có offset mapping) nếu dựng được
+
+    Args:
+        model_name: HuggingFace name hoặc đường dẫn local
+        fast: False = giữ slow tokenizer (như trước)
+        check_texts: Câu kiểm tra nhanh lúc load, lệch input_ids với slow -> dùng slow
+            (None = DEFAULT_CHECK_TEXTS, rỗng = bỏ qua kiểm tra)
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if not fast or tokenizer.is_fast or not hasattr(tokenizer, "bpe_ranks"):
+        return tokenizer
+    try:
+        fast_tokenizer = build_fast_phobert_tokenizer(tokenizer)
+    except Exception as e:
+        logger.warning(f"Unable to build fast PhoBERT tokenizer: {e}. Using slow tokenizer")
+        return tokenizer
+    if check_texts is None:
+        check_texts = DEFAULT_CHECK_TEXTS
+    mismatches = mismatched_texts(tokenizer, fast_tokenizer, check_texts)
+    if mismatches:
+        logger.warning(f"Fast PhoBERT tokenizer differs from slow tokenizer on {mismatches[:3]}, using slow tokenizer")
+        return tokenizer
+    logger.info("Using fast PhoBERT tokenizer (offset mapping enabled)")
+    return fast_tokenizer
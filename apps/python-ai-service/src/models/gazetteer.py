@@ -0,0 +1,199 @@
+"""
+Compiled gazetteer cho rule-based NER (thay vòng lặp ~50 regex mỗi request)
+
+- crop_name / device_name: trie theo âm tiết (word-level), build 1 lần từ gazetteer.json
+  (sinh bởi scripts/build_gazetteer.py từ ENTITY_DATA), 1 lượt quét qua các từ của câu
+- farm_area / duration / date: dạng tham số (khu A, 10 phút, tháng 11) -> 1 regex alternation
+  compile sẵn, mỗi nhánh là 1 named group
+
+Với LEGACY_PATTERN_GROUPS, kết quả giống _extract_rule_based_entities cũ sau bước
+_remove_overlapping_entities (cùng confidence 0.95, cùng ưu tiên bắt đầu sớm nhất rồi dài nhất);
+PATTERN_GROUPS thêm các dạng date ghép (COMPOUND_DATE_PATTERNS)
+So sánh tốc độ / kết quả: scripts/benchmark_gazetteer.py
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+GAZETTEER_FILE = Path(__file__).with_name("gazetteer.json")
+RULE_CONFIDENCE = 0.95  # Very high confidence for rule-based multi-word
+
+# Thứ tự trong từng nhóm: nhánh dài / cụ thể hơn đứng trước (regex lấy nhánh khớp đầu tiên)
+# Các nhóm không thể khớp cùng vị trí bắt đầu (từ đầu khác nhau) nên thứ tự nhóm không ảnh hưởng
+PATTERN_GROUPS = {
+    "farm_area": [
+        r"\bhàng\s+\d+\b",  # hàng 1, hàng 2
+        r"\bluống\s+\d+\b",  # luống 1
+        r"\bkhu\s+[A-Z]\b",  # khu A
+        r"\bkhu\s+\d+\b",  # khu 1
+        r"\bvườn\s+\w+\b",  # vườn cam
+    ],
+    "duration": [
+        r"\d+\s*phút",  # 5 phút, 10 phút
+        r"\d+\s*giờ",  # 1 giờ, 2 giờ
+        r"\d+\s*ngày",  # 1 ngày
+        r"nửa\s+tiếng",  # nửa tiếng
+        r"\d+\s*tiếng\s*rưỡi",  # 1 tiếng rưỡi
+    ],
+    "date": [
+        r"quý\s*\d\s*năm\s*\d{4}",  # quý 2 năm 2024
+        r"tháng\s*\d{1,2}\s*năm\s*\d{4}",  # tháng 11 năm 2024
+        r"tháng\s*\d{1,2}\s*năm\s*(?:ngoái|trước)",  # tháng 11 năm ngoái
+        r"tháng\s*\d{1,2}\s*năm\s*(?:nay|này)",  # tháng 11 năm nay
+        r"năm\s*\d{4}",  # năm 2024
+        r"năm\s*(?:nay|này)",
+        r"năm\s*(?:ngoái|trước)",
+        r"tháng\s*\d{1,2}",  # tháng 11
+        r"tháng\s*(?:này|nay)",
+        r"tháng\s*trước",
+        r"quý\s*\d",  # quý 1, quý 2
+        r"tuần\s*(?:này|nay)",
+        r"tuần\s*trước",
+        r"hôm\s*nay",
+        r"hôm\s*qua",
+        r"\d{1,2}/\d{1,2}/\d{2,4}",
+    ],
+}
+
+# Dạng ghép DateResolver hiểu nhưng vòng regex cũ không có: thiếu thì "quý 2" + "năm 2024"
+# thành 2 entity riêng, date_range của entity đầu sai năm
+COMPOUND_DATE_PATTERNS = (
+    r"quý\s*\d\s*năm\s*\d{4}",
+    r"tháng\s*\d{1,2}\s*năm\s*(?:nay|này)",
+)
+# Các pattern của _extract_rule_based_entities cũ (so sánh trong benchmark / test)
+LEGACY_PATTERN_GROUPS = {
+    entity_type: [pattern for pattern in patterns if pattern not in COMPOUND_DATE_PATTERNS]
+    for entity_type, patterns in PATTERN_GROUPS.items()
+}
+
+WORD_RE = re.compile(r"\w+")
+
+
+def compile_patterns(groups: Dict[str, List[str]]) -> "re.Pattern":
+    """Gộp các nhóm thành 1 regex: (?P<farm_area>...)|(?P<duration>...)|(?P<date>...)"""
+    return re.compile(
+        "|".join(f"(?P<{entity_type}>{'|'.join(patterns)})" for entity_type, patterns in groups.items()),
+        re.IGNORECASE,
+    )
+
+
+class PhraseTrie:
+    """
+    Trie cụm từ theo âm tiết: {từ viết thường: node con}, key END lưu payload nếu cụm kết thúc ở node đó
+
+    Giữa 2 từ của cụm chỉ được là khoảng trắng (như \\s+ của regex cũ) hoặc ký tự trong separators,
+    \\w+ đảm bảo word boundary
+    """
+
+    END = ""  # \w+ không bao giờ rỗng nên không trùng với từ thật
+
+    def __init__(self, separators: str = ""):
+        self.root: Dict[str, Any] = {}
+        self.separators = separators
+        self.phrase_count = 0
+
+    def add(self, phrase: str, payload: Any) -> bool:
+        """Thêm cụm (cụm đã có thì giữ payload nạp trước), False nếu cụm không có từ nào"""
+        words = WORD_RE.findall(phrase.lower())
+        if not words:
+            return False
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        if self.END not in node:
+            self.phrase_count += 1
+            node[self.END] = payload
+        return True
+
+    def _is_separator(self, gap: str) -> bool:
+        if gap.isspace():
+            return True
+        return bool(self.separators) and bool(gap) and not gap.strip(self.separators + " \t\n")
+
+    def find(self, text: str) -> List[Tuple[int, int, Any]]:
+        """(start, end, payload) của cụm dài nhất bắt đầu tại mỗi từ của câu"""
+        words = [(match.group(0).lower(), match.start(), match.end()) for match in WORD_RE.finditer(text)]
+        matches = []
+        for index, (word, start, end) in enumerate(words):
+            node = self.root.get(word)
+            if node is None:
+                continue
+            best = (end, node[self.END]) if self.END in node else None
+            next_index = index + 1
+            while next_index < len(words):
+                next_word, next_start, next_end = words[next_index]
+                if not self._is_separator(text[end:next_start]):
+                    break
+                node = node.get(next_word)
+                if node is None:
+                    break
+                end = next_end
+                if self.END in node:
+                    best = (end, node[self.END])
+                next_index += 1
+            if best is not None:
+                matches.append((start, best[0], best[1]))
+        return matches
+
+    def memory_bytes(self) -> int:
+        """Ước lượng bộ nhớ (dict node + key), dùng cho memory budget của cache"""
+        total = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node)
+            for key, child in node.items():
+                total += sys.getsizeof(key)
+                if key == self.END:
+                    total += sys.getsizeof(child)
+                else:
+                    stack.append(child)
+        return total
+
+
+class Gazetteer:
+    """Trie cụm từ crop/device + regex tham số compile sẵn, dùng chung cho mọi request"""
+
+    def __init__(self, phrases: Dict[str, Iterable[str]], pattern_groups: Dict[str, List[str]] = PATTERN_GROUPS):
+        # cụm trùng ở nhiều type: giữ type nạp trước (crop trước device như thứ tự cũ)
+        self.trie = PhraseTrie()
+        for entity_type, values in phrases.items():
+            for phrase in values:
+                self.trie.add(phrase, entity_type)
+        self.pattern = compile_patterns(pattern_groups)
+
+    @classmethod
+    def load(cls, path: Path = GAZETTEER_FILE) -> "Gazetteer":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def find_phrases(self, text: str) -> List[Dict[str, Any]]:
+        """Cụm dài nhất bắt đầu tại mỗi từ của câu"""
+        return [self._entity(entity_type, text, start, end) for start, end, entity_type in self.trie.find(text)]
+
+    def find_patterns(self, text: str) -> List[Dict[str, Any]]:
+        return [
+            self._entity(match.lastgroup, text, match.start(), match.end())
+            for match in self.pattern.finditer(text)
+        ]
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """Toàn bộ rule-based entities (crop/device trước, như thứ tự pattern cũ)"""
+        return self.find_phrases(text) + self.find_patterns(text)
+
+    @staticmethod
+    def _entity(entity_type: str, text: str, start: int, end: int) -> Dict[str, Any]:
+        return {
+            "type": entity_type,
+            "raw": text[start:end],
+            "start": start,
+            "end": end,
+            "confidence": RULE_CONFIDENCE,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"phrases": self.trie.phrase_count, "patterns": sum(len(p) for p in PATTERN_GROUPS.values())}
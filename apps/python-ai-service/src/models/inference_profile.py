@@ -0,0 +1,120 @@
+"""
+CPU inference profile cho PhoBERT (TorchEngine / StudentEngine)
+
+- torch.inference_mode thay cho no_grad (không ghi version counter / view tracking)
+- Số thread intra-op / inter-op đặt rõ ràng, mặc định chia theo CPU quota của cgroup
+  (container giới hạn 2 CPU trên node 32 core: torch mặc định vẫn tạo 32 thread -> tranh nhau)
+- bf16 autocast khi CPU hỗ trợ (AVX512-BF16 / AMX), logits trả về fp32
+- flush denormal: số rất nhỏ gần 0 xử lý chậm hơn nhiều lần trên x86, làm tròn về 0
+
+So sánh các profile theo batch size: scripts/benchmark_inference_profile.py
+"""
+
+import contextlib
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import torch
+from loguru import logger
+
+CGROUP_V2_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+CGROUP_V1_QUOTA = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+CGROUP_V1_PERIOD = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """Số CPU cgroup cho phép dùng (vd 2.5), None nếu không giới hạn / không đọc được"""
+    try:
+        if CGROUP_V2_CPU_MAX.exists():
+            quota, period = CGROUP_V2_CPU_MAX.read_text().split()[:2]
+            if quota == "max":
+                return None
+            return int(quota) / int(period)
+        if CGROUP_V1_QUOTA.exists():
+            quota = int(CGROUP_V1_QUOTA.read_text())
+            if quota <= 0:
+                return None
+            return quota / int(CGROUP_V1_PERIOD.read_text())
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    """Số CPU dùng được: min(CPU affinity, CPU quota của cgroup làm tròn lên)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def bf16_supported() -> bool:
+    """CPU có lệnh bf16 (oneDNN tự kiểm tra AVX512-BF16 / AMX)"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+@dataclass
+class InferenceProfile:
+    """Cấu hình chạy forward trên CPU (xem config.py: INFERENCE_MODE, BF16_AUTOCAST, ...)"""
+    inference_mode: bool = True
+    # 0 = available_cpus() / workers
+    intra_op_threads: int = 0
+    inter_op_threads: int = 1
+    bf16: bool = False
+    flush_denormal: bool = True
+
+    def __post_init__(self):
+        self.applied = False
+        self.bf16_active = False
+        self.denormal_flushed = False
+        self.threads: Optional[int] = None
+
+    def apply_runtime(self, workers: int = 1):
+        """
+        Đặt thread / denormal / kiểm tra bf16 cho process hiện tại
+        Gọi 1 lần trong mỗi worker (sau fork) trước request đầu tiên
+        """
+        self.threads = self.intra_op_threads or max(1, available_cpus() // max(1, workers))
+        torch.set_num_threads(self.threads)
+        try:
+            torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError:
+            # inter-op pool đã được khởi tạo (đã chạy forward / đã set trước đó trong process)
+            logger.debug("Inter-op thread pool already initialized, keeping current size")
+
+        self.denormal_flushed = torch.set_flush_denormal(True) if self.flush_denormal else False
+
+        self.bf16_active = self.bf16 and bf16_supported()
+        if self.bf16 and not self.bf16_active:
+            logger.warning("BF16_AUTOCAST requested but CPU has no bf16 support, running fp32")
+        self.applied = True
+        logger.info(f"Inference profile: {self.stats()}")
+
+    def context(self, device: torch.device):
+        """Context cho 1 lần forward: inference_mode (hoặc no_grad) + bf16 autocast nếu bật"""
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode() if self.inference_mode else torch.no_grad())
+        if self.bf16_active and device.type == "cpu":
+            stack.enter_context(torch.autocast("cpu", dtype=torch.bfloat16))
+        return stack
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inference_mode": self.inference_mode,
+            "intra_op_threads": torch.get_num_threads(),
+            "inter_op_threads": torch.get_num_interop_threads(),
+            "cgroup_cpu_quota": cgroup_cpu_quota(),
+            "bf16_requested": self.bf16,
+            "bf16_active": self.bf16_active,
+            "flush_denormal": self.denormal_flushed,
+        }
@@ -3,12 +3,15 @@ Intent Classification using PhoBERT
 Fine-tuned for Vietnamese Agricultural Domain
 """
 
+import asyncio
 import json
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
 # fw deep learning: dùng để chạy PhoBERT, tensor computation, GPU/CPU
+import numpy as np
 import torch
 from loguru import logger
 # AutoTokenizer
@@ -31,7 +34,25 @@ from loguru import logger
 # Đầu ra: logits → intent
 # logits là kết quả thô mà model AI nhả ra trc khi đc chuẩn hoá thành xsuat %
 # transformers = tokenizer + model
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from transformers import AutoModelForSequenceClassification
+
+from .bucketing import LENGTH_BUCKETS, tokenize_bucketed
+from .engines import (
+    ENGINE_EARLY_EXIT,
+    ENGINE_STUDENT,
+    ENGINE_TORCH,
+    INTENT_ENGINES,
+    EarlyExitEngine,
+    OnnxEngine,
+    StudentEngine,
+    TorchEngine,
+    validate_engine,
+)
+from .fast_tokenizer import load_tokenizer
+from .inference_profile import InferenceProfile
+from .intent_memory import MEMORY_TOP_K, IntentMemory
+from .lexical_intent import LexicalIntentClassifier
+from .token_cache import TokenizationCache
 
 # kiểu service - intent-classifier.service
 class IntentClassifier:
@@ -51,32 +72,95 @@ class IntentClassifier:
     
     # <=> contructor nestjs
     # entry1
-    def __init__(self, model_name: str = "vinai/phobert-base"):
+    def __init__(
+        self,
+        model_name: str = "vinai/phobert-base",
+        engine: str = ENGINE_TORCH,
+        cascade_threshold: float = 0.0,
+        length_buckets: Sequence[int] = LENGTH_BUCKETS,
+        model_dir: Optional[Path] = None,
+        lexical_dir: Optional[Path] = None,
+        token_cache: Optional[TokenizationCache] = None,
+        inference_profile: Optional[InferenceProfile] = None,
+        memory: Optional[IntentMemory] = None,
+        memory_override_threshold: float = 0.95,
+        memory_boost_threshold: float = 0.85
+    ):
         """
         Initialize Intent Classifier
         
         Args:
             model_name: HuggingFace model name (default: vinai/phobert-base)
+            engine: Inference engine - "torch", "onnx", "onnx-int8", "student" hoặc "early-exit"
+            cascade_threshold: Confidence tối thiểu của lexical model để bỏ qua PhoBERT (0 = tắt cascade)
+            length_buckets: Độ dài pad cho phép (rỗng = pad tới câu dài nhất)
+            model_dir: Thư mục fine-tuned model (mặc định models/intent_classifier, xem ModelRegistry)
+            lexical_dir: Thư mục lexical model của cascade (mặc định models/intent_lexical)
+            token_cache: Tokenization cache dùng chung với NER (None = không cache)
+            inference_profile: inference_mode / bf16 autocast cho engine torch (mặc định InferenceProfile())
+            memory: Câu admin đã sửa intent (models/intent_memory.py), None = tắt
+            memory_override_threshold: Cosine tối thiểu để lấy hẳn intent của câu đã sửa
+            memory_boost_threshold: Cosine tối thiểu để câu đã sửa được trộn vào xác suất của model
         """
         self.model_name = model_name
+        self.engine_name = validate_engine(engine, INTENT_ENGINES)
+        # thư mục chứa fine-tuned model (config, weights, label_mapping.json, onnx/)
+        self.model_dir = model_dir or Path(__file__).resolve().parents[2] / "models" / "intent_classifier"
+        # Stage 1 của cascade (scripts/train_lexical_intent.py)
+        self.lexical_dir = lexical_dir or Path(__file__).resolve().parents[2] / "models" / "intent_lexical"
+        self.lexical: Optional[LexicalIntentClassifier] = None
+        self.cascade_threshold = cascade_threshold
+        self.cascade_hits = 0
+        self.cascade_escalations = 0
+        # try_cascade chạy từ nhiều thread (try_cascade_async)
+        self._cascade_lock = threading.Lock()
+        self.length_buckets = tuple(length_buckets)
+        self.token_cache = token_cache
+        self.inference_profile = inference_profile or InferenceProfile()
+        self.memory = memory
+        self.memory_override_threshold = memory_override_threshold
+        self.memory_boost_threshold = memory_boost_threshold
+        # Vector trong memory chỉ dùng được với đúng model đã sinh ra nó
+        self.encoder_id = str(self.model_dir)
         # kbao biến giữ Model & Tokenizer nhưng chưa load ngay để tiết kiệm RAM lúc đầu
         self.tokenizer = None
         self.model = None
+        # engine(inputs) -> logits, dùng chung cho torch và onnx
+        self.engine = None
         self.intent_labels: List[str] = self.INTENT_LABELS.copy()
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.load_time_ms = 0.0
         # 3
         logger.info(f"Intent Classifier initialized with device: {self.device}")
     
-    async def load_model(self):
-        """Load PhoBERT model and tokenizer"""
+    async def load_model(self, tokenizer=None):
+        """
+        Load PhoBERT model and tokenizer
+        Chạy trong thread riêng để startup load được intent + NER song song
+
+        Args:
+            tokenizer: Tokenizer đã load sẵn (dùng chung với NER), None thì tự load
+        """
+        await asyncio.to_thread(self._load_model_sync, tokenizer)
+
+    def _load_model_sync(self, tokenizer=None):
+        started = time.perf_counter()
         try:
-            # 
-            project_root = Path(__file__).resolve().parents[2]
-            fine_tuned_path = project_root / "models" / "intent_classifier"
-            # 4
-            logger.info(f"Loading tokenizer from {self.model_name}...")
-            # load tokenizer đúng với model
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            fine_tuned_path = self.model_dir
+            if tokenizer is not None:
+                self.tokenizer = tokenizer
+            else:
+                # 4
+                logger.info(f"Loading tokenizer from {self.model_name}...")
+                # load tokenizer đúng với model
+                self.tokenizer = load_tokenizer(self.model_name)
+
+            if self.cascade_threshold > 0:
+                if LexicalIntentClassifier.exists(self.lexical_dir):
+                    self.lexical = LexicalIntentClassifier.load(self.lexical_dir)
+                    logger.info(f"Loaded lexical intent model (cascade threshold={self.cascade_threshold})")
+                else:
+                    logger.warning(f"Lexical intent model not found at {self.lexical_dir}, cascade disabled")
  
             # Load label mapping if available
             # đọc file map nhãn
@@ -103,6 +187,20 @@ class IntentClassifier:
                     logger.warning(f"Unable to read label mapping: {mapping_error}. Falling back to default labels")
 
             num_labels = len(self.intent_labels) #5
+
+            if self.engine_name == ENGINE_STUDENT:
+                # Student BiLSTM distill từ PhoBERT, dùng chung tokenizer
+                self.engine = StudentEngine.from_model_dir(fine_tuned_path, self.device, self.inference_profile)
+                logger.info("✅ Intent Classifier loaded with distilled student engine")
+                return
+
+            if self.engine_name not in (ENGINE_TORCH, ENGINE_EARLY_EXIT):
+                # Graph ONNX đã export từ fine-tuned model, không cần load PyTorch weights
+                self.engine = OnnxEngine.from_model_dir(
+                    fine_tuned_path, self.engine_name, intra_op_threads=self.inference_profile.threads
+                )
+                logger.info(f"✅ Intent Classifier loaded with {self.engine_name} engine")
+                return
 #             Input text
 #                 ↓
 #              Tokenizer
@@ -141,12 +239,157 @@ class IntentClassifier:
             # Inference: KHÔNG được random - dropout off
             # ko eval() -> Mỗi lần predict ra kết quả KHÁC NHAU , output ko ổn định
             self.model.eval() #đúng cho inference
+            if self.engine_name == ENGINE_EARLY_EXIT:
+                # Cùng PhoBERT, thêm head ở các layer giữa (scripts/train_early_exit.py)
+                self.engine = EarlyExitEngine.from_model_dir(
+                    fine_tuned_path, self.model, self.device, self.inference_profile
+                )
+            else:
+                self.engine = TorchEngine(self.model, self.device, self.inference_profile)
             # 7
             logger.info("✅ Intent Classifier model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load Intent Classifier: {str(e)}")
             raise
+        finally:
+            self.load_time_ms = (time.perf_counter() - started) * 1000
+
+    def warmup(self, texts: List[str]) -> float:
+        """
+        Chạy forward trên vài câu mẫu để khởi tạo kernel/allocator trước request thật
+
+        Returns:
+            Thời gian warm-up (ms)
+        """
+        started = time.perf_counter()
+        # batch-of-1 (request đơn lẻ) và cả batch (đường DynamicBatcher)
+        for text in texts:
+            self.predict_batch([text], [3])
+        self.predict_batch(texts, [3] * len(texts))
+        return (time.perf_counter() - started) * 1000
+    def try_cascade(self, text: str, top_k: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Stage 1: lexical model (TF-IDF + LR, vài ms/câu trên CPU)
+
+        Returns:
+            Kết quả nếu confidence >= cascade_threshold, None nếu phải escalate lên PhoBERT
+        """
+        # Câu admin đã sửa thắng cả lexical lẫn PhoBERT
+        remembered = self.try_memory(text)
+        if remembered is not None:
+            return remembered
+        if self.lexical is None:
+            return None
+
+        start_time = time.time()
+        intent, confidence, all_intents = self.lexical.predict(text, top_k)
+        if confidence < self.cascade_threshold:
+            with self._cascade_lock:
+                self.cascade_escalations += 1
+            return None
+
+        with self._cascade_lock:
+            self.cascade_hits += 1
+        return {
+            "intent": intent,
+            "confidence": confidence,
+            "all_intents": all_intents,
+            "processing_time_ms": (time.time() - start_time) * 1000
+        }
+
+    async def try_cascade_async(self, text: str, top_k: int = 3) -> Optional[Dict[str, Any]]:
+        """try_cascade cho code trên event loop: TF-IDF + LR chạy trong thread, không chặn loop"""
+        if self.lexical is None:
+            # Chỉ còn tra câu đã sửa (dict lookup), không cần đổi thread
+            return self.try_memory(text)
+        return await asyncio.to_thread(self.try_cascade, text, top_k)
+
+    def try_memory(self, text: str) -> Optional[Dict[str, Any]]:
+        """Trùng (sau chuẩn hoá) câu admin đã sửa -> trả intent đã sửa, không chạy model"""
+        if self.memory is None:
+            return None
+        start_time = time.time()
+        intent = self.memory.match(text)
+        if intent is None:
+            return None
+        return {
+            "intent": intent,
+            "confidence": 1.0,
+            "all_intents": [{"intent": intent, "confidence": 1.0}],
+            "processing_time_ms": (time.time() - start_time) * 1000
+        }
+
+    def memory_vectors_supported(self) -> bool:
+        """Engine tính được vector câu cho memory (chỉ torch, ONNX / student / early-exit chỉ khớp text)"""
+        return self.memory is not None and isinstance(self.engine, TorchEngine)
+
+    def memory_vectors_ready(self) -> bool:
+        """Memory có vector của đúng model này"""
+        return self.memory_vectors_supported() and self.memory.has_vectors(self.encoder_id)
+
+    def embed(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Vector câu (mean pooling layer cuối) cho memory, [len(texts), hidden]"""
+        if not isinstance(self.engine, TorchEngine):
+            raise RuntimeError("Intent memory vectors need the PyTorch engine (INTENT_ENGINE=torch)")
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        for first in range(0, len(texts), batch_size):
+            chunk = texts[first:first + batch_size]
+            # Không qua token cache: câu thêm vào memory không phải câu đang hỏi
+            for rows, inputs, _ in tokenize_bucketed(
+                self.tokenizer, chunk, max_length=256, buckets=self.length_buckets
+            ):
+                _, pooled = self.engine.forward_pooled(inputs)
+                for position, row in enumerate(rows):
+                    vectors[first + row] = pooled[position].cpu().numpy()
+        return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def _predict_probabilities(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Softmax của model, đã trộn với câu đã sửa gần nhất nếu memory có vector"""
+        if not self.memory_vectors_ready():
+            return torch.softmax(self.engine(inputs), dim=-1)
+        logits, pooled = self.engine.forward_pooled(inputs)
+        return self._apply_memory(torch.softmax(logits, dim=-1), pooled)
+
+    def _apply_memory(self, probabilities: torch.Tensor, pooled: torch.Tensor) -> torch.Tensor:
+        """
+        Các câu đã sửa có cosine >= memory_boost_threshold bỏ phiếu theo similarity, trộn với xác suất
+        của model theo similarity cao nhất trong các phiếu: boost -> 0 (giữ model), override -> 1
+        (lấy hẳn phiếu bầu). Láng giềng có intent model không biết không bỏ phiếu, cũng không tính vào weight
+        """
+        scores, rows = self.memory.search(pooled.cpu().numpy(), MEMORY_TOP_K)
+        probs = probabilities.cpu().numpy().copy()
+        label_ids = {label: idx for idx, label in enumerate(self.intent_labels)}
+        span = self.memory_override_threshold - self.memory_boost_threshold
+        for position in range(len(probs)):
+            votes = np.zeros(len(self.intent_labels), dtype=probs.dtype)
+            best = 0.0
+            for score, row in zip(scores[position], rows[position]):
+                label_id = label_ids.get(self.memory.intents[row])
+                if score >= self.memory_boost_threshold and label_id is not None:
+                    votes[label_id] += score
+                    best = max(best, score)
+            if not votes.any():
+                continue
+            weight = min(1.0, (best - self.memory_boost_threshold) / span) if span > 0 else 1.0
+            probs[position] = (1 - weight) * probs[position] + weight * votes / votes.sum()
+            self.memory.vector_hits += 1
+        return torch.from_numpy(probs)
+
+    def cascade_stats(self) -> Dict[str, Any]:
+        total = self.cascade_hits + self.cascade_escalations
+        return {
+            "enabled": self.lexical is not None,
+            "threshold": self.cascade_threshold,
+            "hits_total": self.cascade_hits,
+            "escalations_total": self.cascade_escalations,
+            "escalation_rate": self.cascade_escalations / total if total else 0.0,
+        }
+
+    def early_exit_stats(self) -> Optional[Dict[str, Any]]:
+        """Số layer trung bình / số câu thoát ở từng head, None nếu không dùng early-exit"""
+        return self.engine.stats() if isinstance(self.engine, EarlyExitEngine) else None
+
     # method trong service
     async def classify(self, text: str, top_k: int = 3) -> Dict[str, Any]:
         """
@@ -167,88 +410,147 @@ class IntentClassifier:
 #   entities: Entity[];
 #   processing_time_ms: number;
 # }
-        if self.model is None or self.tokenizer is None:
+        if self.engine is None or self.tokenizer is None:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
+        cascaded = await self.try_cascade_async(text, top_k)
+        if cascaded is not None:
+            return cascaded
+
         start_time = time.time()
         
         try:
             # Tokenize input KEY1
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt", # pt = PyTorch Tensor (kiểu dữ liệu ma trận số của PyTorch)
-                truncation=True, # Cắt bớt nếu câu quá dài (>256 từ)
-                max_length=256,
-                padding=True  # Thêm số 0 vào cuối nếu câu quá ngắn (cho đủ độ dài chuẩn)
-            )
+            # Cắt bớt nếu câu quá dài (>256 token), pad tới bucket gần nhất (16/32/64/...)
+            # attention_mask = 0 ở phần pad nên kết quả không đổi
+            _, inputs, _ = tokenize_bucketed(
+                self.tokenizer, [text], max_length=256, buckets=self.length_buckets, cache=self.token_cache
+            )[0]
             # AI ko đọc đc chữ , nó cần biến 1 chuỗi thành các con số ID.
             # Ví dụ: "Bật đèn" -> [101, 892, 342, 102] (Các con số này gọi là Tensor).
-            print(f"1_input sau tokenizer: {inputs}")
             # {'input_ids': tensor([[    0,   139,   719, 10709,  5344,     2]]), '
             # token_type_ids': tensor([[0, 0, 0, 0, 0, 0]]), 
             # 'attention_mask': tensor([[1, 1, 1, 1, 1, 1]])}
-            # Move to device
-            # inputs.items() là lấy cặp [key, value]
-            # v.to(self.device) là đẩy ma trận số vào Card màn hình (GPU) hoặc CPU
-            # Model và toàn bộ tensor input phải nằm trên cùng một device
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            print(f"2-input move to device: {inputs}")
             # Get predictions
             # Token IDs (Đầu vào dạng số) -> MODEL AI -> Logits (Điểm số thô) 
             # -> Softmax -> Probability (Xác suất %).
             # KEY2
-            with torch.no_grad(): # giảm RAM,tăng tốc, chuẩn inference
-                outputs = self.model(**inputs) # Đưa số vào Model, **inputs là rải (spread) tham số
-                logits = outputs.logits # Lấy điểm thô (VD: Bật đèn=4.5, Hỏi giá=-2.0)
-                # là điểm số Model chấm cho từng ý định (số có thể âm || dương vô cùng)
-                probabilities = torch.softmax(logits, dim=-1) # Chuyển điểm thô thành % (0-100%), softmax hàm toán học biến điểm số thành %
-            
-            # Get top-k predictions
-# top_probs: Xác suất (VD: [0.9, 0.05, 0.05] - 90%, 5%, 5%)
-# top_indices: Mã số của ý định (VD: [2, 0, 1] - Ý định số 2, số 0, số 1)
-            # KEY3
-            top_probs, top_indices = torch.topk(probabilities[0], k=min(top_k, len(self.intent_labels)))
-            print(f"3 xác suất: {top_probs}")
-            print(f"4 index của intent map: {top_indices}")
-#             3 xác suất: tensor([9.9966e-01, 1.5042e-04, 6.8836e-05], device='cuda:0')
-#             4 index của intent map: tensor([2, 1, 4], device='cuda:0')
-# 5-bestIntent: knowledge_query
-# 6-bestConfidence: 0.9996635913848877
-            # Format results, biến dữ liệu thô của PyTorch thành JSON để trả vể Nestjs
-            all_intents = []
-            # zip giúp 2 danh sách cùng lúc
-            for prob, idx in zip(top_probs.cpu().numpy(), top_indices.cpu().numpy()):
-                all_intents.append({
-                    "intent": self.intent_labels[idx],
-                    "confidence": float(prob)
-                })
-            
-            # Best prediction
-            best_intent = self.intent_labels[top_indices[0].item()]
-            print(f"5-bestIntent: {best_intent}")
-
-            best_confidence = float(top_probs[0].item())
-            print(f"6-bestConfidence: {best_confidence}")
-            # KEY4
-            # If confidence is too low, use rule-based fallback
-            if best_confidence < 0.3:
-                logger.warning(f"Low confidence ({best_confidence:.3f}), using rule-based fallback")
-                return self._rule_based_classify(text, start_time)
-            
-            processing_time = (time.time() - start_time) * 1000
+            # engine tự move input sang device, torch chạy theo InferenceProfile (inference_mode, bf16) hoặc ONNX Runtime
+            # logits: điểm thô (VD: Bật đèn=4.5, Hỏi giá=-2.0), số có thể âm || dương vô cùng
+            # softmax chuyển điểm thô thành % (0-100%); memory có câu đã sửa gần giống thì trộn vào
+            probabilities = self._predict_probabilities(inputs)
             
-            return {
-                "intent": best_intent,
-                "confidence": best_confidence,
-                "all_intents": all_intents,
-                "processing_time_ms": processing_time
-            }
+            return self._format_prediction(text, probabilities[0], top_k, start_time)
             
         except Exception as e:
             logger.error(f"Classification error: {str(e)}")
             # Fallback to rule-based classification
             return self._rule_based_classify(text, start_time)
     
+    def predict_batch(self, texts: List[str], top_ks: List[int]) -> List[Dict[str, Any]]:
+        """
+        Classify nhiều câu trong 1 lần forward (dùng cho DynamicBatcher)
+
+        Args:
+            texts: Danh sách câu cần phân loại
+            top_ks: top_k tương ứng với từng câu
+
+        Returns:
+            List kết quả cùng thứ tự với texts
+        """
+        if self.engine is None or self.tokenizer is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+
+        start_time = time.time()
+
+        try:
+            results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+            # Câu admin đã sửa không cần forward
+            pending = []
+            for row, text in enumerate(texts):
+                results[row] = self.try_memory(text)
+                if results[row] is None:
+                    pending.append(row)
+            if not pending:
+                return results
+
+            # Chia batch theo bucket độ dài: câu ngắn không bị pad theo câu dài nhất
+            for rows, inputs, _ in tokenize_bucketed(
+                self.tokenizer, [texts[row] for row in pending], max_length=256, buckets=self.length_buckets,
+                cache=self.token_cache
+            ):
+                rows = [pending[row] for row in rows]
+                try:
+                    probabilities = self._predict_probabilities(inputs)
+                except Exception as e:
+                    # Lỗi forward chỉ ảnh hưởng các câu trong bucket này
+                    logger.error(f"Batch classification error: {str(e)}")
+                    for row in rows:
+                        results[row] = self._rule_based_classify(texts[row], start_time)
+                    continue
+                for position, row in enumerate(rows):
+                    # Lỗi của 1 câu (top_k sai...) không được thay kết quả các request khác trong batch
+                    try:
+                        results[row] = self._format_prediction(
+                            texts[row], probabilities[position], top_ks[row], start_time
+                        )
+                    except Exception as e:
+                        logger.error(f"Classification error for batch row {row}: {str(e)}")
+                        results[row] = self._rule_based_classify(texts[row], start_time)
+            return results
+
+        except Exception as e:
+            logger.error(f"Batch classification error: {str(e)}")
+            return [self._rule_based_classify(text, start_time) for text in texts]
+
+    def _format_prediction(
+        self,
+        text: str,
+        probabilities: torch.Tensor,
+        top_k: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Convert xác suất của 1 câu thành response (top-k + rule-based fallback)"""
+        # Get top-k predictions
+# top_probs: Xác suất (VD: [0.9, 0.05, 0.05] - 90%, 5%, 5%)
+# top_indices: Mã số của ý định (VD: [2, 0, 1] - Ý định số 2, số 0, số 1)
+        # KEY3
+        top_probs, top_indices = torch.topk(probabilities, k=min(top_k, len(self.intent_labels)))
+        top_probs = top_probs.cpu().numpy()
+        top_indices = top_indices.cpu().numpy()
+
+        # Format results, biến dữ liệu thô của PyTorch thành JSON để trả vể Nestjs
+        all_intents = []
+        # zip giúp 2 danh sách cùng lúc
+        for prob, idx in zip(top_probs, top_indices):
+            all_intents.append({
+                "intent": self.intent_labels[idx],
+                "confidence": float(prob)
+            })
+
+        # Best prediction
+        best_intent = self.intent_labels[top_indices[0]]
+        best_confidence = float(top_probs[0])
+
+        # KEY4
+        # If confidence is too low, use rule-based fallback
+        if best_confidence < 0.3:
+            logger.warning(f"Low confidence ({best_confidence:.3f}), using rule-based fallback")
+            return self._rule_based_classify(text, start_time)
+
+        processing_time = (time.time() - start_time) * 1000
+
+        return {
+            "intent": best_intent,
+            "confidence": best_confidence,
+            "all_intents": all_intents,
+            "processing_time_ms": processing_time
+        }
+
+    def classify_rules_only(self, text: str) -> Dict[str, Any]:
+        """Keyword classification, không chạy PhoBERT (dùng khi service quá tải)"""
+        return self._rule_based_classify(text, time.time())
+
     def _rule_based_classify(self, text: str, start_time: float) -> Dict[str, Any]:
         """Rule-based fallback classification"""
         text_lower = text.lower()
@@ -0,0 +1,202 @@
+"""
+Bộ nhớ câu đã sửa intent (admin sửa câu bị phân loại sai, không cần train lại)
+
+- Mỗi ví dụ: text đã chuẩn hoá + intent đúng + vector câu PhoBERT (mean pooling layer cuối, L2 norm)
+- Trước model: trùng text chuẩn hoá -> trả luôn intent đã sửa (không chạy PhoBERT / lexical)
+- Sau model: cosine top-k với ma trận vector (1 phép nhân ma trận + argpartition),
+  các láng giềng >= boost_threshold bỏ phiếu theo similarity rồi trộn với xác suất của model,
+  similarity cao nhất >= override_threshold thì lấy hẳn phiếu bầu
+- Vector gắn với encoder (thư mục model sinh ra nó): model đổi version thì phải tính lại,
+  vector của encoder khác không được dùng (chỉ còn khớp text)
+
+Chỉ dùng numpy (phần tính vector nằm ở IntentClassifier.embed), benchmark:
+scripts/benchmark_intent_memory.py
+"""
+
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MEMORY_TOP_K = 5
+_SPACES = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " ?!.,;:…\"'"
+
+
+def normalize_query(text: str) -> str:
+    """NFC + lower + gộp khoảng trắng + bỏ dấu câu ở 2 đầu ("Bật bơm đi!" == "bật  bơm đi")"""
+    text = unicodedata.normalize("NFC", text).lower()
+    return _SPACES.sub(" ", text).strip(_EDGE_PUNCTUATION)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IntentMemory:
+    """Ví dụ đã sửa: dict text -> index + ma trận vector [n, dim] (tăng gấp đôi khi đầy)"""
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.intents: List[str] = []
+        self.encoder: Optional[str] = None
+        self._index: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.vector_hits = 0
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        """View [n, dim] (None nếu chưa có vector)"""
+        vectors = self._vectors
+        return vectors[:len(self.texts)] if vectors is not None else None
+
+    def has_vectors(self, encoder: str) -> bool:
+        return self._vectors is not None and self.encoder == encoder and len(self.texts) > 0
+
+    def add(
+        self,
+        texts: Sequence[str],
+        intents: Sequence[str],
+        vectors: Optional[np.ndarray] = None,
+        encoder: Optional[str] = None,
+    ) -> int:
+        """
+        Thêm / sửa ví dụ (text đã có thì ghi đè intent + vector)
+
+        Args:
+            vectors: [len(texts), dim] của encoder, None = chỉ khớp text
+                (vector cũ bị bỏ nếu encoder khác encoder hiện tại)
+
+        Returns:
+            Số ví dụ mới
+        """
+        if vectors is not None:
+            vectors = normalize_rows(vectors)
+        added = 0
+        with self._lock:
+            if vectors is not None and encoder != self.encoder:
+                # Vector của encoder khác không so được với nhau
+                self._vectors = None
+                self.encoder = encoder
+                self._reserve(len(self.texts), vectors.shape[1])
+            for position, (text, intent) in enumerate(zip(texts, intents)):
+                key = normalize_query(text)
+                row = self._index.get(key)
+                if row is None:
+                    row = len(self.texts)
+                    self._index[key] = row
+                    self.texts.append(key)
+                    self.intents.append(intent)
+                    added += 1
+                else:
+                    self.intents[row] = intent
+                if vectors is not None:
+                    self._reserve(row + 1, vectors.shape[1])
+                    self._vectors[row] = vectors[position]
+                elif self._vectors is not None:
+                    self._reserve(row + 1, self._vectors.shape[1])
+        return added
+
+    def set_vectors(self, vectors: np.ndarray, encoder: str):
+        """Thay toàn bộ vector (tính lại sau khi đổi model), vectors[i] <-> self.texts[i]"""
+        vectors = normalize_rows(vectors)
+        with self._lock:
+            if len(vectors) != len(self.texts):
+                raise ValueError("vectors must match the stored examples")
+            self._vectors = vectors.copy()
+            self.encoder = encoder
+
+    def _reserve(self, rows: int, dim: int):
+        """Đảm bảo ma trận đủ rows hàng (amortized O(1) mỗi lần thêm)"""
+        if self._vectors is None or self._vectors.shape[1] != dim:
+            # Hàng của các ví dụ chưa có vector để 0 -> similarity 0, không bao giờ vượt ngưỡng
+            self._vectors = np.zeros((max(rows, 16), dim), dtype=np.float32)
+        elif rows > len(self._vectors):
+            grown = np.zeros((max(rows, 2 * len(self._vectors)), dim), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+
+    def match(self, text: str) -> Optional[str]:
+        """Intent đã sửa của đúng câu này (sau chuẩn hoá), None nếu chưa có"""
+        row = self._index.get(normalize_query(text))
+        if row is None:
+            return None
+        self.exact_hits += 1
+        return self.intents[row]
+
+    def search(self, queries: np.ndarray, k: int = MEMORY_TOP_K) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine top-k cho nhiều câu 1 lần
+
+        Args:
+            queries: [batch, dim] vector câu (chưa cần normalize)
+
+        Returns:
+            (scores [batch, k'], rows [batch, k']) giảm dần, k' = min(k, số ví dụ)
+        """
+        with self._lock:
+            matrix = self.vectors
+        if matrix is None or len(matrix) == 0:
+            empty = np.empty((len(queries), 0))
+            return empty, empty.astype(np.int64)
+        scores = normalize_rows(queries) @ matrix.T
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            rows = np.broadcast_to(np.arange(k), scores.shape).copy()
+        top = np.take_along_axis(scores, rows, axis=1)
+        order = np.argsort(-top, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+    def save(self, path: Path):
+        """Ghi atomic (file tạm rồi replace) để worker khác không đọc file dở"""
+        with self._lock:
+            vectors = self.vectors
+            payload = {
+                "texts": np.array(self.texts, dtype=str),
+                "intents": np.array(self.intents, dtype=str),
+                "encoder": np.array(self.encoder or "", dtype=str),
+                "vectors": vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32),
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_name(f".{path.name}.tmp")
+        with open(tmp_file, "wb") as f:
+            np.savez(f, **payload)
+        tmp_file.replace(path)
+
+    def load(self, path: Path):
+        """Thay nội dung bằng file đã save (KeyError / ValueError nếu file hỏng)"""
+        with np.load(path, allow_pickle=False) as data:
+            texts = data["texts"].tolist()
+            intents = data["intents"].tolist()
+            encoder = str(data["encoder"]) or None
+            vectors = data["vectors"]
+        if len(texts) != len(intents) or (vectors.size and len(vectors) != len(texts)):
+            raise ValueError("corrupted intent memory file")
+        with self._lock:
+            self.texts = texts
+            self.intents = intents
+            self._index = {text: row for row, text in enumerate(texts)}
+            self._vectors = vectors.astype(np.float32) if vectors.size else None
+            self.encoder = encoder
+
+    def stats(self) -> Dict[str, object]:
+        vectors = self.vectors
+        return {
+            "examples": len(self.texts),
+            "vectors": 0 if vectors is None else len(vectors),
+            "encoder": self.encoder,
+            "exact_hits_total": self.exact_hits,
+            "vector_hits_total": self.vector_hits,
+        }
@@ -0,0 +1,88 @@
+"""
+Lexical Intent Classifier (TF-IDF char n-gram + Logistic Regression)
+Stage 1 của cascade: câu dễ ("bật đèn", "doanh thu tháng này") trả lời ngay,
+chỉ câu khó (confidence thấp) mới phải chạy PhoBERT
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import joblib
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+
+
+class LexicalIntentClassifier:
+    """
+    Wrapper quanh sklearn pipeline, xác suất đã calibrate (CalibratedClassifierCV)
+    để so với ngưỡng cascade có ý nghĩa
+    """
+
+    def __init__(self, pipeline: Pipeline = None, labels: List[str] = None):
+        self.pipeline = pipeline
+        self.labels: List[str] = labels or []
+
+    @staticmethod
+    def build_pipeline() -> Pipeline:
+        """char n-gram (bắt được từ viết sai/thiếu dấu) + word n-gram"""
+        features = FeatureUnion([
+            ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), sublinear_tf=True, min_df=2)),
+            ("word", TfidfVectorizer(analyzer="word", ngram_range=(1, 2), sublinear_tf=True, min_df=1)),
+        ])
+        classifier = CalibratedClassifierCV(
+            LogisticRegression(C=10.0, max_iter=2000),
+            method="sigmoid",
+            ensemble=False,  # 1 LR duy nhất lúc inference (calibrator fit trên out-of-fold predictions)
+            cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
+        )
+        return Pipeline([("features", features), ("classifier", classifier)])
+
+    def fit(self, texts: List[str], labels: List[str]) -> "LexicalIntentClassifier":
+        self.pipeline = self.build_pipeline()
+        self.pipeline.fit([text.lower() for text in texts], np.asarray(labels))
+        self.labels = [str(label) for label in self.pipeline.classes_]
+        return self
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        Returns:
+            Ma trận xác suất [len(texts), len(self.labels)]
+        """
+        return self.pipeline.predict_proba([text.lower() for text in texts])
+
+    def predict(self, text: str, top_k: int = 3) -> Tuple[str, float, List[Dict[str, Any]]]:
+        """
+        Returns:
+            (best_intent, confidence, all_intents top-k)
+        """
+        probabilities = self.predict_proba([text])[0]
+        order = np.argsort(-probabilities)[:top_k]
+        all_intents = [
+            {"intent": self.labels[idx], "confidence": float(probabilities[idx])}
+            for idx in order
+        ]
+        return all_intents[0]["intent"], all_intents[0]["confidence"], all_intents
+
+    def save(self, model_dir: Path, extra_meta: Dict[str, Any] = None):
+        model_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self.pipeline, model_dir / MODEL_FILE)
+        meta = {"labels": self.labels, **(extra_meta or {})}
+        (model_dir / META_FILE).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, model_dir: Path) -> "LexicalIntentClassifier":
+        pipeline = joblib.load(model_dir / MODEL_FILE)
+        meta = json.loads((model_dir / META_FILE).read_text(encoding="utf-8"))
+        return cls(pipeline=pipeline, labels=meta["labels"])
+
+    @staticmethod
+    def exists(model_dir: Path) -> bool:
+        return (model_dir / MODEL_FILE).exists() and (model_dir / META_FILE).exists()
@@ -3,12 +3,15 @@ Named Entity Recognition using PhoBERT
 Fine-tuned for Vietnamese Agricultural Domain
 """
 
+import asyncio
+import copy
 import json
 import re
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import torch
 from loguru import logger
 # AutoModelForTokenClassification dùng trong bài toán gán nhãn cho từ - tiêu biểu nhất là NER
@@ -16,7 +19,19 @@ from loguru import logger
 #Token classification: 1 nhãn cho mỗi token, intent classification 1 nhãn cho cả câu, 
 # Intent: 1 Classification Head cho cả câu.
 # NER:    N Classification Heads cho N tokens
-from transformers import AutoModelForTokenClassification, AutoTokenizer
+from transformers import AutoModelForTokenClassification
+
+from .bucketing import LENGTH_BUCKETS, pad_bucketed, tokenize_bucketed
+from .engines import ENGINE_TORCH, OnnxEngine, TorchEngine, validate_engine
+from .fast_tokenizer import load_tokenizer
+from .crop_linker import CropLinker
+from .date_resolver import DateResolver
+from .document_windows import DOCUMENT_OVERLAP, DOCUMENT_WINDOW, merge_window_predictions, plan_windows
+from .entity_resolution import resolve_entities
+from .gazetteer import Gazetteer
+from .inference_profile import InferenceProfile
+from .token_alignment import Surface, align_tokens, build_surface_table
+from .token_cache import TokenizationCache
 
 # Input text
 #    ↓
@@ -74,31 +89,90 @@ class NERExtractor:
         "DURATION": "duration",
     }
     
-    def __init__(self, model_name: str = "vinai/phobert-base"):
+    def __init__(
+        self,
+        model_name: str = "vinai/phobert-base",
+        engine: str = ENGINE_TORCH,
+        length_buckets: Sequence[int] = LENGTH_BUCKETS,
+        model_dir: Optional[Path] = None,
+        token_cache: Optional[TokenizationCache] = None,
+        inference_profile: Optional[InferenceProfile] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        crop_linker: Optional[CropLinker] = None
+    ):
         """
         Initialize NER Extractor
         
         Args:
             model_name: HuggingFace model name (default: vinai/phobert-base)
+            engine: Inference engine - "torch", "onnx" hoặc "onnx-int8"
+            length_buckets: Độ dài pad cho phép (rỗng = pad tới câu dài nhất)
+            model_dir: Thư mục fine-tuned model (mặc định models/ner_extractor, xem ModelRegistry)
+            token_cache: Tokenization cache dùng chung với intent (None = không cache)
+            inference_profile: inference_mode / bf16 autocast cho engine torch (mặc định InferenceProfile())
+            gazetteer: Cụm từ crop/device + regex date/duration/area compile sẵn (mặc định models/gazetteer.json)
+            crop_linker: Tên cây -> crop id của NestJS, dùng chung giữa các version (None = không link)
         """
         self.model_name = model_name
+        self.engine_name = validate_engine(engine)
+        # thư mục chứa fine-tuned model (config, weights, label_mapping.json, onnx/)
+        self.model_dir = model_dir or Path(__file__).resolve().parents[2] / "models" / "ner_extractor"
         self.tokenizer = None
+        # Bản sao riêng của fast tokenizer cho predict_documents (không truncate): tokenizer Rust dùng
+        # chung đổi truncation khi thread khác đang encode -> "RuntimeError: Already borrowed"
+        self.document_tokenizer = None
+        # token id -> surface, chỉ dùng khi tokenizer không có offset mapping (slow tokenizer)
+        self.surface_table: Optional[List[Optional[Surface]]] = None
         self.model = None
+        # engine(inputs) -> logits, dùng chung cho torch và onnx
+        self.engine = None
         self.entity_labels: List[str] = self.ENTITY_LABELS.copy() #lưu bản sao
         self.entity_type_map: Dict[str, str] = self.ENTITY_TYPE_MAP.copy() #lưu bản sao
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.load_time_ms = 0.0
+        self.length_buckets = tuple(length_buckets)
+        self.token_cache = token_cache
+        self.inference_profile = inference_profile or InferenceProfile()
+        # rule-based entities: compile 1 lần, không dựng lại regex mỗi request
+        self.gazetteer = gazetteer or Gazetteer.load()
+        self.crop_linker = crop_linker
+        # date entity -> {"from", "to"} (regex gộp, nhớ theo ngày)
+        self.date_resolver = DateResolver()
         # 10
         logger.info(f"NER Extractor initialized with device: {self.device}")
     
-    async def load_model(self):
-        """Load PhoBERT model and tokenizer"""
+    async def load_model(self, tokenizer=None):
+        """
+        Load PhoBERT model and tokenizer
+        Chạy trong thread riêng để startup load được intent + NER song song
+
+        Args:
+            tokenizer: Tokenizer đã load sẵn (dùng chung với intent), None thì tự load
+        """
+        await asyncio.to_thread(self._load_model_sync, tokenizer)
+
+    def _load_model_sync(self, tokenizer=None):
+        started = time.perf_counter()
         try:
-            # 11
-            logger.info(f"Loading tokenizer from {self.model_name}...")
-            #load model tokenizer
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            if tokenizer is not None:
+                self.tokenizer = tokenizer
+            else:
+                # 11
+                logger.info(f"Loading tokenizer from {self.model_name}...")
+                #load model tokenizer
+                self.tokenizer = load_tokenizer(self.model_name)
 
-            model_dir = Path(__file__).resolve().parents[2] / "models" / "ner_extractor"
+            if not self.tokenizer.is_fast:
+                # Không có offset mapping -> căn token bằng bảng surface, dựng 1 lần ở đây
+                self.surface_table = build_surface_table(self.tokenizer)
+                self.document_tokenizer = self.tokenizer
+            else:
+                # Tắt truncation / padding sẵn: các lần encode sau không phải đổi state của tokenizer
+                self.document_tokenizer = copy.deepcopy(self.tokenizer)
+                self.document_tokenizer.backend_tokenizer.no_truncation()
+                self.document_tokenizer.backend_tokenizer.no_padding()
+
+            model_dir = self.model_dir
 
             # Load label mapping if available
             label_map_path = model_dir / "label_mapping.json"
@@ -132,6 +206,14 @@ class NERExtractor:
 
             num_labels = len(self.entity_labels)
 
+            if self.engine_name != ENGINE_TORCH:
+                # Graph ONNX đã export từ fine-tuned model, không cần load PyTorch weights
+                self.engine = OnnxEngine.from_model_dir(
+                    model_dir, self.engine_name, intra_op_threads=self.inference_profile.threads
+                )
+                logger.info(f"NER Extractor loaded with {self.engine_name} engine")
+                return
+
             if model_dir.exists():
                 # 13
                 logger.info(f"Loading fine-tuned model from {model_dir}...")
@@ -155,12 +237,29 @@ class NERExtractor:
             
             self.model.to(self.device)
             self.model.eval()
+            self.engine = TorchEngine(self.model, self.device, self.inference_profile)
             # 14
             logger.info("NER Extractor model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load NER Extractor: {str(e)}")
             raise
+        finally:
+            self.load_time_ms = (time.perf_counter() - started) * 1000
+
+    def warmup(self, texts: List[str]) -> float:
+        """
+        Chạy forward trên vài câu mẫu để khởi tạo kernel/allocator trước request thật
+
+        Returns:
+            Thời gian warm-up (ms)
+        """
+        started = time.perf_counter()
+        # batch-of-1 (request đơn lẻ) và cả batch (đường DynamicBatcher)
+        for text in texts:
+            self.predict_batch([text])
+        self.predict_batch(texts)
+        return (time.perf_counter() - started) * 1000
     
     async def extract(self, text: str) -> Dict[str, Any]:
         """
@@ -172,87 +271,53 @@ class NERExtractor:
         Returns:
             Dictionary with entities and processing time
         """
-        if self.model is None or self.tokenizer is None:
+        if self.engine is None or self.tokenizer is None:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
         start_time = time.time()
         
         try:
-            # Tokenize input
-            try:
-                inputs = self.tokenizer(
-                    text,
-                    return_tensors="pt",
-                    truncation=True,
-                    max_length=256,
-                    padding=True,
-                    return_offsets_mapping=True  # Lấy vị trí ký tự của mỗi token
-                )
-                print(f"1.ner input tokenizer: {input}") # token id , id của từ vựng trong từ điển PhoBert
-                
-                offset_mapping = inputs.pop("offset_mapping")[0]
-                print(f"2.ner offset_mapping : {offset_mapping}")
-                
-            except NotImplementedError:
-                # PhoBERT tokenizer không hỗ trợ offset mapping
-                logger.info(
-                    "Tokenizer does not support offset mapping. Using manual token alignment for PhoBERT predictions."
-                )
-
-                inputs = self.tokenizer(
-                    text,
-                    return_tensors="pt",
-                    truncation=True,
-                    max_length=256,
-                    padding=True
-                )
-                print(f"ner Using manual token alignment_input-tokenizier: {inputs}")
-                offset_mapping = None
+            # Tokenize input, pad tới bucket gần nhất (16/32/64/...)
+            # Lấy luôn offset mapping (vị trí ký tự của mỗi token): có sẵn với FastPhobertTokenizer,
+            # slow tokenizer (FAST_TOKENIZER=false) không hỗ trợ -> offsets = None, căn token thủ công
+            _, inputs, offsets = tokenize_bucketed(
+                self.tokenizer, [text], max_length=256, buckets=self.length_buckets, return_offsets=True,
+                cache=self.token_cache
+            )[0]
+            offset_mapping = offsets[0] if offsets is not None else None
+            # attention_mask = 0 ở phần pad của bucket -> bỏ trước khi map về ký tự
+            keep = inputs["attention_mask"][0].bool()
             
-            # Move to device
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            print(f"ner move to device_input-tokenizier: {input}")
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                print(f"ner outputs: {outputs}")
-
-                logits = outputs.logits
-                print(f"ner logits: {logits}")
+            # Get predictions (engine tự move input sang device)
+            logits = self.engine(inputs)
 
-                predictions = torch.argmax(logits, dim=-1)[0] #chọn nhãn có điểm cao nhất
-                print(f"ner predictions: {predictions}")
-                print(f"ner predictions para1-both: {predictions.cpu().numpy()}") #label id
-                print(f"ner predictions para2-both: {inputs['input_ids'][0].cpu().numpy()}") #token id
+            predictions = torch.argmax(logits, dim=-1)[0].cpu()[keep] #chọn nhãn có điểm cao nhất
+            input_ids = inputs["input_ids"][0][keep]
 
             entities: List[Dict[str, Any]] = []
             if offset_mapping is not None:
-                print(f"có offset_mapping: {predictions}")
-
                 entities = self._convert_predictions_to_entities(
                     text,
-                    predictions.cpu().numpy(),
-                    offset_mapping.numpy(),
-                    inputs["input_ids"][0].cpu().numpy()
+                    predictions.numpy(),
+                    offset_mapping,
+                    input_ids.numpy()
                 )
             else:
                 # PhoBERT doesn't support offset mapping
-                print(f"KHÔNG CÓ offset_mapping: {predictions}")
 #               numpy chỉ hoạt động trên cpu
                 entities = self._convert_predictions_without_offsets(
                     text,
                     # tensor([1, 3, 0])  →  array([1, 3, 0])
-                    predictions.cpu().numpy(),
-                    inputs["input_ids"][0].cpu().numpy()
+                    predictions.numpy(),
+                    input_ids.numpy()
                 )
             # Apply rule-based post-processing for better accuracy
             # merge với regex, filter rác, normalize values
             entities = self._post_process_entities(text, entities)
-            print("\n" + "="*60)
-            print("Final entities gửi cho NestJS:")
-            print(json.dumps(entities, indent=2, ensure_ascii=False))
-            print("="*60)
+            # lazy: chỉ dựng chuỗi khi log level DEBUG được bật
+            logger.opt(lazy=True).debug(
+                "Final entities gửi cho NestJS: {}", lambda: json.dumps(entities, ensure_ascii=False)
+            )
 
             processing_time = (time.time() - start_time) * 1000
             
@@ -264,7 +329,215 @@ class NERExtractor:
         except Exception as e:
             logger.error(f"NER extraction error: {str(e)}")
             raise
-    
+
+    async def extract_batch(self, texts: List[str], max_batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Extract entities cho nhiều câu (bulk evaluation, tag lại lịch sử chat)
+
+        Giống predict_batch nhưng chạy trong thread (không chặn event loop) và không đi qua
+        tokenization cache: câu bulk chỉ gặp 1 lần, không đẩy câu hỏi đang nóng ra khỏi LRU
+
+        Args:
+            texts: Danh sách câu cần trích xuất entity
+            max_batch_size: Số câu tối đa mỗi lần forward (trong cùng bucket)
+
+        Returns:
+            List kết quả cùng thứ tự với texts, offset tính theo text của từng câu
+        """
+        if self.engine is None or self.tokenizer is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if not texts:
+            return []
+        return await asyncio.to_thread(self.predict_batch, texts, max_batch_size, False)
+
+    def predict_batch(
+        self, texts: List[str], max_batch_size: Optional[int] = None, use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract entities cho nhiều câu trong 1 lần forward mỗi bucket (dùng cho DynamicBatcher)
+
+        Args:
+            texts: Danh sách câu cần trích xuất entity
+            max_batch_size: Số câu tối đa mỗi lần forward, None = cả bucket 1 lần
+            use_cache: Tokenize qua token_cache (False cho bulk)
+
+        Returns:
+            List kết quả cùng thứ tự với texts, offset tính theo text của từng câu
+        """
+        if self.engine is None or self.tokenizer is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+
+        start_time = time.time()
+        results: List[Dict[str, Any]] = [None] * len(texts)
+
+        # Chia batch theo bucket độ dài: câu ngắn không bị pad theo câu dài nhất
+        # offsets = None nếu tokenizer không hỗ trợ offset mapping (slow tokenizer)
+        for rows, inputs, offsets in self._split_batches(tokenize_bucketed(
+            self.tokenizer, texts, max_length=256, buckets=self.length_buckets, return_offsets=True,
+            cache=self.token_cache if use_cache else None
+        ), max_batch_size):
+            # attention_mask = 0 ở vị trí padding -> loại bỏ trước khi map về ký tự
+            token_mask = inputs["attention_mask"].numpy().astype(bool)
+            input_ids = inputs["input_ids"].numpy()
+
+            try:
+                logits = self.engine(inputs)
+                predictions = torch.argmax(logits, dim=-1).cpu().numpy()
+            except Exception as e:
+                # Lỗi forward chỉ ảnh hưởng các câu trong batch này
+                logger.error(f"Batch NER error: {str(e)}")
+                for row in rows:
+                    results[row] = self._rule_based_row(texts[row], start_time)
+                continue
+
+            for position, row in enumerate(rows):
+                text = texts[row]
+                keep = token_mask[position]
+                # Lỗi của 1 câu không được làm hỏng kết quả các request khác gộp chung batch
+                try:
+                    if offsets is not None:
+                        entities = self._convert_predictions_to_entities(
+                            text,
+                            predictions[position][keep],
+                            offsets[position],
+                            input_ids[position][keep]
+                        )
+                    else:
+                        entities = self._convert_predictions_without_offsets(
+                            text,
+                            predictions[position][keep],
+                            input_ids[position][keep]
+                        )
+                    # Merge với regex theo từng câu
+                    entities = self._post_process_entities(text, entities)
+                except Exception as e:
+                    logger.error(f"NER error for batch row {row}: {str(e)}")
+                    results[row] = self._rule_based_row(text, start_time)
+                    continue
+                results[row] = {
+                    "entities": entities,
+                    "processing_time_ms": (time.time() - start_time) * 1000
+                }
+
+        return results
+
+    def _rule_based_row(self, text: str, start_time: float) -> Dict[str, Any]:
+        """Kết quả regex cho 1 câu lỗi trong batch (regex cũng lỗi -> không có entity)"""
+        try:
+            entities = self._post_process_entities(text, [])
+        except Exception as e:
+            logger.error(f"Rule-based NER error: {str(e)}")
+            entities = []
+        return {
+            "entities": entities,
+            "processing_time_ms": (time.time() - start_time) * 1000
+        }
+
+    @staticmethod
+    def _split_batches(groups, max_batch_size: Optional[int]):
+        """Chia mỗi bucket (rows, inputs, offsets) thành các batch tối đa max_batch_size câu"""
+        for rows, inputs, offsets in groups:
+            if not max_batch_size or len(rows) <= max_batch_size:
+                yield rows, inputs, offsets
+                continue
+            for first in range(0, len(rows), max_batch_size):
+                last = first + max_batch_size
+                yield (
+                    rows[first:last],
+                    {name: tensor[first:last] for name, tensor in inputs.items()},
+                    offsets[first:last] if offsets is not None else None,
+                )
+
+    def predict_documents(
+        self,
+        texts: List[str],
+        window: int = DOCUMENT_WINDOW,
+        overlap: int = DOCUMENT_OVERLAP,
+        max_batch_size: int = 32,
+    ) -> List[Dict[str, Any]]:
+        """
+        NER cho văn bản dài (chunk tài liệu), không truncate: cửa sổ trượt + ghép nhãn vùng chồng nhau
+        (xem models/document_windows.py). Cửa sổ của mọi văn bản chạy chung batch theo bucket
+
+        Args:
+            texts: Các văn bản (chunk) cần gắn entity
+            window: Số token nội dung mỗi cửa sổ (chưa tính <s> </s>)
+            overlap: Số token chung giữa 2 cửa sổ liền nhau
+            max_batch_size: Số cửa sổ tối đa mỗi lần forward
+
+        Returns:
+            List kết quả cùng thứ tự với texts, offset tính theo text của từng văn bản
+        """
+        if self.engine is None or self.tokenizer is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+
+        start_time = time.time()
+        documents = [self._encode_document(text) for text in texts]
+
+        # (văn bản, start, end) của từng cửa sổ và input_ids đã thêm <s> </s>
+        windows: List[Tuple[int, int, int]] = []
+        sequences: List[List[int]] = []
+        for row, (ids, _) in enumerate(documents):
+            for start, end in plan_windows(len(ids), window, overlap):
+                windows.append((row, start, end))
+                sequences.append(self.tokenizer.build_inputs_with_special_tokens(ids[start:end]))
+        # Vị trí token nội dung đầu tiên trong cửa sổ (sau <s>)
+        prefix = self.tokenizer.build_inputs_with_special_tokens([-1]).index(-1)
+
+        window_predictions: List[Optional[np.ndarray]] = [None] * len(windows)
+        for rows, inputs in pad_bucketed(self.tokenizer, sequences, self.length_buckets):
+            for first in range(0, len(rows), max_batch_size):
+                batch_rows = rows[first:first + max_batch_size]
+                batch_inputs = {name: tensor[first:first + max_batch_size] for name, tensor in inputs.items()}
+                predictions = torch.argmax(self.engine(batch_inputs), dim=-1).cpu().numpy()
+                for position, row in enumerate(batch_rows):
+                    _, start, end = windows[row]
+                    window_predictions[row] = predictions[position][prefix:prefix + end - start]
+
+        per_document: List[List[int]] = [[] for _ in texts]
+        for index, (row, _, _) in enumerate(windows):
+            per_document[row].append(index)
+
+        results = []
+        for row, (text, (ids, spans)) in enumerate(zip(texts, documents)):
+            indexes = per_document[row]
+            merged = merge_window_predictions(
+                len(ids),
+                [windows[index][1:] for index in indexes],
+                [window_predictions[index] for index in indexes],
+            )
+            entities = self._spans_to_entities(text, merged, spans)
+            results.append({
+                "entities": self._post_process_entities(text, entities),
+                "windows": len(indexes),
+                "tokens": len(ids),
+                "processing_time_ms": (time.time() - start_time) * 1000
+            })
+        return results
+
+    def _encode_document(self, text: str) -> Tuple[List[int], List[Optional[Tuple[int, int]]]]:
+        """input_ids (không special token, không truncate) + vị trí ký tự của từng token"""
+        tokenizer = self.document_tokenizer
+        if tokenizer.is_fast:
+            encoded = tokenizer(
+                text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+            )
+            spans = [None if start == end else (start, end) for start, end in encoded["offset_mapping"]]
+            return encoded["input_ids"], spans
+        ids = tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        if self.surface_table is None:
+            self.surface_table = build_surface_table(self.tokenizer)
+        return ids, align_tokens(text, ids, self.surface_table)
+
+    def extract_rules_only(self, text: str) -> Dict[str, Any]:
+        """Regex entities + filter/normalize, không chạy PhoBERT (dùng khi service quá tải)"""
+        start_time = time.time()
+        entities = self._post_process_entities(text, [])
+        return {
+            "entities": entities,
+            "processing_time_ms": (time.time() - start_time) * 1000
+        }
+
     def _convert_predictions_to_entities(
         self,
         text: str,
@@ -272,51 +545,15 @@ class NERExtractor:
         offset_mapping: List[Tuple[int, int]], # [(0,5), (6,8), ...]
         input_ids: List[int]
     ) -> List[Dict[str, Any]]:
-        """Convert model predictions to entity list"""
-        entities = []
-        current_entity = None
-        
-        for idx, (pred, (start, end)) in enumerate(zip(predictions, offset_mapping)):
-            # Skip special tokens
-            if start == end: # Special tokens như <s>, </s>
-                continue
-            
-            label = self.entity_labels[pred]
-            print(f"label: {label}")
-            
-            if label.startswith("B-"):
-                # Save previous entity
-                if current_entity:
-                    entities.append(current_entity)
-                
-                # Start new entity
-                entity_type = label[2:] #cắt chuỗi bỏ "B-"
-                current_entity = {
-                    "type": self.ENTITY_TYPE_MAP.get(entity_type, entity_type.lower()),
-                    "raw": text[start:end],
-                    "start": start,
-                    "end": end,
-                    "confidence": 0.85  # Base confidence
-                }
-                print(f"current_entity: {current_entity}")
-            
-            elif label.startswith("I-") and current_entity:
-                # Continue current entity
-                current_entity["raw"] = text[current_entity["start"]:end]
-                current_entity["end"] = end
-            
-            elif label == "O" and current_entity:
-                # End current entity
-                entities.append(current_entity)
-                current_entity = None
-        
-        # Add last entity , nếu entity ở cuối câu
-        if current_entity:
-            print(f"trong if add last entity")
-            entities.append(current_entity)
-        
-        return entities
-    
+        """
+        Convert model predictions to entity list
+        Vị trí lấy thẳng từ offset mapping (không decode / find)
+        """
+        offsets = offset_mapping.tolist() if hasattr(offset_mapping, "tolist") else offset_mapping
+        # Special tokens như <s>, </s> có start == end
+        spans = [None if start == end else (start, end) for start, end in offsets]
+        return self._spans_to_entities(text, predictions, spans)
+
     def _convert_predictions_without_offsets(
         self,
         text: str,
@@ -325,138 +562,68 @@ class NERExtractor:
     ) -> List[Dict[str, Any]]:
         """
         Convert predictions to entities without offset mapping.
-        This is a workaround for PhoBERT which doesn't support offset mapping.
+        This is a workaround for PhoBERT slow tokenizer which doesn't support offset mapping:
+        vị trí ký tự của token tìm trong text bằng bảng surface dựng sẵn (xem models/token_alignment.py)
+        """
+        if self.surface_table is None:
+            self.surface_table = build_surface_table(self.tokenizer)
+        ids = input_ids.tolist() if hasattr(input_ids, "tolist") else input_ids
+        return self._spans_to_entities(text, predictions, align_tokens(text, ids, self.surface_table))
+
+    def _spans_to_entities(
+        self,
+        text: str,
+        predictions: List[int],
+        spans: List[Optional[Tuple[int, int]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        BIO labels -> entities, 1 lượt qua các token
+        spans[i] = None: token không có vị trí trong text (special / không căn được) -> bỏ qua,
+        raw chỉ cắt từ text 1 lần khi entity kết thúc
         """
         entities = []
-        current_entity = None
-        # cách trồng cà chua
-        print(f"---predictions----: {predictions}") #[0 0 0 2 8 0]
-        print(f"---input_ids----: {input_ids}") #[    0   139   719 10709  5344     2]
-        # BẢN CHẤT LÀ DETOKEN TOKEN ID -> TEXT
-        # SAU ĐÓ TÌM CÁI TEXT VỪA ĐC DETOKEN TRONG USER_PROMPT_TEXT
-        # Debug: Log ALL tokens and predictions
-        all_tokens_debug = []
-        for i, (token_id, pred) in enumerate(zip(input_ids, predictions)):
-            token = self.tokenizer.decode([token_id], skip_special_tokens=True)
-            print(f"token trong loop debug: {token}")
-            label = self.entity_labels[pred]
-            all_tokens_debug.append(f"~~'{token}'→{label}")
-        logger.info(f"All tokens: {all_tokens_debug}")
-        
-        pred_labels = [self.entity_labels[p] for p in predictions]
-        #pred_labels___: ['O', 'O', 'O', 'B-CROP', 'I-CROP', 'O']
-        print(f"pred_labels___: {pred_labels}")
-        #non_o_labels: ['B-CROP', 'I-CROP']
-        non_o_labels = [l for l in pred_labels if l != 'O']
-        print(f"non_o_labels: {non_o_labels}")
-        logger.info(f"NER Predictions - Total tokens: {len(predictions)}, Non-O predictions: {len(non_o_labels)}")
-        if non_o_labels:
-            logger.info(f"Entity predictions found: {non_o_labels}")
-        else:
-            logger.warning(f"All predictions are 'O' (no entities) - Model may not be trained yet!")
-        
-        # Normalize text for matching
-        text_lower = text.lower()
-        current_pos = 0 #vị trí hiện tại trong text
-        print(f"1.currPOS: {current_pos}")
-        for idx, (pred, token_id) in enumerate(zip(predictions, input_ids)):
-            # lấy được nhãn "B-xxxx","I-xxxx","O"
-            #[0 0 0 2 8 0] 
-            #[0 139 719 10709 5344 2]
-            label = self.entity_labels[pred]
-            print(f"label trong for_loop ko offset: {label}")
-            print(f"tokenID trong for_loop ko offset: {token_id}")
-
-            # Skip special tokens (<s>, </s>, <pad>)
-            if token_id in [self.tokenizer.bos_token_id, self.tokenizer.eos_token_id, self.tokenizer.pad_token_id]:
-                continue
-            
-            # Decode token - note PhoBERT adds underscores for word boundaries
-            # strip() = trim()
-            token_text = self.tokenizer.decode([token_id], skip_special_tokens=True).strip()
-            print(f"token_text: {token_text}")
-            if not token_text:
-                continue
-            
-            # Remove underscore prefix that PhoBERT uses (e.g., "_cà" -> "cà")
-            # key
-            token_clean = token_text.replace("_", " ").strip()
-            print(f"token_clean: {token_clean}")
-            
-            # Find token in text (case-insensitive search from current position)
-            token_lower = token_clean.lower()
-            print(f"final_token_clean_lower: {token_lower}")
-            # tìm token trong prompt_text_gốc , 
-            # tìm vị trí đầu tiên token xuất hiện tìm từ vị trí current_pos trở đi
-            token_start = text_lower.find(token_lower, current_pos)
-            print(f"token_start: {token_start}")
-            # nếu ko tìm đc token (case khó)
-            # vd text gốc khác vs tokenizer "điện thoại" - "điệnthoại"
-            if token_start == -1:
-                # Try exact match without spaces
-                # token_clean= "điện thoại" -> "điệnthoại"
-                token_no_space = token_clean.replace(" ", "")
-                token_start = text_lower.find(token_no_space.lower(), current_pos)
-                if token_start != -1:
-                    print(f"tìm thấy token")
-                    print(f"token_start trong if viếtliền: {token_start}")
-
-                    token_clean = token_no_space
-            
-            if token_start == -1:
-                # Can't find this token - skip it
+        # (type, start, end, confidence) của entity đang mở
+        current: Optional[List[Any]] = None
+        labels = self.entity_labels
+        preds = predictions.tolist() if hasattr(predictions, "tolist") else predictions
+
+        def close(entity: List[Any]):
+            entity_type, start, end, confidence = entity
+            entities.append({
+                "type": self.ENTITY_TYPE_MAP.get(entity_type, entity_type.lower()),
+                "raw": text[start:end],
+                "start": start,
+                "end": end,
+                "confidence": confidence
+            })
+
+        for pred, span in zip(preds, spans):
+            if span is None:
                 continue
-            
-            token_end = token_start + len(token_clean)
-            current_pos = token_end
-            print(f"2.currPOS: {current_pos}")
+            start, end = span
 
-            # đã có token start,end -> Logic giống hàm có offset
+            label = labels[pred]
             if label.startswith("B-"):
-                # Save previous entity
-                if current_entity:
-                    entities.append(current_entity)
-                
-                # Start new entity
-                entity_type = label[2:]
-                current_entity = {
-                    "type": self.ENTITY_TYPE_MAP.get(entity_type, entity_type.lower()),#key,default
-                    "raw": text[token_start:token_end],
-                    "start": token_start,
-                    "end": token_end,
-                    "confidence": 0.85
-                }
-            
+                # Save previous entity, start new entity
+                if current:
+                    close(current)
+                current = [label[2:], start, end, 0.85]  # Base confidence
             elif label.startswith("I-"):
-                if current_entity:
-                    # Continue current entity - extend to include this token
-                    current_entity["raw"] = text[current_entity["start"]:token_end]
-                    current_entity["end"] = token_end
+                if current:
+                    # Continue current entity
+                    current[2] = end
                 else:
-                    # Orphaned I- tag (B- was skipped/not found) - treat as new entity
-                    logger.debug(f"Orphaned I- tag {label} at position {token_start}, treating as B-")
-                    entity_type = label[2:]
-                    current_entity = {
-                        "type": self.ENTITY_TYPE_MAP.get(entity_type, entity_type.lower()),
-                        "raw": text[token_start:token_end],
-                        "start": token_start,
-                        "end": token_end,
-                        "confidence": 0.75  # Lower confidence for orphaned tags
-                    }
-            
-            elif label == "O" and current_entity:
+                    # Orphaned I- tag (B- bị bỏ qua / không căn được) - treat as new entity
+                    current = [label[2:], start, end, 0.75]  # Lower confidence for orphaned tags
+            elif current:
                 # End current entity
-                print(f"!!!! add vào entities")
-                entities.append(current_entity)
-                current_entity = None
-        
-        # Add last entity
-        if current_entity:
-            print(f"!!!! add cuối")
-            entities.append(current_entity)
+                close(current)
+                current = None
+
+        # Add last entity , nếu entity ở cuối câu
+        if current:
+            close(current)
 
-        print(f"entities_extractNoOffset: {entities}")
-        
         return entities
     
     def _post_process_entities(self, text: str, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -464,214 +631,28 @@ class NERExtractor:
         Apply rule-based post-processing to improve accuracy
         Uses patterns similar to the original rule-based system
         """
-        processed = []
-        
         # Add rule-based entities for common patterns (high priority)
         rule_entities = self._extract_rule_based_entities(text)
-        print("\n" + "="*60)
-        print(" BƯỚC 1 - Rule-based entities (Regex):")
-        print(json.dumps(rule_entities, indent=2, ensure_ascii=False))
-        print("="*60)
         # Merge PhoBERT and rule-based entities
         all_entities = entities + rule_entities
-        print("\n" + "="*60)
-        print(" BƯỚC 2 - Merged entities (AI + Regex):")
-        print(json.dumps(all_entities, indent=2, ensure_ascii=False))
-        print("="*60)
-        
-        # Remove duplicates and overlaps (prefer rule-based for multi-word)
-        all_entities = self._remove_overlapping_entities(all_entities)
-        print("\n" + "="*60)
-        print(" BƯỚC 3 - Sau khi loại bỏ overlap:")
-        print(json.dumps(all_entities, indent=2, ensure_ascii=False))
-        print("="*60)
-        
-        # Filter out invalid single-word entities
-        all_entities = self._filter_invalid_entities(text, all_entities)
-        print("\n" + "="*60)
-        print(" BƯỚC 4 - Sau khi lọc invalid entities:")
-        print(json.dumps(all_entities, indent=2, ensure_ascii=False))
-        print("="*60)
-        
-        # Normalize values
-        for entity in all_entities:
-            entity["value"] = self._normalize_entity_value(entity)
-        print("\n" + "="*60)
-        print(" BƯỚC 5 - Sau khi normalize values:")
-        print(json.dumps(all_entities, indent=2, ensure_ascii=False))
-        print("="*60)
-        
-        return all_entities
-    
+
+        # 1 lượt: lọc entity sai + chọn tập không chồng nhau nặng nhất (confidence × độ dài, span phủ
+        # các mảnh cùng type thắng các mảnh), normalize / date_range / crop_id chỉ trên entity được giữ
+        # (xem models/entity_resolution.py)
+        return resolve_entities(all_entities, text, self._finalize_entity)
+
+    def _finalize_entity(self, entity: Dict[str, Any]):
+        entity["value"] = self._normalize_entity_value(entity)
+        if entity["type"] == "date":
+            # Khoảng ngày cụ thể cho NestJS (financial query), None nếu không hiểu
+            entity["date_range"] = self.date_resolver.resolve(entity["raw"])
+        elif self.crop_linker is not None:
+            # crop_name -> crop_id (dict tra sẵn, NestJS không phải query bảng crops)
+            self.crop_linker.link_entity(entity)
+
     def _extract_rule_based_entities(self, text: str) -> List[Dict[str, Any]]:
-        """Extract entities using rule-based patterns (fallback)"""
-        entities = []
-        
-        # Date patterns (prioritize longer/more specific patterns first)
-        date_patterns = [
-            # Month + Year combinations (most specific first)
-            (r'tháng\s*\d{1,2}\s*năm\s*\d{4}', 'date'),  # tháng 11 năm 2024
-            (r'tháng\s*\d{1,2}\s*năm\s*(?:ngoái|trước)', 'date'),  # tháng 11 năm ngoái
-            # Year patterns
-            (r'năm\s*\d{4}', 'date'),  # năm 2024
-            (r'năm\s*(?:nay|này)', 'date'),  # năm nay
-            (r'năm\s*(?:ngoái|trước)', 'date'),  # năm ngoái
-            # Month patterns
-            (r'tháng\s*\d{1,2}', 'date'),  # tháng 11
-            (r'tháng\s*(?:này|nay)', 'date'),  # tháng này
-            (r'tháng\s*trước', 'date'),  # tháng trước
-            # Quarter patterns
-            (r'quý\s*\d', 'date'),  # quý 1, quý 2
-            # Week patterns
-            (r'tuần\s*(?:này|nay)', 'date'),  # tuần này
-            (r'tuần\s*trước', 'date'),  # tuần trước
-            # Day patterns
-            (r'hôm\s*nay', 'date'),
-            (r'hôm\s*qua', 'date'),
-            # Date format
-            (r'\d{1,2}/\d{1,2}/\d{2,4}', 'date'),
-        ]
-        
-        # Multi-word crop patterns (prioritize longer matches)
-        crop_patterns = [
-            # Common 2-3 word crops
-            (r'\bcà\s+chua\b', 'crop_name'),
-            (r'\bcà\s+phê\b', 'crop_name'),
-            (r'\bcà\s+rốt\b', 'crop_name'),
-            (r'\bcà\s+tím\b', 'crop_name'),
-            (r'\bkhoai\s+lang\b', 'crop_name'),
-            (r'\bkhoai\s+tây\b', 'crop_name'),
-            (r'\bkhoai\s+mì\b', 'crop_name'),
-            (r'\bsầu\s+riêng\b', 'crop_name'),
-            (r'\bthanh\s+long\b', 'crop_name'),
-            (r'\bhồ\s+tiêu\b', 'crop_name'),
-            (r'\bcao\s+su\b', 'crop_name'),
-            (r'\bđậu\s+tương\b', 'crop_name'),
-            (r'\bđậu\s+phộng\b', 'crop_name'),
-            (r'\bbắp\s+cải\b', 'crop_name'),
-            (r'\brau\s+muống\b', 'crop_name'),
-            (r'\brau\s+dền\b', 'crop_name'),
-            (r'\bdưa\s+chuột\b', 'crop_name'),
-            (r'\bdưa\s+hấu\b', 'crop_name'),
-            (r'\bsu\s+su\b', 'crop_name'),
-            (r'\bsu\s+hào\b', 'crop_name'),
-            (r'\bcủ\s+cải\b', 'crop_name'),
-        ]
-        
-        # Multi-word device patterns
-        device_patterns = [
-            (r'\bmáy\s+bơm\b', 'device_name'),
-            (r'\bmáy\s+tưới\b', 'device_name'),
-            (r'\bmáy\s+phun\b', 'device_name'),
-            (r'\bvan\s+nước\b', 'device_name'),
-            (r'\bcảm\s+biến\b', 'device_name'),
-            (r'\bhệ\s+thống\s+tưới\b', 'device_name'),
-        ]
-        
-        # Farm area patterns
-        area_patterns = [
-            (r'\bhàng\s+\d+\b', 'farm_area'),  # hàng 1, hàng 2
-            (r'\bluống\s+\d+\b', 'farm_area'),  # luống 1
-            (r'\bkhu\s+[A-Z]\b', 'farm_area'),  # khu A
-            (r'\bkhu\s+\d+\b', 'farm_area'),  # khu 1
-            (r'\bvườn\s+\w+\b', 'farm_area'),  # vườn cam
-        ]
-        
-        # Duration patterns
-        duration_patterns = [
-            (r'\d+\s*phút', 'duration'),  # 5 phút, 10 phút
-            (r'\d+\s*giờ', 'duration'),   # 1 giờ, 2 giờ
-            (r'\d+\s*ngày', 'duration'),  # 1 ngày
-            (r'nửa\s+tiếng', 'duration'), # nửa tiếng
-            (r'\d+\s*tiếng\s*rưỡi', 'duration'), # 1 tiếng rưỡi
-        ]
-
-        # Combine all patterns (prioritize multi-word patterns first)
-        all_patterns = (
-            crop_patterns + 
-            device_patterns + 
-            area_patterns + 
-            duration_patterns +
-            date_patterns
-        )
-        # pattern = regex, entity_type = type
-        for pattern, entity_type in all_patterns:
-            # finditer tìm tất cả các đoạn văn khớp với mẫu trong text
-            # re là thư viện built in của Python để làm việc với regex
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                print(f"append trong match")
-                entities.append({
-                    "type": entity_type,
-                    "raw": match.group(0),
-                    "start": match.start(),
-                    "end": match.end(),
-                    "confidence": 0.95  # Very high confidence for rule-based multi-word
-                })
-                print("\n" + "="*60)
-                print("🔍 Entities tìm được bằng Regex:")
-                print(json.dumps(entities, indent=2, ensure_ascii=False))
-                print("="*60)
-        
-        return entities
-    
-    def _filter_invalid_entities(self, text: str, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Filter out invalid entities based on context and common sense rules
-        """
-        filtered = []
-        
-        # Invalid single words that are often misclassified
-        invalid_crop_words = {"nam", "bắc", "trung", "miền", "chua", "tây", "đông"}
-        invalid_area_words = {"1", "2", "3", "4", "5", "6", "7", "8", "9", "0"}
-        
-        for entity in entities:
-            raw_lower = entity["raw"].lower().strip()
-            entity_type = entity["type"]
-            
-            # Filter invalid crop names
-            if entity_type == "crop_name":
-                # Reject single invalid words
-                if raw_lower in invalid_crop_words:
-                    logger.debug(f"Filtered invalid crop: '{entity['raw']}'")
-                    continue
-                # Reject very short single-character crops (except valid ones)
-                if len(raw_lower) == 1:
-                    continue
-            
-            # Filter invalid farm areas
-            if entity_type == "farm_area":
-                # Reject standalone numbers without context
-                if raw_lower in invalid_area_words:
-                    logger.debug(f"Filtered invalid area: '{entity['raw']}'")
-                    continue
-            
-            filtered.append(entity)
-        
-        return filtered
-    
-    def _remove_overlapping_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove overlapping entities, keeping the one with higher confidence and longer span"""
-        if not entities:
-            return []
-        
-        # Sort by start position, then by confidence (higher first), then by length (longer first)
-        # sort theo vị trị bắt đầu (tăng dần),
-        # (dấu - để đảo ngc thứ tự) nếu cùng vị trí ưu tiên confidence cao hơn
-        # nếu cùng vị trí và confidence ưu tiên entity dài hơn
-        sorted_entities = sorted(
-            entities, 
-            key=lambda x: (x["start"], -x["confidence"], -(x["end"] - x["start"]))
-        )
-        
-        result = []
-        last_end = -1
-        # last_end vị trí kết thúc của entity cuối cùng được chọn
-        for entity in sorted_entities:
-            if entity["start"] >= last_end:
-                result.append(entity)
-                last_end = entity["end"]
-        
-        return result
+        """Extract entities using rule-based patterns (compiled gazetteer, xem models/gazetteer.py)"""
+        return self.gazetteer.find(text)
     
     def _normalize_entity_value(self, entity: Dict[str, Any]) -> str:
         """Normalize entity value based on type"""
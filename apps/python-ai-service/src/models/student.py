@@ -0,0 +1,89 @@
+"""
+Student intent model (BiLSTM) distill từ PhoBERT intent classifier
+- Dùng chung tokenizer/vocab với PhoBERT (input giống hệt TorchEngine/OnnxEngine)
+- Embedding khởi tạo từ word embeddings của teacher (PCA xuống embedding_dim)
+Train bằng scripts/distill_intent_student.py
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import torch
+from torch import nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+STUDENT_WEIGHTS_FILE = "student.pt"
+STUDENT_CONFIG_FILE = "config.json"
+
+
+class BiLSTMStudent(nn.Module):
+    """
+    Embedding -> BiLSTM -> masked mean + max pooling -> Linear
+    ~8M params (phần lớn là embedding 64k x 128) so với 135M của PhoBERT-base
+    """
+
+    def __init__(
+        self,
+        vocab_size: int,
+        num_labels: int,
+        embedding_dim: int = 128,
+        hidden_size: int = 128,
+        num_layers: int = 1,
+        dropout: float = 0.1,
+        pad_token_id: int = 1,
+    ):
+        super().__init__()
+        self.config: Dict[str, Any] = {
+            "vocab_size": vocab_size,
+            "num_labels": num_labels,
+            "embedding_dim": embedding_dim,
+            "hidden_size": hidden_size,
+            "num_layers": num_layers,
+            "dropout": dropout,
+            "pad_token_id": pad_token_id,
+        }
+        self.embedding = nn.Embedding(vocab_size, embedding_dim, padding_idx=pad_token_id)
+        self.lstm = nn.LSTM(
+            embedding_dim,
+            hidden_size,
+            num_layers=num_layers,
+            batch_first=True,
+            bidirectional=True,
+            dropout=dropout if num_layers > 1 else 0.0,
+        )
+        self.dropout = nn.Dropout(dropout)
+        self.classifier = nn.Linear(4 * hidden_size, num_labels)
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """
+        Returns:
+            logits [batch, num_labels]
+        """
+        lengths = attention_mask.sum(dim=1).clamp(min=1)
+        embedded = self.dropout(self.embedding(input_ids))
+        # pack để chiều backward của LSTM không đọc qua padding
+        packed = pack_padded_sequence(embedded, lengths.cpu(), batch_first=True, enforce_sorted=False)
+        output, _ = self.lstm(packed)
+        output, _ = pad_packed_sequence(output, batch_first=True, total_length=input_ids.size(1))
+
+        mask = attention_mask.unsqueeze(-1).to(output.dtype)
+        mean_pooled = (output * mask).sum(dim=1) / lengths.unsqueeze(-1).to(output.dtype)
+        max_pooled = output.masked_fill(mask == 0, float("-inf")).max(dim=1).values
+        return self.classifier(self.dropout(torch.cat([mean_pooled, max_pooled], dim=-1)))
+
+    def save_pretrained(self, output_dir: Path, extra_config: Dict[str, Any] = None):
+        output_dir.mkdir(parents=True, exist_ok=True)
+        torch.save(self.state_dict(), output_dir / STUDENT_WEIGHTS_FILE)
+        config = {**self.config, **(extra_config or {})}
+        (output_dir / STUDENT_CONFIG_FILE).write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @classmethod
+    def from_pretrained(cls, model_dir: Path) -> "BiLSTMStudent":
+        config = json.loads((model_dir / STUDENT_CONFIG_FILE).read_text(encoding="utf-8"))
+        model = cls(**{key: config[key] for key in (
+            "vocab_size", "num_labels", "embedding_dim", "hidden_size", "num_layers", "dropout", "pad_token_id"
+        )})
+        model.load_state_dict(torch.load(model_dir / STUDENT_WEIGHTS_FILE, map_location="cpu"))
+        model.eval()
+        return model
@@ -0,0 +1,118 @@
+"""
+Căn token -> vị trí ký tự cho NER khi tokenizer không có offset mapping (PhoBERT slow tokenizer)
+
+Trước đây mỗi token của mỗi request: decode 2 lần, replace "_", lower, rồi text.find
+(thêm 1 lần find bỏ dấu cách nếu không thấy). Ở đây:
+
+- build_surface_table: decode toàn bộ vocab 1 lần lúc load -> bảng id -> surface đã xử lý
+  "_" / strip / lower (decode từng id của slow tokenizer ~70µs, 64k id ~4s nên dựng từ
+  convert_ids_to_tokens + convert_tokens_to_string, chỉ added token mới gọi decode)
+- align_tokens: con trỏ chỉ tiến về phía trước trên text, token thường khớp ngay sau khoảng
+  trắng (startswith, không quét), find chỉ dùng khi lệch; find thất bại được nhớ theo token
+  để không quét lại phần còn lại của câu
+
+Kết quả giống hệt thuật toán cũ (kể cả token BPE "@@" không bao giờ khớp được text),
+kiểm tra trên các NER CSV: scripts/verify_token_alignment.py
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Surface(NamedTuple):
+    """Dạng hiển thị của 1 token id: bản gốc và bản bỏ dấu cách (thử lại khi không khớp)"""
+    text: str
+    lower: str
+    no_space: str
+    no_space_lower: str
+
+
+def token_surface(decoded: str) -> Optional[Surface]:
+    decoded = decoded.strip()
+    if not decoded:
+        return None
+    # PhoBERT dùng "_" nối các âm tiết của từ đã word-segment ("cà_chua" -> "cà chua")
+    # token chỉ gồm "_" thành chuỗi rỗng: vẫn căn được (span rỗng tại con trỏ) như thuật toán cũ
+    text = decoded.replace("_", " ").strip()
+    no_space = text.replace(" ", "")
+    return Surface(text, text.lower(), no_space, no_space.lower())
+
+
+def build_surface_table(tokenizer) -> List[Optional[Surface]]:
+    """
+    Surface của mọi token id, bằng tokenizer.decode([id], skip_special_tokens=True) đã xử lý "_"
+    None = special token / decode ra rỗng (bỏ qua khi căn)
+    """
+    ids = list(range(len(tokenizer)))
+    if tokenizer.is_fast:
+        return [token_surface(text) for text in tokenizer.batch_decode([[i] for i in ids], skip_special_tokens=True)]
+
+    special_ids = set(tokenizer.all_special_ids)
+    added_ids = set(tokenizer.added_tokens_decoder)
+    clean_up = tokenizer.clean_up_tokenization_spaces
+    table: List[Optional[Surface]] = []
+    for token_id, token in zip(ids, tokenizer.convert_ids_to_tokens(ids)):
+        if token_id in special_ids:
+            table.append(None)
+            continue
+        if token_id in added_ids:
+            decoded = tokenizer.decode([token_id], skip_special_tokens=True)
+        else:
+            # decode 1 token = convert_tokens_to_string([token]) (+ clean up) của slow tokenizer
+            decoded = tokenizer.convert_tokens_to_string([token])
+            if clean_up:
+                decoded = tokenizer.clean_up_tokenization(decoded)
+        table.append(token_surface(decoded))
+    return table
+
+
+def align_tokens(
+    text: str, input_ids: Sequence[int], table: Sequence[Optional[Surface]]
+) -> List[Optional[Tuple[int, int]]]:
+    """
+    Vị trí ký tự (start, end) của từng token trong text, cùng độ dài với input_ids
+
+    Token được tìm từ sau token căn được gần nhất (không phân biệt hoa thường),
+    không thấy thì thử bản bỏ dấu cách, vẫn không thấy (hoặc special token) thì None
+    """
+    text_lower = text.lower()
+    length = len(text_lower)
+    # surface -> vị trí nhỏ nhất đã find thất bại: find từ vị trí >= đó chắc chắn cũng thất bại
+    missing: Dict[str, int] = {}
+
+    def find(needle: str, position: int) -> int:
+        if not needle:
+            return position
+        # Trường hợp thường gặp: token nằm ngay sau khoảng trắng tại con trỏ
+        # (needle không bắt đầu bằng khoảng trắng nên đây chính là kết quả của find)
+        cursor = position
+        while cursor < length and text_lower[cursor].isspace():
+            cursor += 1
+        if text_lower.startswith(needle, cursor):
+            return cursor
+        if missing.get(needle, length + 1) <= position:
+            return -1
+        found = text_lower.find(needle, position)
+        if found == -1:
+            missing[needle] = position
+        return found
+
+    spans: List[Optional[Tuple[int, int]]] = []
+    current_pos = 0
+    vocab_size = len(table)
+    for token_id in input_ids:
+        surface = table[token_id] if 0 <= token_id < vocab_size else None
+        if surface is None:
+            spans.append(None)
+            continue
+        start = find(surface.lower, current_pos)
+        matched = surface.text
+        if start == -1:
+            # vd tokenizer tách "điện_thoại" nhưng text gốc viết liền "điệnthoại"
+            start = find(surface.no_space_lower, current_pos)
+            matched = surface.no_space
+        if start == -1:
+            spans.append(None)
+            continue
+        current_pos = start + len(matched)
+        spans.append((start, current_pos))
+    return spans
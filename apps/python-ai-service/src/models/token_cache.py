@@ -0,0 +1,147 @@
+"""
+Tokenization cache dùng chung giữa IntentClassifier và NERExtractor
+/analyze đưa cùng 1 câu qua intent rồi NER (và shadow candidate): cache theo
+(tokenizer, max_length, text) để mỗi câu chỉ tokenize 1 lần, câu lặp lại giữa các
+request (câu chào, lệnh điều khiển quen thuộc) cũng không phải tokenize lại
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (input_ids không pad, offset mapping [n_tokens, 2] hoặc None nếu tokenizer không hỗ trợ)
+Encoding = Tuple[List[int], Optional[np.ndarray]]
+
+
+def encode_texts(tokenizer, texts: Sequence[str], max_length: int, return_offsets: bool) -> List[Encoding]:
+    """Tokenize (truncate, không pad); offsets chỉ lấy được với fast tokenizer"""
+    if not texts:
+        return []
+    with_offsets = return_offsets and tokenizer.is_fast
+    encoded = tokenizer(list(texts), truncation=True, max_length=max_length, return_offsets_mapping=with_offsets)
+    if not with_offsets:
+        return [(ids, None) for ids in encoded["input_ids"]]
+    return [
+        (ids, np.asarray(offsets, dtype=np.int64).reshape(-1, 2))
+        for ids, offsets in zip(encoded["input_ids"], encoded["offset_mapping"])
+    ]
+
+
+class _InFlight:
+    """Câu đang được thread khác tokenize: thread sau chờ kết quả thay vì tokenize lại"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.encoding: Optional[Encoding] = None
+
+
+class TokenizationCache:
+    """
+    LRU cache text -> (input_ids, offsets), thread-safe (batcher chạy trong thread)
+
+    - Luôn lưu kèm offsets khi tokenizer hỗ trợ để intent (không cần offsets)
+      và NER (cần offsets) dùng chung 1 entry
+    - /analyze chạy intent batcher và NER batcher song song: câu đang được tokenize
+      ở thread này thì thread kia chờ kết quả (coalesced) thay vì tokenize lần 2
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[Tuple[Any, ...], Encoding]" = OrderedDict()
+        self._in_flight: Dict[Tuple[Any, ...], _InFlight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _namespace(tokenizer, max_length: int) -> Tuple[Any, ...]:
+        # Slow và fast tokenizer của cùng model cho cùng input_ids nhưng chỉ fast có offsets
+        return type(tokenizer).__name__, tokenizer.name_or_path, max_length
+
+    def encode(self, tokenizer, texts: Sequence[str], max_length: int = 256) -> List[Encoding]:
+        """Như encode_texts(..., return_offsets=True) nhưng chỉ tokenize các câu chưa có trong cache"""
+        if not self.enabled:
+            return encode_texts(tokenizer, texts, max_length, return_offsets=True)
+
+        namespace = self._namespace(tokenizer, max_length)
+        results: List[Optional[Encoding]] = [None] * len(texts)
+        # text -> các row cần kết quả (câu trùng nhau trong cùng batch chỉ tokenize 1 lần)
+        owned: Dict[str, List[int]] = {}
+        waiting: Dict[str, List[int]] = {}
+        waiting_on: Dict[str, _InFlight] = {}
+        with self._lock:
+            for row, text in enumerate(texts):
+                key = (namespace, text)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    results[row] = entry
+                    self.hits += 1
+                elif text in owned:
+                    owned[text].append(row)
+                    self.hits += 1
+                elif text in waiting:
+                    waiting[text].append(row)
+                    self.coalesced += 1
+                elif key in self._in_flight:
+                    waiting[text] = [row]
+                    waiting_on[text] = self._in_flight[key]
+                    self.coalesced += 1
+                else:
+                    owned[text] = [row]
+                    self._in_flight[key] = _InFlight()
+                    self.misses += 1
+
+        if owned:
+            own_texts = list(owned)
+            encodings: List[Optional[Encoding]] = [None] * len(own_texts)
+            try:
+                encodings = encode_texts(tokenizer, own_texts, max_length, return_offsets=True)
+            finally:
+                with self._lock:
+                    for text, encoding in zip(own_texts, encodings):
+                        key = (namespace, text)
+                        in_flight = self._in_flight.pop(key)
+                        in_flight.encoding = encoding
+                        in_flight.done.set()
+                        if encoding is None:
+                            continue
+                        self._entries[key] = encoding
+                        for row in owned[text]:
+                            results[row] = encoding
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+        for text, rows in waiting.items():
+            in_flight = waiting_on[text]
+            in_flight.done.wait()
+            # Thread kia lỗi khi tokenize -> tự tokenize câu này
+            encoding = in_flight.encoding or encode_texts(tokenizer, [text], max_length, return_offsets=True)[0]
+            for row in rows:
+                results[row] = encoding
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                # chờ kết quả của thread khác đang tokenize cùng câu (intent/NER song song)
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
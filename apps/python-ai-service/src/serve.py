@@ -0,0 +1,235 @@
+"""
+Production launcher cho Python AI Service
+
+- Process cha load PhoBERT weights 1 lần (~1 GB), rồi fork N worker
+- Worker dùng chung weights qua copy-on-write (chỉ đọc), không nhân bản RAM
+- Mỗi worker giới hạn số thread torch để các worker không tranh CPU
+- Cha giữ socket đã bind và restart worker nếu worker chết (có backoff; chết liên tục
+  quá nhiều lần trong 1 khoảng thời gian thì cha dừng hẳn với exit code 1)
+- Hot swap (/admin/models/...) load version mới riêng trong từng worker (không còn
+  copy-on-write cho version đó), worker mới fork lại từ cha tự đổi theo file ACTIVE
+
+Usage:
+    python src/serve.py --workers 4 --threads-per-worker 2
+(dev vẫn dùng: python src/main.py với reload=True)
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import torch
+import uvicorn
+from loguru import logger
+
+# Fast tokenizer (Rust) đã encode ở process cha lúc load (kiểm tra với câu warm-up): tắt thread pool
+# của tokenizers trước khi fork, batch nhỏ nên không cần song song trong tokenizer
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import main
+from config import settings
+from models.engines import ENGINE_ONNX, ENGINE_ONNX_INT8
+from models.inference_profile import available_cpus
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Bind 1 lần ở process cha, các worker cùng accept trên socket này"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload_models() -> bool:
+    """
+    Load weights ở process cha (không chạy forward trước khi fork để tránh
+    thread pool OpenMP/MKL bị khởi tạo rồi mới fork)
+    """
+    onnx_engines = (ENGINE_ONNX, ENGINE_ONNX_INT8)
+    if settings.intent_engine in onnx_engines or settings.ner_engine in onnx_engines:
+        # ONNX Runtime tạo thread pool ngay khi tạo session -> không fork-safe, load trong từng worker
+        logger.warning("ONNX engines are loaded per worker (sessions are not fork-safe)")
+        return False
+
+    torch.set_num_threads(1)
+    # Gán vào intent_registry / ner_registry của module main, worker kế thừa sau fork
+    asyncio.run(main.load_models())
+    # Đưa toàn bộ object hiện có vào generation "permanent" để GC không
+    # ghi vào header object -> không làm bẩn page dùng chung sau fork
+    gc.collect()
+    gc.freeze()
+    return True
+
+
+def run_worker(sock: socket.socket, worker_id: int, threads: int):
+    """Chạy trong process con sau fork"""
+    # threads đã chia theo số worker, inter-op / bf16 / denormal theo config
+    main.inference_profile.intra_op_threads = threads
+    main.inference_profile.apply_runtime()
+
+    logger.info(f"Worker {worker_id} (pid={os.getpid()}) starting with {threads} torch threads")
+    config = uvicorn.Config(main.app, log_level="info", lifespan="on")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, worker_id: int, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Process con: không dùng lại signal handler của cha
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            run_worker(sock, worker_id, threads)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} crashed: {str(e)}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+class RestartPolicy:
+    """
+    Quyết định khi nào fork lại worker vừa chết
+    - Backoff theo từng worker: backoff_s, x2 mỗi lần chết liên tiếp, tối đa backoff_max_s
+      (worker chạy được >= window_s thì coi là ổn định, reset backoff)
+    - Giới hạn chung: quá max_restarts lần restart trong window_s thì không restart nữa
+    """
+
+    def __init__(self, backoff_s: float, backoff_max_s: float, max_restarts: int, window_s: float):
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        self.max_restarts = max_restarts
+        self.window_s = window_s
+        self._failures: Dict[int, int] = {}  # worker_id -> số lần chết liên tiếp
+        self._restarts: Deque[float] = deque()
+
+    def on_exit(self, worker_id: int, uptime_s: float, now: float) -> Optional[float]:
+        """Trả về số giây chờ trước khi fork lại, None nếu đã vượt giới hạn restart"""
+        if uptime_s >= self.window_s:
+            self._failures.pop(worker_id, None)
+        failures = self._failures.get(worker_id, 0) + 1
+        self._failures[worker_id] = failures
+
+        while self._restarts and now - self._restarts[0] > self.window_s:
+            self._restarts.popleft()
+        if len(self._restarts) >= self.max_restarts:
+            return None
+        self._restarts.append(now)
+        return min(self.backoff_max_s, self.backoff_s * 2 ** (failures - 1))
+
+
+def main_loop(workers: int, threads: int, host: str, port: int) -> int:
+    started = time.perf_counter()
+    sock = bind_socket(host, port)
+    shared = preload_models()
+    logger.info(
+        f"🚀 Parent ready in {(time.perf_counter() - started):.1f}s "
+        f"(preloaded={shared}), forking {workers} workers x {threads} threads on {host}:{port}"
+    )
+
+    children: Dict[int, Tuple[int, float]] = {}  # pid -> (worker_id, thời điểm fork)
+    for worker_id in range(workers):
+        children[spawn_worker(sock, worker_id, threads)] = (worker_id, time.monotonic())
+    pending: Dict[int, float] = {}  # worker_id -> thời điểm fork lại (đang chờ backoff)
+    policy = RestartPolicy(
+        settings.worker_restart_backoff_s,
+        settings.worker_restart_backoff_max_s,
+        settings.worker_max_restarts,
+        settings.worker_restart_window_s,
+    )
+    exit_code = 0
+
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    while children or pending:
+        if stopping:
+            pending.clear()
+        now = time.monotonic()
+        for worker_id, due in list(pending.items()):
+            if due <= now:
+                del pending[worker_id]
+                children[spawn_worker(sock, worker_id, threads)] = (worker_id, now)
+
+        try:
+            if pending:
+                # Còn worker chờ backoff: không block trong os.wait, ngủ ngắn rồi kiểm tra lại
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    time.sleep(min(0.5, max(0.0, min(pending.values()) - now)))
+                    continue
+            else:
+                pid, status = os.wait()
+        except ChildProcessError:
+            if pending:
+                time.sleep(min(0.5, max(0.0, min(pending.values()) - now)))
+                continue
+            break
+        except InterruptedError:
+            continue
+        child = children.pop(pid, None)
+        if child is None or stopping:
+            continue
+
+        # Worker chết bất thường -> fork lại từ cha (weights vẫn còn trong RAM) sau backoff
+        worker_id, spawned_at = child
+        now = time.monotonic()
+        delay = policy.on_exit(worker_id, now - spawned_at, now)
+        if delay is None:
+            logger.error(
+                f"Worker {worker_id} (pid={pid}) exited with status {status}: more than "
+                f"{policy.max_restarts} restarts in {policy.window_s:.0f}s, shutting down"
+            )
+            exit_code = 1
+            handle_stop(signal.SIGTERM, None)
+            continue
+        logger.warning(f"Worker {worker_id} (pid={pid}) exited with status {status}, restarting in {delay:.1f}s")
+        pending[worker_id] = now + delay
+
+    sock.close()
+    logger.info(" Python AI Service stopped")
+    return exit_code
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Production multi-worker launcher")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=settings.threads_per_worker,
+        help="torch intra-op threads per worker (0 = CPUs / workers)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, available_cpus() // workers)
+    sys.exit(main_loop(workers, threads, args.host, args.port))
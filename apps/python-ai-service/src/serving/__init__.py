@@ -0,0 +1,30 @@
+"""
+Serving Package
+Hạ tầng phục vụ inference (batching, admission control, degradation, ...)
+"""
+
+from .admission import DEADLINE_HEADER, AdmissionController, DeadlineExceeded, RequestRejected, Ticket
+from .batcher import DynamicBatcher
+from .crop_catalog import CropCatalogStore
+from .degradation import DegradationController
+from .farm_vocabulary import FarmVocabularyError, FarmVocabularyStore
+from .intent_memory import IntentMemoryStore
+from .registry import ModelRegistry, ModelVersionError
+from .shadow import ShadowEvaluator
+
+__all__ = [
+    "DynamicBatcher",
+    "CropCatalogStore",
+    "DegradationController",
+    "FarmVocabularyError",
+    "FarmVocabularyStore",
+    "IntentMemoryStore",
+    "AdmissionController",
+    "DeadlineExceeded",
+    "RequestRejected",
+    "Ticket",
+    "DEADLINE_HEADER",
+    "ModelRegistry",
+    "ModelVersionError",
+    "ShadowEvaluator",
+]
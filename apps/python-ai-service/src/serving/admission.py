@@ -0,0 +1,142 @@
+"""
+Admission control & deadline-aware load shedding
+- Giới hạn số request đang xử lý (in-flight), vượt quá -> 429 + Retry-After
+- Deadline lấy từ header của caller: hết hạn trước khi inference -> bỏ, trả 503
+  (NestJS đã timeout thì tính tiếp chỉ làm quá tải nặng hơn)
+- Tuổi của request in-flight lâu nhất là signal quá tải cho degradation khi tắt batching
+  (không có hàng đợi batch để đo thời gian chờ); request bulk (/ner/extract_batch, /ner/document)
+  chạy lâu là bình thường nên không tính
+"""
+
+import time
+from typing import Any, Dict, Optional, Set
+
+# Thời gian còn lại (ms) caller còn chờ, vd NestJS gửi 10000 (= axios timeout)
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+
+class RequestRejected(Exception):
+    """Request bị từ chối trước khi inference (quá tải hoặc hết deadline)"""
+
+    def __init__(self, status_code: int, reason: str, retry_after_s: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        # Retry-After tính bằng giây (số nguyên, tối thiểu 1)
+        return {"Retry-After": str(max(1, int(round(self.retry_after_s))))}
+
+
+class DeadlineExceeded(RequestRejected):
+    """Deadline của caller đã qua (hoặc chắc chắn không kịp) -> không chạy model"""
+
+    def __init__(self, retry_after_s: float = 1.0, reason: str = "Request deadline exceeded"):
+        super().__init__(503, reason, retry_after_s)
+
+
+class Ticket:
+    """1 slot in-flight đã được cấp cho request"""
+
+    def __init__(self, deadline: Optional[float], bulk: bool = False):
+        # deadline theo time.monotonic(), None = không giới hạn
+        self.deadline = deadline
+        self.admitted_at = time.monotonic()
+        # Request bulk: không tính vào oldest_in_flight_s()
+        self.bulk = bulk
+
+    def remaining_s(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+class AdmissionController:
+    """
+    Bounded in-flight queue cho các endpoint inference
+
+    Dùng: ticket = controller.admit(header_value) ... controller.release(ticket)
+    """
+
+    def __init__(self, max_in_flight: int = 64, retry_after_s: float = 1.0, default_deadline_ms: float = 0):
+        """
+        Args:
+            max_in_flight: Số request tối đa đang chờ/chạy inference
+            retry_after_s: Giá trị Retry-After khi từ chối
+            default_deadline_ms: Deadline mặc định nếu caller không gửi header (0 = không có)
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.retry_after_s = retry_after_s
+        self.default_deadline_ms = default_deadline_ms
+        self.in_flight = 0
+        self._tickets: Set[Ticket] = set()
+
+        # Metrics
+        self.admitted_total = 0
+        self.shed_total = 0
+        self.expired_total = 0
+        self.max_in_flight_seen = 0
+
+    def parse_deadline(self, header_value: Optional[str]) -> Optional[float]:
+        """Header (ms còn lại) -> deadline tuyệt đối theo time.monotonic()"""
+        budget_ms = self.default_deadline_ms
+        if header_value:
+            try:
+                budget_ms = float(header_value)
+            except ValueError:
+                pass
+        if not budget_ms or budget_ms <= 0:
+            return None
+        return time.monotonic() + budget_ms / 1000.0
+
+    def admit(self, deadline_header: Optional[str] = None, bulk: bool = False) -> Ticket:
+        """
+        Cấp slot cho request hoặc raise RequestRejected (429) nếu đã đầy
+
+        Args:
+            deadline_header: Giá trị header X-Request-Deadline-Ms (nếu có)
+            bulk: Request nhiều câu / cả tài liệu, không dùng làm signal quá tải
+        """
+        if self.in_flight >= self.max_in_flight:
+            self.shed_total += 1
+            raise RequestRejected(429, "Service saturated, too many in-flight requests", self.retry_after_s)
+
+        self.in_flight += 1
+        self.admitted_total += 1
+        self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+        ticket = Ticket(self.parse_deadline(deadline_header), bulk)
+        self._tickets.add(ticket)
+        return ticket
+
+    def release(self, ticket: Ticket):
+        self.in_flight = max(0, self.in_flight - 1)
+        self._tickets.discard(ticket)
+
+    def oldest_in_flight_s(self) -> float:
+        """
+        Request in-flight (không tính bulk) lâu nhất đã chờ/chạy bao lâu (0 nếu không có)
+
+        Model chạy trên CPU nên các request đồng thời tranh nhau core: request mới phải chờ
+        cỡ chừng này, kể cả khi không có hàng đợi batch
+        """
+        admitted = [ticket.admitted_at for ticket in self._tickets if not ticket.bulk]
+        if not admitted:
+            return 0.0
+        return time.monotonic() - min(admitted)
+
+    def record_expired(self):
+        self.expired_total += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "oldest_in_flight_ms": self.oldest_in_flight_s() * 1000,
+            "max_in_flight": self.max_in_flight,
+            "max_in_flight_seen": self.max_in_flight_seen,
+            "admitted_total": self.admitted_total,
+            "shed_total": self.shed_total,
+            "expired_total": self.expired_total,
+        }
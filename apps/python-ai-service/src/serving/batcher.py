@@ -0,0 +1,235 @@
+"""
+Dynamic request batching
+Gom các request đơn lẻ đến trong 1 khoảng thời gian ngắn thành 1 batch,
+chạy 1 lần forward PhoBERT rồi trả kết quả về đúng từng request
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .admission import DeadlineExceeded
+
+
+class DynamicBatcher:
+    """
+    Scheduler gom batch cho 1 model
+
+    - submit(item) được gọi từ mỗi request, trả về kết quả của riêng item đó
+    - Worker lấy item đầu tiên trong hàng đợi, chờ thêm tối đa max_wait_ms
+      hoặc đến khi đủ max_batch_size, rồi gọi batch_fn(items) trong thread riêng
+    - batch_fn phải trả về list kết quả cùng thứ tự với items
+    - Item có deadline (time.monotonic()) đã qua sẽ bị bỏ trước khi forward
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            name: Tên batcher (dùng cho log/metrics)
+            batch_fn: Hàm đồng bộ xử lý 1 batch items
+            max_batch_size: Số item tối đa trong 1 batch
+            max_wait_ms: Thời gian chờ tối đa để gom thêm item
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # 1 thread duy nhất: forward chạy tuần tự, không block event loop
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Batch đang chạy trong executor (stop() phải trả lỗi cho các future này)
+        self._running: List[Tuple[Any, asyncio.Future]] = []
+
+        # Metrics
+        self.requests_total = 0
+        self.batches_total = 0
+        self.items_total = 0
+        self.max_queue_depth = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+        self.avg_batch_ms = 0.0  # EWMA, dùng để ước lượng thời gian chờ
+        self.expired_total = 0
+
+    async def start(self):
+        """Start background worker (gọi trong startup event)"""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-batch")
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"Batcher '{self.name}' started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait_s * 1000:.1f})"
+        )
+
+    async def stop(self):
+        """Stop worker, fail pending requests (cả batch đang forward) và chờ thread forward xong"""
+        if self._worker is None:
+            return
+        # Lấy trước khi cancel: finally của _run xoá self._running
+        pending = [future for _, future in self._running]
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            pending.append(future)
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Batcher '{self.name}' stopped"))
+
+        if self._executor is not None:
+            # Không trả về khi batch_fn còn chạy: model có thể bị unload ngay sau stop()
+            await asyncio.to_thread(self._executor.shutdown, True)
+            self._executor = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def queue_wait_s(self) -> float:
+        """Thời gian chờ các batch đang xếp hàng phía trước (không tính batch của chính request)"""
+        batches_ahead = -(-self.queue_depth // self.max_batch_size)  # ceil
+        return batches_ahead * self.avg_batch_ms / 1000.0
+
+    def estimated_wait_s(self) -> float:
+        """Ước lượng thời gian từ lúc submit đến lúc có kết quả"""
+        batches_ahead = self.queue_depth // self.max_batch_size + 1
+        return self.max_wait_s + batches_ahead * self.avg_batch_ms / 1000.0
+
+    async def submit(self, item: Any, deadline: Optional[float] = None) -> Any:
+        """
+        Đưa 1 item vào hàng đợi và chờ kết quả của nó
+
+        Args:
+            item: Input của batch_fn cho 1 request
+            deadline: Thời điểm (time.monotonic()) caller bỏ cuộc, None = không giới hạn
+
+        Returns:
+            Kết quả tương ứng với item
+
+        Raises:
+            DeadlineExceeded: Không kịp trả kết quả trước deadline
+        """
+        if self._queue is None:
+            raise RuntimeError(f"Batcher '{self.name}' not started")
+
+        if deadline is not None and time.monotonic() + self.estimated_wait_s() > deadline:
+            # Chắc chắn không kịp -> từ chối ngay, không chiếm chỗ trong batch
+            self.expired_total += 1
+            raise DeadlineExceeded(
+                retry_after_s=self.estimated_wait_s(),
+                reason=f"Estimated '{self.name}' queue wait exceeds request deadline",
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, deadline))
+        self.requests_total += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future, Optional[float]]]:
+        """Chờ item đầu tiên rồi gom thêm trong cửa sổ max_wait"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_s
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Lấy nốt các item đã có sẵn trong hàng đợi (không chờ thêm)
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+
+            # Client đã huỷ (disconnect) hoặc quá deadline thì không tính toán nữa
+            now = time.monotonic()
+            live = []
+            for item, future, deadline in batch:
+                if future.done():
+                    continue
+                if deadline is not None and now >= deadline:
+                    self.expired_total += 1
+                    future.set_exception(DeadlineExceeded())
+                    continue
+                live.append((item, future))
+            batch = live
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            started = time.perf_counter()
+            self._running = batch
+            try:
+                results = await loop.run_in_executor(self._executor, self.batch_fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Batcher '{self.name}': batch_fn returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                logger.error(f"Batcher '{self.name}' batch error: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._running = []
+                self.last_batch_ms = (time.perf_counter() - started) * 1000
+                self.avg_batch_ms = (
+                    self.last_batch_ms if self.avg_batch_ms == 0
+                    else 0.8 * self.avg_batch_ms + 0.2 * self.last_batch_ms
+                )
+
+            self.batches_total += 1
+            self.items_total += len(items)
+            self.last_batch_size = len(items)
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrics: độ sâu hàng đợi, kích thước batch, tỉ lệ lấp đầy batch"""
+        avg_batch_size = self.items_total / self.batches_total if self.batches_total else 0.0
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "avg_batch_size": avg_batch_size,
+            "batch_fill_ratio": avg_batch_size / self.max_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": self.last_batch_ms,
+            "avg_batch_ms": self.avg_batch_ms,
+            "expired_total": self.expired_total,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000,
+        }
@@ -0,0 +1,64 @@
+"""
+Catalog crop (bảng crops của NestJS) cho CropLinker
+
+- PUT /admin/crops ở 1 worker: ghi <file> (atomic) rồi dựng lại dict của worker đó
+- Các worker khác (và lần restart sau) đọc lại file khi mtime đổi: refresh() chạy trong
+  vòng sync version của main.py (MODEL_SYNC_INTERVAL_S), giống file ACTIVE của ModelRegistry
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from models.crop_linker import CropLinker
+
+
+class CropCatalogStore:
+    """File catalog + CropLinker dùng chung cho mọi version NERExtractor"""
+
+    def __init__(self, path: Path, linker: CropLinker):
+        self.path = path
+        self.linker = linker
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def put(self, crops: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Thay toàn bộ catalog"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_file.write_text(json.dumps({"crops": crops}, ensure_ascii=False), encoding="utf-8")
+        tmp_file.replace(self.path)
+        with self._lock:
+            self.linker.update(crops)
+            self._mtime = self.path.stat().st_mtime_ns
+            self.reloads += 1
+        return self.linker.stats()
+
+    def refresh(self) -> bool:
+        """Đọc lại file nếu worker khác vừa ghi, True nếu catalog đã đổi"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            try:
+                crops = json.loads(self.path.read_text(encoding="utf-8"))["crops"]
+                self.linker.update(crops)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Unable to load crop catalog {self.path}: {e}")
+                return False
+            self._mtime = mtime
+            self.reloads += 1
+        logger.info(f"Crop catalog reloaded: {self.linker.stats()}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"file": str(self.path), "reloads": self.reloads, **self.linker.stats()}
@@ -0,0 +1,91 @@
+"""
+Automatic degradation sang rule-based khi inference quá tải
+Khi thời gian chờ (hàng đợi batch, hoặc request in-flight lâu nhất khi tắt batching) vượt SLO
+-> request mới chạy rules-only (keyword intent + regex entities), hết quá tải thì quay lại PhoBERT
+"""
+
+import time
+from typing import Any, Dict
+
+from loguru import logger
+
+
+class DegradationController:
+    """
+    State machine có hysteresis để không bật/tắt liên tục
+
+    - normal -> degraded: signal > slo_ms
+    - degraded -> normal: signal < slo_ms * exit_ratio
+    """
+
+    def __init__(self, slo_ms: float = 300.0, exit_ratio: float = 0.5, enabled: bool = True):
+        """
+        Args:
+            slo_ms: Latency SLO cho thời gian chờ trong hàng đợi inference
+            exit_ratio: Chỉ thoát degraded khi signal < slo_ms * exit_ratio
+            enabled: Tắt hẳn cơ chế degradation
+        """
+        self.slo_ms = slo_ms
+        self.exit_ratio = exit_ratio
+        self.enabled = enabled
+        self.degraded = False
+        self.last_signal_ms = 0.0
+        self.changed_at = time.monotonic()
+
+        # Metrics
+        self.transitions_total = 0
+        self.degraded_requests_total = 0
+        self.degraded_seconds_total = 0.0
+
+    def update(self, signal_ms: float) -> bool:
+        """
+        Cập nhật với thời gian chờ hiện tại của hàng đợi
+
+        Args:
+            signal_ms: Ước lượng thời gian chờ (ms) của request mới
+
+        Returns:
+            True nếu request mới phải chạy rules-only
+        """
+        self.last_signal_ms = signal_ms
+        if not self.enabled:
+            return False
+
+        if not self.degraded and signal_ms > self.slo_ms:
+            self._switch(True)
+        elif self.degraded and signal_ms < self.slo_ms * self.exit_ratio:
+            self._switch(False)
+
+        if self.degraded:
+            self.degraded_requests_total += 1
+        return self.degraded
+
+    def _switch(self, degraded: bool):
+        now = time.monotonic()
+        if self.degraded:
+            self.degraded_seconds_total += now - self.changed_at
+        self.degraded = degraded
+        self.changed_at = now
+        self.transitions_total += 1
+        if degraded:
+            logger.warning(
+                f"Inference queue wait {self.last_signal_ms:.0f}ms > SLO {self.slo_ms:.0f}ms, "
+                f"switching to rules-only mode"
+            )
+        else:
+            logger.info(f"Inference queue drained ({self.last_signal_ms:.0f}ms), back to PhoBERT")
+
+    def stats(self) -> Dict[str, Any]:
+        degraded_seconds = self.degraded_seconds_total
+        if self.degraded:
+            degraded_seconds += time.monotonic() - self.changed_at
+        return {
+            "enabled": self.enabled,
+            "degraded": self.degraded,
+            "slo_ms": self.slo_ms,
+            "exit_ratio": self.exit_ratio,
+            "last_signal_ms": self.last_signal_ms,
+            "transitions_total": self.transitions_total,
+            "degraded_requests_total": self.degraded_requests_total,
+            "degraded_seconds_total": degraded_seconds,
+        }
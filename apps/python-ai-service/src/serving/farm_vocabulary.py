@@ -0,0 +1,152 @@
+"""
+Cache từ vựng theo farm (FarmVocabulary) với memory budget
+
+- NestJS đẩy vocabulary vào 1 worker bất kỳ: ghi ra <dir>/<farm_id>.json (atomic) để các
+  worker khác (serve.py fork nhiều worker) và lần restart sau đều thấy
+- Mỗi worker compile khi cần và giữ trong LRU, tổng memory_bytes vượt budget -> bỏ farm ít
+  dùng nhất (vẫn còn file, lần sau compile lại)
+- get() so mtime của file với bản đã compile -> farm được cập nhật ở worker khác thì compile lại
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from models.farm_vocabulary import FarmVocabulary
+
+FARM_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class FarmVocabularyError(Exception):
+    """farm_id không hợp lệ hoặc vocabulary vượt memory budget"""
+
+    def __init__(self, status_code: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class FarmVocabularyStore:
+    """LRU farm_id -> (mtime của file, FarmVocabulary), thread-safe"""
+
+    def __init__(self, directory: Path, memory_budget_mb: float = 32.0):
+        self.directory = directory
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._entries: "OrderedDict[str, Tuple[int, FarmVocabulary]]" = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_budget > 0
+
+    def _path(self, farm_id: str) -> Path:
+        if not FARM_ID_PATTERN.match(farm_id):
+            raise FarmVocabularyError(400, f"Invalid farm_id '{farm_id}'")
+        return self.directory / f"{farm_id}.json"
+
+    def put(self, farm_id: str, areas: list, devices: list) -> FarmVocabulary:
+        """Compile + lưu file + đưa vào cache (thay bản cũ của farm)"""
+        if not self.enabled:
+            raise FarmVocabularyError(409, "Farm vocabulary is disabled (FARM_VOCAB_MEMORY_MB=0)")
+        path = self._path(farm_id)
+        vocabulary = FarmVocabulary(farm_id, areas, devices)
+        if vocabulary.memory_bytes > self.memory_budget:
+            raise FarmVocabularyError(
+                413, f"Vocabulary of farm '{farm_id}' needs {vocabulary.memory_bytes} bytes, budget is {self.memory_budget}"
+            )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Tên file tạm riêng cho mỗi lần ghi: 2 worker cùng nhận PUT của 1 farm không ghi đè /
+        # replace mất file tạm của nhau
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, prefix=f".{farm_id}.", suffix=".json.tmp", delete=False
+        ) as tmp_file:
+            json.dump({"areas": areas, "devices": devices}, tmp_file, ensure_ascii=False)
+        try:
+            os.replace(tmp_file.name, path)
+        except OSError:
+            os.unlink(tmp_file.name)
+            raise
+        self._store(farm_id, path.stat().st_mtime_ns, vocabulary)
+        return vocabulary
+
+    def remove(self, farm_id: str) -> bool:
+        path = self._path(farm_id)
+        with self._lock:
+            entry = self._entries.pop(farm_id, None)
+            if entry is not None:
+                self._memory -= entry[1].memory_bytes
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return entry is not None
+        return True
+
+    def get(self, farm_id: str) -> Optional[FarmVocabulary]:
+        """Vocabulary của farm, None nếu NestJS chưa đẩy (hoặc đã xoá / farm_id sai)"""
+        if not self.enabled:
+            return None
+        try:
+            path = self._path(farm_id)
+            mtime = path.stat().st_mtime_ns
+        except (FarmVocabularyError, FileNotFoundError):
+            with self._lock:
+                entry = self._entries.pop(farm_id, None)
+                if entry is not None:
+                    self._memory -= entry[1].memory_bytes
+            return None
+
+        with self._lock:
+            entry = self._entries.get(farm_id)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(farm_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            vocabulary = FarmVocabulary(farm_id, data.get("areas", []), data.get("devices", []))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Unable to load vocabulary of farm {farm_id}: {e}")
+            return None
+        if vocabulary.memory_bytes > self.memory_budget:
+            return vocabulary
+        self._store(farm_id, mtime, vocabulary)
+        return vocabulary
+
+    def _store(self, farm_id: str, mtime: int, vocabulary: FarmVocabulary):
+        with self._lock:
+            previous = self._entries.pop(farm_id, None)
+            if previous is not None:
+                self._memory -= previous[1].memory_bytes
+            self._entries[farm_id] = (mtime, vocabulary)
+            self._memory += vocabulary.memory_bytes
+            while self._memory > self.memory_budget and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._memory -= evicted.memory_bytes
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "farms_cached": len(self._entries),
+                "memory_bytes": self._memory,
+                "memory_budget_bytes": self.memory_budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,102 @@
+"""
+Câu admin đã sửa intent (models/intent_memory.py) dùng chung cho mọi version IntentClassifier
+
+- POST /admin/intent-memory ở 1 worker: khoá file, đọc lại bản mới nhất, tính vector bằng
+  classifier đang active rồi ghi <file> (atomic). Khác PUT /admin/crops (thay toàn bộ),
+  ở đây là thêm vào nên phải khoá để 2 worker thêm cùng lúc không ghi đè nhau
+- Các worker khác (và lần restart sau) đọc lại file khi mtime đổi: refresh() chạy trong
+  vòng sync version của main.py, giống CropCatalogStore
+- Đổi version model: vector cũ không còn so được, sync_encoder() tính lại trong bộ nhớ
+  (đến lúc đó chỉ còn khớp text, file chỉ được ghi lại ở lần thêm sau)
+"""
+
+import fcntl
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from models.intent_classifier import IntentClassifier
+from models.intent_memory import IntentMemory
+
+
+class IntentMemoryStore:
+    """File npz + IntentMemory dùng chung"""
+
+    def __init__(self, path: Path, memory: Optional[IntentMemory] = None):
+        self.path = path
+        self.memory = memory or IntentMemory()
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def add(self, examples: List[Dict[str, str]], classifier: Optional[IntentClassifier]) -> Dict[str, Any]:
+        """
+        Thêm / sửa ví dụ ({"text", "intent"}), có vector nếu classifier chạy engine torch
+
+        Returns:
+            {"added": số câu mới, **stats()}
+        """
+        texts = [example["text"] for example in examples]
+        intents = [example["intent"] for example in examples]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = self.path.with_name(f".{self.path.name}.lock")
+        with self._lock, open(lock_file, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._reload()
+            vectors, encoder = None, None
+            if classifier is not None and classifier.memory_vectors_supported():
+                self._sync_encoder(classifier)
+                vectors, encoder = classifier.embed(texts), classifier.encoder_id
+            added = self.memory.add(texts, intents, vectors, encoder)
+            self.memory.save(self.path)
+            self._mtime = self.path.stat().st_mtime_ns
+        return {"added": added, **self.stats()}
+
+    def refresh(self) -> bool:
+        """Đọc lại file nếu worker khác vừa ghi, True nếu memory đã đổi"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            if not self._reload():
+                return False
+        logger.info(f"Intent memory reloaded: {self.memory.stats()}")
+        return True
+
+    def _reload(self) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self.memory.load(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Unable to load intent memory {self.path}: {e}")
+            return False
+        self._mtime = mtime
+        self.reloads += 1
+        return True
+
+    def sync_encoder(self, classifier: Optional[IntentClassifier]) -> bool:
+        """Tính lại vector bằng classifier đang active nếu memory đang giữ vector của model khác"""
+        if classifier is None or not classifier.memory_vectors_supported():
+            return False
+        with self._lock:
+            return self._sync_encoder(classifier)
+
+    def _sync_encoder(self, classifier: IntentClassifier) -> bool:
+        if not len(self.memory) or self.memory.has_vectors(classifier.encoder_id):
+            return False
+        self.memory.set_vectors(classifier.embed(self.memory.texts), classifier.encoder_id)
+        logger.info(f"Intent memory re-embedded with {classifier.encoder_id}: {len(self.memory)} examples")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"file": str(self.path), "reloads": self.reloads, **self.memory.stats()}
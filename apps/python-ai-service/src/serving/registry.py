@@ -0,0 +1,303 @@
+"""
+Versioned model registry + hot swap
+Đổi version model (intent/NER) không cần restart service:
+load + warm-up version mới trong background, đổi active 1 lần (atomic),
+request đang chạy dùng nốt version cũ, version cũ unload khi không còn ai dùng
+
+Layout:
+    models/<name>/                      -> version "base" (layout cũ)
+    models/versions/<name>/<version>/   -> các version khác (cùng cấu trúc với base)
+    models/versions/<name>/ACTIVE       -> version đang active (dùng chung giữa các worker,
+                                          giữ nguyên sau restart)
+"""
+
+import asyncio
+import ctypes
+import gc
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from loguru import logger
+
+BASE_VERSION = "base"
+ACTIVE_FILE = "ACTIVE"
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class ModelVersionError(Exception):
+    """Version không hợp lệ / không tồn tại hoặc đang có version khác được load"""
+
+    def __init__(self, status_code: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class ModelHandle:
+    """1 version đã load, đếm số request đang dùng"""
+
+    def __init__(self, version: str, model: Any):
+        self.version = version
+        self.model = model
+        self.loaded_at = time.time()
+        self.in_flight = 0
+        self.retired = False
+
+
+def release_memory():
+    """gc + trả heap trống về OS (glibc giữ lại vùng nhớ đã free nếu không trim)"""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ModelRegistry:
+    """
+    Registry cho 1 loại model (vd "intent_classifier")
+
+    - acquire(): context manager trả model của version active, giữ ref-count tới khi xong
+    - load_version(v) / load_in_background(v): load + warm-up (loader) rồi swap,
+      version cũ drain rồi unload
+    - sync_active(): đọc file ACTIVE, swap nếu worker khác đã đổi version; version load lỗi
+      không thử lại cho tới khi ACTIVE hoặc thư mục version đổi (mtime)
+    """
+
+    def __init__(self, name: str, models_root: Path, loader: Callable[[Path], Awaitable[Any]]):
+        """
+        Args:
+            name: Tên model (tên thư mục trong models/)
+            models_root: Thư mục models/ của service
+            loader: async loader(model_dir) -> model đã load + warm-up
+        """
+        self.name = name
+        self.models_root = models_root
+        self.versions_dir = models_root / "versions" / name
+        self.loader = loader
+
+        self._active: Optional[ModelHandle] = None
+        self._draining: List[ModelHandle] = []
+        # acquire/release được gọi cả từ thread của batcher
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+        self.loading_version: Optional[str] = None
+        # (version, mtime của ACTIVE + thư mục version) lần sync_active lỗi gần nhất
+        self._failed_sync: Optional[Tuple[str, Tuple[Optional[int], Optional[int]]]] = None
+
+        # Metrics
+        self.swaps_total = 0
+        self.unloaded_total = 0
+        self.last_error: Optional[str] = None
+
+    # ---- versions -------------------------------------------------------
+
+    def version_dir(self, version: str) -> Path:
+        if version == BASE_VERSION:
+            return self.models_root / self.name
+        if not VERSION_PATTERN.match(version):
+            raise ModelVersionError(400, f"Invalid version name '{version}'")
+        return self.versions_dir / version
+
+    def available_versions(self) -> List[str]:
+        versions = [BASE_VERSION]
+        if self.versions_dir.exists():
+            versions += sorted(p.name for p in self.versions_dir.iterdir() if p.is_dir())
+        return versions
+
+    def persisted_version(self) -> str:
+        """Version ghi trong ACTIVE (mặc định base)"""
+        active_file = self.versions_dir / ACTIVE_FILE
+        if active_file.exists():
+            version = active_file.read_text(encoding="utf-8").strip()
+            if version:
+                return version
+        return BASE_VERSION
+
+    def persist_version(self, version: str):
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.versions_dir / f".{ACTIVE_FILE}.tmp"
+        tmp_file.write_text(version, encoding="utf-8")
+        tmp_file.replace(self.versions_dir / ACTIVE_FILE)
+
+    # ---- active model ---------------------------------------------------
+
+    @property
+    def model(self) -> Optional[Any]:
+        handle = self._active
+        return handle.model if handle is not None else None
+
+    @property
+    def active_version(self) -> Optional[str]:
+        handle = self._active
+        return handle.version if handle is not None else None
+
+    def set_active(self, version: str, model: Any):
+        """Gán version đã load sẵn (lúc startup)"""
+        self._swap(ModelHandle(version, model))
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """Lấy model của version active, version không bị unload khi còn request dùng"""
+        with self._lock:
+            handle = self._active
+            if handle is None:
+                raise RuntimeError(f"Model '{self.name}' not loaded")
+            handle.in_flight += 1
+        try:
+            yield handle.model
+        finally:
+            with self._lock:
+                handle.in_flight -= 1
+                unload = handle.retired and handle.in_flight == 0
+            if unload:
+                self._unload(handle)
+
+    # ---- swap -----------------------------------------------------------
+
+    def startup_version(self) -> str:
+        """Version load lúc khởi động: ACTIVE nếu còn tồn tại, ngược lại base"""
+        version = self.persisted_version()
+        try:
+            if self.version_dir(version).exists():
+                return version
+        except ModelVersionError:
+            pass
+        logger.warning(f"ACTIVE version '{version}' of {self.name} not found, using '{BASE_VERSION}'")
+        return BASE_VERSION
+
+    def _check_loadable(self, version: str) -> Path:
+        model_dir = self.version_dir(version)
+        if not model_dir.exists():
+            raise ModelVersionError(404, f"Version '{version}' of {self.name} not found at {model_dir}")
+        if self.loading_version is not None:
+            raise ModelVersionError(409, f"{self.name} is already loading version '{self.loading_version}'")
+        return model_dir
+
+    async def load_version(self, version: str, persist: bool = True) -> str:
+        """
+        Load + warm-up version rồi swap (await đến khi xong)
+
+        Raises:
+            ModelVersionError: version không tồn tại (404) hoặc đang load version khác (409)
+        """
+        model_dir = self._check_loadable(version)
+        self.loading_version = version
+        return await self._load(version, model_dir, persist)
+
+    def load_in_background(self, version: str):
+        """
+        Kiểm tra version rồi load trong background task (dùng cho admin endpoint)
+
+        Raises:
+            ModelVersionError: version không tồn tại (404) hoặc đang load version khác (409)
+        """
+        model_dir = self._check_loadable(version)
+        # Giữ chỗ ngay (cùng event loop) để request admin thứ 2 nhận 409
+        self.loading_version = version
+        task = asyncio.create_task(self._load(version, model_dir, persist=True))
+        self._tasks.add(task)
+        # Lỗi đã log + lưu ở last_error, lấy exception để asyncio không cảnh báo
+        task.add_done_callback(lambda t: self._tasks.discard(t) or t.cancelled() or t.exception())
+
+    async def _load(self, version: str, model_dir: Path, persist: bool) -> str:
+        started = time.perf_counter()
+        try:
+            logger.info(f"Loading {self.name} version '{version}' from {model_dir}...")
+            model = await self.loader(model_dir)
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            logger.error(f"Failed to load {self.name} version '{version}': {e}")
+            raise
+        finally:
+            self.loading_version = None
+
+        self._swap(ModelHandle(version, model))
+        if persist:
+            self.persist_version(version)
+        logger.info(
+            f"✅ {self.name} switched to version '{version}' "
+            f"(load + warm-up {(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
+        return version
+
+    def _sync_signature(self, version: str) -> Tuple[Optional[int], Optional[int]]:
+        """mtime của file ACTIVE và thư mục version (None = không có)"""
+        def mtime(path: Path) -> Optional[int]:
+            try:
+                return path.stat().st_mtime_ns
+            except OSError:
+                return None
+
+        try:
+            model_dir = self.version_dir(version)
+        except ModelVersionError:
+            return mtime(self.versions_dir / ACTIVE_FILE), None
+        return mtime(self.versions_dir / ACTIVE_FILE), mtime(model_dir)
+
+    async def sync_active(self):
+        """Đổi theo file ACTIVE nếu worker khác (hoặc người vận hành) đã đổi version"""
+        version = self.persisted_version()
+        if version == self.active_version or self.loading_version is not None:
+            return
+        # Version vừa lỗi: không load lại (vài giây / lần poll) cho tới khi file thay đổi
+        signature = self._sync_signature(version)
+        if self._failed_sync == (version, signature):
+            return
+        try:
+            await self.load_version(version, persist=False)
+        except ModelVersionError as e:
+            self._failed_sync = (version, signature)
+            logger.warning(f"Ignoring ACTIVE version for {self.name}: {e.reason}")
+        except Exception:
+            # Lỗi load đã log + lưu ở last_error, giữ version hiện tại
+            self._failed_sync = (version, signature)
+            logger.warning(f"Not retrying {self.name} version '{version}' until ACTIVE or its directory changes")
+        else:
+            self._failed_sync = None
+
+    def _swap(self, handle: ModelHandle):
+        with self._lock:
+            old = self._active
+            self._active = handle
+            self.swaps_total += 1
+            if old is None:
+                return
+            old.retired = True
+            unload = old.in_flight == 0
+            if not unload:
+                self._draining.append(old)
+        if unload:
+            self._unload(old)
+
+    def _unload(self, handle: ModelHandle):
+        with self._lock:
+            if handle in self._draining:
+                self._draining.remove(handle)
+            if handle.model is None:
+                return
+            handle.model = None
+            self.unloaded_total += 1
+        release_memory()
+        logger.info(f"Unloaded {self.name} version '{handle.version}'")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self._active
+            draining = [{"version": h.version, "in_flight": h.in_flight} for h in self._draining]
+        return {
+            "active_version": active.version if active is not None else None,
+            "loaded_at": active.loaded_at if active is not None else None,
+            "in_flight": active.in_flight if active is not None else 0,
+            "loading_version": self.loading_version,
+            "draining": draining,
+            "available_versions": self.available_versions(),
+            "swaps_total": self.swaps_total,
+            "unloaded_total": self.unloaded_total,
+            "last_error": self.last_error,
+            "sync_skipped_version": self._failed_sync[0] if self._failed_sync else None,
+        }
@@ -0,0 +1,304 @@
+"""
+Shadow evaluation: chạy candidate model (version mới) trên 1 phần traffic thật
+ngoài critical path, so sánh với kết quả đã trả cho client
+
+- Response đã được tính xong bằng model active, shadow chỉ nhận bản sao text + kết quả
+- Candidate chạy trong 1 thread riêng, hàng đợi có giới hạn (đầy thì bỏ mẫu)
+- Service đang bận (hàng đợi batch có request / degraded) thì không lấy mẫu
+- Latency so sánh cùng điều kiện: shadow thread chạy lại primary (version active) và candidate
+  liền nhau, đảo thứ tự mỗi mẫu, chỉ tính tokenize + forward. processing_time_ms đã trả cho
+  client có cả thời gian chờ batch / tranh CPU với request khác nên chỉ báo riêng (served_*)
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .registry import release_memory
+
+# Số mẫu latency giữ lại để tính percentile
+LATENCY_WINDOW = 2000
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def _latency_stats(primary: Deque[float], candidate: Deque[float], served: Deque[float]) -> Dict[str, float]:
+    primary, candidate, served = list(primary), list(candidate), list(served)
+    stats = {}
+    for q in (50, 95):
+        stats[f"primary_p{q}_ms"] = _percentile(primary, q)
+        stats[f"candidate_p{q}_ms"] = _percentile(candidate, q)
+        stats[f"delta_p{q}_ms"] = stats[f"candidate_p{q}_ms"] - stats[f"primary_p{q}_ms"]
+        # Latency client thấy (có chờ batch), không so trực tiếp với candidate
+        stats[f"served_p{q}_ms"] = _percentile(served, q)
+    return stats
+
+
+def _entity_keys(entities: List[Dict[str, Any]]) -> Counter:
+    return Counter((e["type"], e["start"], e["end"]) for e in entities)
+
+
+class ShadowEvaluator:
+    """
+    Dùng:
+        shadow.start(intent_candidate, ner_candidate, versions, sample_rate)
+        shadow.observe_intent(text, top_k, primary_result)   # sau khi đã có response
+        shadow.stats()
+        await shadow.stop()
+    """
+
+    def __init__(
+        self,
+        busy: Callable[[], bool] = lambda: False,
+        max_pending: int = 32,
+        intent_primary: Optional[Callable[[], ContextManager[Any]]] = None,
+        ner_primary: Optional[Callable[[], ContextManager[Any]]] = None,
+    ):
+        """
+        Args:
+            busy: True khi service đang có tải -> không chạy shadow để không tranh CPU
+            max_pending: Số mẫu tối đa đang chờ trong executor
+            intent_primary / ner_primary: Context manager trả model active (ModelRegistry.acquire),
+                để đo primary cùng điều kiện với candidate (None = dùng latency đã trả cho client)
+        """
+        self.busy = busy
+        self.max_pending = max(1, max_pending)
+        self.intent_primary = intent_primary
+        self.ner_primary = ner_primary
+        self.intent_candidate = None
+        self.ner_candidate = None
+        self.versions: Dict[str, Optional[str]] = {}
+        self.sample_rate = 0.0
+        self.started_at: Optional[float] = None
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._candidate_first = False
+        self._reset_stats()
+
+    @property
+    def active(self) -> bool:
+        return self._executor is not None
+
+    def _reset_stats(self):
+        self.sampled_out = 0
+        self.dropped_busy = 0
+        self.dropped_queue_full = 0
+        self.errors = 0
+        self.intent_samples = 0
+        self.intent_agreed = 0
+        self.intent_confusion: Dict[str, Counter] = defaultdict(Counter)
+        # (primary, candidate, served)
+        self.intent_latency: Tuple[Deque[float], Deque[float], Deque[float]] = (
+            deque(maxlen=LATENCY_WINDOW), deque(maxlen=LATENCY_WINDOW), deque(maxlen=LATENCY_WINDOW)
+        )
+        self.ner_samples = 0
+        self.ner_exact_match = 0
+        self.ner_matched_entities = 0
+        self.ner_primary_entities = 0
+        self.ner_candidate_entities = 0
+        self.ner_latency: Tuple[Deque[float], Deque[float], Deque[float]] = (
+            deque(maxlen=LATENCY_WINDOW), deque(maxlen=LATENCY_WINDOW), deque(maxlen=LATENCY_WINDOW)
+        )
+
+    def start(
+        self,
+        intent_candidate: Any,
+        ner_candidate: Any,
+        versions: Dict[str, Optional[str]],
+        sample_rate: float,
+    ):
+        """Bắt đầu shadow với candidate đã load + warm-up (reset thống kê)"""
+        if self.active:
+            raise RuntimeError("Shadow evaluation already running, stop it first")
+        self.intent_candidate = intent_candidate
+        self.ner_candidate = ner_candidate
+        self.versions = versions
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.started_at = time.time()
+        self._reset_stats()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        logger.info(f"Shadow evaluation started for {versions} (sample_rate={self.sample_rate})")
+
+    async def stop(self):
+        """Chờ các mẫu đang chạy xong rồi unload candidate (thống kê vẫn giữ lại)"""
+        executor = self._executor
+        if executor is None:
+            return
+        self._executor = None
+        await asyncio.to_thread(executor.shutdown, True)
+        self.intent_candidate = None
+        self.ner_candidate = None
+        release_memory()
+        logger.info("Shadow evaluation stopped")
+
+    # ---- sampling ---------------------------------------------------------
+
+    def _admit(self) -> bool:
+        """Quyết định lấy mẫu (gọi trên event loop, không block)"""
+        if random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        if self.busy():
+            self.dropped_busy += 1
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped_queue_full += 1
+                return False
+            self._pending += 1
+        return True
+
+    def _submit(self, fn: Callable, *args):
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                self._pending -= 1
+            return
+        executor.submit(self._run, fn, *args)
+
+    def _run(self, fn: Callable, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Shadow evaluation error: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def observe_intent(self, text: str, top_k: int, primary: Dict[str, Any]):
+        if self.intent_candidate is None or not self.active or not self._admit():
+            return
+        self._submit(self._evaluate_intent, text, top_k, dict(primary))
+
+    def observe_ner(self, text: str, primary: Dict[str, Any]):
+        if self.ner_candidate is None or not self.active or not self._admit():
+            return
+        self._submit(self._evaluate_ner, text, list(primary["entities"]), primary["processing_time_ms"])
+
+    # ---- evaluation (shadow thread) ----------------------------------------
+
+    def _timed(
+        self,
+        run: Callable[[Any], Any],
+        candidate_model: Any,
+        primary: Optional[Callable[[], ContextManager[Any]]],
+        served_ms: float,
+    ) -> Tuple[Any, float, float]:
+        """
+        Chạy candidate (và primary nếu có) liền nhau trong shadow thread
+
+        Returns:
+            (kết quả candidate, primary ms, candidate ms); không có primary -> primary ms = served_ms
+        """
+        if primary is None:
+            started = time.perf_counter()
+            result = run(candidate_model)
+            return result, served_ms, (time.perf_counter() - started) * 1000
+
+        with primary() as primary_model:
+            runs = [("primary", primary_model), ("candidate", candidate_model)]
+            # Đảo thứ tự mỗi mẫu để cache / CPU frequency không thiên vị bên chạy sau
+            if self._candidate_first:
+                runs.reverse()
+            self._candidate_first = not self._candidate_first
+            results, timings = {}, {}
+            for role, model in runs:
+                started = time.perf_counter()
+                results[role] = run(model)
+                timings[role] = (time.perf_counter() - started) * 1000
+        return results["candidate"], timings["primary"], timings["candidate"]
+
+    def _evaluate_intent(self, text: str, top_k: int, primary: Dict[str, Any]):
+        candidate_model = self.intent_candidate
+        if candidate_model is None:
+            return
+        # Giống đường production: cascade lexical trước, không đạt ngưỡng mới chạy PhoBERT
+        candidate, primary_ms, candidate_ms = self._timed(
+            lambda model: model.try_cascade(text, top_k) or model.predict_batch([text], [top_k])[0],
+            candidate_model, self.intent_primary, primary["processing_time_ms"]
+        )
+
+        with self._lock:
+            self.intent_samples += 1
+            self.intent_agreed += int(candidate["intent"] == primary["intent"])
+            self.intent_confusion[primary["intent"]][candidate["intent"]] += 1
+            self.intent_latency[0].append(primary_ms)
+            self.intent_latency[1].append(candidate_ms)
+            self.intent_latency[2].append(primary["processing_time_ms"])
+
+    def _evaluate_ner(self, text: str, primary_entities: List[Dict[str, Any]], served_ms: float):
+        candidate_model = self.ner_candidate
+        if candidate_model is None:
+            return
+        candidate_entities, primary_ms, candidate_ms = self._timed(
+            lambda model: model.predict_batch([text])[0]["entities"],
+            candidate_model, self.ner_primary, served_ms
+        )
+
+        primary_keys = _entity_keys(primary_entities)
+        candidate_keys = _entity_keys(candidate_entities)
+        matched = sum((primary_keys & candidate_keys).values())
+        with self._lock:
+            self.ner_samples += 1
+            self.ner_exact_match += int(primary_keys == candidate_keys)
+            self.ner_matched_entities += matched
+            self.ner_primary_entities += sum(primary_keys.values())
+            self.ner_candidate_entities += sum(candidate_keys.values())
+            self.ner_latency[0].append(primary_ms)
+            self.ner_latency[1].append(candidate_ms)
+            self.ner_latency[2].append(served_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            intent_samples = self.intent_samples
+            ner_samples = self.ner_samples
+            return {
+                "active": self.active,
+                "versions": self.versions,
+                "sample_rate": self.sample_rate,
+                "started_at": self.started_at,
+                "pending": self._pending,
+                "sampled_out": self.sampled_out,
+                "dropped_busy": self.dropped_busy,
+                "dropped_queue_full": self.dropped_queue_full,
+                "errors": self.errors,
+                "intent": {
+                    "samples": intent_samples,
+                    "agreement_rate": self.intent_agreed / intent_samples if intent_samples else None,
+                    # primary intent -> {candidate intent: count}
+                    "confusion": {primary: dict(row) for primary, row in self.intent_confusion.items()},
+                    # "forward": primary/candidate chạy lại liền nhau trong shadow thread (cùng điều kiện)
+                    # "served": primary = processing_time_ms đã trả (có chờ batch), lệch về phía candidate
+                    "latency_method": "forward" if self.intent_primary else "served",
+                    "latency": _latency_stats(*self.intent_latency),
+                },
+                "ner": {
+                    "samples": ner_samples,
+                    "exact_match_rate": self.ner_exact_match / ner_samples if ner_samples else None,
+                    # coi primary là "chuẩn": recall = candidate giữ lại được bao nhiêu entity của primary
+                    "entity_recall": (
+                        self.ner_matched_entities / self.ner_primary_entities if self.ner_primary_entities else None
+                    ),
+                    "entity_precision": (
+                        self.ner_matched_entities / self.ner_candidate_entities
+                        if self.ner_candidate_entities else None
+                    ),
+                    "latency_method": "forward" if self.ner_primary else "served",
+                    "latency": _latency_stats(*self.ner_latency),
+                },
+            }
@@ -0,0 +1,24 @@
+"""
+Fixture dùng chung: import `models.*` / `serving.*` như main.py (chạy từ src) và script helpers,
+PhoBERT "tí hon" (scripts/make_tiny_fixture.py) dựng 1 lần cho cả session
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for path in (PROJECT_ROOT / "src", PROJECT_ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture(scope="session")
+def tiny_fixture(tmp_path_factory) -> Path:
+    """Thư mục có phobert/ (tokenizer) và models/{intent_classifier,ner_extractor}/"""
+    from make_tiny_fixture import write_fixture
+
+    output = tmp_path_factory.mktemp("agribot-tiny")
+    write_fixture(output, max_words=1000)
+    return output
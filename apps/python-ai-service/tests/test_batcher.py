@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from models.ner_extractor import NERExtractor
+from serving.admission import DeadlineExceeded
+from serving.batcher import DynamicBatcher
+
+
+async def started(batcher: DynamicBatcher) -> DynamicBatcher:
+    await batcher.start()
+    return batcher
+
+
+def test_results_go_back_to_their_caller():
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        time.sleep(0.01)
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = await started(DynamicBatcher("test", double, max_batch_size=4, max_wait_ms=20))
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [i * 2 for i in range(10)]
+    assert max(sizes) == 4 and sum(sizes) == 10
+    assert stats["batches_total"] == len(sizes) < 10
+
+
+def test_submit_rejects_requests_that_cannot_meet_their_deadline():
+    calls = []
+
+    async def scenario():
+        batcher = await started(DynamicBatcher("test", lambda items: calls.extend(items) or items, max_wait_ms=5))
+        batcher.avg_batch_ms = 500.0  # batch gần đây mất 500ms
+        with pytest.raises(DeadlineExceeded):
+            await batcher.submit("late", deadline=time.monotonic() + 0.1)
+        # Deadline còn dư thì vẫn chạy
+        result = await batcher.submit("ok", deadline=time.monotonic() + 5)
+        await batcher.stop()
+        return result, batcher.expired_total
+
+    result, expired = asyncio.run(scenario())
+    assert result == "ok"
+    assert expired == 1
+    assert calls == ["ok"]
+
+
+def test_stop_fails_running_and_queued_requests():
+    running = threading.Event()
+    release = threading.Event()
+
+    def blocking(items):
+        running.set()
+        release.wait(5)
+        return items
+
+    async def scenario():
+        batcher = await started(DynamicBatcher("test", blocking, max_batch_size=1, max_wait_ms=0))
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+        await asyncio.to_thread(running.wait, 5)
+        stopping = asyncio.create_task(batcher.stop())
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.wait_for(stopping, 5)
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 1)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) and "stopped" in str(result) for result in results)
+
+
+@pytest.fixture(scope="module")
+def ner(tiny_fixture) -> NERExtractor:
+    extractor = NERExtractor(
+        model_name=str(tiny_fixture / "phobert"), model_dir=tiny_fixture / "models" / "ner_extractor"
+    )
+    asyncio.run(extractor.load_model())
+    return extractor
+
+
+def test_ner_offsets_are_per_text_in_a_mixed_length_batch(ner):
+    texts = [
+        "khu A",
+        "giá cà phê hôm nay bao nhiêu",
+        "tưới cà chua ở khu B trong 15 phút rồi bật máy bơm nhà kính 2 vào tuần sau " * 3,
+        "bật máy bơm",
+    ]
+    expected = [ner.predict_batch([text])[0]["entities"] for text in texts]
+
+    async def scenario():
+        batcher = await started(DynamicBatcher("ner", ner.predict_batch, max_batch_size=8, max_wait_ms=20))
+        results = await asyncio.gather(*(batcher.submit(text) for text in texts))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert stats["batches_total"] == 1
+    for text, result, single in zip(texts, results, expected):
+        assert result["entities"] == single
+        assert all(text[e["start"]:e["end"]] == e["raw"] for e in result["entities"])
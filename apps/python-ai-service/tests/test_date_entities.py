@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import pytest
+
+from models.date_resolver import DateResolver
+from models.ner_extractor import NERExtractor
+from verify_date_resolver import generated_forms, legacy_parse
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture(scope="module")
+def ner() -> NERExtractor:
+    # _post_process_entities chỉ cần gazetteer + DateResolver, không cần load PhoBERT
+    extractor = NERExtractor()
+    extractor.date_resolver.clock = lambda: TODAY
+    return extractor
+
+
+@pytest.mark.parametrize("text, raw, date_range", [
+    ("doanh thu quý 2 năm 2024", "quý 2 năm 2024", {"from": "2024-04-01", "to": "2024-06-30"}),
+    ("chi phí tháng 11 năm nay", "tháng 11 năm nay", {"from": "2026-11-01", "to": "2026-11-30"}),
+    ("chi phí tháng 11 năm 2024", "tháng 11 năm 2024", {"from": "2024-11-01", "to": "2024-11-30"}),
+    ("doanh thu tháng 3 năm ngoái", "tháng 3 năm ngoái", {"from": "2025-03-01", "to": "2025-03-31"}),
+    ("doanh thu quý 2", "quý 2", {"from": "2026-04-01", "to": "2026-06-30"}),
+])
+def test_compound_dates_resolve_as_one_entity(ner, text, raw, date_range):
+    dates = [entity for entity in ner._post_process_entities(text, []) if entity["type"] == "date"]
+    assert [(entity["raw"], entity["date_range"]) for entity in dates] == [(raw, date_range)]
+
+
+def test_compound_date_beats_model_fragment(ner):
+    """Model chỉ bắt "quý 2" (span ngắn hơn regex) -> vẫn giữ nguyên cụm "quý 2 năm 2024\""""
+    text = "doanh thu quý 2 năm 2024"
+    start = text.index("quý")
+    model = [{"type": "date", "raw": "quý 2", "start": start, "end": start + 5, "confidence": 0.85}]
+    dates = [entity for entity in ner._post_process_entities(text, model) if entity["type"] == "date"]
+    assert [entity["raw"] for entity in dates] == ["quý 2 năm 2024"]
+    assert dates[0]["date_range"] == {"from": "2024-04-01", "to": "2024-06-30"}
+
+
+# Đầu / cuối tháng, năm nhuận, đầu năm (tháng trước / quý trước lùi sang năm cũ), Chủ nhật
+EDGE_DAYS = [date(2024, 1, 1), date(2024, 2, 29), date(2024, 3, 1), date(2024, 12, 31), date(2025, 1, 5)]
+
+
+@pytest.mark.parametrize("today", EDGE_DAYS + [date(2024, 1, 3) + timedelta(days=37 * i) for i in range(20)])
+def test_resolver_matches_nestjs_parse_date_range(today):
+    """Port của parseDateRange (scripts/verify_date_resolver.py): chỗ NestJS hiểu được phải ra cùng khoảng"""
+    resolver = DateResolver(clock=lambda: today)
+    mismatches = []
+    for text in generated_forms():
+        expected = legacy_parse(text, today)
+        if expected is None:
+            continue
+        expected = {"from": expected[0].isoformat(), "to": expected[1].isoformat()}
+        # 2 lần: lần sau đi qua memo theo ngày
+        for actual in (resolver.resolve(text), resolver.resolve(text)):
+            if actual != expected:
+                mismatches.append((text, actual, expected))
+    assert mismatches == []
@@ -0,0 +1,56 @@
+import pytest
+
+import main
+from serving.admission import AdmissionController
+from serving.degradation import DegradationController
+
+
+@pytest.fixture
+def unbatched(monkeypatch):
+    """Service với BATCHING_ENABLED=false: không có hàng đợi batch"""
+    monkeypatch.setattr(main, "intent_batcher", None)
+    monkeypatch.setattr(main, "ner_batcher", None)
+    monkeypatch.setattr(main, "admission", AdmissionController(max_in_flight=8))
+    monkeypatch.setattr(main, "degradation", DegradationController(slo_ms=300.0, exit_ratio=0.5))
+
+
+def test_degrades_without_batcher_when_in_flight_requests_are_stuck(unbatched):
+    stuck = main.admission.admit()
+    assert not main.check_degraded()
+
+    stuck.admitted_at -= 0.5  # request đầu đã chạy 500ms > SLO
+    new = main.admission.admit()
+    assert main.check_degraded()
+
+    main.admission.release(stuck)
+    assert not main.check_degraded()
+    main.admission.release(new)
+    assert main.admission.oldest_in_flight_s() == 0.0
+    assert main.degradation.transitions_total == 2
+
+
+def test_long_bulk_request_does_not_degrade(unbatched):
+    document = main.admission.admit(bulk=True)
+    document.admitted_at -= 5.0  # /ner/document cả tài liệu, chạy 5s là bình thường
+    main.admission.admit()
+    assert not main.check_degraded()
+    assert main.admission.oldest_in_flight_s() < 0.3
+
+
+def test_in_flight_age_is_ignored_when_batchers_run(unbatched, monkeypatch):
+    class IdleBatcher:
+        queue_depth = 0
+
+        def queue_wait_s(self):
+            return 0.0
+
+    monkeypatch.setattr(main, "intent_batcher", IdleBatcher())
+    slow = main.admission.admit()
+    slow.admitted_at -= 1.0
+    assert not main.check_degraded()
+
+
+@pytest.mark.parametrize("path", ["/ner/extract_batch", "/ner/document"])
+def test_bulk_endpoints_use_bulk_tickets(path):
+    route = next(route for route in main.app.routes if getattr(route, "path", None) == path)
+    assert main.bulk_admission_ticket in [dependency.call for dependency in route.dependant.dependencies]
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import pytest
+
+from models.fast_tokenizer import load_tokenizer
+from models.ner_extractor import NERExtractor
+
+DOCUMENT = "Cà phê robusta ở Đắk Lắk cần tưới nước vào mùa khô, bón phân NPK cho vườn sầu riêng khu A. " * 40
+
+
+def load_ner(tiny_fixture, fast: bool) -> NERExtractor:
+    ner = NERExtractor(model_name=str(tiny_fixture / "phobert"), model_dir=tiny_fixture / "models" / "ner_extractor")
+    asyncio.run(ner.load_model(tokenizer=load_tokenizer(str(tiny_fixture / "phobert"), fast=fast)))
+    return ner
+
+
+@pytest.fixture(scope="module")
+def fast_ner(tiny_fixture) -> NERExtractor:
+    return load_ner(tiny_fixture, fast=True)
+
+
+def test_fast_tokenizer_special_tokens_match_slow(tiny_fixture):
+    fast = load_tokenizer(str(tiny_fixture / "phobert"))
+    slow = load_tokenizer(str(tiny_fixture / "phobert"), fast=False)
+    assert fast.is_fast and not slow.is_fast
+    for pair in ([10, 11], [12]), ([10, 11], None):
+        assert fast.build_inputs_with_special_tokens(*pair) == slow.build_inputs_with_special_tokens(*pair)
+
+
+def test_document_window_matches_sentence_inference(fast_ner):
+    """1 cửa sổ có <s> </s> và nhãn căn đúng token: giống hệt predict_batch (truncate 256) trên cùng câu"""
+    text = DOCUMENT[:200]
+    document = fast_ner.predict_documents([text])[0]
+    assert document["windows"] == 1
+    assert document["entities"] == fast_ner.predict_batch([text])[0]["entities"]
+
+
+def test_document_windows_cover_long_text(fast_ner):
+    result = fast_ner.predict_documents([DOCUMENT], window=64, overlap=16)[0]
+    ids, _ = fast_ner._encode_document(DOCUMENT)
+    assert result["tokens"] == len(ids) > 64
+    assert result["windows"] > 1
+
+
+def test_document_ner_concurrent_with_truncating_batches(fast_ner):
+    """Document mode (không truncate) chạy song song với batch (truncation=True) trên cùng tokenizer"""
+    errors = []
+
+    def run(fn, repeat):
+        try:
+            for _ in range(repeat):
+                fn()
+        except Exception as e:  # noqa: BLE001 - gom lỗi của thread để assert
+            errors.append(repr(e))
+
+    def batch():
+        fast_ner.tokenizer(["bật máy bơm khu A", "giá cà phê tháng này"], truncation=True, max_length=256)
+
+    def document():
+        fast_ner._encode_document(DOCUMENT * 5)
+
+    threads = [
+        threading.Thread(target=run, args=(batch, 2000)),
+        threading.Thread(target=run, args=(batch, 2000)),
+        threading.Thread(target=run, args=(document, 100)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,74 @@
+import itertools
+import random
+
+import pytest
+
+from models.crop_linker import CropLinker
+from models.entity_resolution import EntitySpans, prefer_covering_spans, resolve_entities, schedule_intervals
+from models.ner_extractor import NERExtractor
+
+
+def entity(entity_type, text, raw, confidence):
+    start = text.index(raw)
+    return {"type": entity_type, "raw": raw, "start": start, "end": start + len(raw), "confidence": confidence}
+
+
+def brute_force_best(starts, ends, weights):
+    return max(
+        sum(weights[i] for i in subset)
+        for size in range(len(starts) + 1)
+        for subset in itertools.combinations(range(len(starts)), size)
+        if all(ends[a] <= starts[b] or ends[b] <= starts[a] for a, b in itertools.combinations(subset, 2))
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_schedule_intervals_is_optimal(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        count = rng.randint(0, 8)
+        starts = [rng.randint(0, 20) for _ in range(count)]
+        ends = [start + rng.randint(1, 8) for start in starts]
+        weights = [rng.random() for _ in range(count)]
+        chosen = schedule_intervals(starts, ends, weights)
+        spans = sorted((starts[i], ends[i]) for i in chosen)
+        assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+        assert sum(weights[i] for i in chosen) == pytest.approx(brute_force_best(starts, ends, weights))
+
+
+def test_covering_span_beats_adjacent_fragments():
+    """Model phủ cả cụm (0.85) vs 2 mảnh regex liền nhau (0.95): tổng trọng số mảnh lớn hơn nhưng span phủ thắng"""
+    text = "doanh thu quý 2 năm nay"
+    entities = [
+        entity("date", text, "quý 2 năm nay", 0.85),
+        entity("date", text, "quý 2", 0.95),
+        entity("date", text, "năm nay", 0.95),
+    ]
+    assert [e["raw"] for e in resolve_entities(entities, text)] == ["quý 2 năm nay"]
+
+
+def test_fragments_of_other_type_or_with_gap_are_not_covered():
+    text = "bật bơm khu A rồi tắt đèn"
+    cover = entity("device_name", text, "bơm khu A rồi tắt đèn", 0.5)
+    fragments = [entity("device_name", text, "bơm", 0.95), entity("device_name", text, "tắt đèn", 0.95)]
+    spans = EntitySpans([cover] + fragments)
+    # Giữa 2 mảnh còn "khu A rồi" -> không nối liền, không tăng trọng số
+    assert prefer_covering_spans(spans, text) == 0
+    area = [entity("farm_area", text, "khu A", 0.95), entity("device_name", text, "rồi tắt đèn", 0.95)]
+    assert prefer_covering_spans(EntitySpans([cover, fragments[0]] + area), text) == 0
+
+
+def test_post_process_finalizes_only_kept_entities():
+    """normalize / date_range / crop_id chạy trong cùng lượt chọn, entity bị loại không bị đụng tới"""
+    linker = CropLinker()
+    linker.update([{"id": "crop-1", "name": "cà chua"}])
+    extractor = NERExtractor(crop_linker=linker)
+    text = "tưới cà chua hôm nay"
+    dropped = entity("crop_name", text, "cà", 0.5)
+    result = extractor._post_process_entities(text, [dropped])
+
+    by_raw = {e["raw"]: e for e in result}
+    assert by_raw["cà chua"]["crop_id"] == "crop-1"
+    assert by_raw["cà chua"]["value"] == "cà chua"
+    assert by_raw["hôm nay"]["date_range"] is not None
+    assert "value" not in dropped
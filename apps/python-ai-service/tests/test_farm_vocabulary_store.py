@@ -0,0 +1,29 @@
+import threading
+
+from serving.farm_vocabulary import FarmVocabularyStore
+
+AREAS = [{"id": "a1", "name": "Khu A"}, {"id": "a2", "name": "Nhà kính 2"}]
+DEVICES = [{"id": "d1", "name": "Máy bơm 1"}]
+
+
+def test_concurrent_puts_of_one_farm_do_not_collide(tmp_path):
+    # Mỗi store giả lập 1 worker, cùng ghi vào 1 thư mục
+    stores = [FarmVocabularyStore(tmp_path) for _ in range(4)]
+    errors = []
+
+    def push(store):
+        try:
+            for _ in range(50):
+                store.put("farm-1", AREAS, DEVICES)
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    threads = [threading.Thread(target=push, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [path.name for path in tmp_path.iterdir()] == ["farm-1.json"]
+    assert FarmVocabularyStore(tmp_path).get("farm-1") is not None
@@ -0,0 +1,29 @@
+"""FastPhobertTokenizer so với PhoBERT slow tokenizer (thay cho scripts/verify_fast_tokenizer.py)"""
+
+import pytest
+from transformers import AutoTokenizer
+
+from bench_utils import DATA_DIR, load_texts
+from models.fast_tokenizer import build_fast_phobert_tokenizer, mismatched_texts
+from verify_fast_tokenizer import offset_errors
+
+EDGE_TEXTS = ["", "   ", "Cà_chua  ở KHU A!!", "giá lúa 7.500đ/kg (tăng 2%)", "bật bơm\tkhu\nB", "😀 tưới cây"]
+
+
+@pytest.fixture(scope="module")
+def tokenizers(tiny_fixture):
+    slow = AutoTokenizer.from_pretrained(tiny_fixture / "phobert")
+    return slow, build_fast_phobert_tokenizer(slow)
+
+
+@pytest.mark.parametrize("csv_name", sorted(path.name for path in DATA_DIR.glob("*.csv")))
+def test_fast_tokenizer_matches_slow_on_training_texts(tokenizers, csv_name):
+    slow, fast = tokenizers
+    texts = load_texts([csv_name], limit=1000)
+    assert mismatched_texts(slow, fast, texts) == []
+    assert offset_errors(fast, texts) == 0
+
+
+def test_fast_tokenizer_matches_slow_on_edge_texts(tokenizers):
+    slow, fast = tokenizers
+    assert mismatched_texts(slow, fast, EDGE_TEXTS) == []
@@ -0,0 +1,39 @@
+"""Gazetteer (trie + regex gộp) so với vòng regex cũ của _extract_rule_based_entities"""
+
+import pytest
+
+from bench_utils import INTENT_CSV_FILES, NER_CSV_FILES, load_texts
+from benchmark_gazetteer import legacy_rule_entities, resolved
+from build_gazetteer import LEGACY_PHRASES
+from models.gazetteer import LEGACY_PATTERN_GROUPS, Gazetteer
+
+# Ranh giới từ / khoảng trắng / hoa thường mà regex cũ xử lý
+EDGE_TEXTS = [
+    "Giá  cà   phê hôm nay",
+    "cà phêsữa không phải cây trồng",
+    "TƯỚI máy bơm khu A trong 15 phút",
+    "bật đèn nhà kính 2, tắt quạt khu b",
+    "tuần trước và 3 ngày tới",
+    "doanh thu quý 3 năm 2025 so với tháng 5 năm nay",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return list(dict.fromkeys(load_texts(INTENT_CSV_FILES + NER_CSV_FILES, 2000))) + EDGE_TEXTS
+
+
+def test_gazetteer_with_legacy_phrases_matches_legacy_regexes(texts):
+    gazetteer = Gazetteer(LEGACY_PHRASES, LEGACY_PATTERN_GROUPS)
+    expected = resolved(legacy_rule_entities, texts)
+    actual = resolved(gazetteer.find, texts)
+    differing = [(text, a, b) for text, a, b in zip(texts, actual, expected) if a != b]
+    assert differing == []
+
+
+def test_shipped_gazetteer_finds_each_entity_type_once():
+    entities = Gazetteer.load().find("tưới cà phê bằng máy bơm khu A")
+    assert [(e["type"], e["raw"]) for e in entities] == [
+        ("crop_name", "cà phê"), ("device_name", "máy bơm"), ("farm_area", "khu A"),
+    ]
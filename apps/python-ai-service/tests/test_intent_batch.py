@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+import torch
+from pydantic import ValidationError
+
+from models.intent_classifier import IntentClassifier
+
+TEXTS = ["bật máy bơm khu A", "giá cà phê hôm nay"]
+
+
+@pytest.fixture(scope="module")
+def classifier(tiny_fixture) -> IntentClassifier:
+    intent = IntentClassifier(
+        model_name=str(tiny_fixture / "phobert"), model_dir=tiny_fixture / "models" / "intent_classifier"
+    )
+    asyncio.run(intent.load_model())
+    return intent
+
+
+def test_bad_row_does_not_degrade_the_rest_of_the_batch(classifier, monkeypatch):
+    # Model tí hon có weight ngẫu nhiên (confidence thấp -> rule-based), cho forward trả xác suất chắc chắn
+    confident = torch.zeros(len(classifier.intent_labels))
+    confident[0] = 0.9
+    confident[1:] = 0.1 / (len(confident) - 1)
+    monkeypatch.setattr(
+        classifier, "_predict_probabilities", lambda inputs: confident.repeat(len(inputs["input_ids"]), 1)
+    )
+
+    results = classifier.predict_batch(TEXTS, [3, 0])
+    assert results[0]["intent"] == classifier.intent_labels[0]
+    assert results[0]["confidence"] == pytest.approx(0.9)
+    assert len(results[0]["all_intents"]) == 3
+    # Câu lỗi rơi về rule-based, không làm hỏng câu còn lại
+    assert results[1]["intent"] == classifier.classify_rules_only(TEXTS[1])["intent"]
+
+
+def test_request_models_reject_out_of_range_top_k():
+    from main import CombinedRequest, IntentRequest
+
+    for model in (IntentRequest, CombinedRequest):
+        assert model(text="x").top_k == 3
+        for top_k in (0, -1, 6):
+            with pytest.raises(ValidationError):
+                model(text="x", top_k=top_k)
+
+
+def test_single_request_path_does_not_dump_to_stdout(classifier, capsys):
+    asyncio.run(classifier.classify(TEXTS[0], top_k=3))
+    assert capsys.readouterr().out == ""
+
+
+@pytest.fixture(scope="module")
+def lexical():
+    from bench_utils import INTENT_CSV_FILES, load_labeled_texts
+    from models.lexical_intent import LexicalIntentClassifier
+
+    rows = load_labeled_texts(INTENT_CSV_FILES[:1], limit=600)
+    return LexicalIntentClassifier().fit([text for text, _ in rows], [label for _, label in rows])
+
+
+@pytest.fixture
+def cascade(classifier, lexical, monkeypatch):
+    monkeypatch.setattr(classifier, "lexical", lexical)
+    monkeypatch.setattr(classifier, "cascade_hits", 0)
+    monkeypatch.setattr(classifier, "cascade_escalations", 0)
+    return classifier
+
+
+def test_cascade_answers_confident_texts_and_escalates_the_rest(cascade, lexical, monkeypatch):
+    text = "bật máy bơm khu A"
+    intent, confidence, _ = lexical.predict(text)
+
+    monkeypatch.setattr(cascade, "cascade_threshold", confidence)
+    hit = cascade.try_cascade(text, 2)
+    assert hit["intent"] == intent
+    assert hit["confidence"] == pytest.approx(confidence)
+    assert len(hit["all_intents"]) == 2
+
+    monkeypatch.setattr(cascade, "cascade_threshold", confidence + 1e-6)
+    assert cascade.try_cascade(text, 2) is None
+
+    stats = cascade.cascade_stats()
+    assert stats["enabled"] is True
+    assert (stats["hits_total"], stats["escalations_total"]) == (1, 1)
+    assert stats["escalation_rate"] == 0.5
+
+
+def test_cascade_runs_off_the_event_loop(cascade, lexical, monkeypatch):
+    threads = []
+    predict = lexical.predict
+
+    def recording(text, top_k=3):
+        threads.append(threading.current_thread())
+        return predict(text, top_k)
+
+    monkeypatch.setattr(lexical, "predict", recording)
+    monkeypatch.setattr(cascade, "cascade_threshold", 0.01)
+    result = asyncio.run(cascade.try_cascade_async("giá cà phê hôm nay", 3))
+    assert result is not None
+    assert threads and threads[0] is not threading.main_thread()
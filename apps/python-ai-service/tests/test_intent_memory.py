@@ -0,0 +1,105 @@
+"""Câu admin đã sửa intent: trộn boost / override vào xác suất model và vòng POST -> file -> worker khác"""
+
+import asyncio
+
+import numpy as np
+import pytest
+import torch
+
+from models.bucketing import tokenize_bucketed
+from models.intent_classifier import IntentClassifier
+from models.intent_memory import IntentMemory
+from serving.intent_memory import IntentMemoryStore
+
+DIM = 4
+
+
+@pytest.fixture(scope="module")
+def classifier(tiny_fixture) -> IntentClassifier:
+    intent = IntentClassifier(
+        model_name=str(tiny_fixture / "phobert"),
+        model_dir=tiny_fixture / "models" / "intent_classifier",
+        memory=IntentMemory(),
+        memory_override_threshold=0.95,
+        memory_boost_threshold=0.85,
+    )
+    asyncio.run(intent.load_model())
+    return intent
+
+
+def near(similarity: float, axis: int) -> np.ndarray:
+    """Vector có cosine = similarity với query e0"""
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[0] = similarity
+    vector[axis] = np.sqrt(1 - similarity ** 2)
+    return vector
+
+
+def blend(classifier, monkeypatch, examples):
+    memory = IntentMemory()
+    memory.add(
+        [f"câu {row}" for row in range(len(examples))],
+        [intent for intent, _ in examples],
+        np.stack([near(similarity, row + 1) for row, (_, similarity) in enumerate(examples)]),
+        classifier.encoder_id,
+    )
+    monkeypatch.setattr(classifier, "memory", memory)
+    probabilities = torch.full((1, len(classifier.intent_labels)), 1 / len(classifier.intent_labels))
+    query = torch.zeros(1, DIM)
+    query[0, 0] = 1.0
+    return probabilities[0].numpy(), classifier._apply_memory(probabilities, query)[0].numpy()
+
+
+def one_hot(classifier, intent: str) -> np.ndarray:
+    vector = np.zeros(len(classifier.intent_labels), dtype=np.float32)
+    vector[classifier.intent_labels.index(intent)] = 1.0
+    return vector
+
+
+def test_boost_blends_by_similarity(classifier, monkeypatch):
+    target = classifier.intent_labels[1]
+    model, blended = blend(classifier, monkeypatch, [(target, 0.90)])
+    # 0.90 nằm giữa boost 0.85 và override 0.95 -> weight 0.5
+    np.testing.assert_allclose(blended, 0.5 * model + 0.5 * one_hot(classifier, target), atol=1e-5)
+
+
+def test_override_takes_the_votes(classifier, monkeypatch):
+    target = classifier.intent_labels[1]
+    _, blended = blend(classifier, monkeypatch, [(target, 0.97)])
+    np.testing.assert_allclose(blended, one_hot(classifier, target), atol=1e-5)
+
+
+def test_neighbours_below_boost_leave_the_model_alone(classifier, monkeypatch):
+    model, blended = blend(classifier, monkeypatch, [(classifier.intent_labels[1], 0.80)])
+    np.testing.assert_allclose(blended, model)
+    assert classifier.memory.vector_hits == 0
+
+
+def test_weight_ignores_neighbours_that_did_not_vote(classifier, monkeypatch):
+    target = classifier.intent_labels[1]
+    # Láng giềng gần nhất có intent model không biết: không bỏ phiếu nên không được kéo weight lên override
+    model, blended = blend(classifier, monkeypatch, [("intent_da_xoa", 0.99), (target, 0.90)])
+    np.testing.assert_allclose(blended, 0.5 * model + 0.5 * one_hot(classifier, target), atol=1e-5)
+
+
+def test_correction_round_trip(classifier, monkeypatch, tmp_path):
+    text = "tưới cây khu B lúc 6 giờ sáng"
+    corrected = classifier.intent_labels[2]
+    writer = IntentMemoryStore(tmp_path / "intent_memory.npz")
+    stats = writer.add([{"text": text, "intent": corrected}], classifier)
+    assert stats["added"] == 1 and stats["vectors"] == 1
+
+    # Worker khác đọc lại file trong vòng sync
+    reader = IntentMemoryStore(tmp_path / "intent_memory.npz")
+    assert reader.refresh()
+    assert reader.memory.has_vectors(classifier.encoder_id)
+    monkeypatch.setattr(classifier, "memory", reader.memory)
+
+    # Trùng sau chuẩn hoá -> trả luôn intent đã sửa
+    result = asyncio.run(classifier.classify(f"  {text.upper()}!", top_k=3))
+    assert (result["intent"], result["confidence"]) == (corrected, 1.0)
+
+    # Đường vector: chính câu đó có cosine 1 -> override
+    _, inputs, _ = tokenize_bucketed(classifier.tokenizer, [text], buckets=classifier.length_buckets)[0]
+    probabilities = classifier._predict_probabilities(inputs)[0].numpy()
+    np.testing.assert_allclose(probabilities, one_hot(classifier, corrected), atol=1e-4)
@@ -0,0 +1,23 @@
+import asyncio
+
+from models.fast_tokenizer import FastPhobertTokenizer, load_tokenizer
+from models.intent_classifier import IntentClassifier
+from models.ner_extractor import NERExtractor
+
+
+def test_load_tokenizer_without_check_texts(tiny_fixture):
+    assert isinstance(load_tokenizer(str(tiny_fixture / "phobert")), FastPhobertTokenizer)
+    assert isinstance(load_tokenizer(str(tiny_fixture / "phobert"), check_texts=[]), FastPhobertTokenizer)
+
+
+def test_models_load_without_shared_tokenizer(tiny_fixture):
+    """Script (distill / train_early_exit / compare_intent_engines...) load model không qua main.py"""
+    model_name = str(tiny_fixture / "phobert")
+    intent = IntentClassifier(model_name=model_name, model_dir=tiny_fixture / "models" / "intent_classifier")
+    ner = NERExtractor(model_name=model_name, model_dir=tiny_fixture / "models" / "ner_extractor")
+    asyncio.run(intent.load_model())
+    asyncio.run(ner.load_model())
+
+    assert intent.model is not None and ner.model is not None
+    assert intent.predict_batch(["bật máy bơm khu A"], [3])[0]["intent"] in intent.intent_labels
+    assert "entities" in ner.predict_batch(["giá cà phê hôm nay"])[0]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from models.ner_extractor import NERExtractor
+
+TEXTS = ["giá cà phê hôm nay", "tưới khu A trong 15 phút", "bật máy bơm khu B"]
+
+
+@pytest.fixture(scope="module")
+def ner(tiny_fixture) -> NERExtractor:
+    extractor = NERExtractor(
+        model_name=str(tiny_fixture / "phobert"), model_dir=tiny_fixture / "models" / "ner_extractor"
+    )
+    asyncio.run(extractor.load_model())
+    return extractor
+
+
+def test_bad_row_does_not_fail_the_rest_of_the_batch(ner, monkeypatch):
+    expected = ner.predict_batch(TEXTS)
+    post_process = ner._post_process_entities
+    calls = []
+
+    def flaky(text, entities):
+        # Lần đầu gặp câu 2 (sau model) lỗi, lần fallback regex chạy bình thường
+        calls.append(text)
+        if text == TEXTS[1] and calls.count(text) == 1:
+            raise ValueError("bad row")
+        return post_process(text, entities)
+
+    monkeypatch.setattr(ner, "_post_process_entities", flaky)
+    results = ner.predict_batch(TEXTS)
+    assert results[0]["entities"] == expected[0]["entities"]
+    assert results[2]["entities"] == expected[2]["entities"]
+    assert results[1]["entities"] == post_process(TEXTS[1], [])
+
+
+def test_forward_error_falls_back_to_rules(ner, monkeypatch):
+    def broken(inputs):
+        raise RuntimeError("engine down")
+
+    monkeypatch.setattr(ner, "engine", broken)
+    results = ner.predict_batch(TEXTS)
+    assert [r["entities"] for r in results] == [ner.extract_rules_only(text)["entities"] for text in TEXTS]
+
+
+def test_single_request_path_does_not_dump_to_stdout(ner, capsys):
+    result = asyncio.run(ner.extract(TEXTS[0]))
+    assert result["entities"] == ner.predict_batch([TEXTS[0]])[0]["entities"]
+    assert capsys.readouterr().out == ""
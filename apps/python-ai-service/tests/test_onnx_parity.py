@@ -0,0 +1,72 @@
+"""PyTorch vs ONNX (scripts/export_onnx.py) trên fixture tí hon, thay cho scripts/check_onnx_parity.py"""
+
+import asyncio
+import shutil
+
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+
+from export_onnx import export_task  # noqa: E402
+from models.engines import ENGINE_ONNX, ENGINE_ONNX_INT8, OnnxEngine  # noqa: E402
+from models.intent_classifier import IntentClassifier  # noqa: E402
+from models.ner_extractor import NERExtractor  # noqa: E402
+
+TEXTS = [
+    "bật máy bơm ở khu A trong 10 phút",
+    "giá cà phê hôm nay bao nhiêu",
+    "độ ẩm đất khu nhà kính 2 thế nào",
+    "cách bón phân cho cây lúa",
+]
+
+
+@pytest.fixture(scope="module")
+def exported(tiny_fixture, tmp_path_factory):
+    """Bản sao fixture có onnx/model.onnx + model.int8.onnx cho cả intent và NER"""
+    output = tmp_path_factory.mktemp("agribot-onnx")
+    shutil.copytree(tiny_fixture, output, dirs_exist_ok=True)
+    classifier = IntentClassifier(model_name=str(output / "phobert"), model_dir=output / "models" / "intent_classifier")
+    asyncio.run(classifier.load_model())
+    for task in ("intent", "ner"):
+        export_task(task, classifier.tokenizer, opset=14, quantize=True, models_dir=output / "models")
+    return output
+
+
+def load(model_class, exported, dir_name, engine):
+    model = model_class(
+        model_name=str(exported / "phobert"), model_dir=exported / "models" / dir_name, engine=engine
+    )
+    asyncio.run(model.load_model())
+    return model
+
+
+@pytest.mark.parametrize("model_class,dir_name", [
+    (IntentClassifier, "intent_classifier"), (NERExtractor, "ner_extractor"),
+])
+def test_onnx_fp32_logits_match_torch(exported, model_class, dir_name):
+    model = load(model_class, exported, dir_name, "torch")
+    onnx_engine = OnnxEngine.from_model_dir(model.model_dir, ENGINE_ONNX)
+    inputs = model.tokenizer(TEXTS, return_tensors="pt", padding=True)
+    with torch.inference_mode():
+        expected = model.engine(inputs).float()
+    actual = onnx_engine(inputs)
+    assert actual.shape == expected.shape
+    torch.testing.assert_close(actual, expected, atol=1e-4, rtol=1e-4)
+
+
+@pytest.mark.parametrize("engine", [ENGINE_ONNX, ENGINE_ONNX_INT8])
+def test_intent_predictions_through_onnx_engine(exported, engine):
+    reference = load(IntentClassifier, exported, "intent_classifier", "torch").predict_batch(TEXTS, [3] * len(TEXTS))
+    results = load(IntentClassifier, exported, "intent_classifier", engine).predict_batch(TEXTS, [3] * len(TEXTS))
+    assert [len(r["all_intents"]) for r in results] == [len(r["all_intents"]) for r in reference]
+    # Weight ngẫu nhiên -> logits sát nhau, int8 chỉ kiểm tra chạy được; fp32 phải giống hệt torch
+    if engine == ENGINE_ONNX:
+        assert [r["intent"] for r in results] == [r["intent"] for r in reference]
+        assert [r["confidence"] for r in results] == pytest.approx([r["confidence"] for r in reference], abs=1e-4)
+
+
+def test_ner_labels_through_onnx_engine(exported):
+    reference = load(NERExtractor, exported, "ner_extractor", "torch").predict_batch(TEXTS)
+    results = load(NERExtractor, exported, "ner_extractor", ENGINE_ONNX).predict_batch(TEXTS)
+    assert [r["entities"] for r in results] == [r["entities"] for r in reference]
@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+import pytest
+
+from serving.registry import BASE_VERSION, ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    (tmp_path / "intent_classifier").mkdir()
+    (tmp_path / "versions" / "intent_classifier" / "v2").mkdir(parents=True)
+    calls = []
+
+    async def loader(model_dir):
+        calls.append(model_dir.name)
+        if (model_dir / "broken").exists():
+            raise RuntimeError("corrupt weights")
+        return f"model:{model_dir.name}"
+
+    registry = ModelRegistry("intent_classifier", tmp_path, loader)
+    registry.set_active(BASE_VERSION, "model:base")
+    registry.calls = calls
+    return registry
+
+
+def touch_later(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_sync_does_not_retry_a_failed_version_until_it_changes(registry):
+    version_dir = registry.version_dir("v2")
+    (version_dir / "broken").touch()
+    registry.persist_version("v2")
+
+    for _ in range(3):
+        asyncio.run(registry.sync_active())
+    assert registry.calls == ["v2"]
+    assert registry.active_version == BASE_VERSION
+    assert registry.stats()["sync_skipped_version"] == "v2"
+
+    # Sửa lại thư mục version -> mtime đổi -> thử lại
+    (version_dir / "broken").unlink()
+    touch_later(version_dir)
+    asyncio.run(registry.sync_active())
+    assert registry.calls == ["v2", "v2"]
+    assert registry.active_version == "v2"
+    assert registry.stats()["sync_skipped_version"] is None
+
+
+def test_sync_retries_when_active_points_elsewhere(registry):
+    registry.persist_version("missing")
+    asyncio.run(registry.sync_active())
+    asyncio.run(registry.sync_active())
+    assert registry.stats()["sync_skipped_version"] == "missing"
+
+    registry.persist_version("v2")
+    asyncio.run(registry.sync_active())
+    assert registry.active_version == "v2"
@@ -0,0 +1,32 @@
+"""RestartPolicy của serve.py: backoff khi worker chết liên tục và giới hạn số lần restart"""
+
+from serve import RestartPolicy
+
+
+def make_policy(**overrides):
+    options = dict(backoff_s=1.0, backoff_max_s=8.0, max_restarts=10, window_s=60.0)
+    options.update(overrides)
+    return RestartPolicy(**options)
+
+
+def test_backoff_doubles_per_worker_and_is_capped():
+    policy = make_policy()
+    delays = [policy.on_exit(0, uptime_s=0.1, now=float(i)) for i in range(5)]
+    assert delays == [1.0, 2.0, 4.0, 8.0, 8.0]
+    # Worker khác có backoff riêng
+    assert policy.on_exit(1, uptime_s=0.1, now=5.0) == 1.0
+
+
+def test_stable_worker_resets_backoff():
+    policy = make_policy()
+    assert policy.on_exit(0, uptime_s=0.1, now=0.0) == 1.0
+    assert policy.on_exit(0, uptime_s=0.1, now=1.0) == 2.0
+    assert policy.on_exit(0, uptime_s=120.0, now=200.0) == 1.0
+
+
+def test_too_many_restarts_in_window_gives_up():
+    policy = make_policy(max_restarts=3, window_s=10.0)
+    assert all(policy.on_exit(worker_id, uptime_s=0.1, now=1.0) is not None for worker_id in range(3))
+    assert policy.on_exit(3, uptime_s=0.1, now=2.0) is None
+    # Các lần restart cũ đã ra khỏi window -> được restart tiếp
+    assert policy.on_exit(3, uptime_s=0.1, now=12.0) is not None
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from serving.shadow import ShadowEvaluator
+
+
+class SleepyIntent:
+    def __init__(self, intent: str, forward_s: float):
+        self.intent = intent
+        self.forward_s = forward_s
+
+    def try_cascade(self, text, top_k):
+        return None
+
+    def predict_batch(self, texts, top_ks):
+        time.sleep(self.forward_s)
+        return [{"intent": self.intent} for _ in texts]
+
+
+def evaluate(shadow: ShadowEvaluator, samples: int):
+    shadow.start(SleepyIntent("device_control", 0.002), None, {"intent_classifier": "v2"}, 1.0)
+    for _ in range(samples):
+        # Client thấy 200ms (chờ batch), forward thật chỉ ~2ms ở cả 2 version
+        shadow.observe_intent("bật máy bơm", 3, {"intent": "device_control", "processing_time_ms": 200.0})
+    asyncio.run(shadow.stop())
+    return shadow.stats()["intent"]
+
+
+def test_latency_compares_forward_time_of_both_versions():
+    primary = SleepyIntent("device_control", 0.002)
+
+    @contextmanager
+    def acquire():
+        yield primary
+
+    report = evaluate(ShadowEvaluator(intent_primary=acquire), samples=6)
+    assert report["samples"] == 6
+    assert report["agreement_rate"] == 1.0
+    assert report["latency_method"] == "forward"
+    latency = report["latency"]
+    assert latency["primary_p50_ms"] < 50
+    assert latency["delta_p50_ms"] == pytest.approx(0, abs=20)
+    assert latency["served_p50_ms"] == 200.0
+
+
+def test_without_primary_falls_back_to_served_latency():
+    report = evaluate(ShadowEvaluator(), samples=2)
+    assert report["latency_method"] == "served"
+    assert report["latency"]["primary_p50_ms"] == 200.0
@@ -0,0 +1,44 @@
+"""Bảng surface + align_tokens (models/token_alignment.py) so với decode + find từng token cũ"""
+
+import random
+
+import pytest
+from transformers import AutoTokenizer
+
+from bench_utils import NER_CSV_FILES, load_texts
+from models.ner_extractor import NERExtractor
+from models.token_alignment import build_surface_table
+from verify_token_alignment import legacy_entities, random_predictions, table_mismatches, variants
+
+
+@pytest.fixture(scope="module")
+def extractor(tiny_fixture) -> NERExtractor:
+    # Đường không có offset mapping: PhoBERT slow tokenizer
+    tokenizer = AutoTokenizer.from_pretrained(tiny_fixture / "phobert", use_fast=False)
+    extractor = NERExtractor(model_name=str(tiny_fixture / "phobert"))
+    extractor.tokenizer = tokenizer
+    extractor.surface_table = build_surface_table(tokenizer)
+    return extractor
+
+
+def test_surface_table_matches_decode_for_every_id(extractor):
+    assert table_mismatches(extractor.tokenizer, extractor.surface_table) == []
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_entities_match_legacy_alignment_for_random_labels(extractor, seed):
+    rng = random.Random(seed)
+    texts = load_texts(NER_CSV_FILES)
+    texts = rng.sample(texts, 200) + ["Cà_chua ở khu A", "  bật   máy bơm  ", "máy bơm@@ khu"]
+    labels = extractor.entity_labels
+    mismatches = []
+    for text in texts:
+        for variant in variants(text):
+            input_ids = extractor.tokenizer(variant, truncation=True, max_length=256)["input_ids"]
+            for _ in range(3):
+                predictions = random_predictions(rng, len(input_ids), len(labels))
+                expected = legacy_entities(extractor.tokenizer, labels, variant, predictions, input_ids)
+                actual = extractor._convert_predictions_without_offsets(variant, predictions, input_ids)
+                if actual != expected:
+                    mismatches.append((variant, predictions))
+    assert mismatches == []
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from models.fast_tokenizer import load_tokenizer
+from models.token_cache import TokenizationCache, encode_texts
+
+
+class GatedTokenizer:
+    """Tokenizer thật, ghi lại các lần gọi; lần gọi đầu có thể dừng chờ (và lỗi) để dựng race giữa 2 thread"""
+
+    def __init__(self, tokenizer, gate: bool = False, fail: bool = False):
+        self.tokenizer = tokenizer
+        self.calls = []
+        self.gate = gate
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if self.gate and len(self.calls) == 1:
+            self.started.set()
+            assert self.release.wait(5)
+            if self.fail:
+                raise RuntimeError("tokenizer crashed")
+        return self.tokenizer(texts, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def fast_tokenizer(tiny_fixture):
+    return load_tokenizer(str(tiny_fixture / "phobert"))
+
+
+def same(actual, expected):
+    return actual[0] == expected[0] and np.array_equal(actual[1], expected[1])
+
+
+def wait_for_waiter(cache, count=1, timeout=5.0):
+    # Chỉ thả owner khi thread kia đã đăng ký chờ trên entry đang tokenize
+    deadline = time.monotonic() + timeout
+    while cache.stats()["coalesced"] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def run_in_thread(fn, *args):
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = fn(*args)
+        except Exception as e:  # noqa: BLE001
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def test_concurrent_threads_coalesce_on_the_text_in_flight(fast_tokenizer):
+    tokenizer = GatedTokenizer(fast_tokenizer, gate=True)
+    cache = TokenizationCache()
+    owner, owner_out = run_in_thread(cache.encode, tokenizer, ["bật máy bơm", "khu A"])
+    assert tokenizer.started.wait(5)
+    # "bật máy bơm" đang được thread kia tokenize -> chờ; "khu B" là miss của thread này
+    waiter, waiter_out = run_in_thread(cache.encode, tokenizer, ["bật máy bơm", "khu B"])
+    wait_for_waiter(cache)
+    tokenizer.release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    expected = encode_texts(fast_tokenizer, ["bật máy bơm", "khu A", "khu B"], 256, return_offsets=True)
+    assert same(owner_out["result"][0], expected[0]) and same(owner_out["result"][1], expected[1])
+    assert waiter_out["result"][0] is owner_out["result"][0]
+    assert same(waiter_out["result"][1], expected[2])
+    assert tokenizer.calls == [["bật máy bơm", "khu A"], ["khu B"]]
+
+    cache.encode(tokenizer, ["khu A"])
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (3, 1, 1)
+    assert stats["entries"] == 3
+
+
+def test_duplicate_texts_in_one_batch_are_tokenized_once(fast_tokenizer):
+    tokenizer = GatedTokenizer(fast_tokenizer)
+    cache = TokenizationCache()
+    results = cache.encode(tokenizer, ["giá lúa", "khu A", "giá lúa", "giá lúa"])
+    assert tokenizer.calls == [["giá lúa", "khu A"]]
+    assert results[0] is results[2] is results[3]
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["coalesced"]) == (2, 2, 0)
+
+
+def test_lru_evicts_the_least_recently_used_entry(fast_tokenizer):
+    tokenizer = GatedTokenizer(fast_tokenizer)
+    cache = TokenizationCache(max_entries=2)
+    for text in ("a", "b", "a", "c"):  # "a" dùng lại -> "b" cũ nhất khi thêm "c"
+        cache.encode(tokenizer, [text])
+    assert cache.stats()["entries"] == 2
+
+    tokenizer.calls.clear()
+    cache.encode(tokenizer, ["a"])
+    cache.encode(tokenizer, ["c"])
+    assert tokenizer.calls == []
+    cache.encode(tokenizer, ["b"])
+    assert tokenizer.calls == [["b"]]
+
+
+def test_waiters_fall_back_when_the_owner_fails(fast_tokenizer):
+    tokenizer = GatedTokenizer(fast_tokenizer, gate=True, fail=True)
+    cache = TokenizationCache()
+    owner, owner_out = run_in_thread(cache.encode, tokenizer, ["tưới cây"])
+    assert tokenizer.started.wait(5)
+    waiter, waiter_out = run_in_thread(cache.encode, tokenizer, ["tưới cây"])
+    wait_for_waiter(cache)
+    tokenizer.release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert not waiter.is_alive()
+
+    assert isinstance(owner_out["error"], RuntimeError)
+    expected = encode_texts(fast_tokenizer, ["tưới cây"], 256, return_offsets=True)[0]
+    assert same(waiter_out["result"][0], expected)
+    # Không còn entry "đang tokenize" treo lại: lần sau là miss bình thường
+    assert cache.stats()["entries"] == 0
+    assert same(cache.encode(tokenizer, ["tưới cây"])[0], expected)
+    assert cache.stats()["misses"] == 2